@@ -1,6 +1,5 @@
 from datetime import datetime, timedelta
 from jose import jwt, JWTError  
-from passlib.context import CryptContext
 from fastapi.security import OAuth2PasswordBearer
 from dotenv import load_dotenv
 import os
@@ -13,7 +12,6 @@ SECRET_KEY = os.getenv("SECRET_KEY", "BACKUP_KEY")
 ALGORITHM = "HS256"
 ACCESS_TOKEN_EXPIRE_MINUTES = 60
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="login")
 
 
@@ -0,0 +1,258 @@
+import asyncio
+import logging
+import os
+import queue
+import threading
+import time
+from concurrent.futures import TimeoutError as FuturoVencido
+
+from sqlalchemy import text
+
+from chat.chat import VERSION_PROMPT
+from chat.cliente import CircuitoAbierto
+from chat.lote import micro_lote
+from chat.motores import motor_sentimiento
+from database import SessionLocal
+
+logger = logging.getLogger(__name__)
+
+# Número de hilos que analizan comentarios en segundo plano
+ANALISIS_WORKERS = int(os.getenv("ANALISIS_WORKERS", "4"))
+# Cuántos comentarios pendientes se recuperan de la base al arrancar
+ANALISIS_LIMITE_RECUPERACION = int(os.getenv("ANALISIS_LIMITE_RECUPERACION", "1000"))
+# Máximo de comentarios que un hilo toma de la cola de una vez
+ANALISIS_LOTE = int(os.getenv("ANALISIS_LOTE", "20"))
+# Segundos tras los cuales un comentario en 'procesando' se da por abandonado y se
+# puede volver a reclamar; también es el intervalo con que se buscan en la base
+ANALISIS_RECLAMO_SEGUNDOS = int(os.getenv("ANALISIS_RECLAMO_SEGUNDOS", "300"))
+# Parte del reclamo que se espera a la clasificación; el resto queda para guardar
+# antes de que venza y otro worker tome los mismos comentarios
+FRACCION_ESPERA_RECLAMO = 0.8
+
+
+class ColaAnalisis:
+    """Cola en memoria con un pool de hilos que clasifica comentarios pendientes.
+
+    Los comentarios se guardan con ``sentimiento`` NULL y ``estado_analisis``
+    'pendiente'; cada hilo toma hasta ANALISIS_LOTE ids de la cola, los
+    reclama en la base (para que varios procesos de uvicorn no los analicen
+    dos veces), los clasifica a través del micro-lote con el motor configurado
+    (chat/motores.py) y guarda la etiqueta junto con el nivel que la produjo.
+
+    El reclamo vence a los ANALISIS_RECLAMO_SEGUNDOS: si el proceso muere con
+    comentarios en 'procesando', otro worker (o este mismo al reiniciar) los
+    retoma. Si el lote falla, o su clasificación no termina antes de que el
+    reclamo esté por vencer, sus comentarios vuelven a 'pendiente'; un hilo de
+    barrido los busca en la base cuando la cola está vacía.
+    """
+
+    def __init__(self, num_workers: int = ANALISIS_WORKERS):
+        self.num_workers = num_workers
+        self._cola = queue.Queue()
+        self._hilos = []
+        # (loop, futuro) de las peticiones que esperan un resultado (GET /comentarios/{id}/estado)
+        self._esperas = []
+        self._lock_esperas = threading.Lock()
+        self._detenida = threading.Event()
+
+    @property
+    def activa(self) -> bool:
+        return any(hilo.is_alive() for hilo in self._hilos)
+
+    def iniciar(self):
+        if self.activa:
+            return
+        self._detenida.clear()
+        self._hilos = [
+            threading.Thread(target=self._trabajar, name=f"analisis-{i}", daemon=True)
+            for i in range(self.num_workers)
+        ]
+        for hilo in self._hilos:
+            hilo.start()
+        self.recuperar_pendientes()
+        threading.Thread(target=self._barrer, name="analisis-barrido", daemon=True).start()
+
+    def detener(self, timeout: float = 5.0):
+        self._detenida.set()
+        for _ in self._hilos:
+            self._cola.put(None)
+        for hilo in self._hilos:
+            hilo.join(timeout)
+        self._hilos = []
+
+    def encolar(self, id_comentario: int):
+        self._cola.put(id_comentario)
+
+    def pendientes(self) -> int:
+        return self._cola.qsize()
+
+    async def esperar(self, timeout: float):
+        """Espera, sin ocupar un hilo, a que algún lote termine de analizarse o venza el timeout."""
+        loop = asyncio.get_running_loop()
+        futuro = loop.create_future()
+        espera = (loop, futuro)
+        with self._lock_esperas:
+            self._esperas.append(espera)
+        try:
+            await asyncio.wait_for(futuro, timeout)
+        except asyncio.TimeoutError:
+            pass
+        finally:
+            with self._lock_esperas:
+                if espera in self._esperas:
+                    self._esperas.remove(espera)
+
+    def _notificar(self):
+        # Corre en los hilos de análisis: los futuros se resuelven en su propio event loop
+        with self._lock_esperas:
+            esperas, self._esperas = self._esperas, []
+        for loop, futuro in esperas:
+            try:
+                loop.call_soon_threadsafe(_resolver, futuro)
+            except RuntimeError:
+                pass  # el loop ya se cerró
+
+    def recuperar_pendientes(self):
+        """Vuelve a encolar los comentarios pendientes o con el reclamo vencido (p. ej. tras un reinicio)."""
+        db = SessionLocal()
+        try:
+            filas = db.execute(
+                text("CALL ComentariosPendientesAnalisis(:limite, :vencimiento)"),
+                {"limite": ANALISIS_LIMITE_RECUPERACION, "vencimiento": ANALISIS_RECLAMO_SEGUNDOS}
+            ).fetchall()
+            for fila in filas:
+                self.encolar(fila.id_comentario)
+        except Exception as e:
+            logger.warning("No se pudieron recuperar los comentarios pendientes: %s", e)
+        finally:
+            db.close()
+
+    def _barrer(self):
+        # Solo con la cola vacía: lo que siga pendiente en la base quedó huérfano (lotes
+        # fallidos, reclamos vencidos de otro proceso) y no se encola dos veces lo que ya espera
+        while not self._detenida.wait(ANALISIS_RECLAMO_SEGUNDOS):
+            if self._cola.empty():
+                self.recuperar_pendientes()
+
+    def _liberar(self, ids):
+        # Sesión nueva: la del lote pudo fallar por la conexión
+        db = SessionLocal()
+        try:
+            for id_comentario in ids:
+                db.execute(text("CALL LiberarComentarioAnalisis(:id)"), {"id": id_comentario})
+            db.commit()
+        except Exception as e:
+            # El reclamo vence solo; el barrido los retoma después de ANALISIS_RECLAMO_SEGUNDOS
+            logger.warning("No se pudieron devolver a 'pendiente' los comentarios %s: %s", ids, e)
+        finally:
+            db.close()
+
+    def _trabajar(self):
+        while True:
+            ids = [self._cola.get()]
+            # Toma lo que ya esté esperando para clasificarlo en un solo lote
+            while len(ids) < ANALISIS_LOTE:
+                try:
+                    ids.append(self._cola.get_nowait())
+                except queue.Empty:
+                    break
+
+            senales = ids.count(None)
+            ids = [id_comentario for id_comentario in ids if id_comentario is not None]
+            # Cada hilo consume una sola señal de parada; el resto se devuelve a la cola
+            for _ in range(senales - 1):
+                self._cola.put(None)
+            try:
+                if ids:
+                    self._procesar(ids)
+            except Exception:
+                logger.exception("Error al analizar los comentarios %s", ids)
+            finally:
+                for _ in range(len(ids) + senales):
+                    self._cola.task_done()
+            if senales:
+                return
+
+    def _reencolar_despues(self, ids, segundos: float):
+        # Al menos 1 s: con el circuito semiabierto reintentar_en es 0 y no debe girar en vacío
+        segundos = max(segundos, 1.0)
+        logger.warning("Modelo no disponible; %d comentarios se reintentan en %.0f s", len(ids), segundos)
+
+        def reencolar():
+            for id_comentario in ids:
+                self.encolar(id_comentario)
+
+        temporizador = threading.Timer(segundos, reencolar)
+        temporizador.daemon = True
+        temporizador.start()
+
+    def _procesar(self, ids):
+        db = SessionLocal()
+        reclamados = []
+        limite = time.monotonic() + ANALISIS_RECLAMO_SEGUNDOS * FRACCION_ESPERA_RECLAMO
+        try:
+            filas = []
+            for id_comentario in ids:
+                fila = db.execute(
+                    text("CALL ReclamarComentarioParaAnalisis(:id, :vencimiento)"),
+                    {"id": id_comentario, "vencimiento": ANALISIS_RECLAMO_SEGUNDOS}
+                ).fetchone()
+                # Si no hay fila, otro proceso ya lo reclamó o ya no está pendiente
+                if fila is not None:
+                    filas.append(fila)
+            db.commit()
+            reclamados = [fila.id_comentario for fila in filas]
+
+            futuros = [micro_lote.enviar(fila.comentario, float(fila.promedio)) for fila in filas]
+
+            diferidos, vencidos = [], []
+            for fila, futuro in zip(filas, futuros):
+                try:
+                    resultado = futuro.result(timeout=max(limite - time.monotonic(), 0))
+                except FuturoVencido:
+                    # Micro-lote atascado: se suelta el reclamo antes de que venza, para que
+                    # el comentario no se clasifique dos veces; el barrido lo retoma
+                    db.execute(text("CALL LiberarComentarioAnalisis(:id)"), {"id": fila.id_comentario})
+                    vencidos.append(fila.id_comentario)
+                    continue
+                except CircuitoAbierto as e:
+                    # El modelo no acepta llamadas: vuelve a 'pendiente' en vez de quedar como error
+                    db.execute(text("""
+                        CALL GuardarSentimientoComentario(:id, NULL, 'pendiente', NULL, NULL)
+                    """), {"id": fila.id_comentario})
+                    diferidos.append(fila.id_comentario)
+                    reintentar_en = e.reintentar_en
+                    continue
+                db.execute(text("""
+                    CALL GuardarSentimientoComentario(:id, :sentimiento, :estado, :origen, :version)
+                """), {
+                    "id": fila.id_comentario,
+                    "sentimiento": resultado.sentimiento,
+                    "estado": "completado" if resultado.sentimiento else "error",
+                    "origen": resultado.origen if resultado.sentimiento else None,
+                    # Sin versión si el modelo no pudo decidir: el reanálisis la retoma
+                    "version": VERSION_PROMPT if motor_sentimiento.definitivo(resultado) else None
+                })
+            db.commit()
+            if vencidos:
+                logger.warning("La clasificación de %d comentarios no terminó a tiempo; vuelven a 'pendiente'",
+                               len(vencidos))
+            if diferidos:
+                self._reencolar_despues(diferidos, reintentar_en)
+        except Exception:
+            db.rollback()
+            # El reclamo ya se confirmó: sin esto quedarían en 'procesando' hasta que venza
+            if reclamados:
+                self._liberar(reclamados)
+            raise
+        finally:
+            db.close()
+            self._notificar()
+
+
+def _resolver(futuro):
+    if not futuro.done():
+        futuro.set_result(None)
+
+
+cola_analisis = ColaAnalisis()
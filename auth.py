@@ -0,0 +1,119 @@
+"""Autenticación de las rutas protegidas con los tokens que emite /login.
+
+Verificar un JWT (firma HMAC + decodificación) y buscar al usuario en cada
+petición es lo que encarece activar la autenticación, así que ambas cosas
+pasan por cache:
+
+- tokens ya verificados, por hash SHA-256 del token, hasta su ``exp``
+- estado del usuario (existe y con qué rol) en cache_entidades, que crud.py
+  invalida al actualizar o eliminar usuarios; así un cambio de rol o una
+  baja se aplican sin esperar a que venza el token
+
+Con AUTH_HABILITADA=false (por defecto) las dependencias no exigen token, para
+no romper a los clientes actuales mientras se adopta el login.
+"""
+import hashlib
+import os
+import time
+
+from fastapi import Depends, HTTPException
+from fastapi.concurrency import run_in_threadpool
+from fastapi.security import OAuth2PasswordBearer
+from jose import JWTError, jwt
+from sqlalchemy import text
+
+from cache_entidades import cache_entidades
+from JWTKeys import ALGORITHM, SECRET_KEY
+from utils import CacheLRU
+
+AUTH_HABILITADA = os.getenv("AUTH_HABILITADA", "false").lower() == "true"
+AUTH_CACHE_TOKENS_MAX = int(os.getenv("AUTH_CACHE_TOKENS_MAX", "10000"))
+# Comprueba en cada petición (con cache) que el usuario del token siga existiendo y su rol actual
+AUTH_VERIFICAR_USUARIO = os.getenv("AUTH_VERIFICAR_USUARIO", "true").lower() == "true"
+
+# Igual que oauth2_scheme de JWTKeys.py, pero sin el 401 automático: el token es
+# opcional mientras AUTH_HABILITADA=false
+esquema_token = OAuth2PasswordBearer(tokenUrl="login", auto_error=False)
+
+cache_tokens = CacheLRU(max_entradas=AUTH_CACHE_TOKENS_MAX, ttl=0)
+
+QUERY_ESTADO_USUARIO = text("SELECT id_usuario, rol FROM Usuarios WHERE email = :email")
+
+
+def _no_autorizado(detalle: str):
+    return HTTPException(status_code=401, detail=detalle, headers={"WWW-Authenticate": "Bearer"})
+
+
+def verificar_token(token: str) -> dict:
+    """Claims del token; 401 si la firma no es válida, venció o le faltan sub/rol."""
+    clave = hashlib.sha256(token.encode("utf-8")).hexdigest()
+    claims = cache_tokens.get(clave)
+    if claims is not None:
+        return claims
+
+    try:
+        claims = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
+    except JWTError:
+        raise _no_autorizado("Token inválido o vencido")
+    if not claims.get("sub") or not claims.get("rol") or "exp" not in claims:
+        raise _no_autorizado("Token sin los datos requeridos")
+
+    # Queda en cache exactamente hasta que vence
+    restante = claims["exp"] - time.time()
+    if restante > 0:
+        cache_tokens.set(clave, claims, ttl=restante)
+    return claims
+
+
+def _leer_estado_usuario(email: str):
+    from database import engine
+
+    with engine.connect() as conexion:
+        fila = conexion.execute(QUERY_ESTADO_USUARIO, {"email": email}).fetchone()
+    return {"id_usuario": fila.id_usuario, "rol": fila.rol} if fila else None
+
+
+async def _estado_usuario(email: str):
+    async def cargar():
+        return await run_in_threadpool(_leer_estado_usuario, email)
+
+    return await cache_entidades.obtener_async("estado_usuario", email, cargar)
+
+
+def requiere_rol(*roles: str):
+    """Dependencia que exige un token válido y, si se indican, uno de ``roles``.
+
+    Devuelve ``{"email", "rol", "id_usuario"}`` del usuario autenticado, o None
+    si la autenticación está desactivada.
+    """
+    async def dependencia(token: str = Depends(esquema_token)):
+        if not AUTH_HABILITADA:
+            return None
+        if not token:
+            raise _no_autorizado("No autenticado")
+
+        claims = verificar_token(token)
+        usuario = {"email": claims["sub"], "rol": claims["rol"], "id_usuario": None}
+        if AUTH_VERIFICAR_USUARIO:
+            estado = await _estado_usuario(claims["sub"])
+            if estado is None:
+                raise _no_autorizado("El usuario del token ya no existe")
+            # Manda el rol actual, no el que tenía al emitirse el token
+            usuario.update(estado)
+
+        if roles and usuario["rol"] not in roles:
+            raise HTTPException(status_code=403, detail="No tiene permisos para esta operación")
+        return usuario
+
+    return dependencia
+
+
+def estadisticas() -> dict:
+    return {"habilitada": AUTH_HABILITADA, "tokens": cache_tokens.estadisticas()}
+
+
+# Dependencias listas para usar en dependencies=[...] de las rutas
+AUTENTICADO = Depends(requiere_rol())
+DOCENTE_O_GESTION = Depends(requiere_rol("Administrador", "Administrativo", "Docente"))
+GESTION = Depends(requiere_rol("Administrador", "Administrativo"))
+ADMINISTRADOR = Depends(requiere_rol("Administrador"))
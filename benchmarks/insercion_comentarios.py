@@ -0,0 +1,140 @@
+"""Latencia de INSERT en Comentarios con y sin los índices de la migración 0003.
+
+Trabaja sobre una tabla aparte (Bench_comentarios) con las mismas columnas
+de llave que Comentarios y el mismo trigger validar_comentario, para no tocar
+los datos reales. Para cada tamaño llena la tabla, mide N inserciones
+individuales sin índice, crea el índice único y vuelve a medir.
+
+Uso:
+    python benchmarks/insercion_comentarios.py --tamanos 10000,100000,1000000 --muestras 200
+"""
+import argparse
+import json
+import os
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from database import engine  # noqa: E402
+
+LOTE_CARGA = 5000
+
+SQL_PREPARAR = [
+    "DROP TABLE IF EXISTS Bench_comentarios",
+    """
+    CREATE TABLE Bench_comentarios (
+        id_comentario INT AUTO_INCREMENT PRIMARY KEY,
+        id_estudiante INT,
+        id_docente    INT,
+        id_asignatura INT,
+        promedio      DECIMAL(3,1),
+        comentario    TEXT NOT NULL
+    )
+    """,
+    # Igual que validar_comentario; @bench_carga lo omite durante el llenado
+    """
+    CREATE TRIGGER bench_validar_comentario
+    BEFORE INSERT ON Bench_comentarios
+    FOR EACH ROW
+    BEGIN
+        IF @bench_carga IS NULL AND EXISTS (
+            SELECT 1 FROM Bench_comentarios
+            WHERE id_asignatura = NEW.id_asignatura
+              AND id_estudiante = NEW.id_estudiante
+              AND id_docente    = NEW.id_docente
+        ) THEN
+            SIGNAL SQLSTATE '45000'
+            SET MESSAGE_TEXT = 'Ya existe un comentario de este estudiante para esta asignatura y docente.';
+        END IF;
+    END
+    """,
+]
+
+SQL_CREAR_INDICE = (
+    "ALTER TABLE Bench_comentarios ADD UNIQUE INDEX uq_bench_triple (id_estudiante, id_asignatura, id_docente)"
+)
+SQL_QUITAR_INDICE = "ALTER TABLE Bench_comentarios DROP INDEX uq_bench_triple"
+
+
+def llenar(cursor, desde: int, hasta: int):
+    cursor.execute("SET @bench_carga = 1")
+    for inicio in range(desde, hasta, LOTE_CARGA):
+        fin = min(inicio + LOTE_CARGA, hasta)
+        valores = ",".join(
+            f"({i}, {i % 97 + 1}, {i % 53 + 1}, 4.0, 'comentario de prueba {i}')" for i in range(inicio, fin)
+        )
+        cursor.execute(
+            "INSERT INTO Bench_comentarios (id_estudiante, id_docente, id_asignatura, promedio, comentario) "
+            f"VALUES {valores}"
+        )
+    cursor.execute("SET @bench_carga = NULL")
+
+
+def medir(cursor, muestras: int, base: int):
+    """Inserta ``muestras`` filas nuevas (con el trigger activo) y devuelve sus latencias en ms."""
+    latencias = []
+    for i in range(base, base + muestras):
+        inicio = time.perf_counter()
+        cursor.execute(
+            "INSERT INTO Bench_comentarios (id_estudiante, id_docente, id_asignatura, promedio, comentario) "
+            "VALUES (%s, %s, %s, 4.0, 'muestra')",
+            (i, i % 97 + 1, i % 53 + 1),
+        )
+        latencias.append((time.perf_counter() - inicio) * 1000)
+    cursor.execute("DELETE FROM Bench_comentarios WHERE id_estudiante >= %s", (base,))
+    return latencias
+
+
+def resumir(latencias):
+    ordenadas = sorted(latencias)
+    return {
+        "p50_ms": round(statistics.median(ordenadas), 3),
+        "p95_ms": round(ordenadas[int(len(ordenadas) * 0.95) - 1], 3),
+        "promedio_ms": round(statistics.fmean(ordenadas), 3),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--tamanos", default="10000,100000,1000000")
+    parser.add_argument("--muestras", type=int, default=200)
+    parser.add_argument("--json", action="store_true", help="imprime el resultado como JSON")
+    args = parser.parse_args()
+    tamanos = sorted(int(t) for t in args.tamanos.split(","))
+
+    conexion = engine.raw_connection()
+    conexion.autocommit(True)
+    cursor = conexion.cursor()
+    resultados = []
+    try:
+        for sentencia in SQL_PREPARAR:
+            cursor.execute(sentencia)
+
+        actual = 0
+        for tamano in tamanos:
+            llenar(cursor, actual, tamano)
+            actual = tamano
+            # Las muestras usan id_estudiante fuera del rango cargado para no chocar
+            sin_indice = resumir(medir(cursor, args.muestras, 10_000_000))
+            cursor.execute(SQL_CREAR_INDICE)
+            con_indice = resumir(medir(cursor, args.muestras, 10_000_000))
+            cursor.execute(SQL_QUITAR_INDICE)
+            resultados.append({"comentarios": tamano, "sin_indice": sin_indice, "con_indice": con_indice})
+            if not args.json:
+                print(
+                    f"{tamano:>10,} comentarios | sin índice p50 {sin_indice['p50_ms']:>9.3f} ms "
+                    f"p95 {sin_indice['p95_ms']:>9.3f} ms | con índice p50 {con_indice['p50_ms']:>7.3f} ms "
+                    f"p95 {con_indice['p95_ms']:>7.3f} ms"
+                )
+    finally:
+        cursor.execute("DROP TABLE IF EXISTS Bench_comentarios")
+        conexion.close()
+
+    if args.json:
+        print(json.dumps(resultados, indent=2))
+
+
+if __name__ == "__main__":
+    main()
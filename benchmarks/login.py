@@ -0,0 +1,122 @@
+"""Logins por segundo que sostiene un worker.
+
+Sin --url mide solo el costo de bcrypt: verificaciones por segundo para cada
+BCRYPT_ROUNDS y número de hilos del pool (el techo de logins por worker,
+sin contar la base de datos). Con --url hace logins reales contra una API en
+marcha con N clientes concurrentes y reporta throughput y latencias.
+
+Uso:
+    python benchmarks/login.py --rounds 10,12 --hilos 1,2,4
+    python benchmarks/login.py --url http://localhost:8000 --email laura.perez@uniautonoma.edu.co \\
+        --password 123 --concurrencia 32 --segundos 20
+"""
+import argparse
+import json
+import os
+import statistics
+import sys
+import time
+import urllib.error
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import contrasenas  # noqa: E402
+
+
+def percentiles(latencias):
+    ordenadas = sorted(latencias)
+    return {
+        "p50_ms": round(statistics.median(ordenadas), 2),
+        "p95_ms": round(ordenadas[max(int(len(ordenadas) * 0.95) - 1, 0)], 2),
+        "p99_ms": round(ordenadas[max(int(len(ordenadas) * 0.99) - 1, 0)], 2),
+    }
+
+
+def medir_bcrypt(rounds: int, hilos: int, operaciones: int):
+    guardada = contrasenas.hashear("contrasena de prueba", rounds=rounds)
+    with ThreadPoolExecutor(max_workers=hilos) as pool:
+        inicio = time.perf_counter()
+        list(pool.map(lambda _: contrasenas.verificar("contrasena de prueba", guardada), range(operaciones)))
+        duracion = time.perf_counter() - inicio
+    return {
+        "rounds": rounds,
+        "hilos": hilos,
+        "logins_por_segundo": round(operaciones / duracion, 1),
+        "ms_por_verificacion": round(duracion / operaciones * hilos * 1000, 1),
+    }
+
+
+def login(url: str, cuerpo: bytes):
+    peticion = urllib.request.Request(
+        f"{url.rstrip('/')}/login", data=cuerpo, headers={"Content-Type": "application/json"}
+    )
+    inicio = time.perf_counter()
+    try:
+        with urllib.request.urlopen(peticion, timeout=30) as respuesta:
+            respuesta.read()
+            ok = respuesta.status == 200
+    except urllib.error.URLError:
+        ok = False
+    return ok, (time.perf_counter() - inicio) * 1000
+
+
+def medir_api(url: str, email: str, password: str, concurrencia: int, segundos: float):
+    cuerpo = json.dumps({"email": email, "password": password}).encode("utf-8")
+    fin = time.monotonic() + segundos
+
+    def cliente(_):
+        resultados = []
+        while time.monotonic() < fin:
+            resultados.append(login(url, cuerpo))
+        return resultados
+
+    inicio = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrencia) as pool:
+        resultados = [r for lote in pool.map(cliente, range(concurrencia)) for r in lote]
+    duracion = time.perf_counter() - inicio
+
+    latencias = [ms for ok, ms in resultados if ok]
+    return {
+        "concurrencia": concurrencia,
+        "logins": len(latencias),
+        "errores": len(resultados) - len(latencias),
+        "logins_por_segundo": round(len(latencias) / duracion, 1),
+        **(percentiles(latencias) if latencias else {}),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rounds", default="10,12")
+    parser.add_argument("--hilos", default="1,2,4")
+    parser.add_argument("--operaciones", type=int, default=40)
+    parser.add_argument("--url", help="API en marcha; sin esto solo se mide bcrypt")
+    parser.add_argument("--email")
+    parser.add_argument("--password")
+    parser.add_argument("--concurrencia", type=int, default=16)
+    parser.add_argument("--segundos", type=float, default=10)
+    parser.add_argument("--json", action="store_true", help="imprime el resultado como JSON")
+    args = parser.parse_args()
+
+    if args.url:
+        if not args.email or not args.password:
+            parser.error("--url requiere --email y --password")
+        resultados = [medir_api(args.url, args.email, args.password, args.concurrencia, args.segundos)]
+    else:
+        resultados = [
+            medir_bcrypt(int(rounds), int(hilos), args.operaciones)
+            for rounds in args.rounds.split(",")
+            for hilos in args.hilos.split(",")
+        ]
+
+    if args.json:
+        print(json.dumps(resultados, indent=2))
+        return
+    for fila in resultados:
+        print("  ".join(f"{clave}={valor}" for clave, valor in fila.items()))
+
+
+if __name__ == "__main__":
+    main()
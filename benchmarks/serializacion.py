@@ -0,0 +1,113 @@
+"""Costo de serializar las respuestas: camino anterior contra RespuestaJSON.
+
+No necesita base de datos. Arma cargas sintéticas con la misma forma que las
+respuestas de la API y mide, por petición:
+
+- antes: validación con response_model + jsonable_encoder + JSONResponse
+  (lo que hacía FastAPI con las rutas que declaraban response_model)
+- sin_modelo: jsonable_encoder + JSONResponse (rutas sin response_model)
+- despues: RespuestaJSON (orjson directo sobre los dicts de crud.py)
+
+Uso:
+    python benchmarks/serializacion.py --repeticiones 200
+"""
+import argparse
+import json
+import os
+import statistics
+import sys
+import time
+from datetime import datetime, timedelta
+from decimal import Decimal
+from typing import List
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from fastapi.encoders import jsonable_encoder  # noqa: E402
+from fastapi.responses import JSONResponse  # noqa: E402
+from pydantic import TypeAdapter  # noqa: E402
+
+from respuestas import RespuestaJSON  # noqa: E402
+from schemas import ComentarioResponse, UserResponse  # noqa: E402
+
+SENTIMIENTOS = ("positivo", "negativo", "neutral", None)
+
+
+def comentarios(cantidad: int):
+    base = datetime(2025, 1, 1)
+    return [
+        {
+            "id_comentario": i,
+            "id_estudiante": i % 500 + 1,
+            "id_docente": i % 40 + 1,
+            "id_asignatura": i % 60 + 1,
+            "comentario": f"Comentario de prueba número {i} sobre la clase, con tildes: evaluación",
+            "promedio": Decimal("4.5"),
+            "sentimiento": SENTIMIENTOS[i % 4],
+            "estado_analisis": "completado" if i % 4 else "pendiente",
+            "fecha_creacion": base + timedelta(minutes=i),
+        }
+        for i in range(cantidad)
+    ]
+
+
+def usuario():
+    return {"id_usuario": 1, "nombre": "Ana Pérez", "email": "ana@example.com", "rol": "Docente"}
+
+
+def cargas():
+    return [
+        ("usuario por id", usuario(), TypeAdapter(UserResponse)),
+        ("100 comentarios", comentarios(100), TypeAdapter(List[ComentarioResponse])),
+        ("1000 comentarios", comentarios(1000), TypeAdapter(List[ComentarioResponse])),
+    ]
+
+
+def antes(datos, adaptador):
+    validado = adaptador.validate_python(datos)
+    return JSONResponse(jsonable_encoder(validado)).body
+
+
+def sin_modelo(datos, _):
+    return JSONResponse(jsonable_encoder(datos)).body
+
+
+def despues(datos, _):
+    return RespuestaJSON(datos).body
+
+
+def medir(funcion, datos, adaptador, repeticiones: int):
+    funcion(datos, adaptador)  # calentamiento
+    tiempos = []
+    for _ in range(repeticiones):
+        inicio = time.perf_counter()
+        funcion(datos, adaptador)
+        tiempos.append((time.perf_counter() - inicio) * 1000)
+    return round(statistics.median(tiempos), 4)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--repeticiones", type=int, default=200)
+    parser.add_argument("--json", action="store_true", help="imprime el resultado como JSON")
+    args = parser.parse_args()
+
+    resultados = []
+    for nombre, datos, adaptador in cargas():
+        fila = {"carga": nombre}
+        for funcion in (antes, sin_modelo, despues):
+            fila[f"{funcion.__name__}_p50_ms"] = medir(funcion, datos, adaptador, args.repeticiones)
+        fila["mejora"] = round(fila["antes_p50_ms"] / fila["despues_p50_ms"], 1)
+        resultados.append(fila)
+        if not args.json:
+            print(
+                f"{nombre:>18} | antes {fila['antes_p50_ms']:>9.4f} ms | sin modelo {fila['sin_modelo_p50_ms']:>9.4f} ms"
+                f" | orjson {fila['despues_p50_ms']:>8.4f} ms | x{fila['mejora']}"
+            )
+
+    if args.json:
+        print(json.dumps(resultados, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,168 @@
+"""Búsqueda de docentes por nombre con un índice de trigramas en memoria.
+
+Los nombres se normalizan igual que los comentarios (minúsculas, sin tildes
+ni puntuación), así "Maria", "MARÍA" y "maría" son equivalentes. El índice
+guarda, para cada trigrama, los docentes cuyo nombre lo contiene; una búsqueda
+solo revisa los candidatos que comparten trigramas con la consulta en vez de
+recorrer la tabla con LIKE '%x%'. Las rutas por nombre resuelven primero los
+id con este índice y luego consultan por id_docente, que sí está indexado.
+
+El índice se recarga cuando vence DOCENTES_INDICE_TTL o en la primera
+búsqueda después de que crud.py lo marca como desactualizado (al crear un
+docente o cambiar el nombre o rol de un usuario); marcarlo no cuesta nada, así
+que varias altas seguidas producen una sola recarga.
+"""
+import os
+import threading
+import time
+from typing import Dict, List, NamedTuple, Set
+
+from sqlalchemy import text
+
+from chat.cache import normalizar_texto
+
+DOCENTES_INDICE_TTL = float(os.getenv("DOCENTES_INDICE_TTL", "300"))
+# Fracción mínima de trigramas de la consulta que debe tener un nombre para sugerirse
+DOCENTES_BUSQUEDA_UMBRAL = float(os.getenv("DOCENTES_BUSQUEDA_UMBRAL", "0.3"))
+
+QUERY_INDICE_DOCENTES = text("""
+    SELECT id_usuario AS id_docente, nombre
+    FROM Usuarios
+    WHERE rol = 'Docente'
+""")
+
+
+class Docente(NamedTuple):
+    id_docente: int
+    nombre: str
+    normalizado: str
+
+
+def trigramas(texto: str, completo: bool = True) -> Set[str]:
+    """Trigramas de cada palabra con relleno, al estilo de pg_trgm.
+
+    Con ``completo=False`` la última palabra no lleva relleno final, porque
+    mientras se escribe puede estar incompleta ("mar" debe encontrar "maria").
+    """
+    palabras = texto.split()
+    resultado = set()
+    for i, palabra in enumerate(palabras):
+        final = " " if completo or i < len(palabras) - 1 else ""
+        relleno = f"  {palabra}{final}"
+        resultado.update(relleno[j:j + 3] for j in range(len(relleno) - 2))
+    return resultado
+
+
+class IndiceDocentes:
+
+    def __init__(self, ttl: float = DOCENTES_INDICE_TTL):
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._docentes: List[Docente] = []
+        self._por_trigrama: Dict[str, Set[int]] = {}
+        self._cargado_en = None
+        self._sucio = True
+        # Sube con cada invalidar(): una recarga que leyó la tabla antes no limpia la marca
+        self._generacion = 0
+
+    def necesita_recarga(self) -> bool:
+        return self._sucio or time.monotonic() - self._cargado_en > self.ttl
+
+    def invalidar(self):
+        """Marca el índice como desactualizado; se recarga en la próxima búsqueda."""
+        with self._lock:
+            self._generacion += 1
+            self._sucio = True
+
+    def cargar(self, filas, generacion: int = None):
+        """Reconstruye el índice con filas (id_docente, nombre).
+
+        ``generacion`` es la de antes de leer las filas: si hubo un invalidar()
+        mientras tanto, el índice se usa pero sigue marcado para recargarse.
+        """
+        docentes = [Docente(fila[0], fila[1], normalizar_texto(fila[1] or "")) for fila in filas]
+        por_trigrama: Dict[str, Set[int]] = {}
+        for posicion, docente in enumerate(docentes):
+            for trigrama in trigramas(docente.normalizado):
+                por_trigrama.setdefault(trigrama, set()).add(posicion)
+        with self._lock:
+            self._docentes = docentes
+            self._por_trigrama = por_trigrama
+            self._cargado_en = time.monotonic()
+            self._sucio = generacion is not None and generacion != self._generacion
+
+    def asegurar(self, db):
+        if self.necesita_recarga():
+            generacion = self._generacion
+            self.cargar(db.execute(QUERY_INDICE_DOCENTES).fetchall(), generacion)
+
+    async def asegurar_async(self, db):
+        if self.necesita_recarga():
+            generacion = self._generacion
+            self.cargar((await db.execute(QUERY_INDICE_DOCENTES)).fetchall(), generacion)
+
+    def _contienen(self, consulta: str) -> List[Docente]:
+        with self._lock:
+            docentes, por_trigrama = self._docentes, self._por_trigrama
+        # Todo nombre que contiene la consulta tiene sus trigramas internos;
+        # con menos de 3 letras no hay trigramas útiles y se revisan todos
+        internos = {palabra[i:i + 3] for palabra in consulta.split() for i in range(len(palabra) - 2)}
+        if internos:
+            candidatos = None
+            for trigrama in sorted(internos, key=lambda t: len(por_trigrama.get(t, ()))):
+                posiciones = por_trigrama.get(trigrama, set())
+                candidatos = posiciones if candidatos is None else candidatos & posiciones
+                if not candidatos:
+                    return []
+            docentes = [docentes[i] for i in sorted(candidatos)]
+        return [docente for docente in docentes if consulta in docente.normalizado]
+
+    def resolver(self, nombre: str, exacto: bool = False) -> List[int]:
+        """id de los docentes cuyo nombre es (o contiene) ``nombre``, sin distinguir tildes ni mayúsculas."""
+        consulta = normalizar_texto(nombre or "")
+        if not consulta:
+            return []
+        coincidencias = self._contienen(consulta)
+        if exacto:
+            coincidencias = [docente for docente in coincidencias if docente.normalizado == consulta]
+        return [docente.id_docente for docente in coincidencias]
+
+    def buscar(self, consulta: str, limite: int = 10) -> List[dict]:
+        """Sugerencias para autocompletar, ordenadas por parecido con la consulta."""
+        consulta = normalizar_texto(consulta or "")
+        if not consulta:
+            return []
+        buscados = trigramas(consulta, completo=False)
+        with self._lock:
+            docentes, por_trigrama = self._docentes, self._por_trigrama
+
+        compartidos: Dict[int, int] = {}
+        for trigrama in buscados:
+            for posicion in por_trigrama.get(trigrama, ()):
+                compartidos[posicion] = compartidos.get(posicion, 0) + 1
+
+        resultados = []
+        for posicion, comunes in compartidos.items():
+            puntaje = comunes / len(buscados)
+            docente = docentes[posicion]
+            contiene = consulta in docente.normalizado
+            if puntaje < DOCENTES_BUSQUEDA_UMBRAL and not contiene:
+                continue
+            resultados.append((contiene, puntaje, docente))
+
+        resultados.sort(key=lambda r: (not r[0], -r[1], len(r[2].normalizado), r[2].nombre))
+        return [
+            {"id": docente.id_docente, "nombre": docente.nombre, "puntaje": round(puntaje, 3)}
+            for _, puntaje, docente in resultados[:limite]
+        ]
+
+    def estadisticas(self) -> dict:
+        with self._lock:
+            return {
+                "docentes": len(self._docentes),
+                "trigramas": len(self._por_trigrama),
+                "edad_segundos": round(time.monotonic() - self._cargado_en, 1) if self._cargado_en else None,
+            }
+
+
+indice_docentes = IndiceDocentes()
@@ -0,0 +1,207 @@
+"""Cache de lectura para los datos de referencia: usuarios, asignaturas y evaluaciones.
+
+Estos datos cambian unas pocas veces por semestre pero el frontend los pide
+todo el tiempo. Las lecturas de crud.py pasan por ``obtener``: si la entrada
+está en cache se devuelve sin tocar MySQL, si no se carga y se guarda. Las
+funciones create_*/update_*/delete_* de crud.py invalidan las entidades
+afectadas después del commit; el TTL acota lo que puede quedar desactualizado
+por cambios hechos fuera de la API (scripts, SQL a mano).
+
+Por defecto cada proceso tiene su propia LRU. Con CACHE_ENTIDADES_REDIS_URL
+se usa Redis como backend compartido, así una invalidación en un worker de
+uvicorn la ven todos los demás.
+"""
+import asyncio
+import logging
+import os
+import threading
+from collections import defaultdict
+
+import orjson
+
+from respuestas import _por_defecto
+from utils import CacheLRU
+
+logger = logging.getLogger(__name__)
+
+CACHE_ENTIDADES_HABILITADA = os.getenv("CACHE_ENTIDADES_HABILITADA", "true").lower() == "true"
+CACHE_ENTIDADES_MAX = int(os.getenv("CACHE_ENTIDADES_MAX", "2000"))
+CACHE_ENTIDADES_TTL = float(os.getenv("CACHE_ENTIDADES_TTL", "600"))
+CACHE_ENTIDADES_REDIS_URL = os.getenv("CACHE_ENTIDADES_REDIS_URL")
+
+# Marca para distinguir "no está en cache" de un None guardado (p. ej. un id inexistente)
+_AUSENTE = object()
+
+
+class BackendMemoria:
+    """Una CacheLRU por entidad, local al proceso."""
+
+    local = True
+
+    def __init__(self, max_entradas: int = CACHE_ENTIDADES_MAX, ttl: float = CACHE_ENTIDADES_TTL):
+        self._caches = defaultdict(lambda: CacheLRU(max_entradas=max_entradas, ttl=ttl))
+        self._lock = threading.Lock()
+
+    def _cache(self, entidad):
+        with self._lock:
+            return self._caches[entidad]
+
+    def leer(self, entidad, clave):
+        # Los aciertos y fallos se cuentan en CacheEntidades, igual para todos los backends
+        return self._cache(entidad).get(clave, _AUSENTE)
+
+    def guardar(self, entidad, clave, valor):
+        self._cache(entidad).set(clave, valor)
+
+    def invalidar(self, entidad, clave=None):
+        if clave is None:
+            self._cache(entidad).limpiar()
+        else:
+            self._cache(entidad).invalidar(clave)
+
+    def estadisticas(self) -> dict:
+        with self._lock:
+            return {entidad: len(cache) for entidad, cache in self._caches.items()}
+
+
+class BackendRedis:
+    """Backend compartido entre procesos.
+
+    Cada entidad tiene un contador de generación que forma parte de las
+    claves; invalidar la entidad completa es un INCR y las entradas viejas
+    quedan huérfanas hasta que vence su TTL. Los valores se guardan como JSON,
+    que es como terminan en la respuesta de todas formas.
+    """
+
+    local = False
+
+    def __init__(self, url: str, ttl: float = CACHE_ENTIDADES_TTL, prefijo: str = "entidades"):
+        import redis  # dependencia opcional, solo si se configura el backend
+
+        self._redis = redis.Redis.from_url(url)
+        self.ttl = int(ttl)
+        self.prefijo = prefijo
+
+    def _generacion(self, entidad) -> int:
+        return int(self._redis.get(f"{self.prefijo}:{entidad}:gen") or 0)
+
+    def _clave(self, entidad, clave) -> str:
+        return f"{self.prefijo}:{entidad}:{self._generacion(entidad)}:{clave!r}"
+
+    def leer(self, entidad, clave):
+        datos = self._redis.get(self._clave(entidad, clave))
+        return _AUSENTE if datos is None else orjson.loads(datos)
+
+    def guardar(self, entidad, clave, valor):
+        datos = orjson.dumps(valor, default=_por_defecto, option=orjson.OPT_NON_STR_KEYS)
+        self._redis.set(self._clave(entidad, clave), datos, ex=self.ttl)
+
+    def invalidar(self, entidad, clave=None):
+        if clave is None:
+            self._redis.incr(f"{self.prefijo}:{entidad}:gen")
+        else:
+            self._redis.delete(self._clave(entidad, clave))
+
+    def estadisticas(self) -> dict:
+        return {}
+
+
+class CacheEntidades:
+    """Cache read-through con métricas de aciertos por entidad.
+
+    Un fallo del backend nunca impide responder: se registra y se consulta
+    la base como si fuera un fallo de cache.
+    """
+
+    def __init__(self, backend=None, habilitada: bool = CACHE_ENTIDADES_HABILITADA):
+        self.backend = backend if backend is not None else BackendMemoria()
+        self.habilitada = habilitada
+        self._lock = threading.Lock()
+        self._contadores = defaultdict(lambda: {"hits": 0, "misses": 0, "invalidaciones": 0, "errores": 0})
+
+    def _contar(self, entidad, campo):
+        with self._lock:
+            self._contadores[entidad][campo] += 1
+
+    def _leer(self, entidad, clave):
+        try:
+            valor = self.backend.leer(entidad, clave)
+        except Exception as e:
+            self._registrar_error(entidad, e)
+            return _AUSENTE
+        self._contar(entidad, "misses" if valor is _AUSENTE else "hits")
+        return valor
+
+    def _guardar(self, entidad, clave, valor):
+        try:
+            self.backend.guardar(entidad, clave, valor)
+        except Exception as e:
+            self._registrar_error(entidad, e)
+
+    def obtener(self, entidad: str, clave, cargar):
+        """Valor en cache o el que devuelva ``cargar()``, que queda guardado."""
+        if not self.habilitada:
+            return cargar()
+        valor = self._leer(entidad, clave)
+        if valor is _AUSENTE:
+            valor = cargar()
+            self._guardar(entidad, clave, valor)
+        return valor
+
+    async def obtener_async(self, entidad: str, clave, cargar):
+        """Igual que ``obtener`` con un ``cargar`` asíncrono; un backend remoto se consulta en un hilo."""
+        if not self.habilitada:
+            return await cargar()
+        if self.backend.local:
+            valor = self._leer(entidad, clave)
+        else:
+            valor = await asyncio.to_thread(self._leer, entidad, clave)
+        if valor is _AUSENTE:
+            valor = await cargar()
+            if self.backend.local:
+                self._guardar(entidad, clave, valor)
+            else:
+                await asyncio.to_thread(self._guardar, entidad, clave, valor)
+        return valor
+
+    def invalidar(self, *entidades: str, clave=None):
+        """Descarta ``clave`` de cada entidad, o la entidad completa si no se indica."""
+        for entidad in entidades:
+            self._contar(entidad, "invalidaciones")
+            try:
+                self.backend.invalidar(entidad, clave)
+            except Exception as e:
+                self._registrar_error(entidad, e)
+
+    def _registrar_error(self, entidad, error):
+        self._contar(entidad, "errores")
+        logger.warning("Cache de entidades no disponible (%s): %s", entidad, error)
+
+    def estadisticas(self) -> dict:
+        entradas = self.backend.estadisticas()
+        with self._lock:
+            por_entidad = {}
+            for entidad, contadores in self._contadores.items():
+                consultas = contadores["hits"] + contadores["misses"]
+                por_entidad[entidad] = {
+                    **contadores,
+                    "entradas": entradas.get(entidad),
+                    "hit_ratio": round(contadores["hits"] / consultas, 4) if consultas else 0.0,
+                }
+        return {
+            "habilitada": self.habilitada,
+            "backend": type(self.backend).__name__,
+            "entidades": por_entidad,
+        }
+
+
+def _crear_backend():
+    if CACHE_ENTIDADES_REDIS_URL:
+        try:
+            return BackendRedis(CACHE_ENTIDADES_REDIS_URL)
+        except ImportError:
+            logger.warning("CACHE_ENTIDADES_REDIS_URL definida pero el paquete redis no está instalado; se usa memoria")
+    return BackendMemoria()
+
+
+cache_entidades = CacheEntidades(_crear_backend())
@@ -0,0 +1,88 @@
+"""Lectura en streaming de cargas masivas de comentarios (NDJSON o CSV).
+
+El cuerpo de la petición se procesa a medida que llega, sin cargarlo
+completo en memoria; cada fila se entrega como (número, datos, error).
+"""
+import codecs
+import csv
+import json
+
+CAMPOS_CSV = ("id_estudiante", "id_docente", "id_asignatura", "comentario", "promedio")
+
+
+def detectar_formato(content_type: str, formato: str = None) -> str:
+    if formato:
+        return formato.lower()
+    content_type = (content_type or "").lower()
+    if "csv" in content_type:
+        return "csv"
+    return "ndjson"
+
+
+async def _leer_lineas(request):
+    decodificador = codecs.getincrementaldecoder("utf-8-sig")()
+    resto = ""
+    async for bloque in request.stream():
+        resto += decodificador.decode(bloque)
+        *lineas, resto = resto.split("\n")
+        for linea in lineas:
+            yield linea.rstrip("\r")
+    resto += decodificador.decode(b"", final=True)
+    if resto.strip():
+        yield resto.rstrip("\r")
+
+
+async def leer_filas(request, formato: str):
+    """Genera (número de fila, dict o None, mensaje de error o None)."""
+    if formato == "ndjson":
+        numero = 0
+        async for linea in _leer_lineas(request):
+            if not linea.strip():
+                continue
+            numero += 1
+            try:
+                datos = json.loads(linea)
+            except ValueError as e:
+                yield numero, None, f"JSON inválido: {e}"
+                continue
+            if not isinstance(datos, dict):
+                yield numero, None, "Cada línea debe ser un objeto JSON"
+                continue
+            yield numero, datos, None
+
+    elif formato == "csv":
+        encabezado = None
+        numero = 0
+        registro = ""
+        async for linea in _leer_lineas(request):
+            registro = f"{registro}\n{linea}" if registro else linea
+            # Un número impar de comillas indica un campo con saltos de línea sin cerrar
+            if registro.count('"') % 2:
+                continue
+            if not registro.strip():
+                registro = ""
+                continue
+            valores = next(csv.reader([registro]))
+            registro = ""
+
+            if encabezado is None:
+                encabezado = [valor.strip() for valor in valores]
+                faltantes = [campo for campo in CAMPOS_CSV if campo not in encabezado]
+                if faltantes:
+                    raise ValueError(f"Faltan columnas en el CSV: {', '.join(faltantes)}")
+                continue
+
+            numero += 1
+            if len(valores) != len(encabezado):
+                yield numero, None, f"Se esperaban {len(encabezado)} columnas y llegaron {len(valores)}"
+                continue
+            yield numero, {
+                campo: (valor if valor != "" else None) for campo, valor in zip(encabezado, valores)
+            }, None
+
+        if registro:
+            numero += 1
+            yield numero, None, "Campo entre comillas sin cerrar al final del archivo"
+
+    else:
+        raise ValueError(f"Formato no soportado: {formato!r} (use 'ndjson' o 'csv')")
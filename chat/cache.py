@@ -0,0 +1,120 @@
+import hashlib
+import logging
+import os
+import re
+import threading
+import unicodedata
+
+from sqlalchemy import text
+
+from utils import CacheLRU
+
+logger = logging.getLogger(__name__)
+
+SENTIMIENTO_CACHE_MAX = int(os.getenv("SENTIMIENTO_CACHE_MAX", "10000"))
+SENTIMIENTO_CACHE_TTL = float(os.getenv("SENTIMIENTO_CACHE_TTL", "3600"))
+# Vigencia de las entradas en la tabla Cache_sentimientos (30 días)
+SENTIMIENTO_CACHE_TTL_PERSISTENTE = int(os.getenv("SENTIMIENTO_CACHE_TTL_PERSISTENTE", str(30 * 24 * 3600)))
+# Permite desactivar la capa persistente (p. ej. sin base de datos)
+SENTIMIENTO_CACHE_PERSISTENTE = os.getenv("SENTIMIENTO_CACHE_PERSISTENTE", "true").lower() == "true"
+
+
+def normalizar_texto(texto: str) -> str:
+    """'Excelente profesor!!' y 'excelente  profesor' producen el mismo texto."""
+    texto = unicodedata.normalize("NFKD", texto.lower())
+    texto = "".join(c for c in texto if not unicodedata.combining(c))
+    texto = re.sub(r"[^\w\s]", " ", texto)
+    return " ".join(texto.split())
+
+
+def clave_cache(texto: str, etiqueta_promedio: str, version: int) -> str:
+    base = f"{version}|{etiqueta_promedio}|{normalizar_texto(texto)}"
+    return hashlib.sha256(base.encode("utf-8")).hexdigest()
+
+
+class CacheSentimientos:
+    """Cache de dos niveles para los resultados del modelo.
+
+    Primero una LRU en memoria (por proceso) y detrás la tabla
+    Cache_sentimientos, compartida entre workers de uvicorn y que sobrevive
+    a los reinicios. Un fallo de la base nunca impide clasificar: solo se
+    registra y se sigue como si fuera un fallo de cache.
+    """
+
+    def __init__(self, max_entradas=SENTIMIENTO_CACHE_MAX, ttl=SENTIMIENTO_CACHE_TTL,
+                 persistente=SENTIMIENTO_CACHE_PERSISTENTE):
+        self.memoria = CacheLRU(max_entradas=max_entradas, ttl=ttl)
+        self.persistente = persistente
+        self._lock = threading.Lock()
+        self.hits_persistente = 0
+        self.misses_persistente = 0
+        self.errores_persistente = 0
+
+    def obtener(self, clave: str):
+        sentimiento = self.memoria.get(clave)
+        if sentimiento is not None or not self.persistente:
+            return sentimiento
+
+        sentimiento = self._leer_persistente(clave)
+        with self._lock:
+            if sentimiento is None:
+                self.misses_persistente += 1
+            else:
+                self.hits_persistente += 1
+        if sentimiento is not None:
+            self.memoria.set(clave, sentimiento)
+        return sentimiento
+
+    def guardar(self, clave: str, etiqueta_promedio: str, sentimiento: str):
+        self.memoria.set(clave, sentimiento)
+        if self.persistente:
+            self._escribir_persistente(clave, etiqueta_promedio, sentimiento)
+
+    def estadisticas(self) -> dict:
+        memoria = self.memoria.estadisticas()
+        with self._lock:
+            return {
+                "memoria": memoria,
+                "persistente": {
+                    "activa": self.persistente,
+                    "hits": self.hits_persistente,
+                    "misses": self.misses_persistente,
+                    "errores": self.errores_persistente,
+                },
+                # Cada acierto en cualquiera de los dos niveles es una llamada al modelo ahorrada
+                "llamadas_ahorradas": memoria["hits"] + self.hits_persistente,
+            }
+
+    def _leer_persistente(self, clave):
+        from database import engine
+
+        try:
+            with engine.connect() as conn:
+                fila = conn.execute(
+                    text("CALL LeerCacheSentimiento(:clave, :ttl)"),
+                    {"clave": clave, "ttl": SENTIMIENTO_CACHE_TTL_PERSISTENTE}
+                ).fetchone()
+            return fila.sentimiento if fila else None
+        except Exception as e:
+            self._registrar_error(e)
+            return None
+
+    def _escribir_persistente(self, clave, etiqueta_promedio, sentimiento):
+        from database import engine
+
+        try:
+            with engine.begin() as conn:
+                conn.execute(
+                    text("CALL GuardarCacheSentimiento(:clave, :etiqueta, :sentimiento)"),
+                    {"clave": clave, "etiqueta": etiqueta_promedio, "sentimiento": sentimiento}
+                )
+        except Exception as e:
+            self._registrar_error(e)
+
+    def _registrar_error(self, error):
+        with self._lock:
+            self.errores_persistente += 1
+        logger.warning("Cache persistente de sentimientos no disponible: %s", error)
+
+
+cache_sentimientos = CacheSentimientos()
@@ -1,7 +1,40 @@
 import os
-from openai import OpenAI
+import re
+from chat.cache import cache_sentimientos, clave_cache
+from chat.cliente import CircuitoAbierto, ErrorLLM, cliente_llm
+
+
+SENTIMIENTOS_VALIDOS = ("positivo", "negativo", "neutral")
+
+# Subir este número al cambiar el prompt invalida los resultados cacheados
+VERSION_PROMPT = 1
+
+# Comentarios que se envían como máximo en una sola petición al modelo
+LOTE_MAX = int(os.getenv("SENTIMIENTO_LOTE_MAX", "20"))
+
+PROMPT_SISTEMA = (
+    "Eres un analista de sentimientos. Analiza tanto la frase del comentario como la categoría del promedio "
+    "relacionado (positivo, negativo o neutral). El resultado debe ser una única palabra: "
+    "'positivo', 'negativo' o 'neutral'. Considera que el promedio afecta el análisis solo en un 48%."
+)
+
+PROMPT_SISTEMA_LOTE = (
+    "Eres un analista de sentimientos. Recibirás varios comentarios numerados, cada uno con la categoría "
+    "de su promedio (positivo, negativo o neutral) entre corchetes. Considera que el promedio afecta el "
+    "análisis solo en un 48%. Responde una línea por comentario, en el mismo orden, con el formato "
+    "'número: sentimiento', donde sentimiento es 'positivo', 'negativo' o 'neutral'. No agregues nada más."
+)
+
+_LINEA_LOTE = re.compile(r"^\W*(\d+)\s*[:.)\-]\s*\W*(positivo|negativo|neutral)\b", re.IGNORECASE)
+
+
+def normalizar_sentimiento(resultado):
+    """Convierte la respuesta del modelo en un valor válido del ENUM o None."""
+    if not resultado:
+        return None
+    sentimiento = resultado.strip().strip(".!'\"").lower()
+    return sentimiento if sentimiento in SENTIMIENTOS_VALIDOS else None
 
-client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
 
 def convertir_promedio_a_etiqueta(promedio):
     if promedio <= 2:
@@ -12,23 +45,31 @@ def convertir_promedio_a_etiqueta(promedio):
         return "positivo"
 
 def chat_bot(comentarioTexto, promedio):
+    """Clasifica un comentario con el modelo: 'positivo', 'negativo', 'neutral' o None.
+
+    Devuelve None si el comentario está vacío, la llamada falla o la respuesta
+    del modelo no es una etiqueta válida.
+
+    Con el circuito del modelo abierto lanza CircuitoAbierto: el comentario
+    no falló, solo hay que analizarlo más tarde.
+    """
     if not comentarioTexto or not comentarioTexto.strip():
-        return "Entrada vacía. Por favor, proporciona un comentario válido."
+        return None
 
     # Convertimos el promedio a una etiqueta para darle contexto al modelo
     etiqueta_promedio = convertir_promedio_a_etiqueta(promedio)
 
+    clave = clave_cache(comentarioTexto, etiqueta_promedio, VERSION_PROMPT)
+    cacheado = cache_sentimientos.obtener(clave)
+    if cacheado is not None:
+        return cacheado
+
     try:
-        response = client.chat.completions.create(
-            model="gpt-4o-mini",
-            messages=[
+        resultado = cliente_llm.completar(
+            [
                 {
                     "role": "system",
-                    "content": (
-                        "Eres un analista de sentimientos. Analiza tanto la frase del comentario como la categoría del promedio "
-                        "relacionado (positivo, negativo o neutral). El resultado debe ser una única palabra: "
-                        "'positivo', 'negativo' o 'neutral'. Considera que el promedio afecta el análisis solo en un 48%."
-                    )
+                    "content": PROMPT_SISTEMA
                 },
                 {
                     "role": "user",
@@ -43,8 +84,102 @@ def chat_bot(comentarioTexto, promedio):
             temperature=0.2
         )
 
-        resultado = response.choices[0].message.content.strip().lower()
-        return resultado
+        # Solo se cachean respuestas válidas, para no fijar errores del modelo
+        sentimiento = normalizar_sentimiento(resultado)
+        if sentimiento is not None:
+            cache_sentimientos.guardar(clave, etiqueta_promedio, sentimiento)
+        return sentimiento
+
+    except CircuitoAbierto:
+        raise
+    except ErrorLLM:
+        # None en vez de un texto que no cabe en el ENUM de Comentarios.sentimiento
+        return None
+
+
+def clasificar_lote(comentarios):
+    """Clasifica una lista de (texto, promedio) con una sola petición por cada LOTE_MAX comentarios.
+
+    Devuelve una lista del mismo largo con 'positivo', 'negativo', 'neutral'
+    o None. Los comentarios que el modelo no devuelve bien en una respuesta
+    del lote se reintentan uno a uno con chat_bot; si falla la petición del
+    lote entera quedan en None, sin reintentos individuales.
+    """
+    return [sentimiento for sentimiento, _ in clasificar_lote_con_origen(comentarios)]
+
+
+def clasificar_lote_con_origen(comentarios):
+    """Igual que clasificar_lote, pero cada resultado es (sentimiento, origen) con origen 'cache' o 'llm'.
+
+    Lanza CircuitoAbierto si el modelo no acepta llamadas; lo ya clasificado
+    queda en la cache.
+    """
+    resultados = [(None, "llm")] * len(comentarios)
+    faltantes = []
+
+    for i, (texto, promedio) in enumerate(comentarios):
+        if not texto or not texto.strip():
+            continue
+        etiqueta = convertir_promedio_a_etiqueta(promedio)
+        clave = clave_cache(texto, etiqueta, VERSION_PROMPT)
+        cacheado = cache_sentimientos.obtener(clave)
+        if cacheado is not None:
+            resultados[i] = (cacheado, "cache")
+        else:
+            faltantes.append((i, texto, etiqueta, clave))
+
+    for inicio in range(0, len(faltantes), LOTE_MAX):
+        lote = faltantes[inicio:inicio + LOTE_MAX]
+        etiquetas = _consultar_lote(lote)
+        if etiquetas is None:
+            # El modelo ya falló con sus reintentos: una llamada por comentario solo
+            # multiplicaría la carga sobre un servicio caído. Quedan en 'error'
+            continue
+
+        for numero, (i, texto, etiqueta, clave) in enumerate(lote, start=1):
+            sentimiento = etiquetas.get(numero)
+            if sentimiento is not None:
+                cache_sentimientos.guardar(clave, etiqueta, sentimiento)
+            else:
+                # Respuesta incompleta o malformada para este comentario
+                sentimiento = chat_bot(texto, comentarios[i][1])
+            resultados[i] = (sentimiento, "llm")
+
+    return resultados
+
+
+def _consultar_lote(lote):
+    """Envía un lote numerado al modelo y devuelve {número: sentimiento} con lo que se pudo leer.
+
+    Devuelve None si la petición falló.
+    """
+    if len(lote) == 1:
+        # Un lote de uno no aprovecha el formato numerado
+        return {}
+
+    lineas = [
+        f"{numero}. [{etiqueta}] \"{' '.join(texto.split())}\""
+        for numero, (_, texto, etiqueta, _) in enumerate(lote, start=1)
+    ]
+    try:
+        contenido = cliente_llm.completar(
+            [
+                {"role": "system", "content": PROMPT_SISTEMA_LOTE},
+                {"role": "user", "content": "\n".join(lineas)}
+            ],
+            max_tokens=8 * len(lote),
+            temperature=0.2
+        )
+    except CircuitoAbierto:
+        raise
+    except ErrorLLM:
+        return None
 
-    except Exception as e:
-        return "Comentario no analizado"
\ No newline at end of file
+    etiquetas = {}
+    for linea in contenido.splitlines():
+        coincidencia = _LINEA_LOTE.match(linea.strip())
+        if coincidencia:
+            numero = int(coincidencia.group(1))
+            if 1 <= numero <= len(lote) and numero not in etiquetas:
+                etiquetas[numero] = coincidencia.group(2).lower()
+    return etiquetas
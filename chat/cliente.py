@@ -0,0 +1,328 @@
+"""Cliente del modelo de chat con plazos, reintentos, límite de concurrencia y circuit breaker.
+
+Envuelve el cliente de OpenAI para que un upstream lento o caído no tome
+como rehenes a los hilos que lo llaman:
+
+- cada llamada tiene un plazo total (LLM_PLAZO) y cada intento su propio
+  timeout (LLM_TIMEOUT); el SDK no reintenta por su cuenta
+- los errores transitorios (timeouts, conexión, 408/409/429/5xx) se
+  reintentan hasta LLM_REINTENTOS veces con backoff exponencial y jitter
+  completo, respetando Retry-After y sin pasarse del plazo
+- un semáforo global limita las peticiones en vuelo a LLM_CONCURRENCIA
+- el circuit breaker se abre cuando, en los últimos LLM_CIRCUITO_VENTANA
+  segundos y con al menos LLM_CIRCUITO_MIN_INTENTOS intentos, la proporción
+  de errores llega a LLM_CIRCUITO_UMBRAL; mientras está abierto las
+  llamadas fallan al instante con CircuitoAbierto y, pasado
+  LLM_CIRCUITO_ENFRIAMIENTO, deja pasar un intento de prueba
+
+Quien recibe CircuitoAbierto no debe marcar el comentario como fallido:
+la cola de análisis lo devuelve a 'pendiente' y lo reintenta cuando el
+circuito vuelve a aceptar llamadas (ver analisis.py).
+"""
+import os
+import random
+import threading
+import time
+from collections import Counter, deque
+
+from metricas import Histograma
+
+LLM_MODELO = os.getenv("LLM_MODELO", "gpt-4o-mini")
+# Segundos por intento y para la llamada completa, reintentos incluidos
+LLM_TIMEOUT = float(os.getenv("LLM_TIMEOUT", "10"))
+LLM_PLAZO = float(os.getenv("LLM_PLAZO", "25"))
+LLM_REINTENTOS = int(os.getenv("LLM_REINTENTOS", "2"))
+LLM_BACKOFF_BASE_MS = float(os.getenv("LLM_BACKOFF_BASE_MS", "250"))
+LLM_BACKOFF_MAX_MS = float(os.getenv("LLM_BACKOFF_MAX_MS", "4000"))
+# Peticiones al modelo en vuelo a la vez, sumando todos los hilos del proceso
+LLM_CONCURRENCIA = int(os.getenv("LLM_CONCURRENCIA", "8"))
+LLM_CIRCUITO_UMBRAL = float(os.getenv("LLM_CIRCUITO_UMBRAL", "0.5"))
+LLM_CIRCUITO_MIN_INTENTOS = int(os.getenv("LLM_CIRCUITO_MIN_INTENTOS", "10"))
+LLM_CIRCUITO_VENTANA = float(os.getenv("LLM_CIRCUITO_VENTANA", "30"))
+LLM_CIRCUITO_ENFRIAMIENTO = float(os.getenv("LLM_CIRCUITO_ENFRIAMIENTO", "30"))
+
+# Códigos HTTP que vale la pena reintentar
+_ESTADOS_TRANSITORIOS = (408, 409, 429)
+
+
+class ErrorLLM(Exception):
+    """La llamada al modelo falló después de los reintentos o agotó su plazo."""
+
+
+class CircuitoAbierto(ErrorLLM):
+    """El circuit breaker rechazó la llamada sin enviarla."""
+
+    def __init__(self, reintentar_en: float):
+        super().__init__(f"Circuito del modelo abierto; reintentar en {reintentar_en:.1f} s")
+        self.reintentar_en = reintentar_en
+
+
+class CircuitBreaker:
+    """Circuit breaker por proporción de errores en una ventana deslizante de tiempo.
+
+    Estados: 'cerrado' (todo pasa), 'abierto' (nada pasa hasta que vence el
+    enfriamiento) y 'semiabierto' (pasa un solo intento de prueba; si sale
+    bien se cierra y si falla vuelve a abrirse).
+    """
+
+    def __init__(self, umbral: float = LLM_CIRCUITO_UMBRAL, min_intentos: int = LLM_CIRCUITO_MIN_INTENTOS,
+                 ventana: float = LLM_CIRCUITO_VENTANA, enfriamiento: float = LLM_CIRCUITO_ENFRIAMIENTO):
+        self.umbral = umbral
+        self.min_intentos = min_intentos
+        self.ventana = ventana
+        self.enfriamiento = enfriamiento
+        self._resultados = deque()  # (instante, ok)
+        self._errores = 0
+        self._estado = "cerrado"
+        self._abierto_desde = 0.0
+        self._sonda_en_curso = False
+        self._lock = threading.Lock()
+        self.aperturas = 0
+
+    @property
+    def estado(self) -> str:
+        with self._lock:
+            return self._estado_actual(time.monotonic())
+
+    def _estado_actual(self, ahora: float) -> str:
+        if self._estado == "abierto" and ahora - self._abierto_desde >= self.enfriamiento:
+            self._estado = "semiabierto"
+            self._sonda_en_curso = False
+        return self._estado
+
+    def segundos_para_reintento(self) -> float:
+        with self._lock:
+            if self._estado_actual(time.monotonic()) != "abierto":
+                return 0.0
+            return max(self.enfriamiento - (time.monotonic() - self._abierto_desde), 0.0)
+
+    def permitir(self):
+        """Lanza CircuitoAbierto si la llamada no debe enviarse."""
+        with self._lock:
+            ahora = time.monotonic()
+            estado = self._estado_actual(ahora)
+            if estado == "cerrado":
+                return
+            if estado == "semiabierto" and not self._sonda_en_curso:
+                self._sonda_en_curso = True
+                return
+            restante = self.enfriamiento - (ahora - self._abierto_desde) if estado == "abierto" else 0.0
+            raise CircuitoAbierto(max(restante, 0.0))
+
+    def registrar(self, ok: bool):
+        with self._lock:
+            ahora = time.monotonic()
+            if self._estado_actual(ahora) == "semiabierto":
+                if ok:
+                    self._estado = "cerrado"
+                    self._resultados.clear()
+                    self._errores = 0
+                else:
+                    self._abrir(ahora)
+                return
+
+            self._resultados.append((ahora, ok))
+            self._errores += not ok
+            while self._resultados and ahora - self._resultados[0][0] > self.ventana:
+                _, ok_antiguo = self._resultados.popleft()
+                self._errores -= not ok_antiguo
+
+            intentos = len(self._resultados)
+            if (self._estado == "cerrado" and intentos >= self.min_intentos
+                    and self._errores / intentos >= self.umbral):
+                self._abrir(ahora)
+
+    def _abrir(self, ahora: float):
+        self._estado = "abierto"
+        self._abierto_desde = ahora
+        self._sonda_en_curso = False
+        self._resultados.clear()
+        self._errores = 0
+        self.aperturas += 1
+
+    def estadisticas(self) -> dict:
+        with self._lock:
+            ahora = time.monotonic()
+            estado = self._estado_actual(ahora)
+            intentos = len(self._resultados)
+            return {
+                "estado": estado,
+                "aperturas": self.aperturas,
+                "intentos_en_ventana": intentos,
+                "proporcion_errores": round(self._errores / intentos, 3) if intentos else 0.0,
+                "reintentar_en_segundos": round(max(self.enfriamiento - (ahora - self._abierto_desde), 0.0), 1)
+                if estado == "abierto" else 0.0,
+            }
+
+
+class ClienteLLM:
+    """Punto único de salida hacia el modelo; ver la descripción del módulo."""
+
+    def __init__(self, modelo: str = LLM_MODELO, timeout: float = LLM_TIMEOUT, plazo: float = LLM_PLAZO,
+                 reintentos: int = LLM_REINTENTOS, concurrencia: int = LLM_CONCURRENCIA,
+                 circuito: CircuitBreaker = None, cliente=None):
+        self.modelo = modelo
+        self.timeout = timeout
+        self.plazo = plazo
+        self.reintentos = reintentos
+        self.concurrencia = concurrencia
+        self.circuito = circuito or CircuitBreaker()
+        self._semaforo = threading.BoundedSemaphore(concurrencia)
+        # El cliente se crea en el primer uso: importar este módulo no debe cargar
+        # openai ni exigir OPENAI_API_KEY (p. ej. con SENTIMIENTO_MODO=local)
+        self._cliente = cliente
+        self._cliente_lock = threading.Lock()
+        self._lock = threading.Lock()
+        self._en_vuelo = 0
+        self._contadores = Counter()
+        self.latencia_intento = Histograma()
+        self.latencia_llamada = Histograma()
+
+    def _obtener_cliente(self):
+        if self._cliente is None:
+            with self._cliente_lock:
+                if self._cliente is None:
+                    from openai import OpenAI
+                    # Los reintentos y timeouts los maneja esta clase
+                    self._cliente = OpenAI(api_key=os.getenv("OPENAI_API_KEY"), max_retries=0, timeout=self.timeout)
+        return self._cliente
+
+    def _contar(self, *claves):
+        with self._lock:
+            self._contadores.update(claves)
+
+    def completar(self, mensajes, max_tokens: int, temperature: float = 0.2) -> str:
+        """Texto de la respuesta del modelo; lanza CircuitoAbierto o ErrorLLM si no se obtuvo."""
+        inicio = time.monotonic()
+        limite = inicio + self.plazo
+        self._contar("llamadas")
+        try:
+            contenido = self._completar(mensajes, max_tokens, temperature, limite)
+        except CircuitoAbierto:
+            self._contar("rechazadas_circuito")
+            raise
+        except ErrorLLM:
+            self._contar("fallidas")
+            raise
+        self._contar("exitosas")
+        self.latencia_llamada.observar(time.monotonic() - inicio)
+        return contenido
+
+    def _completar(self, mensajes, max_tokens, temperature, limite):
+        ultimo_error = None
+        for intento in range(self.reintentos + 1):
+            if intento:
+                espera = self._espera(intento, ultimo_error)
+                if time.monotonic() + espera >= limite:
+                    break
+                self._contar("reintentos")
+                time.sleep(espera)
+
+            # Falla rápido antes de esperar turno; permitir() decide después de obtenerlo
+            reintentar_en = self.circuito.segundos_para_reintento()
+            if reintentar_en:
+                raise CircuitoAbierto(reintentar_en)
+            restante = limite - time.monotonic()
+            if restante <= 0 or not self._semaforo.acquire(timeout=restante):
+                self._contar("sin_turno")
+                raise ErrorLLM("No hubo turno para llamar al modelo dentro del plazo")
+
+            try:
+                self.circuito.permitir()
+                return self._intentar(mensajes, max_tokens, temperature, min(self.timeout, limite - time.monotonic()))
+            except CircuitoAbierto:
+                raise
+            except Exception as e:
+                ultimo_error = e
+                if not _es_transitorio(e):
+                    raise ErrorLLM(f"Error no recuperable del modelo: {e}") from e
+            finally:
+                self._semaforo.release()
+
+        raise ErrorLLM(f"El modelo no respondió dentro del plazo: {ultimo_error}") from ultimo_error
+
+    def _intentar(self, mensajes, max_tokens, temperature, timeout):
+        with self._lock:
+            self._en_vuelo += 1
+        inicio = time.monotonic()
+        # Los errores del llamador (400, 401...) no dicen nada de la salud del upstream
+        ok = False
+        try:
+            respuesta = self._obtener_cliente().chat.completions.create(
+                model=self.modelo,
+                messages=mensajes,
+                max_tokens=max_tokens,
+                temperature=temperature,
+                timeout=max(timeout, 0.001),
+            )
+            ok = True
+            return respuesta.choices[0].message.content or ""
+        except Exception as e:
+            self._contar(f"error_{_tipo_error(e)}")
+            ok = not _es_transitorio(e)
+            raise
+        finally:
+            self.latencia_intento.observar(time.monotonic() - inicio)
+            self.circuito.registrar(ok)
+            with self._lock:
+                self._en_vuelo -= 1
+
+    def _espera(self, intento: int, error) -> float:
+        """Backoff exponencial con jitter completo; Retry-After del servidor como mínimo."""
+        techo = min(LLM_BACKOFF_MAX_MS, LLM_BACKOFF_BASE_MS * 2 ** (intento - 1)) / 1000
+        espera = random.uniform(0, techo)
+        retry_after = _retry_after(error)
+        return max(espera, retry_after) if retry_after is not None else espera
+
+    def estadisticas(self) -> dict:
+        with self._lock:
+            contadores = dict(self._contadores)
+            en_vuelo = self._en_vuelo
+        return {
+            "modelo": self.modelo,
+            "concurrencia": self.concurrencia,
+            "en_vuelo": en_vuelo,
+            "timeout_segundos": self.timeout,
+            "plazo_segundos": self.plazo,
+            "reintentos_max": self.reintentos,
+            "contadores": contadores,
+            "circuito": self.circuito.estadisticas(),
+            "latencia_intento": self.latencia_intento.resumen(),
+            "latencia_llamada": self.latencia_llamada.resumen(),
+        }
+
+
+def _codigo_http(error):
+    return getattr(error, "status_code", None)
+
+
+def _es_transitorio(error) -> bool:
+    import openai
+
+    if isinstance(error, openai.APIConnectionError):  # incluye APITimeoutError
+        return True
+    codigo = _codigo_http(error)
+    return codigo is not None and (codigo in _ESTADOS_TRANSITORIOS or codigo >= 500)
+
+
+def _tipo_error(error) -> str:
+    import openai
+
+    if isinstance(error, openai.APITimeoutError):
+        return "timeout"
+    if isinstance(error, openai.APIConnectionError):
+        return "conexion"
+    codigo = _codigo_http(error)
+    return f"http_{codigo}" if codigo is not None else type(error).__name__
+
+
+def _retry_after(error):
+    respuesta = getattr(error, "response", None)
+    valor = respuesta.headers.get("retry-after") if respuesta is not None else None
+    try:
+        return min(float(valor), LLM_BACKOFF_MAX_MS / 1000) if valor is not None else None
+    except ValueError:
+        return None
+
+
+cliente_llm = ClienteLLM()
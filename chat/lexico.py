@@ -0,0 +1,119 @@
+"""Clasificador local de sentimientos: léxico en español + modelo lineal en NumPy.
+
+Cada comentario se convierte en un vector de conteos sobre el léxico (las
+palabras precedidas por una negación usan la fila invertida de la matriz de
+pesos) más la etiqueta del promedio; los puntajes son ``X @ W + b`` y la
+confianza es la probabilidad softmax de la clase ganadora.
+"""
+from functools import lru_cache
+
+import numpy as np
+
+from chat.cache import normalizar_texto
+
+CLASES = ("positivo", "negativo", "neutral")
+
+# Raíz -> (clase, peso). Se compara por prefijo con las palabras ya normalizadas
+# (minúsculas y sin tildes), así "excelente" y "excelentes" comparten raíz.
+LEXICO = {
+    # Positivas
+    "excelen": ("positivo", 2.0), "buen": ("positivo", 1.2), "genial": ("positivo", 1.8),
+    "clar": ("positivo", 1.0), "recomiend": ("positivo", 1.6), "recomendad": ("positivo", 1.6),
+    "domin": ("positivo", 1.0), "pacien": ("positivo", 1.0), "puntual": ("positivo", 0.8),
+    "interesan": ("positivo", 1.0), "mejor": ("positivo", 0.8), "encant": ("positivo", 1.8),
+    "aprendi": ("positivo", 1.0), "util": ("positivo", 0.8), "organizad": ("positivo", 1.0),
+    "dinamic": ("positivo", 1.0), "motiva": ("positivo", 1.0), "respetuos": ("positivo", 1.0),
+    "amable": ("positivo", 1.0), "increible": ("positivo", 1.8), "perfect": ("positivo", 1.8),
+    "gracias": ("positivo", 0.8), "agradab": ("positivo", 1.0),
+    "magnific": ("positivo", 1.8), "fantastic": ("positivo", 1.8), "comprometid": ("positivo", 1.0),
+    # Negativas
+    "malo": ("negativo", 1.6), "mala": ("negativo", 1.6), "pesim": ("negativo", 2.0),
+    "confus": ("negativo", 1.2), "aburrid": ("negativo", 1.4), "impuntual": ("negativo", 1.2),
+    "desorganiz": ("negativo", 1.2), "grosero": ("negativo", 1.8), "irrespetuos": ("negativo", 1.8),
+    "injust": ("negativo", 1.4), "peor": ("negativo", 1.6), "terrible": ("negativo", 2.0),
+    "horrible": ("negativo", 2.0), "deficien": ("negativo", 1.4), "nunca": ("negativo", 0.8),
+    "odi": ("negativo", 1.6), "falta": ("negativo", 0.8), "tarde": ("negativo", 0.6),
+    "desmotiva": ("negativo", 1.2), "incomprensib": ("negativo", 1.4), "decepcion": ("negativo", 1.6),
+    "inutil": ("negativo", 1.4), "arrogante": ("negativo", 1.6), "lent": ("negativo", 0.6),
+    # Matices que suelen indicar un comentario neutral
+    "podria": ("neutral", 1.0), "mejorar": ("neutral", 1.0), "regular": ("neutral", 1.4),
+    "normal": ("neutral", 1.0), "aceptable": ("neutral", 1.2), "veces": ("neutral", 0.8),
+    "sugerenc": ("neutral", 1.0), "pero": ("neutral", 0.6), "aunque": ("neutral", 0.6),
+    "promedio": ("neutral", 1.0), "suficiente": ("neutral", 0.8),
+}
+
+NEGACIONES = {"no", "ni", "nada", "tampoco", "sin", "jamas"}
+# Palabras siguientes a una negación cuyo sentido se invierte
+ALCANCE_NEGACION = 3
+# Peso de la etiqueta del promedio frente al texto (el prompt del modelo usa 48 %)
+PESO_PROMEDIO = 0.9
+# Sin evidencia en el texto, el comentario tiende a neutral con baja confianza
+SESGO = np.array([0.0, 0.0, 0.3])
+
+_RAICES = sorted(LEXICO, key=len, reverse=True)
+_INDICE_CLASE = {clase: i for i, clase in enumerate(CLASES)}
+
+
+def _construir_pesos():
+    """Matriz (2V + 3) x 3: filas normales, filas negadas y etiqueta del promedio."""
+    v = len(_RAICES)
+    pesos = np.zeros((2 * v + len(CLASES), len(CLASES)))
+    for fila, raiz in enumerate(_RAICES):
+        clase, peso = LEXICO[raiz]
+        pesos[fila, _INDICE_CLASE[clase]] = peso
+        if clase == "positivo":
+            pesos[fila, _INDICE_CLASE["negativo"]] = -0.5 * peso
+            pesos[v + fila, _INDICE_CLASE["negativo"]] = peso
+        elif clase == "negativo":
+            pesos[fila, _INDICE_CLASE["positivo"]] = -0.5 * peso
+            pesos[v + fila, _INDICE_CLASE["neutral"]] = peso
+        else:
+            pesos[v + fila, _INDICE_CLASE["neutral"]] = peso
+    for i in range(len(CLASES)):
+        pesos[2 * v + i, i] = PESO_PROMEDIO
+    return pesos
+
+
+PESOS = _construir_pesos()
+
+
+@lru_cache(maxsize=20000)
+def _indice_palabra(palabra):
+    for fila, raiz in enumerate(_RAICES):
+        if palabra.startswith(raiz):
+            return fila
+    return None
+
+
+def vectorizar(comentarios):
+    """Convierte [(texto, etiqueta_promedio), ...] en la matriz de características."""
+    v = len(_RAICES)
+    matriz = np.zeros((len(comentarios), PESOS.shape[0]))
+    for i, (texto, etiqueta) in enumerate(comentarios):
+        negado = 0
+        for palabra in normalizar_texto(texto or "").split():
+            if palabra in NEGACIONES:
+                negado = ALCANCE_NEGACION
+                continue
+            fila = _indice_palabra(palabra)
+            if fila is not None:
+                matriz[i, fila + v if negado else fila] += 1
+            negado = max(negado - 1, 0)
+        if etiqueta in _INDICE_CLASE:
+            matriz[i, 2 * v + _INDICE_CLASE[etiqueta]] = 1
+    return matriz
+
+
+def clasificar(comentarios):
+    """Devuelve [(sentimiento, confianza), ...] para [(texto, etiqueta_promedio), ...]."""
+    if not comentarios:
+        return []
+    puntajes = vectorizar(comentarios) @ PESOS + SESGO
+    puntajes -= puntajes.max(axis=1, keepdims=True)
+    probabilidades = np.exp(puntajes)
+    probabilidades /= probabilidades.sum(axis=1, keepdims=True)
+    ganadoras = probabilidades.argmax(axis=1)
+    return [
+        (CLASES[clase], float(probabilidades[i, clase]))
+        for i, clase in enumerate(ganadoras)
+    ]
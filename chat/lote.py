@@ -0,0 +1,91 @@
+import os
+import queue
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+
+from chat.chat import LOTE_MAX
+from chat.motores import motor_sentimiento
+
+# Tiempo que se espera a otros llamadores antes de enviar un lote incompleto
+LOTE_VENTANA_MS = float(os.getenv("SENTIMIENTO_LOTE_VENTANA_MS", "50"))
+# Lotes que pueden estar en vuelo al mismo tiempo
+LOTE_CONCURRENCIA = int(os.getenv("SENTIMIENTO_LOTE_CONCURRENCIA", "4"))
+
+
+class MicroLote:
+    """Agrupa clasificaciones concurrentes en una sola petición al modelo.
+
+    Cada llamador recibe un Future; un hilo despachador junta lo que llegue
+    durante ``ventana`` segundos (o hasta ``max_lote`` elementos) y lo envía
+    con ``funcion_lote`` en un pool de ``concurrencia`` hilos.
+    """
+
+    def __init__(self, funcion_lote=motor_sentimiento.clasificar_lote, ventana: float = LOTE_VENTANA_MS / 1000,
+                 max_lote: int = LOTE_MAX, concurrencia: int = LOTE_CONCURRENCIA):
+        self.funcion_lote = funcion_lote
+        self.ventana = ventana
+        self.max_lote = max_lote
+        self._entrada = queue.Queue()
+        self._pool = ThreadPoolExecutor(max_workers=concurrencia, thread_name_prefix="micro-lote")
+        self._lock = threading.Lock()
+        self._despachador = None
+        self.lotes_enviados = 0
+        self.elementos_enviados = 0
+
+    def enviar(self, texto: str, promedio: float) -> Future:
+        self._asegurar_despachador()
+        futuro = Future()
+        self._entrada.put((texto, promedio, futuro))
+        return futuro
+
+    def clasificar(self, texto: str, promedio: float, timeout: float = None):
+        return self.enviar(texto, promedio).result(timeout)
+
+    def estadisticas(self) -> dict:
+        with self._lock:
+            return {
+                "lotes_enviados": self.lotes_enviados,
+                "elementos_enviados": self.elementos_enviados,
+                "tamano_promedio": round(self.elementos_enviados / self.lotes_enviados, 2)
+                if self.lotes_enviados else 0.0,
+                "en_espera": self._entrada.qsize(),
+            }
+
+    def _asegurar_despachador(self):
+        with self._lock:
+            if self._despachador is None or not self._despachador.is_alive():
+                self._despachador = threading.Thread(
+                    target=self._despachar, name="micro-lote-despachador", daemon=True
+                )
+                self._despachador.start()
+
+    def _despachar(self):
+        while True:
+            lote = [self._entrada.get()]
+            limite = time.monotonic() + self.ventana
+            while len(lote) < self.max_lote:
+                restante = limite - time.monotonic()
+                if restante <= 0:
+                    break
+                try:
+                    lote.append(self._entrada.get(timeout=restante))
+                except queue.Empty:
+                    break
+            with self._lock:
+                self.lotes_enviados += 1
+                self.elementos_enviados += len(lote)
+            self._pool.submit(self._ejecutar, lote)
+
+    def _ejecutar(self, lote):
+        try:
+            resultados = self.funcion_lote([(texto, promedio) for texto, promedio, _ in lote])
+        except Exception as e:
+            for _, _, futuro in lote:
+                futuro.set_exception(e)
+            return
+        for (_, _, futuro), resultado in zip(lote, resultados):
+            futuro.set_result(resultado)
+
+
+micro_lote = MicroLote()
@@ -0,0 +1,123 @@
+"""Motores de análisis de sentimiento intercambiables.
+
+SENTIMIENTO_MODO elige el motor:
+  - local:   solo el clasificador léxico en proceso (chat/lexico.py)
+  - llm:     solo el modelo remoto (con su cache)
+  - hibrido: el clasificador local resuelve los comentarios claros y solo
+             escala al modelo los que quedan por debajo de SENTIMIENTO_UMBRAL_CONFIANZA
+"""
+import os
+from abc import ABC, abstractmethod
+from typing import List, NamedTuple, Optional
+
+from chat.chat import clasificar_lote_con_origen, convertir_promedio_a_etiqueta
+from chat.cliente import CircuitoAbierto
+from instrumentacion import medir_sentimiento
+
+SENTIMIENTO_MODO = os.getenv("SENTIMIENTO_MODO", "hibrido").lower()
+SENTIMIENTO_UMBRAL_CONFIANZA = float(os.getenv("SENTIMIENTO_UMBRAL_CONFIANZA", "0.75"))
+
+MODOS = ("local", "llm", "hibrido")
+
+
+class ResultadoSentimiento(NamedTuple):
+    sentimiento: Optional[str]
+    # Probabilidad del clasificador local; None cuando la etiqueta viene del modelo
+    confianza: Optional[float]
+    # Nivel que produjo la etiqueta: 'local', 'cache' o 'llm'
+    origen: str
+
+
+class MotorSentimiento(ABC):
+    """Interfaz común: recibe [(texto, promedio), ...] y devuelve un ResultadoSentimiento por comentario."""
+
+    nombre = "base"
+
+    @abstractmethod
+    def clasificar_lote(self, comentarios) -> List[ResultadoSentimiento]:
+        ...
+
+    def clasificar(self, texto: str, promedio: float) -> ResultadoSentimiento:
+        return self.clasificar_lote([(texto, promedio)])[0]
+
+    def definitivo(self, resultado: ResultadoSentimiento) -> bool:
+        """True si es la etiqueta que este motor da con el modelo disponible.
+
+        Solo esas se guardan con VERSION_PROMPT; las demás quedan sin versión y
+        el reanálisis las vuelve a tomar.
+        """
+        return resultado.sentimiento is not None
+
+
+class MotorLocal(MotorSentimiento):
+    nombre = "local"
+
+    def clasificar_lote(self, comentarios):
+        # Importación diferida: NumPy y la matriz de pesos se cargan en el primer uso
+        from chat import lexico
+
+        entradas = [(texto, convertir_promedio_a_etiqueta(promedio)) for texto, promedio in comentarios]
+        with medir_sentimiento("local"):
+            clasificados = lexico.clasificar(entradas)
+        return [
+            ResultadoSentimiento(sentimiento if texto and texto.strip() else None, confianza, "local")
+            for (texto, _), (sentimiento, confianza) in zip(comentarios, clasificados)
+        ]
+
+
+class MotorLLM(MotorSentimiento):
+    nombre = "llm"
+
+    def clasificar_lote(self, comentarios):
+        with medir_sentimiento("llm"):
+            clasificados = clasificar_lote_con_origen(comentarios)
+        return [ResultadoSentimiento(sentimiento, None, origen) for sentimiento, origen in clasificados]
+
+
+class MotorHibrido(MotorSentimiento):
+    nombre = "hibrido"
+
+    def __init__(self, umbral: float = SENTIMIENTO_UMBRAL_CONFIANZA,
+                 local: MotorSentimiento = None, remoto: MotorSentimiento = None):
+        self.umbral = umbral
+        self.local = local or MotorLocal()
+        self.remoto = remoto or MotorLLM()
+
+    def clasificar_lote(self, comentarios):
+        resultados = self.local.clasificar_lote(comentarios)
+        dudosos = [
+            i for i, resultado in enumerate(resultados)
+            if resultado.sentimiento is not None and resultado.confianza < self.umbral
+        ]
+        if not dudosos:
+            return resultados
+
+        try:
+            escalados = self.remoto.clasificar_lote([comentarios[i] for i in dudosos])
+        except CircuitoAbierto:
+            # Con el modelo caído la etiqueta local es la mejor disponible
+            return resultados
+        for i, escalado in zip(dudosos, escalados):
+            # Si el modelo falla se conserva la etiqueta local, que siempre es válida
+            if escalado.sentimiento is not None:
+                resultados[i] = escalado
+        return resultados
+
+    def definitivo(self, resultado):
+        # Una etiqueta local por debajo del umbral es el respaldo de un escalado que falló
+        if resultado.origen == "local" and resultado.confianza is not None and resultado.confianza < self.umbral:
+            return False
+        return super().definitivo(resultado)
+
+
+def crear_motor(modo: str = SENTIMIENTO_MODO) -> MotorSentimiento:
+    if modo == "local":
+        return MotorLocal()
+    if modo == "llm":
+        return MotorLLM()
+    if modo == "hibrido":
+        return MotorHibrido()
+    raise ValueError(f"SENTIMIENTO_MODO inválido: {modo!r} (use uno de {', '.join(MODOS)})")
+
+
+motor_sentimiento = crear_motor()
@@ -0,0 +1,71 @@
+"""GET condicional: ETag, If-None-Match y Cache-Control.
+
+Los resúmenes de sentimientos usan ETag por versión: la tabla Version_datos
+lleva contadores por docente y del catálogo que suben los triggers de
+Comentarios, Usuarios y Asignaturas, y la ruta los lee por llave primaria
+(el global, sumando las versiones por docente) antes de decidir si ejecuta
+el resumen. Si el cliente manda el mismo ETag en
+If-None-Match se responde 304 sin cuerpo y sin tocar las agregaciones.
+
+Los listados de docentes y asignaturas ya salen de cache_entidades, así que
+su ETag es un hash del cuerpo: no cuesta ninguna consulta y ahorra el envío.
+"""
+import hashlib
+import os
+from typing import Optional
+
+from fastapi import Request, Response
+
+from respuestas import RespuestaJSON
+
+# Segundos que el navegador puede reutilizar un listado sin revalidar
+ETAG_CATALOGO_MAX_AGE = int(os.getenv("ETAG_CATALOGO_MAX_AGE", "60"))
+
+# Los resúmenes cambian con cada comentario: siempre se revalidan (y el 304 es barato)
+CACHE_RESUMEN = "private, no-cache"
+CACHE_CATALOGO = f"private, max-age={ETAG_CATALOGO_MAX_AGE}"
+# El archivo de un reporte no cambia una vez generado
+CACHE_REPORTE = "private, max-age=86400, immutable"
+
+
+def etag_version(*partes) -> str:
+    """ETag débil a partir de versiones de datos y parámetros de la consulta."""
+    resumen = hashlib.sha1(repr(partes).encode("utf-8")).hexdigest()[:20]
+    return f'W/"{resumen}"'
+
+
+def etag_contenido(cuerpo: bytes) -> str:
+    return f'"{hashlib.sha1(cuerpo).hexdigest()[:20]}"'
+
+
+def coincide(if_none_match: Optional[str], etag: str) -> bool:
+    """Comparación débil de RFC 9110: ignora el prefijo W/ de ambos lados."""
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    propio = etag.removeprefix("W/")
+    return any(candidato.strip().removeprefix("W/") == propio for candidato in if_none_match.split(","))
+
+
+def no_modificado(request: Request, etag: str, cache_control: str) -> Optional[Response]:
+    """Respuesta 304 si el cliente ya tiene esta versión; None si hay que generar el cuerpo."""
+    if coincide(request.headers.get("if-none-match"), etag):
+        return Response(status_code=304, headers={"ETag": etag, "Cache-Control": cache_control})
+    return None
+
+
+def con_etag(contenido, etag: str, cache_control: str) -> RespuestaJSON:
+    return RespuestaJSON(content=contenido, headers={"ETag": etag, "Cache-Control": cache_control})
+
+
+def respuesta_condicional(request: Request, contenido, cache_control: str = CACHE_CATALOGO) -> Response:
+    """Serializa ``contenido`` y responde 304 si su hash coincide con If-None-Match."""
+    respuesta = RespuestaJSON(content=contenido)
+    etag = etag_contenido(respuesta.body)
+    no_modificada = no_modificado(request, etag, cache_control)
+    if no_modificada is not None:
+        return no_modificada
+    respuesta.headers["ETag"] = etag
+    respuesta.headers["Cache-Control"] = cache_control
+    return respuesta
@@ -0,0 +1,72 @@
+"""Hash y verificación de contraseñas con bcrypt.
+
+bcrypt cuesta ~100-300 ms de CPU por operación (según BCRYPT_ROUNDS), así
+que corre en un pool de hilos propio y las rutas que lo usan (login, crear y
+actualizar usuarios) son async y esperan con ``verificar_async`` y
+``hashear_async``: mientras tanto no ocupan el event loop ni un hilo del
+threadpool de Starlette, y CONTRASENAS_HILOS acota cuánta CPU pueden ocupar
+los logins en un pico. La extensión de bcrypt libera el GIL mientras calcula,
+así que los hilos sí trabajan en paralelo.
+
+Las filas antiguas guardan la contraseña en texto plano; se siguen aceptando
+y el login las reemplaza por su hash (``necesita_rehash``), igual que los
+hash creados con otro costo.
+
+Se usa el paquete bcrypt directamente (passlib 1.7 no es compatible con
+bcrypt >= 4.1), así que passlib ya no es dependencia.
+"""
+import asyncio
+import hmac
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+import bcrypt
+
+BCRYPT_ROUNDS = int(os.getenv("BCRYPT_ROUNDS", "12"))
+CONTRASENAS_HILOS = int(os.getenv("CONTRASENAS_HILOS", str(min(4, os.cpu_count() or 1))))
+
+_pool = ThreadPoolExecutor(max_workers=CONTRASENAS_HILOS, thread_name_prefix="bcrypt")
+
+
+def _bytes(contrasena: str) -> bytes:
+    # bcrypt solo usa los primeros 72 bytes; las versiones nuevas fallan en vez de truncar
+    return contrasena.encode("utf-8")[:72]
+
+
+def es_hash(valor: str) -> bool:
+    return valor.startswith(("$2a$", "$2b$", "$2y$"))
+
+
+def hashear(contrasena: str, rounds: int = None) -> str:
+    sal = bcrypt.gensalt(rounds=rounds or BCRYPT_ROUNDS)
+    return bcrypt.hashpw(_bytes(contrasena), sal).decode("ascii")
+
+
+def verificar(contrasena: str, guardada: str) -> bool:
+    if not guardada:
+        return False
+    if not es_hash(guardada):
+        # Fila antigua en texto plano
+        return hmac.compare_digest(contrasena.encode("utf-8"), guardada.encode("utf-8"))
+    return bcrypt.checkpw(_bytes(contrasena), guardada.encode("ascii"))
+
+
+def necesita_rehash(guardada: str) -> bool:
+    """True si está en texto plano o con un costo distinto de BCRYPT_ROUNDS."""
+    if not es_hash(guardada):
+        return True
+    return int(guardada.split("$")[2]) != BCRYPT_ROUNDS
+
+
+# Versiones que corren en el pool de bcrypt
+
+async def hashear_async(contrasena: str) -> str:
+    return await asyncio.get_running_loop().run_in_executor(_pool, hashear, contrasena)
+
+
+async def verificar_async(contrasena: str, guardada: str) -> bool:
+    return await asyncio.get_running_loop().run_in_executor(_pool, verificar, contrasena, guardada)
+
+
+def cerrar():
+    _pool.shutdown(wait=False, cancel_futures=True)
@@ -1,23 +1,35 @@
 from models import User, Asignatura, Comentario, Reporte
 from schemas import UserUpdate, ComentarioUpdate, ComentarioCreate, ComentarioResponse
-from passlib.context import CryptContext
 from sqlalchemy.exc import DBAPIError
 from sqlalchemy.orm import Session
 from typing import List, Dict, Any
 from fastapi import HTTPException
-from chat.chat import chat_bot
-from sqlalchemy import text
+from pydantic import ValidationError
+from analisis import cola_analisis
+from buscador_docentes import indice_docentes
+from cache_entidades import cache_entidades
+from datetime import datetime
+import paginacion
+import condicional
+from sqlalchemy import text, bindparam
 from database import Base
 import schemas
+import logging
 import re
 
+logger = logging.getLogger(__name__)
+
 # --------------------- Docentes por estudiante --------------------- #
 
 
+# Los _formatear_* convierten filas en respuestas y los comparte crud_async.py
+
 def obtener_docentes_por_estudiante(db: Session, id_estudiante: int) -> Dict[str, Any]:
     result = db.execute(text("CALL docentes_por_estudiantes(:id_estudiante)"), {"id_estudiante": id_estudiante})
-    filas = result.mappings().all()
+    return _formatear_docentes_por_estudiante(id_estudiante, result.mappings().all())
 
+
+def _formatear_docentes_por_estudiante(id_estudiante: int, filas) -> Dict[str, Any]:
     if not filas:
         return {}
 
@@ -58,30 +70,76 @@ def get_user_by_email(db: Session, email: str):
     return result.mappings().fetchone()
 
 
+QUERY_ACTUALIZAR_HASH = text("CALL ActualizarHashContrasena(:id, :anterior, :hash)")
+
+
+def actualizar_hash_contrasena(db: Session, user_id: int, anterior: str, nuevo_hash: str):
+    db.execute(QUERY_ACTUALIZAR_HASH, {"id": user_id, "anterior": anterior, "hash": nuevo_hash})
+    db.commit()
+
+
 # --------------------- Sentimientos por administrador --------------------- #
 
 
 def obtener_resumen_sentimientos(db):
     try:
         resultados = db.execute(text("CALL resumen_sentimientos_global()")).fetchall()
-        return [
-            {"sentimiento": r[0], "total": r[1], "porcentaje": float(r[2])}
-            for r in resultados
-        ]
+        return _formatear_resumen_global(resultados)
     except Exception as e:
         raise Exception(f"Error al obtener resumen de sentimientos: {str(e)}")
 
 
+def reconstruir_resumen_sentimientos(db: Session):
+    """Recalcula Resumen_sentimientos desde Comentarios; devuelve grupos y diferencias encontradas."""
+    # READ COMMITTED: el procedimiento lee Comentarios sin bloquear a quienes escriben comentarios
+    db.connection(execution_options={"isolation_level": "READ COMMITTED"})
+    row = db.execute(text("CALL ReconstruirResumenSentimientos()")).mappings().fetchone()
+    db.commit()
+    return {"grupos": row["grupos"], "diferencias": row["diferencias"]}
+
+
+def _formatear_resumen_global(resultados):
+    return [
+        {"sentimiento": r[0], "total": r[1], "porcentaje": float(r[2])}
+        for r in resultados
+    ]
+
+
 # --------------------- Sentimientos por docente --------------------- #
 
 
+# El nombre se resuelve a id con el índice de buscador_docentes.py y la consulta
+# filtra por id_docente (clave de Resumen_sentimientos) en vez de LIKE sobre el nombre
+QUERY_RESUMEN_POR_DOCENTES = text("""
+    SELECT
+        d.id_usuario AS id_docente,
+        d.nombre     AS nombre_docente,
+        a.id_asignatura,
+        a.nombre_asignatura,
+        SUM(r.total) AS total_comentarios,
+        SUM(CASE WHEN r.sentimiento = 'positivo' THEN r.total ELSE 0 END) AS positivos,
+        SUM(CASE WHEN r.sentimiento = 'neutral'  THEN r.total ELSE 0 END) AS neutrales,
+        SUM(CASE WHEN r.sentimiento = 'negativo' THEN r.total ELSE 0 END) AS negativos
+    FROM Resumen_sentimientos r
+    JOIN Usuarios    d ON r.id_docente    = d.id_usuario
+    JOIN Asignaturas a ON r.id_asignatura = a.id_asignatura
+    WHERE r.id_docente IN :ids
+    GROUP BY d.id_usuario, d.nombre, a.id_asignatura, a.nombre_asignatura
+    HAVING SUM(r.total) > 0
+""").bindparams(bindparam("ids", expanding=True))
+
+
 def obtener_resumen_sentimientos_por_nombre(db: Session, nombre_docente: str):
+    indice_docentes.asegurar(db)
+    ids = indice_docentes.resolver(nombre_docente)
+    if not ids:
+        return []
+
+    result = db.execute(QUERY_RESUMEN_POR_DOCENTES, {"ids": ids}).fetchall()
+    return _formatear_resumen_docente(result)
 
-    result = db.execute(
-        text("CALL resumen_sentimientos_por_nombre_docente(:nombre_docente)"),
-        {"nombre_docente": nombre_docente}
-    ).fetchall()
 
+def _formatear_resumen_docente(result):
     resumen = []
     for row in result:
         resumen.append({
@@ -98,16 +156,68 @@ def obtener_resumen_sentimientos_por_nombre(db: Session, nombre_docente: str):
     return resumen
 
 
+# --------------------- Versiones de datos (ETag) --------------------- #
+
+# Consulta por llave primaria de Version_datos; un ámbito sin fila está en la versión 0
+QUERY_VERSIONES = text("""
+    SELECT ambito, id_ambito, version
+    FROM Version_datos
+    WHERE (ambito = 'catalogo' AND id_ambito = 0)
+       OR (ambito = 'docente' AND id_ambito IN :ids)
+""").bindparams(bindparam("ids", expanding=True))
+
+# El resumen global cambia cuando cambia el de algún docente. Las versiones solo
+# suben, así que su suma sirve de versión global sin una fila que compartan todas
+# las escrituras de comentarios (un recorrido del prefijo 'docente' de la llave)
+QUERY_VERSION_RESUMEN = text("""
+    SELECT COALESCE(SUM(version), 0)
+    FROM Version_datos
+    WHERE ambito = 'docente'
+""")
+
+
+def _etag_resumen_global(version):
+    return condicional.etag_version("resumen", int(version))
+
+
+def _etag_resumen_docentes(ids, filas):
+    # Depende de los comentarios de esos docentes y de los nombres de docentes y asignaturas
+    versiones = {(f.ambito, f.id_ambito): f.version for f in filas}
+    return condicional.etag_version(
+        "docentes", versiones.get(("catalogo", 0), 0),
+        [(id_docente, versiones.get(("docente", id_docente), 0)) for id_docente in sorted(ids)],
+    )
+
+
+def etag_resumen_sentimientos(db: Session) -> str:
+    return _etag_resumen_global(db.execute(QUERY_VERSION_RESUMEN).scalar())
+
+
+def etag_resumen_sentimientos_por_nombre(db: Session, nombre_docente: str) -> str:
+    indice_docentes.asegurar(db)
+    ids = indice_docentes.resolver(nombre_docente)
+    return _etag_resumen_docentes(ids, db.execute(QUERY_VERSIONES, {"ids": ids}).fetchall())
+
+
 # --------------------- Usuarios --------------------- #
 
 
+def _fila_a_dict(fila):
+    # Las lecturas por id devuelven dicts para serializarlos sin pasar por Pydantic
+    return dict(fila._mapping) if fila is not None else None
+
+
 def get_user(db: Session, user_id: int):
+    return cache_entidades.obtener("usuario", user_id, lambda: _leer_usuario(db, user_id))
+
 
+def _leer_usuario(db: Session, user_id: int):
     result = db.execute(text("CALL LeerUsuario(:id)"), {"id": user_id})
-    return result.fetchone()
+    return _fila_a_dict(result.fetchone())
 
 
-def create_user(db: Session, user):
+def create_user(db: Session, user, contrasena_hash: str):
+    # La ruta calcula el hash con contrasenas.hashear_async antes de llamar aquí
     try:
         db.execute(text("""
             CALL CrearUsuario(:nombre, :email, :rol, :contrasena)
@@ -115,9 +225,14 @@ def create_user(db: Session, user):
             "nombre": user.nombre,
             "email": user.email,
             "rol": user.rol,
-            "contrasena": user.contrasena
+            "contrasena": contrasena_hash
         })
         db.commit()
+        # Solo un docente nuevo cambia el índice de nombres: crear estudiantes no lo recarga
+        if user.rol == "Docente":
+            indice_docentes.invalidar()
+        # Completa: puede haber quedado en cache un "no existe" para el id nuevo
+        cache_entidades.invalidar("usuario", "docentes", "estado_usuario")
         return {"message": "Usuario creado con éxito"}
     except DBAPIError as e:
         # Aquí capturamos el error de la base (trigger o cualquier fallo)
@@ -126,7 +241,7 @@ def create_user(db: Session, user):
         return {"error": error_msg}
     
 
-def update_user(db: Session, user_id: int, user_update: UserUpdate):
+def update_user(db: Session, user_id: int, user_update: UserUpdate, contrasena_hash: str = None):
     try:
         db.execute(text("""
             CALL ActualizarUsuario(:id_usuario, :nombre, :email, :rol, :contrasena)
@@ -135,12 +250,16 @@ def update_user(db: Session, user_id: int, user_update: UserUpdate):
             "nombre": user_update.nombre,
             "email": user_update.email,
             "rol": user_update.rol,
-            "contrasena": user_update.contrasena
+            "contrasena": contrasena_hash
         })
         db.commit()
+        # El índice guarda nombres de docentes; el rol decide quién está en él
+        if user_update.nombre is not None or user_update.rol is not None:
+            indice_docentes.invalidar()
+        cache_entidades.invalidar("usuario", clave=user_id)
+        cache_entidades.invalidar("docentes", "asignaturas", "estado_usuario")
 
-        result = db.execute(text("CALL LeerUsuario(:id)"), {"id": user_id})
-        return result.fetchone()
+        return _leer_usuario(db, user_id)
 
     except Exception as e:
         db.rollback()
@@ -153,7 +272,7 @@ def update_user(db: Session, user_id: int, user_update: UserUpdate):
         else:
             clean_msg = error_msg  # Si no se encuentra, mostrar el error completo
 
-        print(f"Error al actualizar usuario: {clean_msg}")
+        logger.warning("Error al actualizar usuario: %s", clean_msg)
         raise HTTPException(status_code=400, detail=clean_msg)
 
 
@@ -163,6 +282,9 @@ def delete_user(db, user_id: int):
         # Llamar al procedimiento almacenado
         db.execute(text("CALL EliminarUsuario(:id)"), {"id": user_id})
         db.commit()
+        indice_docentes.invalidar()
+        cache_entidades.invalidar("usuario", clave=user_id)
+        cache_entidades.invalidar("docentes", "asignaturas", "estado_usuario")
         return {"message": f"Usuario con ID {user_id} eliminado correctamente."}
     
     except Exception as e:
@@ -177,9 +299,12 @@ def delete_user(db, user_id: int):
 
 # Obtener todas las asignaturas
 def get_asignatura(db: Session, asignatura_id: int):
-    
+    return cache_entidades.obtener("asignatura", asignatura_id, lambda: _leer_asignatura(db, asignatura_id))
+
+
+def _leer_asignatura(db: Session, asignatura_id: int):
     result = db.execute(text("CALL LeerAsignatura(:id)"), {"id": asignatura_id})
-    return result.fetchone()
+    return _fila_a_dict(result.fetchone())
 
 
 # Crear una asignatura
@@ -191,6 +316,7 @@ def create_asignatura(db: Session, asignatura):
         "id_docente": asignatura.id_docente
     })
     db.commit()
+    cache_entidades.invalidar("asignatura", "asignaturas", "docentes")
 
     # Ahora hacemos el SELECT para devolver la asignatura creada
     result = db.execute(text("""
@@ -225,6 +351,8 @@ def update_asignatura(db: Session, asignatura_id: int, asignatura_update):
         "id_docente": asignatura_update.id_docente
     })
     db.commit()
+    cache_entidades.invalidar("asignatura", clave=asignatura_id)
+    cache_entidades.invalidar("asignaturas", "docentes")
     return {"message": "Asignatura actualizada con éxito"}
 
 # Eliminar una asignatura
@@ -232,6 +360,8 @@ def delete_asignatura(db: Session, asignatura_id: int):
 
     db.execute(text("CALL EliminarAsignatura(:id_asignatura)"), {"id_asignatura": asignatura_id})
     db.commit()
+    cache_entidades.invalidar("asignatura", clave=asignatura_id)
+    cache_entidades.invalidar("asignaturas", "docentes")
     return {"message": "Asignatura eliminada con éxito"}
 
 
@@ -239,9 +369,12 @@ def delete_asignatura(db: Session, asignatura_id: int):
 
 # Obtener todas las evaluaciones
 def get_evaluacion(db: Session, evaluacion_id: int):
+    return cache_entidades.obtener("evaluacion", evaluacion_id, lambda: _leer_evaluacion(db, evaluacion_id))
+
 
+def _leer_evaluacion(db: Session, evaluacion_id: int):
     result = db.execute(text("CALL LeerEvaluacion(:id)"), {"id": evaluacion_id})
-    return result.fetchone()
+    return _fila_a_dict(result.fetchone())
 
 # Crear una evaluación
 
@@ -256,6 +389,7 @@ def create_evaluacion(db: Session, evaluacion):
             "descripcion": evaluacion.descripcion
         })
         db.commit()
+        cache_entidades.invalidar("evaluacion")
         return {"message": "Evaluación creada con éxito"}
     
     except DBAPIError as e:
@@ -276,12 +410,14 @@ def update_evaluacion(db: Session, evaluacion_id: int, evaluacion_update):
         "descripcion": evaluacion_update.descripcion_e
     })
     db.commit()
+    cache_entidades.invalidar("evaluacion", clave=evaluacion_id)
     return {"message": "Evaluación actualizada con éxito"}
 
 # Eliminar una evaluación
 def delete_evaluacion(db: Session, evaluacion_id: int):
     db.execute(text("CALL EliminarEvaluacion(:id_evaluacion)"), {"id_evaluacion": evaluacion_id})
     db.commit()
+    cache_entidades.invalidar("evaluacion", clave=evaluacion_id)
     return {"message": "Evaluación eliminada con éxito"}
 
 
@@ -290,7 +426,10 @@ def delete_evaluacion(db: Session, evaluacion_id: int):
 # Obtener todos los comentarios de una evaluación
 def get_comentario(db: Session, comentario_id: int):
     result = db.execute(text("CALL LeerComentario(:id_comentario)"), {"id_comentario": comentario_id})
-    row = result.fetchone()
+    return _formatear_comentario(result.fetchone())
+
+
+def _formatear_comentario(row):
     if row is None:
         return None
     return {
@@ -301,26 +440,105 @@ def get_comentario(db: Session, comentario_id: int):
         "id_evaluacion": row.id_evaluacion,
         "comentario": row.comentario,
         "fecha_creacion": row.fecha_creacion,
-        "sentimiento": row.sentimiento if row.sentimiento is not None else "No analizado"
+        "sentimiento": row.sentimiento if row.sentimiento is not None else "No analizado",
+        "estado_analisis": row.estado_analisis
     }
 
 
+# Estado del análisis de sentimiento de un comentario
+def get_estado_analisis(db: Session, comentario_id: int):
+    result = db.execute(text("CALL EstadoAnalisisComentario(:id_comentario)"), {"id_comentario": comentario_id})
+    row = result.mappings().fetchone()
+    return dict(row) if row else None
+
+
+# Listados paginados por cursor (ver paginacion.py). Cada _consulta_* arma el
+# SELECT con sus filtros y lo comparten las versiones síncrona y asíncrona.
+
 # Listar docentes
 
-def get_docentes(db: Session):
-    result = db.execute(text("""
-        SELECT u.id_usuario AS id_docente, u.nombre 
-        FROM Usuarios u
-        JOIN Docente d ON u.id_usuario = d.id_docente;
-    """))
-    return result.fetchall()
+SELECT_DOCENTES = """
+    SELECT u.id_usuario AS id_docente, u.nombre
+    FROM Usuarios u
+    JOIN Docente d ON u.id_usuario = d.id_docente
+"""
+
+
+def _consulta_docentes(limite: int, cursor: str = None, id_asignatura: int = None):
+    condiciones, params = [], {}
+    posicion = paginacion.decodificar_cursor(cursor, "id")
+    if posicion:
+        condiciones.append("u.id_usuario > :despues")
+        params["despues"] = posicion["id"]
+    if id_asignatura is not None:
+        condiciones.append(
+            "EXISTS (SELECT 1 FROM Asignaturas a WHERE a.id_docente = u.id_usuario AND a.id_asignatura = :id_asignatura)"
+        )
+        params["id_asignatura"] = id_asignatura
+    return paginacion.consulta(SELECT_DOCENTES, condiciones, "u.id_usuario", params, limite)
+
+
+def _formatear_docentes(rows):
+    return [{"id": row.id_docente, "nombre": row.nombre} for row in rows]
+
+
+def _pagina_docentes(filas, limite):
+    return paginacion.pagina(filas, limite, lambda f: {"id": f.id_docente}, _formatear_docentes)
+
+
+def get_docentes(db: Session, limite: int, cursor: str = None, id_asignatura: int = None):
+    consulta, params = _consulta_docentes(limite, cursor, id_asignatura)
+    return cache_entidades.obtener(
+        "docentes", (limite, cursor, id_asignatura),
+        lambda: _pagina_docentes(db.execute(consulta, params).fetchall(), limite),
+    )
+
+
+def ids_docentes_por_nombre(db: Session, nombre_docente: str, exacto: bool = True):
+    indice_docentes.asegurar(db)
+    return indice_docentes.resolver(nombre_docente, exacto=exacto)
+
+
+def buscar_docentes(db: Session, consulta: str, limite: int = 10):
+    indice_docentes.asegurar(db)
+    return indice_docentes.buscar(consulta, limite)
 
 # Listar usuarios
 
+SELECT_USUARIOS = """
+    SELECT id_usuario, nombre, email, rol, fecha_creacion
+    FROM Usuarios
+"""
+
+
+def _consulta_usuarios(limite: int, cursor: str = None, rol: str = None, desde=None, hasta=None):
+    condiciones, params = [], {}
+    posicion = paginacion.decodificar_cursor(cursor, "id")
+    if posicion:
+        condiciones.append("id_usuario > :despues")
+        params["despues"] = posicion["id"]
+    if rol:
+        condiciones.append("rol = :rol")
+        params["rol"] = rol
+    if desde:
+        condiciones.append("fecha_creacion >= :desde")
+        params["desde"] = desde
+    if hasta:
+        condiciones.append("fecha_creacion < :hasta")
+        params["hasta"] = hasta
+    return paginacion.consulta(SELECT_USUARIOS, condiciones, "id_usuario", params, limite)
+
+
+def _pagina_usuarios(filas, limite):
+    return paginacion.pagina(filas, limite, lambda f: {"id": f.id_usuario}, _formatear_usuarios)
+
 
-def get_todos_los_usuarios(db: Session):
-    result = db.execute(text("CALL usuarios_sin_contraseña();"))
-    usuarios = result.fetchall()
+def get_todos_los_usuarios(db: Session, limite: int, cursor: str = None, rol: str = None, desde=None, hasta=None):
+    consulta, params = _consulta_usuarios(limite, cursor, rol, desde, hasta)
+    return _pagina_usuarios(db.execute(consulta, params).fetchall(), limite)
+
+
+def _formatear_usuarios(usuarios):
     usuarios_list = [
         {
             "id_usuario": row[0],
@@ -336,11 +554,43 @@ def get_todos_los_usuarios(db: Session):
 
 # Listar asignaturas
 
+SELECT_ASIGNATURAS = """
+    SELECT
+        a.id_asignatura,
+        a.nombre_asignatura,
+        a.creditos,
+        u.id_usuario AS id_docente,
+        u.nombre     AS nombre_docente
+    FROM Asignaturas a
+    LEFT JOIN Usuarios u ON a.id_docente = u.id_usuario
+"""
+
+
+def _consulta_asignaturas(limite: int, cursor: str = None, id_docente: int = None):
+    condiciones, params = [], {}
+    posicion = paginacion.decodificar_cursor(cursor, "id")
+    if posicion:
+        condiciones.append("a.id_asignatura > :despues")
+        params["despues"] = posicion["id"]
+    if id_docente is not None:
+        condiciones.append("a.id_docente = :id_docente")
+        params["id_docente"] = id_docente
+    return paginacion.consulta(SELECT_ASIGNATURAS, condiciones, "a.id_asignatura", params, limite)
+
+
+def _pagina_asignaturas(filas, limite):
+    return paginacion.pagina(filas, limite, lambda f: {"id": f.id_asignatura}, _formatear_asignaturas)
+
+
+def get_asignaturas_con_docentes(db, limite: int, cursor: str = None, id_docente: int = None):
+    consulta, params = _consulta_asignaturas(limite, cursor, id_docente)
+    return cache_entidades.obtener(
+        "asignaturas", (limite, cursor, id_docente),
+        lambda: _pagina_asignaturas(db.execute(consulta, params).fetchall(), limite),
+    )
+
 
-def get_asignaturas_con_docentes(db):
-    result = db.execute(text("CALL ObtenerAsignaturasConDocentes();"))
-    # Esto trae todos los resultados del procedimiento
-    asignaturas = result.fetchall()
+def _formatear_asignaturas(asignaturas):
     # Opcional: convertir a lista de dicts para que sea más fácil manejar
     asignaturas_list = [
         {
@@ -357,18 +607,71 @@ def get_asignaturas_con_docentes(db):
 
 # Comentarios por docente
 
-def get_comentarios_por_docente(db: Session, nombre_docente: str):
-    query = text("""
-        SELECT asignatura, comentario, fecha_creacion, sentimiento
-        FROM VistaComentariosPorDocente
-        WHERE nombre_docente = :nombre_docente
-    """)
-    result = db.execute(query, {"nombre_docente": nombre_docente})
-    rows = result.fetchall()
+# Misma salida que VistaComentariosPorDocente, pero filtrando por id_docente.
+# Del más reciente al más antiguo; usa idx_comentarios_docente_fecha
+SELECT_COMENTARIOS_POR_DOCENTE = """
+    SELECT c.id_comentario, a.nombre_asignatura AS asignatura, c.comentario, c.fecha_creacion, c.sentimiento
+    FROM Comentarios c
+    JOIN Asignaturas a ON c.id_asignatura = a.id_asignatura
+"""
+
+
+def _consulta_comentarios_docente(ids, limite: int, cursor: str = None, sentimiento: str = None,
+                                  id_asignatura: int = None, desde=None, hasta=None):
+    condiciones, params = ["c.id_docente IN :ids"], {"ids": ids}
+    posicion = paginacion.decodificar_cursor(cursor, "fecha", "id")
+    if posicion:
+        condiciones.append(
+            "(c.fecha_creacion < :fecha OR (c.fecha_creacion = :fecha AND c.id_comentario < :despues))"
+        )
+        try:
+            params["fecha"] = datetime.fromisoformat(posicion["fecha"])
+        except (TypeError, ValueError):
+            raise HTTPException(status_code=400, detail="Cursor inválido")
+        params["despues"] = posicion["id"]
+    if sentimiento == "pendiente":
+        condiciones.append("c.sentimiento IS NULL")
+    elif sentimiento:
+        condiciones.append("c.sentimiento = :sentimiento")
+        params["sentimiento"] = sentimiento
+    if id_asignatura is not None:
+        condiciones.append("c.id_asignatura = :id_asignatura")
+        params["id_asignatura"] = id_asignatura
+    if desde:
+        condiciones.append("c.fecha_creacion >= :desde")
+        params["desde"] = desde
+    if hasta:
+        condiciones.append("c.fecha_creacion < :hasta")
+        params["hasta"] = hasta
+    consulta, params = paginacion.consulta(
+        SELECT_COMENTARIOS_POR_DOCENTE, condiciones, "c.fecha_creacion DESC, c.id_comentario DESC", params, limite
+    )
+    return consulta.bindparams(bindparam("ids", expanding=True)), params
+
 
+def _pagina_comentarios_docente(filas, limite):
+    return paginacion.pagina(
+        filas, limite,
+        lambda f: {"fecha": f.fecha_creacion.isoformat(), "id": f.id_comentario},
+        _formatear_comentarios_docente
+    )
+
+
+def get_comentarios_por_docente(db: Session, nombre_docente: str, limite: int, cursor: str = None, **filtros):
+    # Coincidencia exacta del nombre, sin distinguir tildes ni mayúsculas
+    indice_docentes.asegurar(db)
+    ids = indice_docentes.resolver(nombre_docente, exacto=True)
+    if not ids:
+        return _pagina_comentarios_docente([], limite)
+    consulta, params = _consulta_comentarios_docente(ids, limite, cursor, **filtros)
+    return _pagina_comentarios_docente(db.execute(consulta, params).fetchall(), limite)
+
+
+def _formatear_comentarios_docente(rows):
     comentarios = []
     for row in rows:
         comentarios.append({
+            "id_comentario": row.id_comentario,
             "asignatura": row.asignatura,
             "comentario": row.comentario,
             "fecha_creacion": row.fecha_creacion,
@@ -380,29 +683,13 @@ def get_comentarios_por_docente(db: Session, nombre_docente: str):
 # Crear un comentario
 def create_comentario(db: Session, comentario):
     try:
-        # Analiza el sentimiento antes de la inserción
-        sentimiento = chat_bot(comentario.comentario, comentario.promedio)
-
-        db.execute(text("""
-            CALL InsertarComentario(:idEst, :idDoc, :idAsig, :comentario, :sentimiento, :promedio)
-        """), {
-            "idEst": comentario.id_estudiante,
-            "idDoc": comentario.id_docente,
-            "idAsig": comentario.id_asignatura,
-            "comentario": comentario.comentario,
-            "sentimiento": sentimiento,
-            "promedio": comentario.promedio
-        })
+        # Se guarda sin sentimiento; el análisis corre en segundo plano (ver analisis.py)
+        result = db.execute(QUERY_INSERTAR_COMENTARIO, _parametros_comentario(comentario))
+        id_comentario = result.fetchone().id_comentario
         db.commit()
 
-        return {
-            "id_estudiante": comentario.id_estudiante,
-            "id_docente": comentario.id_docente,
-            "id_asignatura": comentario.id_asignatura,
-            "comentario": comentario.comentario,
-            "sentimiento": sentimiento,
-            "promedio": comentario.promedio
-        }
+        cola_analisis.encolar(id_comentario)
+        return _formatear_comentario_creado(id_comentario, comentario)
 
     except DBAPIError as e:
         db.rollback()
@@ -410,12 +697,176 @@ def create_comentario(db: Session, comentario):
         raise HTTPException(status_code=400, detail=error_msg)
 
 
-def update_comentario(db: Session, comentario_id: int, comentario_update: ComentarioUpdate):
+QUERY_INSERTAR_COMENTARIO = text("""
+    CALL InsertarComentario(:idEst, :idDoc, :idAsig, :comentario, :sentimiento, :promedio)
+""")
+
+
+def _parametros_comentario(comentario):
+    return {
+        "idEst": comentario.id_estudiante,
+        "idDoc": comentario.id_docente,
+        "idAsig": comentario.id_asignatura,
+        "comentario": comentario.comentario,
+        "sentimiento": None,
+        "promedio": comentario.promedio
+    }
+
+
+def _formatear_comentario_creado(id_comentario, comentario):
+    return {
+        "id_comentario": id_comentario,
+        "id_estudiante": comentario.id_estudiante,
+        "id_docente": comentario.id_docente,
+        "id_asignatura": comentario.id_asignatura,
+        "comentario": comentario.comentario,
+        "sentimiento": None,
+        "estado_analisis": "pendiente",
+        "promedio": comentario.promedio
+    }
+
+
+# Carga masiva de comentarios
+
+def _clasificar_error_bd(error) -> Dict[str, str]:
+    """Traduce un error de MySQL a un tipo de error por fila."""
+    mensaje = str(error.orig) if hasattr(error, "orig") else str(error)
+    codigo = error.orig.args[0] if hasattr(error, "orig") and getattr(error.orig, "args", None) else None
+    match = re.search(r"(?:1644|45000), '(.+?)'", mensaje)
+    if codigo == 1062 or (match and "Ya existe" in match.group(1)):
+        tipo = "duplicado"
+    elif codigo in (1216, 1452):
+        tipo = "fk_invalida"
+    elif codigo == 1048 or (match and "nulos" in match.group(1)):
+        tipo = "campos_nulos"
+    else:
+        tipo = "error_bd"
+    return {"tipo": tipo, "detalle": match.group(1) if match else mensaje}
+
+
+def _ids_existentes(db: Session, consulta: str, ids) -> set:
+    if not ids:
+        return set()
+    query = text(consulta).bindparams(bindparam("ids", expanding=True))
+    return {fila[0] for fila in db.execute(query, {"ids": list(ids)})}
+
+
+def insertar_comentarios_masivo(db: Session, filas, vistos: set) -> List[Dict[str, Any]]:
+    """Inserta un bloque de filas [(número, datos, error)] en una sola transacción.
+
+    Las filas inválidas (campos nulos, llaves foráneas inexistentes o
+    comentarios duplicados) se reportan sin abortar el resto. ``vistos``
+    acumula las combinaciones estudiante/docente/asignatura ya aceptadas en
+    bloques anteriores de la misma carga.
+    """
+    resultados = {}
+    candidatas = []
+
+    for numero, datos, error in filas:
+        if error:
+            resultados[numero] = {"fila": numero, "estado": "error", "tipo": "formato", "detalle": error}
+            continue
+        faltantes = [campo for campo in ("id_estudiante", "id_docente", "id_asignatura", "comentario", "promedio")
+                     if datos.get(campo) in (None, "")]
+        if faltantes:
+            resultados[numero] = {"fila": numero, "estado": "error", "tipo": "campos_nulos",
+                                  "detalle": f"Campos vacíos: {', '.join(faltantes)}"}
+            continue
+        try:
+            comentario = ComentarioCreate(**datos)
+        except ValidationError as e:
+            resultados[numero] = {"fila": numero, "estado": "error", "tipo": "formato",
+                                  "detalle": "; ".join(err["msg"] for err in e.errors())}
+            continue
+        if not 1 <= comentario.promedio <= 5:
+            resultados[numero] = {"fila": numero, "estado": "error", "tipo": "formato",
+                                  "detalle": "El promedio debe estar entre 1 y 5"}
+            continue
+        candidatas.append((numero, comentario))
+
+    # Validación de llaves foráneas y duplicados con una consulta por tabla para todo el bloque
+    usuarios = _ids_existentes(
+        db, "SELECT id_usuario FROM Usuarios WHERE id_usuario IN :ids",
+        {c.id_estudiante for _, c in candidatas} | {c.id_docente for _, c in candidatas}
+    )
+    asignaturas = _ids_existentes(
+        db, "SELECT id_asignatura FROM Asignaturas WHERE id_asignatura IN :ids",
+        {c.id_asignatura for _, c in candidatas}
+    )
+    existentes = set()
+    if candidatas:
+        query = text("""
+            SELECT id_estudiante, id_docente, id_asignatura
+            FROM Comentarios
+            WHERE id_estudiante IN :estudiantes
+        """).bindparams(bindparam("estudiantes", expanding=True))
+        existentes = {
+            tuple(fila) for fila in db.execute(query, {"estudiantes": list({c.id_estudiante for _, c in candidatas})})
+        }
+
+    validas = []
+    for numero, comentario in candidatas:
+        triple = (comentario.id_estudiante, comentario.id_docente, comentario.id_asignatura)
+        if comentario.id_estudiante not in usuarios or comentario.id_docente not in usuarios \
+                or comentario.id_asignatura not in asignaturas:
+            resultados[numero] = {"fila": numero, "estado": "error", "tipo": "fk_invalida",
+                                  "detalle": "Estudiante, docente o asignatura inexistente"}
+        elif triple in existentes or triple in vistos:
+            resultados[numero] = {"fila": numero, "estado": "error", "tipo": "duplicado",
+                                  "detalle": "Ya existe un comentario de este estudiante para esta asignatura y docente."}
+        else:
+            vistos.add(triple)
+            validas.append((numero, comentario))
+
+    if validas:
+        try:
+            valores = []
+            parametros = {}
+            for i, (_, c) in enumerate(validas):
+                valores.append(f"(:est{i}, :doc{i}, :asig{i}, :com{i}, :prom{i})")
+                parametros.update({
+                    f"est{i}": c.id_estudiante, f"doc{i}": c.id_docente, f"asig{i}": c.id_asignatura,
+                    f"com{i}": c.comentario, f"prom{i}": c.promedio
+                })
+            db.execute(text(
+                "INSERT INTO Comentarios (id_estudiante, id_docente, id_asignatura, comentario, promedio) VALUES "
+                + ", ".join(valores)
+            ), parametros)
+            # En un INSERT de varias filas los ids son consecutivos a partir de LAST_INSERT_ID()
+            primer_id = db.execute(text("SELECT LAST_INSERT_ID()")).scalar()
+            db.commit()
+            for i, (numero, _) in enumerate(validas):
+                resultados[numero] = {"fila": numero, "estado": "ok", "id_comentario": primer_id + i}
+
+        except DBAPIError:
+            # Algo cambió entre la validación y la inserción: se inserta fila por fila
+            db.rollback()
+            for numero, c in validas:
+                try:
+                    with db.begin_nested():
+                        fila = db.execute(text("""
+                            CALL InsertarComentario(:idEst, :idDoc, :idAsig, :comentario, NULL, :promedio)
+                        """), {
+                            "idEst": c.id_estudiante, "idDoc": c.id_docente, "idAsig": c.id_asignatura,
+                            "comentario": c.comentario, "promedio": c.promedio
+                        }).fetchone()
+                    resultados[numero] = {"fila": numero, "estado": "ok", "id_comentario": fila.id_comentario}
+                except DBAPIError as e:
+                    resultados[numero] = {"fila": numero, "estado": "error", **_clasificar_error_bd(e)}
+            db.commit()
+
+        for numero, _ in validas:
+            if resultados[numero]["estado"] == "ok":
+                cola_analisis.encolar(resultados[numero]["id_comentario"])
+
+    return [resultados[numero] for numero in sorted(resultados)]
 
-    sentimiento = chat_bot(comentario_update.comentario)
 
+def update_comentario(db: Session, comentario_id: int, comentario_update: ComentarioUpdate):
+
+    # El sentimiento queda pendiente y se vuelve a analizar en segundo plano
     db.execute(text("""
-        CALL ActualizarComentario(:id, :id_est, :id_doc, :id_asig, :id_eval, :comentario)
+        CALL ActualizarComentario(:id, :id_est, :id_doc, :id_asig, :id_eval, :comentario, :sentimiento)
     """), {
         "id": comentario_id,
         "id_est": comentario_update.id_estudiante,
@@ -423,9 +874,11 @@ def update_comentario(db: Session, comentario_id: int, comentario_update: Coment
         "id_asig": comentario_update.id_asignatura,
         "id_eval": comentario_update.id_evaluacion,
         "comentario": comentario_update.comentario,
-        "sentimiento": sentimiento
+        "sentimiento": None
     })
     db.commit()
+
+    cola_analisis.encolar(comentario_id)
     return {"message": "Comentario actualizado con éxito"}
 
 
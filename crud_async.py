@@ -0,0 +1,169 @@
+"""Versiones asíncronas (AsyncSession + aiomysql) de las funciones de crud.py
+usadas en las rutas de lectura, el login y la creación de comentarios.
+
+Ejecutan las mismas consultas y reutilizan los _formatear_* de crud.py,
+así ambos modos devuelven exactamente las mismas respuestas.
+"""
+from sqlalchemy.exc import DBAPIError
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import Dict, Any
+from fastapi import HTTPException
+from analisis import cola_analisis
+from buscador_docentes import indice_docentes
+from cache_entidades import cache_entidades
+from sqlalchemy import text
+import crud
+
+
+# --------------------- Docentes por estudiante --------------------- #
+
+
+async def obtener_docentes_por_estudiante(db: AsyncSession, id_estudiante: int) -> Dict[str, Any]:
+    result = await db.execute(text("CALL docentes_por_estudiantes(:id_estudiante)"), {"id_estudiante": id_estudiante})
+    return crud._formatear_docentes_por_estudiante(id_estudiante, result.mappings().all())
+
+
+# --------------------- Login --------------------- #
+
+
+async def get_user_by_email(db: AsyncSession, email: str):
+    result = await db.execute(text("CALL obtener_usuario_por_email(:email)"), {"email": email})
+    return result.mappings().fetchone()
+
+
+async def actualizar_hash_contrasena(db: AsyncSession, user_id: int, anterior: str, nuevo_hash: str):
+    await db.execute(crud.QUERY_ACTUALIZAR_HASH, {"id": user_id, "anterior": anterior, "hash": nuevo_hash})
+    await db.commit()
+
+
+# --------------------- Resúmenes de sentimientos --------------------- #
+
+
+async def obtener_resumen_sentimientos(db: AsyncSession):
+    try:
+        resultados = (await db.execute(text("CALL resumen_sentimientos_global()"))).fetchall()
+        return crud._formatear_resumen_global(resultados)
+    except Exception as e:
+        raise Exception(f"Error al obtener resumen de sentimientos: {str(e)}")
+
+
+async def obtener_resumen_sentimientos_por_nombre(db: AsyncSession, nombre_docente: str):
+    await indice_docentes.asegurar_async(db)
+    ids = indice_docentes.resolver(nombre_docente)
+    if not ids:
+        return []
+    result = (await db.execute(crud.QUERY_RESUMEN_POR_DOCENTES, {"ids": ids})).fetchall()
+    return crud._formatear_resumen_docente(result)
+
+
+async def etag_resumen_sentimientos(db: AsyncSession) -> str:
+    return crud._etag_resumen_global((await db.execute(crud.QUERY_VERSION_RESUMEN)).scalar())
+
+
+async def etag_resumen_sentimientos_por_nombre(db: AsyncSession, nombre_docente: str) -> str:
+    await indice_docentes.asegurar_async(db)
+    ids = indice_docentes.resolver(nombre_docente)
+    return crud._etag_resumen_docentes(ids, (await db.execute(crud.QUERY_VERSIONES, {"ids": ids})).fetchall())
+
+
+# --------------------- Lecturas por id --------------------- #
+
+
+async def get_user(db: AsyncSession, user_id: int):
+    async def cargar():
+        result = await db.execute(text("CALL LeerUsuario(:id)"), {"id": user_id})
+        return crud._fila_a_dict(result.fetchone())
+
+    return await cache_entidades.obtener_async("usuario", user_id, cargar)
+
+
+async def get_asignatura(db: AsyncSession, asignatura_id: int):
+    async def cargar():
+        result = await db.execute(text("CALL LeerAsignatura(:id)"), {"id": asignatura_id})
+        return crud._fila_a_dict(result.fetchone())
+
+    return await cache_entidades.obtener_async("asignatura", asignatura_id, cargar)
+
+
+async def get_evaluacion(db: AsyncSession, evaluacion_id: int):
+    async def cargar():
+        result = await db.execute(text("CALL LeerEvaluacion(:id)"), {"id": evaluacion_id})
+        return crud._fila_a_dict(result.fetchone())
+
+    return await cache_entidades.obtener_async("evaluacion", evaluacion_id, cargar)
+
+
+async def get_comentario(db: AsyncSession, comentario_id: int):
+    result = await db.execute(text("CALL LeerComentario(:id_comentario)"), {"id_comentario": comentario_id})
+    return crud._formatear_comentario(result.fetchone())
+
+
+async def get_estado_analisis(db: AsyncSession, comentario_id: int):
+    result = await db.execute(text("CALL EstadoAnalisisComentario(:id_comentario)"), {"id_comentario": comentario_id})
+    row = result.mappings().fetchone()
+    return dict(row) if row else None
+
+
+# --------------------- Listados --------------------- #
+
+
+async def get_docentes(db: AsyncSession, limite: int, cursor: str = None, id_asignatura: int = None):
+    consulta, params = crud._consulta_docentes(limite, cursor, id_asignatura)
+
+    async def cargar():
+        return crud._pagina_docentes((await db.execute(consulta, params)).fetchall(), limite)
+
+    return await cache_entidades.obtener_async("docentes", (limite, cursor, id_asignatura), cargar)
+
+
+async def get_todos_los_usuarios(db: AsyncSession, limite: int, cursor: str = None, rol: str = None,
+                                 desde=None, hasta=None):
+    consulta, params = crud._consulta_usuarios(limite, cursor, rol, desde, hasta)
+    return crud._pagina_usuarios((await db.execute(consulta, params)).fetchall(), limite)
+
+
+async def get_asignaturas_con_docentes(db: AsyncSession, limite: int, cursor: str = None, id_docente: int = None):
+    consulta, params = crud._consulta_asignaturas(limite, cursor, id_docente)
+
+    async def cargar():
+        return crud._pagina_asignaturas((await db.execute(consulta, params)).fetchall(), limite)
+
+    return await cache_entidades.obtener_async("asignaturas", (limite, cursor, id_docente), cargar)
+
+
+async def buscar_docentes(db: AsyncSession, consulta: str, limite: int = 10):
+    await indice_docentes.asegurar_async(db)
+    return indice_docentes.buscar(consulta, limite)
+
+
+async def ids_docentes_por_nombre(db: AsyncSession, nombre_docente: str, exacto: bool = True):
+    await indice_docentes.asegurar_async(db)
+    return indice_docentes.resolver(nombre_docente, exacto=exacto)
+
+
+async def get_comentarios_por_docente(db: AsyncSession, nombre_docente: str, limite: int, cursor: str = None,
+                                     **filtros):
+    await indice_docentes.asegurar_async(db)
+    ids = indice_docentes.resolver(nombre_docente, exacto=True)
+    if not ids:
+        return crud._pagina_comentarios_docente([], limite)
+    consulta, params = crud._consulta_comentarios_docente(ids, limite, cursor, **filtros)
+    return crud._pagina_comentarios_docente((await db.execute(consulta, params)).fetchall(), limite)
+
+
+# --------------------- Comentarios --------------------- #
+
+
+async def create_comentario(db: AsyncSession, comentario):
+    try:
+        result = await db.execute(crud.QUERY_INSERTAR_COMENTARIO, crud._parametros_comentario(comentario))
+        id_comentario = result.fetchone().id_comentario
+        await db.commit()
+
+        cola_analisis.encolar(id_comentario)
+        return crud._formatear_comentario_creado(id_comentario, comentario)
+
+    except DBAPIError as e:
+        await db.rollback()
+        error_msg = str(e.orig) if hasattr(e, 'orig') else str(e)
+        raise HTTPException(status_code=400, detail=error_msg)
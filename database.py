@@ -1,7 +1,15 @@
 from sqlalchemy.ext.declarative import declarative_base
+from sqlalchemy.pool import QueuePool, AsyncAdaptedQueuePool
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
 from sqlalchemy.orm import sessionmaker
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event
+from metricas import Histograma
+from instrumentacion import medir_consultas
+from perfilador_sql import SQL_PERFILADOR, perfilador_sql
 from dotenv import load_dotenv
+import threading
+import time
+import ssl
 import os
 
 # Cargar variables desde .env
@@ -11,24 +19,165 @@ load_dotenv()
 DB_URL = os.getenv("DATABASE_URL")
 if DB_URL.startswith("mysql://"):
     DB_URL = DB_URL.replace("mysql://", "mysql+pymysql://", 1)
-print("DATABASE_URL cargada:", DB_URL)
 
 
+# Parámetros del pool de conexiones. Conviene que DB_POOL_SIZE + DB_MAX_OVERFLOW
+# cubra los hilos que usan la base a la vez: threadpool de Starlette (40) y
+# ANALISIS_WORKERS, por cada worker de uvicorn.
+POOL_CONFIG = {
+    "pool_size": int(os.getenv("DB_POOL_SIZE", "10")),
+    "max_overflow": int(os.getenv("DB_MAX_OVERFLOW", "20")),
+    "pool_timeout": float(os.getenv("DB_POOL_TIMEOUT", "30")),
+    # Recicla las conexiones antes de que el servidor las cierre por inactividad
+    "pool_recycle": int(os.getenv("DB_POOL_RECYCLE", "1800")),
+    # Verifica la conexión al tomarla del pool y la reemplaza si está rota
+    "pool_pre_ping": os.getenv("DB_POOL_PRE_PING", "true").lower() == "true",
+}
+
+
+class MetricasPool:
+    """Métricas de un pool: espera por conexión, latencia de conexión y eventos."""
+
+    def __init__(self):
+        self.espera = Histograma()
+        self.conexion = Histograma()
+        self._lock = threading.Lock()
+        self.checkouts = 0
+        self.conexiones_abiertas = 0
+        self.invalidadas = 0
+        self.timeouts = 0
+
+    def contar(self, campo: str):
+        with self._lock:
+            setattr(self, campo, getattr(self, campo) + 1)
+
+    def resumen(self, pool) -> dict:
+        with self._lock:
+            contadores = {
+                "checkouts": self.checkouts,
+                "conexiones_abiertas": self.conexiones_abiertas,
+                "invalidadas": self.invalidadas,
+                "timeouts": self.timeouts,
+            }
+        return {
+            "estado": {
+                "tamano": pool.size(),
+                "en_uso": pool.checkedout(),
+                "disponibles": pool.checkedin(),
+                "overflow": pool.overflow(),
+            },
+            "contadores": contadores,
+            "espera_conexion": self.espera.resumen(),
+            "latencia_conexion": self.conexion.resumen(),
+        }
+
+
+class _PoolInstrumentado:
+    """Mide cuánto espera cada checkout (incluye abrir una conexión nueva y el pre-ping).
+
+    Envuelve Pool.connect(), el método público que usa el engine para cada
+    conexión: los eventos del pool solo avisan cuando la conexión ya se entregó.
+    """
+
+    metricas: MetricasPool = None
+
+    def connect(self):
+        inicio = time.perf_counter()
+        try:
+            return super().connect()
+        except PoolTimeoutError:
+            self.metricas.contar("timeouts")
+            raise
+        finally:
+            self.metricas.espera.observar(time.perf_counter() - inicio)
+
+
+def _clase_pool(base, metricas):
+    return type(f"{base.__name__}Instrumentado", (_PoolInstrumentado, base), {"metricas": metricas})
+
+
+def instrumentar_engine(engine, metricas: MetricasPool):
+    @event.listens_for(engine, "do_connect")
+    def _conectar(dialect, conn_rec, cargs, cparams):
+        inicio = time.perf_counter()
+        conexion = dialect.connect(*cargs, **cparams)
+        metricas.conexion.observar(time.perf_counter() - inicio)
+        metricas.contar("conexiones_abiertas")
+        return conexion
+
+    @event.listens_for(engine, "checkout")
+    def _checkout(dbapi_conn, conn_rec, conn_proxy):
+        metricas.contar("checkouts")
+
+    @event.listens_for(engine, "invalidate")
+    def _invalidar(dbapi_conn, conn_rec, exception):
+        metricas.contar("invalidadas")
+
+
+metricas_pool = MetricasPool()
+
+
+# Argumentos de conexión de pymysql (también los usa herramientas/generar_datos.py)
+CONNECT_ARGS = {
+    "ssl": {
+        "check_hostname": False,
+        "ssl_mode": "REQUIRED",
+        # Esto desactiva la verificación estricta que está fallando
+        "fake_user_agent": "Mozilla/5.0" # A veces ayuda con proxies
+    }
+}
+
 # Crear el motor de la base de datos
 engine = create_engine(
     DB_URL,
-    connect_args={
-        "ssl": {
-            "check_hostname": False,
-            "ssl_mode": "REQUIRED",
-            # Esto desactiva la verificación estricta que está fallando
-            "fake_user_agent": "Mozilla/5.0" # A veces ayuda con proxies
-        }
-    }
+    poolclass=_clase_pool(QueuePool, metricas_pool),
+    **POOL_CONFIG,
+    connect_args=CONNECT_ARGS
 )
+instrumentar_engine(engine, metricas_pool)
+medir_consultas(engine, perfilador_sql if SQL_PERFILADOR else None)
 
 # Sesión de SQLAlchemy
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+
+# Modo de acceso a datos de las rutas: "sync" (pymysql en el threadpool) o
+# "async" (aiomysql en el event loop, ver rutas_async.py)
+DB_MODO = os.getenv("DB_MODO", "sync").lower()
+
+async_engine = None
+AsyncSessionLocal = None
+metricas_pool_async = MetricasPool()
+
+if DB_MODO == "async":
+    from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
+
+    # Mismo TLS que el motor síncrono: cifrado obligatorio sin verificar el certificado
+    contexto_ssl = ssl.create_default_context()
+    contexto_ssl.check_hostname = False
+    contexto_ssl.verify_mode = ssl.CERT_NONE
+
+    async_engine = create_async_engine(
+        DB_URL.replace("mysql+pymysql://", "mysql+aiomysql://", 1),
+        poolclass=_clase_pool(AsyncAdaptedQueuePool, metricas_pool_async),
+        **POOL_CONFIG,
+        connect_args={"ssl": contexto_ssl}
+    )
+    instrumentar_engine(async_engine.sync_engine, metricas_pool_async)
+    medir_consultas(async_engine.sync_engine, perfilador_sql if SQL_PERFILADOR else None)
+    AsyncSessionLocal = async_sessionmaker(async_engine, autoflush=False, expire_on_commit=False)
+
+
+async def get_async_db():
+    async with AsyncSessionLocal() as db:
+        yield db
+
+
+def estado_pools() -> dict:
+    pools = {"sync": metricas_pool.resumen(engine.pool)}
+    if async_engine is not None:
+        pools["async"] = metricas_pool_async.resumen(async_engine.sync_engine.pool)
+    return {"configuracion": POOL_CONFIG, "pools": pools}
+
 # Base declarativa para modelos
 Base = declarative_base()
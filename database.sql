@@ -1025,7 +1025,8 @@ CREATE TABLE IF NOT EXISTS Usuarios (
     email          VARCHAR(100)  UNIQUE NOT NULL,
     rol            ENUM('Administrador', 'Estudiante', 'Docente', 'Administrativo') NOT NULL,
     contrasena     VARCHAR(255)  NOT NULL,
-    fecha_creacion TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    fecha_creacion TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    INDEX idx_usuarios_rol (rol)
 );
 
 -- Tabla Docente
@@ -1078,12 +1079,16 @@ CREATE TABLE IF NOT EXISTS Evaluaciones (
     fecha_inicio  DATE NOT NULL,
     fecha_fin     DATE NOT NULL,
     estado        ENUM('Activo', 'Inactivo') DEFAULT 'Inactivo',
-    descripcion   TEXT
+    descripcion   TEXT,
+    -- Lo usa el trigger evitar_descripciones_duplicadas
+    INDEX idx_evaluaciones_descripcion (descripcion(255))
 );
 
 -- Tabla Comentarios
 -- CORRECCIÓN #5:  promedio cambiado de INT a DECIMAL(3,1)
 -- CORRECCIÓN #10: se agrega columna id_evaluacion (referenciada en procedimientos y vistas)
+-- estado_analisis: el sentimiento se calcula en segundo plano después de insertar
+-- origen_sentimiento: nivel que produjo la etiqueta (clasificador local, cache o modelo)
 CREATE TABLE IF NOT EXISTS Comentarios (
     id_comentario  INT AUTO_INCREMENT PRIMARY KEY,
     id_estudiante  INT,
@@ -1093,7 +1098,19 @@ CREATE TABLE IF NOT EXISTS Comentarios (
     promedio       DECIMAL(3,1) CHECK (promedio BETWEEN 1 AND 5),
     comentario     TEXT NOT NULL,
     sentimiento    ENUM('positivo', 'negativo', 'neutral'),
+    estado_analisis ENUM('pendiente', 'procesando', 'completado', 'error')
+                   NOT NULL DEFAULT 'pendiente',
+    origen_sentimiento ENUM('local', 'cache', 'llm'),
+    -- VERSION_PROMPT de chat/chat.py con que se analizó; NULL si es anterior a esta columna
+    version_analisis SMALLINT UNSIGNED,
+    -- Cuándo un worker lo pasó a 'procesando'; vencido el reclamo otro worker puede retomarlo
+    reclamado_en   TIMESTAMP NULL,
     fecha_creacion TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    INDEX idx_comentarios_estado_analisis (estado_analisis),
+    -- Un comentario por estudiante, asignatura y docente (lo consulta el trigger validar_comentario)
+    UNIQUE INDEX uq_comentarios_estudiante_asignatura_docente (id_estudiante, id_asignatura, id_docente),
+    -- Paginación de comentarios por docente, del más reciente al más antiguo
+    INDEX idx_comentarios_docente_fecha (id_docente, fecha_creacion, id_comentario),
     CONSTRAINT fk_comentario_estudiante
         FOREIGN KEY (id_estudiante)  REFERENCES Usuarios(id_usuario),
     CONSTRAINT fk_comentario_docente
@@ -1115,6 +1132,51 @@ CREATE TABLE IF NOT EXISTS Analisis_sentimientos (
         FOREIGN KEY (id_comentario) REFERENCES Comentarios(id_comentario)
 );
 
+-- Tabla Cache_sentimientos
+-- Resultados del modelo por texto normalizado + etiqueta del promedio,
+-- compartidos entre workers y persistentes entre reinicios
+CREATE TABLE IF NOT EXISTS Cache_sentimientos (
+    clave             CHAR(64) PRIMARY KEY,
+    etiqueta_promedio ENUM('positivo', 'negativo', 'neutral') NOT NULL,
+    sentimiento       ENUM('positivo', 'negativo', 'neutral') NOT NULL,
+    fecha_creacion    TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+
+-- Tabla Resumen_sentimientos
+-- Conteo de comentarios por (docente, asignatura, sentimiento), mantenido por
+-- los triggers de Comentarios; los resúmenes del dashboard leen de aquí en vez
+-- de recorrer todos los comentarios. Los id NULL se guardan como 0 y el
+-- sentimiento NULL (aún sin analizar) como 'pendiente'.
+CREATE TABLE IF NOT EXISTS Resumen_sentimientos (
+    id_docente    INT NOT NULL,
+    id_asignatura INT NOT NULL,
+    sentimiento   ENUM('positivo', 'negativo', 'neutral', 'pendiente') NOT NULL,
+    total         INT NOT NULL DEFAULT 0,
+    PRIMARY KEY (id_docente, id_asignatura, sentimiento),
+    INDEX idx_resumen_sentimiento (sentimiento)
+);
+
+-- Tabla Version_datos
+-- Contador de cambios por ámbito, usado para los ETag de la API: 'docente' sube
+-- con cada cambio en el resumen de ese docente (la versión del resumen global es
+-- la suma de todas) y 'catalogo' (id 0) con los cambios de nombres en Usuarios y
+-- Asignaturas. Un ámbito sin fila está en la versión 0.
+CREATE TABLE IF NOT EXISTS Version_datos (
+    ambito     VARCHAR(20) NOT NULL,
+    id_ambito  INT NOT NULL DEFAULT 0,
+    version    BIGINT UNSIGNED NOT NULL DEFAULT 0,
+    PRIMARY KEY (ambito, id_ambito)
+);
+
+-- Tabla Migraciones_esquema
+-- Migraciones de migraciones/ ya incluidas en el esquema (ver migrar.py)
+CREATE TABLE IF NOT EXISTS Migraciones_esquema (
+    version           CHAR(4) PRIMARY KEY,
+    nombre            VARCHAR(100) NOT NULL,
+    checksum          CHAR(64),
+    fecha_aplicacion  TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+
 -- Tabla Reportes
 CREATE TABLE IF NOT EXISTS Reportes (
     id_reporte        INT AUTO_INCREMENT PRIMARY KEY,
@@ -1122,6 +1184,16 @@ CREATE TABLE IF NOT EXISTS Reportes (
     fecha_generacion  TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
     contenido         TEXT,
     formato           ENUM('PDF', 'Excel'),
+    -- Generación en segundo plano (reportes.py); las filas antiguas quedan 'listo' sin archivo
+    id_semestre       INT NULL,
+    estado            ENUM('pendiente', 'generando', 'listo', 'error') NOT NULL DEFAULT 'listo',
+    clave             CHAR(64) NULL,
+    hash_contenido    CHAR(64) NULL,
+    ruta              VARCHAR(255) NULL,
+    tamano            INT UNSIGNED NULL,
+    error             VARCHAR(255) NULL,
+    fecha_finalizacion TIMESTAMP NULL,
+    INDEX idx_reportes_clave (clave, estado),
     CONSTRAINT fk_reporte_docente
         FOREIGN KEY (id_docente) REFERENCES Usuarios(id_usuario)
 );
@@ -1148,6 +1220,7 @@ CREATE TABLE IF NOT EXISTS MDS (
     id_docente    INT,
     id_asignatura INT,
     id_semestre   INT,
+    INDEX idx_mds_asignatura_docente (id_asignatura, id_docente),
     CONSTRAINT fk_mds_docente
         FOREIGN KEY (id_docente)    REFERENCES Docente(id_docente),
     CONSTRAINT fk_mds_asignatura
@@ -1161,6 +1234,7 @@ CREATE TABLE IF NOT EXISTS ME (
     id_me         INT AUTO_INCREMENT PRIMARY KEY,
     id_estudiante INT,
     id_asignatura INT,
+    INDEX idx_me_estudiante_asignatura (id_estudiante, id_asignatura),
     CONSTRAINT fk_me_estudiante
         FOREIGN KEY (id_estudiante) REFERENCES Estudiante(id_estudiante),
     CONSTRAINT fk_me_asignatura
@@ -1236,12 +1310,12 @@ INSERT INTO Evaluaciones (fecha_inicio, fecha_fin, estado, descripcion) VALUES
 -- CORRECCIÓN #5: promedio ahora es DECIMAL(3,1), admite valores como 4.5
 -- CORRECCIÓN #6: id_docente apunta a IDs en tabla Docente; id_estudiante a tabla Estudiante
 -- CORRECCIÓN #10: se incluye id_evaluacion
-INSERT INTO Comentarios (id_estudiante, id_docente, id_asignatura, id_evaluacion, comentario, sentimiento, promedio) VALUES
-(1, 3, 1, 1, 'Muy buena metodología.',             'positivo', 4.5),
-(2, 4, 2, 2, 'El docente explica con claridad.',   'positivo', 4.0),
-(1, 6, 3, 3, 'A veces las clases son confusas.',   'negativo', 2.8),
-(2, 7, 4, 4, 'Excelente manejo del tema.',         'positivo', 4.9),
-(1, 8, 5, 5, 'Podría mejorar la interacción.',     'neutral',  3.2);
+INSERT INTO Comentarios (id_estudiante, id_docente, id_asignatura, id_evaluacion, comentario, sentimiento, estado_analisis, version_analisis, promedio) VALUES
+(1, 3, 1, 1, 'Muy buena metodología.',             'positivo', 'completado', 1, 4.5),
+(2, 4, 2, 2, 'El docente explica con claridad.',   'positivo', 'completado', 1, 4.0),
+(1, 6, 3, 3, 'A veces las clases son confusas.',   'negativo', 'completado', 1, 2.8),
+(2, 7, 4, 4, 'Excelente manejo del tema.',         'positivo', 'completado', 1, 4.9),
+(1, 8, 5, 5, 'Podría mejorar la interacción.',     'neutral',  'completado', 1, 3.2);
 
 -- Análisis de Sentimientos
 INSERT INTO Analisis_sentimientos (id_comentario, sentimiento, resumen, puntuacion) VALUES
@@ -1365,6 +1439,22 @@ BEGIN
 END$$
 DELIMITER ;
 
+-- Reemplaza la contraseña guardada por su hash al iniciar sesión. Solo cambia la
+-- fila si todavía tiene el valor leído, por si otra petición ya la actualizó.
+DELIMITER $$
+CREATE PROCEDURE ActualizarHashContrasena(
+    IN p_id_usuario INT,
+    IN p_anterior   VARCHAR(255),
+    IN p_hash       VARCHAR(255)
+)
+BEGIN
+    UPDATE Usuarios
+    SET contrasena = p_hash
+    WHERE id_usuario = p_id_usuario
+      AND contrasena = p_anterior;
+END$$
+DELIMITER ;
+
 DELIMITER $$
 CREATE PROCEDURE EliminarUsuario(IN p_id INT)
 BEGIN
@@ -1481,10 +1571,14 @@ CREATE PROCEDURE InsertarComentario(
 )
 BEGIN
     INSERT INTO Comentarios
-        (id_estudiante, id_docente, id_asignatura, comentario, sentimiento, promedio)
+        (id_estudiante, id_docente, id_asignatura, comentario, sentimiento,
+         estado_analisis, promedio)
     VALUES
         (p_id_estudiante, p_id_docente, p_id_asignatura,
-         p_comentario, p_sentimiento, p_promedio);
+         p_comentario, p_sentimiento,
+         IF(p_sentimiento IS NULL, 'pendiente', 'completado'), p_promedio);
+    -- Devuelve el id para encolar el análisis de sentimiento
+    SELECT LAST_INSERT_ID() AS id_comentario;
 END$$
 DELIMITER ;
 
@@ -1500,7 +1594,8 @@ BEGIN
         id_evaluacion,
         comentario,
         fecha_creacion,
-        sentimiento
+        sentimiento,
+        estado_analisis
     FROM Comentarios
     WHERE id_comentario = p_id;
 END$$
@@ -1542,7 +1637,9 @@ BEGIN
         id_asignatura = p_id_asig,
         id_evaluacion = p_id_eval,
         comentario    = p_comentario,
-        sentimiento   = p_sentimiento
+        sentimiento   = p_sentimiento,
+        estado_analisis = IF(p_sentimiento IS NULL, 'pendiente', 'completado'),
+        origen_sentimiento = NULL
     WHERE id_comentario = p_id;
 END$$
 DELIMITER ;
@@ -1554,19 +1651,126 @@ BEGIN
 END$$
 DELIMITER ;
 
+-- Análisis de sentimiento en segundo plano
+DELIMITER $$
+CREATE PROCEDURE EstadoAnalisisComentario(IN p_id INT)
+BEGIN
+    SELECT id_comentario, sentimiento, estado_analisis, origen_sentimiento
+    FROM Comentarios
+    WHERE id_comentario = p_id;
+END$$
+DELIMITER ;
+
+DELIMITER $$
+CREATE PROCEDURE ComentariosPendientesAnalisis(IN p_limite INT, IN p_vencimiento INT)
+BEGIN
+    -- También los 'procesando' cuyo reclamo venció: el worker que los tomó murió o falló
+    SELECT id_comentario
+    FROM Comentarios
+    WHERE estado_analisis = 'pendiente'
+       OR (estado_analisis = 'procesando'
+           AND (reclamado_en IS NULL OR reclamado_en < NOW() - INTERVAL p_vencimiento SECOND))
+    ORDER BY id_comentario
+    LIMIT p_limite;
+END$$
+DELIMITER ;
+
+-- Marca el comentario como 'procesando' solo si sigue pendiente (o su reclamo
+-- venció), así dos workers no analizan el mismo comentario. Si no se reclamó,
+-- no devuelve filas.
+DELIMITER $$
+CREATE PROCEDURE ReclamarComentarioParaAnalisis(IN p_id INT, IN p_vencimiento INT)
+BEGIN
+    DECLARE v_reclamado INT DEFAULT 0;
+    UPDATE Comentarios
+    SET estado_analisis = 'procesando',
+        reclamado_en    = NOW()
+    WHERE id_comentario = p_id
+      AND (estado_analisis = 'pendiente'
+           OR (estado_analisis = 'procesando'
+               AND (reclamado_en IS NULL OR reclamado_en < NOW() - INTERVAL p_vencimiento SECOND)));
+    SET v_reclamado = ROW_COUNT();
+    SELECT id_comentario, comentario, promedio
+    FROM Comentarios
+    WHERE id_comentario = p_id
+      AND v_reclamado > 0;
+END$$
+DELIMITER ;
+
+-- Devuelve a 'pendiente' un comentario reclamado cuyo lote falló
+DELIMITER $$
+CREATE PROCEDURE LiberarComentarioAnalisis(IN p_id INT)
+BEGIN
+    UPDATE Comentarios
+    SET estado_analisis = 'pendiente',
+        reclamado_en    = NULL
+    WHERE id_comentario = p_id
+      AND estado_analisis = 'procesando';
+END$$
+DELIMITER ;
+
+-- Cache persistente de sentimientos
+DELIMITER $$
+CREATE PROCEDURE LeerCacheSentimiento(
+    IN p_clave        CHAR(64),
+    IN p_ttl_segundos INT
+)
+BEGIN
+    SELECT sentimiento
+    FROM Cache_sentimientos
+    WHERE clave = p_clave
+      AND fecha_creacion >= NOW() - INTERVAL p_ttl_segundos SECOND;
+END$$
+DELIMITER ;
+
+DELIMITER $$
+CREATE PROCEDURE GuardarCacheSentimiento(
+    IN p_clave       CHAR(64),
+    IN p_etiqueta    VARCHAR(20),
+    IN p_sentimiento VARCHAR(20)
+)
+BEGIN
+    INSERT INTO Cache_sentimientos (clave, etiqueta_promedio, sentimiento)
+    VALUES (p_clave, p_etiqueta, p_sentimiento)
+    ON DUPLICATE KEY UPDATE
+        sentimiento    = VALUES(sentimiento),
+        fecha_creacion = CURRENT_TIMESTAMP;
+END$$
+DELIMITER ;
+
+DELIMITER $$
+CREATE PROCEDURE GuardarSentimientoComentario(
+    IN p_id          INT,
+    IN p_sentimiento VARCHAR(20),
+    IN p_estado      VARCHAR(20),
+    IN p_origen      VARCHAR(10),
+    IN p_version     SMALLINT
+)
+BEGIN
+    UPDATE Comentarios
+    SET sentimiento        = p_sentimiento,
+        estado_analisis    = p_estado,
+        origen_sentimiento = p_origen,
+        version_analisis   = p_version
+    WHERE id_comentario = p_id;
+END$$
+DELIMITER ;
+
 -- Resumen de sentimientos global
 -- CORRECCIÓN #9: DELIMITER ; con espacio correcto
+-- Lee de Resumen_sentimientos: el costo depende del número de grupos, no de comentarios
 DELIMITER $$
 CREATE PROCEDURE resumen_sentimientos_global()
 BEGIN
     DECLARE total_count INT;
-    SELECT COUNT(*) INTO total_count FROM Comentarios;
+    SELECT SUM(total) INTO total_count FROM Resumen_sentimientos;
     SELECT
-        sentimiento,
-        COUNT(*) AS total,
-        ROUND((COUNT(*) / total_count) * 100, 2) AS porcentaje
-    FROM Comentarios
-    GROUP BY sentimiento;
+        NULLIF(sentimiento, 'pendiente') AS sentimiento,
+        SUM(total) AS total,
+        ROUND((SUM(total) / total_count) * 100, 2) AS porcentaje
+    FROM Resumen_sentimientos
+    GROUP BY sentimiento
+    HAVING SUM(total) > 0;
 END$$
 DELIMITER ;
 
@@ -1604,16 +1808,110 @@ BEGIN
         d.nombre     AS nombre_docente,
         a.id_asignatura,
         a.nombre_asignatura,
-        COUNT(c.id_comentario) AS total_comentarios,
-        SUM(CASE WHEN LOWER(c.sentimiento) = 'positivo' THEN 1 ELSE 0 END) AS positivos,
-        SUM(CASE WHEN LOWER(c.sentimiento) = 'neutral'  THEN 1 ELSE 0 END) AS neutrales,
-        SUM(CASE WHEN LOWER(c.sentimiento) = 'negativo' THEN 1 ELSE 0 END) AS negativos
-    FROM Comentarios c
-    JOIN Usuarios    d ON c.id_docente    = d.id_usuario
-    JOIN Asignaturas a ON c.id_asignatura = a.id_asignatura
+        SUM(r.total) AS total_comentarios,
+        SUM(CASE WHEN r.sentimiento = 'positivo' THEN r.total ELSE 0 END) AS positivos,
+        SUM(CASE WHEN r.sentimiento = 'neutral'  THEN r.total ELSE 0 END) AS neutrales,
+        SUM(CASE WHEN r.sentimiento = 'negativo' THEN r.total ELSE 0 END) AS negativos
+    FROM Resumen_sentimientos r
+    JOIN Usuarios    d ON r.id_docente    = d.id_usuario
+    JOIN Asignaturas a ON r.id_asignatura = a.id_asignatura
     WHERE d.rol = 'Docente'
       AND LOWER(d.nombre) LIKE CONCAT('%', LOWER(nombre_docente_input), '%')
-    GROUP BY d.id_usuario, d.nombre, a.id_asignatura, a.nombre_asignatura;
+    GROUP BY d.id_usuario, d.nombre, a.id_asignatura, a.nombre_asignatura
+    HAVING SUM(r.total) > 0;
+END$$
+DELIMITER ;
+
+-- Sube la versión de un ámbito de Version_datos
+DELIMITER $$
+CREATE PROCEDURE IncrementarVersionDatos(
+    IN p_ambito VARCHAR(20),
+    IN p_id     INT
+)
+BEGIN
+    INSERT INTO Version_datos (ambito, id_ambito, version)
+    VALUES (p_ambito, COALESCE(p_id, 0), 1)
+    ON DUPLICATE KEY UPDATE version = version + 1;
+END$$
+DELIMITER ;
+
+-- Mantenimiento de Resumen_sentimientos
+-- Suma p_delta al grupo; la llaman los triggers de Comentarios
+DELIMITER $$
+CREATE PROCEDURE AjustarResumenSentimientos(
+    IN p_id_docente    INT,
+    IN p_id_asignatura INT,
+    IN p_sentimiento   VARCHAR(20),
+    IN p_delta         INT
+)
+BEGIN
+    INSERT INTO Resumen_sentimientos (id_docente, id_asignatura, sentimiento, total)
+    VALUES (COALESCE(p_id_docente, 0), COALESCE(p_id_asignatura, 0),
+            COALESCE(p_sentimiento, 'pendiente'), p_delta)
+    ON DUPLICATE KEY UPDATE total = total + VALUES(total);
+
+    -- Solo la versión del docente: una fila global haría esperar a todas las escrituras de comentarios
+    CALL IncrementarVersionDatos('docente', p_id_docente);
+END$$
+DELIMITER ;
+
+-- Reconcilia Resumen_sentimientos con Comentarios y devuelve cuántos grupos
+-- estaban desfasados. Conviene ejecutarlo tras cargas que desactiven triggers
+-- o modificaciones manuales de la tabla.
+--
+-- No abre ni confirma transacciones: las controla quien lo llama. Una sola
+-- sentencia lee Comentarios y Resumen_sentimientos en la misma instantánea y
+-- calcula la diferencia de cada grupo; los triggers mantienen ambas tablas en
+-- la misma transacción, así que esa diferencia no cambia aunque entren
+-- comentarios mientras tanto y se suma con el mismo upsert que usan los
+-- triggers. Si no hay diferencias no se escribe nada. Con READ COMMITTED
+-- (crud.reconstruir_resumen_sentimientos) la lectura no bloquea Comentarios.
+DELIMITER $$
+CREATE PROCEDURE ReconstruirResumenSentimientos()
+BEGIN
+    DECLARE v_diferencias INT DEFAULT 0;
+
+    DROP TEMPORARY TABLE IF EXISTS tmp_resumen_diferencias;
+    CREATE TEMPORARY TABLE tmp_resumen_diferencias (
+        id_docente    INT NOT NULL,
+        id_asignatura INT NOT NULL,
+        sentimiento   VARCHAR(20) NOT NULL,
+        delta         INT NOT NULL,
+        PRIMARY KEY (id_docente, id_asignatura, sentimiento)
+    );
+
+    -- Conteo real menos el guardado, por grupo; incluye grupos ausentes y sobrantes
+    INSERT INTO tmp_resumen_diferencias (id_docente, id_asignatura, sentimiento, delta)
+    SELECT id_docente, id_asignatura, sentimiento, SUM(total)
+    FROM (
+        SELECT COALESCE(id_docente, 0) AS id_docente, COALESCE(id_asignatura, 0) AS id_asignatura,
+               COALESCE(sentimiento, 'pendiente') AS sentimiento, COUNT(*) AS total
+        FROM Comentarios
+        GROUP BY COALESCE(id_docente, 0), COALESCE(id_asignatura, 0), COALESCE(sentimiento, 'pendiente')
+        UNION ALL
+        SELECT id_docente, id_asignatura, sentimiento, -total
+        FROM Resumen_sentimientos
+    ) AS conteos
+    GROUP BY id_docente, id_asignatura, sentimiento
+    HAVING SUM(total) <> 0;
+
+    SELECT COUNT(*) INTO v_diferencias FROM tmp_resumen_diferencias;
+
+    IF v_diferencias > 0 THEN
+        INSERT INTO Resumen_sentimientos (id_docente, id_asignatura, sentimiento, total)
+        SELECT id_docente, id_asignatura, sentimiento, delta FROM tmp_resumen_diferencias
+        ON DUPLICATE KEY UPDATE total = total + VALUES(total);
+
+        -- Solo los ETag de los docentes afectados (el global se deriva de ellos)
+        INSERT INTO Version_datos (ambito, id_ambito, version)
+        SELECT DISTINCT 'docente', id_docente, 1 FROM tmp_resumen_diferencias
+        ON DUPLICATE KEY UPDATE version = version + 1;
+    END IF;
+
+    SELECT (SELECT COUNT(*) FROM Resumen_sentimientos WHERE total <> 0) AS grupos,
+           v_diferencias AS diferencias;
+
+    DROP TEMPORARY TABLE tmp_resumen_diferencias;
 END$$
 DELIMITER ;
 
@@ -1632,6 +1930,97 @@ BEGIN
 END$$
 DELIMITER ;
 
+-- Reportes generados en segundo plano (ver reportes.py). p_clave es el hash de
+-- los datos agregados y el formato: si ya hay un reporte listo, o uno en curso
+-- más reciente que p_vigencia segundos, con la misma clave, se devuelve ese.
+DELIMITER $$
+CREATE PROCEDURE SolicitarReporte(
+    IN p_id_docente  INT,
+    IN p_id_semestre INT,
+    IN p_formato     VARCHAR(10),
+    IN p_clave       CHAR(64),
+    IN p_contenido   TEXT,
+    IN p_vigencia    INT
+)
+BEGIN
+    DECLARE v_id INT DEFAULT NULL;
+
+    SELECT id_reporte INTO v_id
+    FROM Reportes
+    WHERE clave = p_clave
+      AND (estado = 'listo'
+           OR (estado IN ('pendiente', 'generando')
+               AND fecha_generacion >= NOW() - INTERVAL p_vigencia SECOND))
+    ORDER BY id_reporte DESC
+    LIMIT 1;
+
+    IF v_id IS NULL THEN
+        INSERT INTO Reportes (id_docente, id_semestre, contenido, formato, estado, clave)
+        VALUES (p_id_docente, p_id_semestre, p_contenido, p_formato, 'pendiente', p_clave);
+        SELECT LAST_INSERT_ID() AS id_reporte, 0 AS reutilizado;
+    ELSE
+        SELECT v_id AS id_reporte, 1 AS reutilizado;
+    END IF;
+END$$
+DELIMITER ;
+
+DELIMITER $$
+CREATE PROCEDURE ActualizarEstadoReporte(
+    IN p_id_reporte     INT,
+    IN p_estado         VARCHAR(20),
+    IN p_hash_contenido CHAR(64),
+    IN p_ruta           VARCHAR(255),
+    IN p_tamano         INT,
+    IN p_error          VARCHAR(255)
+)
+BEGIN
+    UPDATE Reportes
+    SET estado             = p_estado,
+        hash_contenido     = p_hash_contenido,
+        ruta               = p_ruta,
+        tamano             = p_tamano,
+        error              = p_error,
+        fecha_finalizacion = IF(p_estado IN ('listo', 'error'), NOW(), NULL)
+    WHERE id_reporte = p_id_reporte;
+END$$
+DELIMITER ;
+
+DELIMITER $$
+CREATE PROCEDURE ObtenerReporte(IN p_id_reporte INT)
+BEGIN
+    SELECT r.id_reporte, r.id_docente, u.nombre AS docente, r.id_semestre, s.nombre_semestre AS semestre,
+           r.formato, r.estado, r.hash_contenido, r.ruta, r.tamano, r.error,
+           r.fecha_generacion, r.fecha_finalizacion
+    FROM Reportes r
+    LEFT JOIN Usuarios u ON u.id_usuario  = r.id_docente
+    LEFT JOIN Semestre s ON s.id_semestre = r.id_semestre
+    WHERE r.id_reporte = p_id_reporte;
+END$$
+DELIMITER ;
+
+-- Sentimientos por asignatura de un docente en las fechas de un semestre
+DELIMITER $$
+CREATE PROCEDURE DatosReporteDocente(IN p_id_docente INT, IN p_id_semestre INT)
+BEGIN
+    SELECT a.id_asignatura,
+           a.nombre_asignatura              AS asignatura,
+           COUNT(*)                         AS total,
+           SUM(c.sentimiento = 'positivo')  AS positivos,
+           SUM(c.sentimiento = 'negativo')  AS negativos,
+           SUM(c.sentimiento = 'neutral')   AS neutrales,
+           SUM(c.sentimiento IS NULL)       AS pendientes,
+           ROUND(AVG(c.promedio), 2)        AS promedio
+    FROM Comentarios c
+    JOIN Semestre s     ON s.id_semestre   = p_id_semestre
+    JOIN Asignaturas a  ON a.id_asignatura = c.id_asignatura
+    WHERE c.id_docente = p_id_docente
+      AND c.fecha_creacion >= s.fecha_inicio
+      AND c.fecha_creacion <  s.fecha_final + INTERVAL 1 DAY
+    GROUP BY a.id_asignatura, a.nombre_asignatura
+    ORDER BY a.nombre_asignatura;
+END$$
+DELIMITER ;
+
 
 -- ============================================================
 -- TRIGGERS
@@ -1752,13 +2141,15 @@ END$$
 DELIMITER ;
 
 -- Evitar comentarios duplicados (mismo estudiante, docente y asignatura)
+-- Con @carga_masiva definida (herramientas/generar_datos.py) se omite la consulta;
+-- el índice único uq_comentarios_estudiante_asignatura_docente sigue rechazando duplicados
 DROP TRIGGER IF EXISTS validar_comentario;
 DELIMITER $$
 CREATE TRIGGER validar_comentario
 BEFORE INSERT ON Comentarios
 FOR EACH ROW
 BEGIN
-    IF EXISTS (
+    IF @carga_masiva IS NULL AND EXISTS (
         SELECT 1 FROM Comentarios
         WHERE id_asignatura = NEW.id_asignatura
           AND id_estudiante = NEW.id_estudiante
@@ -1881,6 +2272,96 @@ END$$
 DELIMITER ;
 
 
+-- Mantener Resumen_sentimientos al insertar, actualizar o eliminar comentarios.
+-- Las cargas masivas (@carga_masiva definida) no lo ajustan fila a fila: al
+-- terminar llaman a ReconstruirResumenSentimientos
+DELIMITER $$
+CREATE TRIGGER resumen_sentimientos_insert
+AFTER INSERT ON Comentarios
+FOR EACH ROW
+BEGIN
+    IF @carga_masiva IS NULL THEN
+        CALL AjustarResumenSentimientos(NEW.id_docente, NEW.id_asignatura, NEW.sentimiento, 1);
+    END IF;
+END$$
+DELIMITER ;
+
+DELIMITER $$
+CREATE TRIGGER resumen_sentimientos_update
+AFTER UPDATE ON Comentarios
+FOR EACH ROW
+BEGIN
+    -- El cambio de estado_analisis no mueve el conteo; solo docente, asignatura o sentimiento
+    IF NOT (OLD.id_docente    <=> NEW.id_docente
+        AND OLD.id_asignatura <=> NEW.id_asignatura
+        AND OLD.sentimiento   <=> NEW.sentimiento) THEN
+        CALL AjustarResumenSentimientos(OLD.id_docente, OLD.id_asignatura, OLD.sentimiento, -1);
+        CALL AjustarResumenSentimientos(NEW.id_docente, NEW.id_asignatura, NEW.sentimiento, 1);
+    END IF;
+END$$
+DELIMITER ;
+
+DELIMITER $$
+CREATE TRIGGER resumen_sentimientos_delete
+AFTER DELETE ON Comentarios
+FOR EACH ROW
+BEGIN
+    CALL AjustarResumenSentimientos(OLD.id_docente, OLD.id_asignatura, OLD.sentimiento, -1);
+END$$
+DELIMITER ;
+
+-- Los comentarios de ejemplo se insertaron antes de crear los triggers
+CALL ReconstruirResumenSentimientos();
+
+
+-- Versión del catálogo (nombres de docentes y asignaturas) para los ETag.
+-- Las altas no la suben: un usuario o una asignatura nuevos no aparecen en
+-- ningún resumen hasta tener comentarios, que ya suben la versión del docente,
+-- y así una carga de usuarios no espera por esta fila en cada INSERT
+DELIMITER $$
+CREATE TRIGGER version_catalogo_usuarios_update
+AFTER UPDATE ON Usuarios
+FOR EACH ROW
+BEGIN
+    -- Los resúmenes muestran el nombre y filtran por rol; cambiar la contraseña
+    -- (p. ej. el rehash del login) o el email no invalida los ETag
+    IF NOT (OLD.nombre <=> NEW.nombre AND OLD.rol <=> NEW.rol) THEN
+        CALL IncrementarVersionDatos('catalogo', 0);
+    END IF;
+END$$
+DELIMITER ;
+
+DELIMITER $$
+CREATE TRIGGER version_catalogo_usuarios_delete
+AFTER DELETE ON Usuarios
+FOR EACH ROW
+BEGIN
+    CALL IncrementarVersionDatos('catalogo', 0);
+END$$
+DELIMITER ;
+
+DELIMITER $$
+CREATE TRIGGER version_catalogo_asignaturas_update
+AFTER UPDATE ON Asignaturas
+FOR EACH ROW
+BEGIN
+    -- Los resúmenes solo muestran el nombre de la asignatura
+    IF NOT (OLD.nombre_asignatura <=> NEW.nombre_asignatura) THEN
+        CALL IncrementarVersionDatos('catalogo', 0);
+    END IF;
+END$$
+DELIMITER ;
+
+DELIMITER $$
+CREATE TRIGGER version_catalogo_asignaturas_delete
+AFTER DELETE ON Asignaturas
+FOR EACH ROW
+BEGIN
+    CALL IncrementarVersionDatos('catalogo', 0);
+END$$
+DELIMITER ;
+
+
 -- ============================================================
 -- VISTAS
 -- ============================================================
@@ -1895,4 +2376,26 @@ SELECT
 FROM Comentarios c
 JOIN Usuarios    u ON c.id_docente    = u.id_usuario
 JOIN Docente     d ON d.id_docente    = u.id_usuario
-JOIN Asignaturas a ON c.id_asignatura = a.id_asignatura;
\ No newline at end of file
+JOIN Asignaturas a ON c.id_asignatura = a.id_asignatura;
+
+
+-- ============================================================
+-- MIGRACIONES
+-- ============================================================
+
+-- Este script ya contiene los cambios de estas migraciones; se registran
+-- para que migrar.py no intente aplicarlas de nuevo
+INSERT IGNORE INTO Migraciones_esquema (version, nombre) VALUES
+('0001', 'analisis_y_cache_sentimientos'),
+('0002', 'resumen_sentimientos'),
+('0003', 'indices_validacion'),
+('0004', 'indices_paginacion'),
+('0005', 'version_datos'),
+('0006', 'hash_contrasenas'),
+('0007', 'version_analisis'),
+('0008', 'reportes_en_segundo_plano'),
+('0009', 'carga_masiva'),
+('0010', 'reclamo_analisis'),
+('0011', 'reconciliacion_resumen'),
+('0012', 'version_resumen_por_docente'),
+('0013', 'version_catalogo_sin_altas');
@@ -0,0 +1,117 @@
+"""Archivos PDF y Excel de los reportes de sentimientos por docente y semestre.
+
+Se ejecuta en los procesos del pool de reportes.py: recibe solo tipos simples
+(el dict de ``datos`` ya agregado por la base) y devuelve los bytes del
+archivo, sin tocar la base ni el disco. fpdf2 y openpyxl se importan en el
+primer uso para que el proceso de la API no los cargue.
+"""
+import io
+
+VERSION_PLANTILLA = 1
+
+COLUMNAS = (
+    ("asignatura", "Asignatura"),
+    ("total", "Total"),
+    ("positivos", "Positivos"),
+    ("negativos", "Negativos"),
+    ("neutrales", "Neutrales"),
+    ("pendientes", "Pendientes"),
+    ("promedio", "Promedio"),
+)
+
+EXTENSIONES = {"PDF": "pdf", "Excel": "xlsx"}
+TIPOS_CONTENIDO = {
+    "PDF": "application/pdf",
+    "Excel": "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+}
+
+
+def _porcentaje(parte, total):
+    return f"{parte * 100 / total:.1f}%" if total else "-"
+
+
+def _encabezado(datos):
+    semestre = datos["semestre"]
+    return [
+        ("Docente", datos["docente"]["nombre"]),
+        ("Semestre", f"{semestre['nombre']} ({semestre['fecha_inicio']} a {semestre['fecha_final']})"),
+        ("Comentarios", str(datos["totales"]["total"])),
+        ("Positivos", _porcentaje(datos["totales"]["positivos"], datos["totales"]["total"])),
+        ("Negativos", _porcentaje(datos["totales"]["negativos"], datos["totales"]["total"])),
+        ("Neutrales", _porcentaje(datos["totales"]["neutrales"], datos["totales"]["total"])),
+    ]
+
+
+def _latin1(valor) -> str:
+    # Las fuentes base del PDF solo cubren latin-1 (suficiente para el español)
+    texto = "-" if valor is None else str(valor)
+    return texto.encode("latin-1", "replace").decode("latin-1")
+
+
+def generar_pdf(datos) -> bytes:
+    from fpdf import FPDF
+    from fpdf.enums import XPos, YPos
+
+    pdf = FPDF(orientation="landscape")
+    pdf.set_title(_latin1(f"Reporte de sentimientos - {datos['docente']['nombre']}"))
+    pdf.add_page()
+    pdf.set_font("Helvetica", "B", 16)
+    pdf.cell(0, 10, "Reporte de sentimientos", new_x=XPos.LMARGIN, new_y=YPos.NEXT)
+
+    pdf.set_font("Helvetica", size=11)
+    for etiqueta, valor in _encabezado(datos):
+        pdf.cell(0, 7, _latin1(f"{etiqueta}: {valor}"), new_x=XPos.LMARGIN, new_y=YPos.NEXT)
+    pdf.ln(4)
+
+    if not datos["asignaturas"]:
+        pdf.cell(0, 8, "No hay comentarios en este semestre.")
+        return bytes(pdf.output())
+
+    pdf.set_font("Helvetica", size=10)
+    with pdf.table(col_widths=(90, 25, 25, 25, 25, 25, 25), text_align="CENTER") as tabla:
+        fila = tabla.row()
+        for _, titulo in COLUMNAS:
+            fila.cell(titulo)
+        for asignatura in datos["asignaturas"] + [{"asignatura": "Total", **datos["totales"]}]:
+            fila = tabla.row()
+            for clave, _ in COLUMNAS:
+                fila.cell(_latin1(asignatura.get(clave)))
+    return bytes(pdf.output())
+
+
+def generar_excel(datos) -> bytes:
+    from openpyxl import Workbook
+    from openpyxl.styles import Font
+
+    libro = Workbook()
+    hoja = libro.active
+    hoja.title = "Resumen"
+    hoja.append(["Reporte de sentimientos"])
+    hoja["A1"].font = Font(bold=True, size=14)
+    for etiqueta, valor in _encabezado(datos):
+        hoja.append([etiqueta, valor])
+    hoja.append([])
+
+    hoja.append([titulo for _, titulo in COLUMNAS])
+    for celda in hoja[hoja.max_row]:
+        celda.font = Font(bold=True)
+    for asignatura in datos["asignaturas"]:
+        hoja.append([asignatura[clave] for clave, _ in COLUMNAS])
+    hoja.append(["Total"] + [datos["totales"][clave] for clave, _ in COLUMNAS[1:]])
+    for celda in hoja[hoja.max_row]:
+        celda.font = Font(bold=True)
+
+    hoja.column_dimensions["A"].width = 45
+    for columna in "BCDEFG":
+        hoja.column_dimensions[columna].width = 12
+
+    salida = io.BytesIO()
+    libro.save(salida)
+    return salida.getvalue()
+
+
+GENERADORES = {"PDF": generar_pdf, "Excel": generar_excel}
+
+
+def generar(formato: str, datos) -> bytes:
+    return GENERADORES[formato](datos)
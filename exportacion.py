@@ -0,0 +1,123 @@
+"""Exportación en streaming de comentarios (NDJSON o CSV).
+
+Las filas se leen con un cursor del lado del servidor (stream_results usa el
+SSCursor de pymysql) y se escriben a medida que llegan, así la memoria no
+depende del tamaño del resultado y el primer byte sale de inmediato. El
+generador abre su propia conexión: la sesión de la petición se cierra antes
+de que termine la respuesta.
+"""
+import csv
+import io
+import json
+import os
+
+from fastapi.responses import StreamingResponse
+from sqlalchemy import bindparam, text
+
+from database import engine
+
+# Filas que se piden al servidor y se escriben por bloque
+EXPORTACION_BLOQUE = int(os.getenv("EXPORTACION_BLOQUE", "1000"))
+
+COLUMNAS = (
+    "id_comentario", "id_estudiante", "id_docente", "id_asignatura", "asignatura", "comentario",
+    "promedio", "sentimiento", "estado_analisis", "origen_sentimiento", "fecha_creacion",
+)
+
+TIPOS_CONTENIDO = {"ndjson": "application/x-ndjson", "csv": "text/csv; charset=utf-8"}
+
+SELECT_EXPORTACION = """
+    SELECT c.id_comentario, c.id_estudiante, c.id_docente, c.id_asignatura,
+           a.nombre_asignatura AS asignatura, c.comentario, c.promedio, c.sentimiento,
+           c.estado_analisis, c.origen_sentimiento, c.fecha_creacion
+    FROM Comentarios c
+    LEFT JOIN Asignaturas a ON c.id_asignatura = a.id_asignatura
+"""
+
+
+def consulta_exportacion(ids_docente=None, id_asignatura=None, sentimiento=None, desde=None, hasta=None):
+    condiciones, params = [], {}
+    if ids_docente is not None:
+        condiciones.append("c.id_docente IN :ids_docente")
+        params["ids_docente"] = list(ids_docente)
+    if id_asignatura is not None:
+        condiciones.append("c.id_asignatura = :id_asignatura")
+        params["id_asignatura"] = id_asignatura
+    if sentimiento == "pendiente":
+        condiciones.append("c.sentimiento IS NULL")
+    elif sentimiento:
+        condiciones.append("c.sentimiento = :sentimiento")
+        params["sentimiento"] = sentimiento
+    if desde:
+        condiciones.append("c.fecha_creacion >= :desde")
+        params["desde"] = desde
+    if hasta:
+        condiciones.append("c.fecha_creacion < :hasta")
+        params["hasta"] = hasta
+    where = f"WHERE {' AND '.join(condiciones)}" if condiciones else ""
+    consulta = text(f"{SELECT_EXPORTACION} {where} ORDER BY c.id_comentario")
+    if ids_docente is not None:
+        consulta = consulta.bindparams(bindparam("ids_docente", expanding=True))
+    return consulta, params
+
+
+def _valores(fila):
+    return [
+        valor.isoformat() if hasattr(valor, "isoformat")
+        else float(valor) if columna == "promedio" and valor is not None
+        else valor
+        for columna, valor in zip(COLUMNAS, fila)
+    ]
+
+
+def _bloques(consulta, params):
+    with engine.connect() as conexion:
+        resultado = conexion.execution_options(stream_results=True, max_row_buffer=EXPORTACION_BLOQUE).execute(
+            consulta, params
+        )
+        while True:
+            filas = resultado.fetchmany(EXPORTACION_BLOQUE)
+            if not filas:
+                break
+            yield filas
+
+
+def exportar_ndjson(consulta, params):
+    for filas in _bloques(consulta, params):
+        yield "".join(
+            json.dumps(dict(zip(COLUMNAS, _valores(fila))), ensure_ascii=False) + "\n" for fila in filas
+        ).encode("utf-8")
+
+
+def exportar_csv(consulta, params):
+    buffer = io.StringIO()
+    escritor = csv.writer(buffer)
+    # BOM para que Excel reconozca UTF-8; el encabezado sale antes de consultar
+    escritor.writerow(COLUMNAS)
+    yield ("\ufeff" + buffer.getvalue()).encode("utf-8")
+    for filas in _bloques(consulta, params):
+        buffer.seek(0)
+        buffer.truncate()
+        escritor.writerows(_valores(fila) for fila in filas)
+        yield buffer.getvalue().encode("utf-8")
+
+
+EXPORTADORES = {"ndjson": exportar_ndjson, "csv": exportar_csv}
+
+
+def filtrar_docentes(ids_por_nombre, id_docente):
+    """Combina los id resueltos por nombre (o None si no se filtró por nombre) con ?id_docente."""
+    if id_docente is None:
+        return ids_por_nombre
+    return [i for i in ids_por_nombre if i == id_docente] if ids_por_nombre is not None else [id_docente]
+
+
+def respuesta_exportacion(formato, ids_docente=None, id_asignatura=None, sentimiento=None, desde=None, hasta=None):
+    # Compartida por la ruta síncrona y la de rutas_async.py; el generador es síncrono
+    # y Starlette lo recorre en el threadpool en ambos modos
+    consulta, params = consulta_exportacion(ids_docente, id_asignatura, sentimiento, desde, hasta)
+    return StreamingResponse(
+        EXPORTADORES[formato](consulta, params),
+        media_type=TIPOS_CONTENIDO[formato],
+        headers={"Content-Disposition": f'attachment; filename="comentarios.{formato}"'},
+    )
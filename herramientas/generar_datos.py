@@ -0,0 +1,419 @@
+"""Genera datos sintéticos coherentes para probar la base a escala (10^4 a 10^7 comentarios).
+
+Crea docentes, estudiantes, asignaturas, MDS (una fila por asignatura y
+semestre existente), evaluaciones, matrículas (ME) y comentarios que
+respetan todas las llaves: cada estudiante comenta solo asignaturas en las
+que está matriculado, con el docente de la asignatura, una sola vez por
+(estudiante, asignatura, docente) y con una fecha dentro de un semestre.
+El sentimiento concuerda con el promedio y el texto.
+
+La carga va por bloques con LOAD DATA LOCAL INFILE (o INSERT de varias filas
+si el servidor no lo permite). La sesión define @carga_masiva, que hace que
+los triggers por fila de Comentarios, Usuarios y Asignaturas no consulten ni
+actualicen nada (migración 0009), y desactiva foreign_key_checks y
+unique_checks: los ids y las combinaciones ya son válidos por construcción.
+Al terminar reconstruye Resumen_sentimientos, sube la versión del catálogo
+y actualiza las estadísticas de las tablas.
+
+Los ids continúan después de los existentes, así que se puede ejecutar
+varias veces sobre la misma base. Para volver a los datos de ejemplo se
+recrea la base con database.sql.
+
+Uso:
+    python herramientas/generar_datos.py --comentarios 1000000
+    python herramientas/generar_datos.py --comentarios 10000000 --simular     # solo muestra el plan
+    python herramientas/generar_datos.py --comentarios 100000 --pendientes 0.1 --metodo insert
+"""
+import argparse
+import math
+import os
+import random
+import sys
+import tempfile
+import time
+import unicodedata
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import create_engine  # noqa: E402
+from sqlalchemy.pool import NullPool  # noqa: E402
+
+from chat.chat import VERSION_PROMPT  # noqa: E402
+
+DOMINIO = "@uniautonoma.edu.co"
+CONTRASENA = "sintetico123"
+
+# Errores de MySQL cuando LOAD DATA LOCAL está desactivado en el cliente o el servidor
+_ERRORES_LOCAL_INFILE = {1148, 2068, 3948}
+
+NOMBRES = (
+    "Alejandro", "Andrea", "Camilo", "Carolina", "Daniel", "Daniela", "David", "Diana", "Felipe",
+    "Gabriela", "Isabel", "Jorge", "Juan", "Juliana", "Laura", "Lucía", "Manuel", "Mariana",
+    "Mateo", "Natalia", "Pablo", "Paula", "Santiago", "Sara", "Sebastián", "Sofía", "Tomás", "Valentina",
+)
+APELLIDOS = (
+    "Álvarez", "Bermúdez", "Castro", "Díaz", "Erazo", "Fernández", "Gómez", "Guzmán", "Hernández",
+    "Jaramillo", "López", "Martínez", "Muñoz", "Narváez", "Ordóñez", "Pérez", "Quintero", "Ramírez",
+    "Rodríguez", "Salazar", "Torres", "Urrutia", "Vargas", "Zúñiga",
+)
+TITULOS = (
+    "Ingeniero de Sistemas", "Magíster en Ingeniería de Software", "Doctor en Ciencias de la Computación",
+    "Licenciado en Matemáticas", "Magíster en Educación", "Especialista en Redes", "Doctora en Estadística",
+)
+MATERIAS = (
+    "Algoritmos", "Bases de datos", "Cálculo diferencial", "Cálculo integral", "Estructuras de datos",
+    "Física mecánica", "Ingeniería de software", "Inteligencia artificial", "Programación orientada a objetos",
+    "Redes de computadoras", "Sistemas operativos", "Estadística", "Álgebra lineal", "Arquitectura de software",
+    "Compiladores", "Seguridad informática", "Computación en la nube", "Ética profesional",
+)
+
+# Frases por sentimiento; cada comentario une una apertura y un aspecto
+APERTURAS = {
+    "positivo": (
+        "Excelente docente.", "Muy buena metodología.", "Las clases son claras y dinámicas.",
+        "Se nota que domina el tema.", "Explica con mucha paciencia.", "Me gustó mucho la materia.",
+    ),
+    "neutral": (
+        "La clase es normal.", "El curso cumple con lo básico.", "Las explicaciones son suficientes.",
+        "Algunas clases son buenas y otras no tanto.", "El ritmo de la materia es regular.",
+    ),
+    "negativo": (
+        "Las clases son confusas.", "No explica con claridad.", "La metodología no funciona.",
+        "Llega tarde con frecuencia.", "Es difícil entender los temas.", "No responde las dudas.",
+    ),
+}
+ASPECTOS = {
+    "positivo": (
+        "Los ejemplos ayudan a entender.", "Siempre está dispuesto a resolver dudas.",
+        "Las evaluaciones son justas.", "El material de apoyo es muy completo.", "",
+    ),
+    "neutral": (
+        "Podría usar más ejemplos prácticos.", "Las evaluaciones son parecidas a los talleres.",
+        "El material está en la plataforma.", "",
+    ),
+    "negativo": (
+        "Las evaluaciones no corresponden con lo visto.", "Falta material de apoyo.",
+        "Las notas se publican muy tarde.", "Debería mejorar la organización del curso.", "",
+    ),
+}
+# Rango del promedio (1 a 5) para cada sentimiento
+PROMEDIOS = {"positivo": (40, 50), "neutral": (30, 39), "negativo": (10, 29)}
+
+
+def _sin_tildes(texto: str) -> str:
+    normalizado = unicodedata.normalize("NFKD", texto)
+    return "".join(c for c in normalizado if not unicodedata.combining(c)).lower().replace(" ", "")
+
+
+def _campo_tsv(valor) -> str:
+    # Formato por defecto de LOAD DATA: \N es NULL y la barra escapa tabuladores y saltos de línea
+    if valor is None:
+        return "\\N"
+    return str(valor).replace("\\", "\\\\").replace("\t", "\\t").replace("\n", "\\n")
+
+
+def _leer_pesos(texto: str) -> dict:
+    pesos = {}
+    for parte in texto.split(","):
+        clave, _, valor = parte.partition("=")
+        if clave.strip() not in APERTURAS:
+            raise SystemExit(f"Sentimiento desconocido en --distribucion: {clave!r}")
+        pesos[clave.strip()] = float(valor)
+    return pesos
+
+
+def planificar(comentarios: int, materias: int, respuesta: float, grupo: int, por_docente: int) -> dict:
+    """Cantidad de filas por tabla para llegar a ``comentarios`` comentarios."""
+    estudiantes = math.ceil(comentarios / (materias * respuesta))
+    asignaturas = max(math.ceil(estudiantes * materias / grupo), materias * 2)
+    docentes = math.ceil(asignaturas / por_docente)
+    return {
+        "docentes": docentes,
+        "estudiantes": estudiantes,
+        "asignaturas": asignaturas,
+        "matriculas": estudiantes * materias,
+        "comentarios": comentarios,
+    }
+
+
+class Cargador:
+    """Acumula filas de una tabla y las carga por bloques en una transacción cada uno."""
+
+    def __init__(self, conexion, tabla: str, columnas, lote: int, metodo: str):
+        self.conexion = conexion
+        self.tabla = tabla
+        self.columnas = columnas
+        self.lote = lote
+        self.metodo = metodo
+        self.filas = 0
+        self.segundos = 0.0
+        self._pendientes = []
+
+    def agregar(self, fila):
+        self._pendientes.append(fila)
+        if len(self._pendientes) >= self.lote:
+            self._volcar()
+
+    def cerrar(self):
+        if self._pendientes:
+            self._volcar()
+
+    def _volcar(self):
+        inicio = time.perf_counter()
+        if self.metodo == "archivo":
+            try:
+                self._cargar_archivo()
+            except Exception as e:
+                codigo = e.args[0] if e.args else None
+                if codigo not in _ERRORES_LOCAL_INFILE:
+                    raise
+                self.conexion.rollback()
+                print(f"  LOAD DATA LOCAL no está permitido ({e.args[-1]}); se usa INSERT", flush=True)
+                self.metodo = "insert"
+                self._cargar_insert()
+        else:
+            self._cargar_insert()
+        self.conexion.commit()
+        self.filas += len(self._pendientes)
+        self.segundos += time.perf_counter() - inicio
+        self._pendientes = []
+
+    def _cargar_archivo(self):
+        with tempfile.NamedTemporaryFile("w", suffix=".tsv", encoding="utf-8", newline="", delete=False) as archivo:
+            archivo.writelines("\t".join(map(_campo_tsv, fila)) + "\n" for fila in self._pendientes)
+        try:
+            with self.conexion.cursor() as cursor:
+                cursor.execute(
+                    f"LOAD DATA LOCAL INFILE %s INTO TABLE {self.tabla} CHARACTER SET utf8mb4 "
+                    f"FIELDS TERMINATED BY '\\t' ESCAPED BY '\\\\' LINES TERMINATED BY '\\n' "
+                    f"({', '.join(self.columnas)})",
+                    (archivo.name,),
+                )
+        finally:
+            os.unlink(archivo.name)
+
+    def _cargar_insert(self):
+        # pymysql agrupa executemany de un INSERT ... VALUES en sentencias de varias filas
+        marcadores = ", ".join(["%s"] * len(self.columnas))
+        with self.conexion.cursor() as cursor:
+            cursor.executemany(
+                f"INSERT INTO {self.tabla} ({', '.join(self.columnas)}) VALUES ({marcadores})",
+                self._pendientes,
+            )
+
+
+class Generador:
+
+    def __init__(self, conexion, plan: dict, args):
+        self.conexion = conexion
+        self.plan = plan
+        self.args = args
+        self.azar = random.Random(args.semilla)
+        self.sentimientos, self.pesos = zip(*_leer_pesos(args.distribucion).items())
+        self.cargadores = []
+
+    def _cargador(self, tabla, *columnas):
+        cargador = Cargador(self.conexion, tabla, columnas, self.args.lote, self.args.metodo)
+        self.cargadores.append(cargador)
+        return cargador
+
+    def _consultar(self, sql):
+        with self.conexion.cursor() as cursor:
+            cursor.execute(sql)
+            return cursor.fetchall()
+
+    def _nombre(self):
+        return f"{self.azar.choice(NOMBRES)} {self.azar.choice(APELLIDOS)} {self.azar.choice(APELLIDOS)}"
+
+    def _email(self, nombre: str, id_usuario: int) -> str:
+        partes = nombre.split()
+        return f"{_sin_tildes(partes[0])}.{_sin_tildes(partes[1])}.{id_usuario}{DOMINIO}"
+
+    def preparar_sesion(self):
+        with self.conexion.cursor() as cursor:
+            cursor.execute("SET @carga_masiva = 1")
+            cursor.execute("SET foreign_key_checks = 0")
+            cursor.execute("SET unique_checks = 0")
+
+    def generar(self, hash_contrasena: str):
+        semestres = self._consultar("SELECT id_semestre, nombre_semestre, fecha_inicio, fecha_final FROM Semestre")
+        if not semestres:
+            raise SystemExit("La tabla Semestre está vacía: las fechas de los comentarios salen de ahí")
+        (base_usuario,), = self._consultar("SELECT COALESCE(MAX(id_usuario), 0) FROM Usuarios")
+        (base_asignatura,), = self._consultar("SELECT COALESCE(MAX(id_asignatura), 0) FROM Asignaturas")
+        (base_evaluacion,), = self._consultar("SELECT COALESCE(MAX(id_evaluacion), 0) FROM Evaluaciones")
+        self.preparar_sesion()
+
+        usuarios = self._cargador("Usuarios", "id_usuario", "nombre", "email", "rol", "contrasena")
+        docentes = self._cargador("Docente", "id_docente", "titulo", "certificado")
+        estudiantes = self._cargador("Estudiante", "id_estudiante", "estado", "codigo", "telefono", "cuenta_social")
+        asignaturas = self._cargador("Asignaturas", "id_asignatura", "nombre_asignatura", "creditos", "id_docente")
+        mds = self._cargador("MDS", "id_docente", "id_asignatura", "id_semestre")
+        evaluaciones = self._cargador("Evaluaciones", "id_evaluacion", "fecha_inicio", "fecha_fin", "estado",
+                                      "descripcion")
+        matriculas = self._cargador("ME", "id_estudiante", "id_asignatura")
+        comentarios = self._cargador(
+            "Comentarios", "id_estudiante", "id_docente", "id_asignatura", "id_evaluacion", "promedio",
+            "comentario", "sentimiento", "estado_analisis", "origen_sentimiento", "version_analisis",
+            "fecha_creacion",
+        )
+
+        # Docentes: ids justo después de los usuarios existentes
+        primer_docente = base_usuario + 1
+        for i in range(self.plan["docentes"]):
+            id_docente = primer_docente + i
+            nombre = self._nombre()
+            usuarios.agregar((id_docente, nombre, self._email(nombre, id_docente), "Docente", hash_contrasena))
+            docentes.agregar((id_docente, self.azar.choice(TITULOS), None))
+        usuarios.cerrar()
+        docentes.cerrar()
+        self._informar("docentes", docentes)
+
+        # Asignaturas repartidas entre docentes; cada una se dicta en todos los semestres
+        docente_de = []
+        for i in range(self.plan["asignaturas"]):
+            id_asignatura = base_asignatura + 1 + i
+            id_docente = primer_docente + i % self.plan["docentes"]
+            docente_de.append(id_docente)
+            nombre = f"{MATERIAS[i % len(MATERIAS)]} {i // len(MATERIAS) + 1}"
+            asignaturas.agregar((id_asignatura, nombre, self.azar.randint(2, 5), id_docente))
+            for semestre in semestres:
+                mds.agregar((id_docente, id_asignatura, semestre[0]))
+        asignaturas.cerrar()
+        mds.cerrar()
+        self._informar("asignaturas", asignaturas)
+
+        # Dos evaluaciones por semestre; la descripción lleva el id porque el trigger no admite repetidas
+        evaluaciones_de = {}
+        id_evaluacion = base_evaluacion
+        for id_semestre, nombre_semestre, inicio, final in semestres:
+            mitad = inicio + (final - inicio) / 2
+            for tipo, desde, hasta in (("parcial", inicio, mitad), ("final", mitad, final)):
+                id_evaluacion += 1
+                evaluaciones.agregar((id_evaluacion, desde, hasta, "Inactivo",
+                                      f"Evaluación {tipo} {nombre_semestre} (sintética {id_evaluacion})"))
+                evaluaciones_de.setdefault(id_semestre, []).append((id_evaluacion, desde, hasta))
+        evaluaciones.cerrar()
+
+        # Estudiantes con sus matrículas y comentarios, generados en streaming. Los
+        # comentarios se reparten en partes iguales para llegar al total exacto
+        primer_estudiante = primer_docente + self.plan["docentes"]
+        ids_asignatura = range(self.plan["asignaturas"])
+        total, cantidad_estudiantes = self.plan["comentarios"], self.plan["estudiantes"]
+        for i in range(cantidad_estudiantes):
+            id_estudiante = primer_estudiante + i
+            nombre = self._nombre()
+            usuarios.agregar((id_estudiante, nombre, self._email(nombre, id_estudiante), "Estudiante",
+                              hash_contrasena))
+            estudiantes.agregar((
+                id_estudiante, "Activo" if self.azar.random() < 0.95 else "Inactivo", f"SIN{id_estudiante:08d}",
+                f"555-{self.azar.randint(1000, 9999)}", None,
+            ))
+            por_comentar = (i + 1) * total // cantidad_estudiantes - i * total // cantidad_estudiantes
+            for orden, indice in enumerate(self.azar.sample(ids_asignatura, self.args.materias)):
+                id_asignatura = base_asignatura + 1 + indice
+                matriculas.agregar((id_estudiante, id_asignatura))
+                if orden < por_comentar:
+                    id_semestre = self.azar.choice(semestres)[0]
+                    comentarios.agregar(self._comentario(
+                        id_estudiante, docente_de[indice], id_asignatura, evaluaciones_de[id_semestre],
+                    ))
+            if (i + 1) % 100_000 == 0:
+                print(f"  {i + 1:,} estudiantes generados", flush=True)
+
+        for cargador in (usuarios, estudiantes, matriculas, comentarios):
+            cargador.cerrar()
+        self._informar("estudiantes", estudiantes)
+        self._informar("matrículas", matriculas)
+        self._informar("comentarios", comentarios)
+
+    def _comentario(self, id_estudiante, id_docente, id_asignatura, evaluaciones):
+        id_evaluacion, desde, hasta = self.azar.choice(evaluaciones)
+        segundos = int((datetime.combine(hasta, datetime.min.time()) -
+                        datetime.combine(desde, datetime.min.time())).total_seconds()) + 86399
+        fecha = datetime.combine(desde, datetime.min.time()) + timedelta(seconds=self.azar.randint(0, segundos))
+
+        sentimiento = self.azar.choices(self.sentimientos, self.pesos)[0]
+        minimo, maximo = PROMEDIOS[sentimiento]
+        promedio = self.azar.randint(minimo, maximo) / 10
+        texto = f"{self.azar.choice(APERTURAS[sentimiento])} {self.azar.choice(ASPECTOS[sentimiento])}".strip()
+        if self.azar.random() < self.args.pendientes:
+            analisis = (None, "pendiente", None, None)
+        else:
+            analisis = (sentimiento, "completado", "local", VERSION_PROMPT)
+        return (id_estudiante, id_docente, id_asignatura, id_evaluacion, promedio, texto, *analisis,
+                fecha.strftime("%Y-%m-%d %H:%M:%S"))
+
+    def _informar(self, nombre, cargador):
+        ritmo = cargador.filas / cargador.segundos if cargador.segundos else 0
+        print(f"  {nombre:<12} {cargador.filas:>12,} filas  {cargador.segundos:8.1f} s de carga  "
+              f"{ritmo:>10,.0f} filas/s  ({cargador.metodo})", flush=True)
+
+    def finalizar(self):
+        """Restaura la sesión y recalcula lo que los triggers omitieron."""
+        with self.conexion.cursor() as cursor:
+            cursor.execute("SET @carga_masiva = NULL")
+            cursor.execute("SET foreign_key_checks = 1")
+            cursor.execute("SET unique_checks = 1")
+            inicio = time.perf_counter()
+            cursor.execute("CALL ReconstruirResumenSentimientos()")
+            grupos, diferencias = cursor.fetchone()
+            while cursor.nextset():
+                pass
+            cursor.execute("CALL IncrementarVersionDatos('catalogo', 0)")
+            self.conexion.commit()
+            print(f"  Resumen_sentimientos reconstruido: {grupos:,} grupos, {diferencias:,} cambiados "
+                  f"({time.perf_counter() - inicio:.1f} s)", flush=True)
+            # Estadísticas frescas para que el optimizador elija bien los planes con el nuevo volumen
+            cursor.execute("ANALYZE TABLE Usuarios, Docente, Estudiante, Asignaturas, MDS, ME, Evaluaciones, "
+                           "Comentarios, Resumen_sentimientos")
+            cursor.fetchall()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--comentarios", type=int, default=100_000)
+    parser.add_argument("--materias", type=int, default=6, help="asignaturas matriculadas por estudiante")
+    parser.add_argument("--respuesta", type=float, default=0.8,
+                        help="fracción de matrículas con comentario")
+    parser.add_argument("--grupo", type=int, default=40, help="estudiantes por asignatura, en promedio")
+    parser.add_argument("--asignaturas-por-docente", type=int, default=3)
+    parser.add_argument("--distribucion", default="positivo=60,neutral=25,negativo=15",
+                        help="pesos de cada sentimiento")
+    parser.add_argument("--pendientes", type=float, default=0.0,
+                        help="fracción de comentarios sin analizar (los toma la cola de análisis)")
+    parser.add_argument("--lote", type=int, default=50_000, help="filas por LOAD DATA o por transacción")
+    parser.add_argument("--metodo", choices=("archivo", "insert"), default="archivo",
+                        help="LOAD DATA LOCAL INFILE (si el servidor lo rechaza se usa INSERT) o INSERT de varias filas")
+    parser.add_argument("--semilla", type=int, default=42)
+    parser.add_argument("--simular", action="store_true", help="solo muestra cuántas filas se generarían")
+    args = parser.parse_args()
+    if not 0 < args.respuesta <= 1:
+        parser.error("--respuesta debe estar entre 0 y 1")
+
+    plan = planificar(args.comentarios, args.materias, args.respuesta, args.grupo, args.asignaturas_por_docente)
+    for tabla, filas in plan.items():
+        print(f"  {tabla:<12} {filas:>12,}")
+    if args.simular:
+        return
+
+    from contrasenas import hashear
+    from database import CONNECT_ARGS, DB_URL
+
+    # Conexión propia: local_infile se negocia al conectar
+    engine = create_engine(DB_URL, poolclass=NullPool, connect_args={**CONNECT_ARGS, "local_infile": True})
+    conexion = engine.raw_connection()
+    inicio = time.perf_counter()
+    try:
+        generador = Generador(conexion, plan, args)
+        # Un solo hash para todos: bcrypt por usuario tomaría horas
+        generador.generar(hashear(CONTRASENA))
+        generador.finalizar()
+    finally:
+        conexion.close()
+    print(f"Listo en {time.perf_counter() - inicio:.1f} s. Contraseña de los usuarios sintéticos: {CONTRASENA}")
+
+
+if __name__ == "__main__":
+    main()
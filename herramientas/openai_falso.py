@@ -0,0 +1,164 @@
+"""Servidor local compatible con la API de chat de OpenAI, para pruebas sin red.
+
+Responde a POST /v1/chat/completions con sentimientos calculados por palabras
+clave, tanto para el prompt de un comentario como para el prompt por lotes
+de chat.chat.clasificar_lote. GET /estadisticas devuelve cuántas peticiones
+y comentarios ha atendido.
+
+Para probar chat/cliente.py puede inyectar fallas: una proporción de
+respuestas con error HTTP (--error-pct, --codigo-error) y de respuestas
+lentas (--lento-pct, --lento-ms). POST /fallas cambia esos valores con el
+servidor en marcha, p. ej. {"error_pct": 100} simula una caída y
+{"error_pct": 0} la recuperación.
+
+Uso:
+    python herramientas/openai_falso.py --puerto 8001 --latencia-ms 300
+    python herramientas/openai_falso.py --error-pct 30 --lento-pct 10 --lento-ms 15000
+    curl -X POST localhost:8001/fallas -d '{"error_pct": 100, "codigo_error": 503}'
+    OPENAI_BASE_URL=http://127.0.0.1:8001/v1 OPENAI_API_KEY=falsa uvicorn main:app
+"""
+import argparse
+import json
+import random
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+POSITIVAS = ("excelente", "buen", "buena", "clar", "gran", "recomend", "genial", "mejor")
+NEGATIVAS = ("malo", "mala", "confus", "pésim", "pesim", "terrible", "nunca", "aburrid", "peor", "no explica")
+
+_LINEA_LOTE = re.compile(r'^(\d+)\. \[(\w+)\] "(.*)"$')
+_COMENTARIO = re.compile(r'Comentario: "(.*)"\nPromedio categorizado como: (\w+)', re.DOTALL)
+
+
+def clasificar(texto, etiqueta_promedio):
+    texto = texto.lower()
+    puntaje = sum(p in texto for p in POSITIVAS) - sum(n in texto for n in NEGATIVAS)
+    if puntaje > 0:
+        return "positivo"
+    if puntaje < 0:
+        return "negativo"
+    return etiqueta_promedio if etiqueta_promedio in ("positivo", "negativo") else "neutral"
+
+
+class Estado:
+    def __init__(self, latencia_ms, error_pct=0, codigo_error=500, lento_pct=0, lento_ms=0):
+        self.latencia = latencia_ms / 1000
+        self.lock = threading.Lock()
+        self.peticiones = 0
+        self.comentarios = 0
+        self.errores_inyectados = 0
+        self.lentas_inyectadas = 0
+        self.fallas = {
+            "error_pct": error_pct, "codigo_error": codigo_error, "lento_pct": lento_pct, "lento_ms": lento_ms,
+        }
+
+    def registrar(self, comentarios):
+        with self.lock:
+            self.peticiones += 1
+            self.comentarios += comentarios
+
+    def sortear_fallas(self):
+        """(código de error o None, segundos extra de latencia) para la petición actual."""
+        with self.lock:
+            fallas = dict(self.fallas)
+            codigo = fallas["codigo_error"] if random.random() * 100 < fallas["error_pct"] else None
+            extra = fallas["lento_ms"] / 1000 if random.random() * 100 < fallas["lento_pct"] else 0
+            self.errores_inyectados += codigo is not None
+            self.lentas_inyectadas += extra > 0
+        return codigo, extra
+
+
+def crear_manejador(estado):
+    class Manejador(BaseHTTPRequestHandler):
+        def log_message(self, *args):
+            pass
+
+        def _responder(self, codigo, cuerpo):
+            datos = json.dumps(cuerpo).encode("utf-8")
+            self.send_response(codigo)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(datos)))
+            self.end_headers()
+            self.wfile.write(datos)
+
+        def do_GET(self):
+            if self.path == "/estadisticas":
+                with estado.lock:
+                    return self._responder(200, {
+                        "peticiones": estado.peticiones,
+                        "comentarios": estado.comentarios,
+                        "errores_inyectados": estado.errores_inyectados,
+                        "lentas_inyectadas": estado.lentas_inyectadas,
+                        "fallas": estado.fallas,
+                    })
+            self._responder(404, {"error": "no encontrado"})
+
+        def do_POST(self):
+            largo = int(self.headers.get("Content-Length", 0))
+            peticion = json.loads(self.rfile.read(largo) or b"{}")
+
+            if self.path.rstrip("/") == "/fallas":
+                with estado.lock:
+                    estado.fallas.update({k: v for k, v in peticion.items() if k in estado.fallas})
+                    return self._responder(200, estado.fallas)
+            if not self.path.rstrip("/").endswith("/chat/completions"):
+                return self._responder(404, {"error": "no encontrado"})
+
+            codigo_error, extra = estado.sortear_fallas()
+            if estado.latencia or extra:
+                time.sleep(estado.latencia + extra)
+            if codigo_error is not None:
+                return self._responder(codigo_error, {
+                    "error": {"message": "falla inyectada", "type": "server_error", "code": codigo_error}
+                })
+
+            contenido = peticion.get("messages", [{}])[-1].get("content", "")
+
+            lineas = [_LINEA_LOTE.match(linea) for linea in contenido.splitlines()]
+            if lineas and all(lineas):
+                respuesta = "\n".join(
+                    f"{m.group(1)}: {clasificar(m.group(3), m.group(2))}" for m in lineas
+                )
+                estado.registrar(len(lineas))
+            else:
+                m = _COMENTARIO.search(contenido)
+                respuesta = clasificar(m.group(1), m.group(2)) if m else "neutral"
+                estado.registrar(1)
+
+            self._responder(200, {
+                "id": "chatcmpl-falso",
+                "object": "chat.completion",
+                "created": int(time.time()),
+                "model": peticion.get("model", "gpt-4o-mini"),
+                "choices": [{
+                    "index": 0,
+                    "message": {"role": "assistant", "content": respuesta},
+                    "finish_reason": "stop",
+                }],
+                "usage": {"prompt_tokens": 0, "completion_tokens": 0, "total_tokens": 0},
+            })
+
+    return Manejador
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--puerto", type=int, default=8001)
+    parser.add_argument("--latencia-ms", type=float, default=0)
+    parser.add_argument("--error-pct", type=float, default=0, help="porcentaje de respuestas con error HTTP")
+    parser.add_argument("--codigo-error", type=int, default=500)
+    parser.add_argument("--lento-pct", type=float, default=0, help="porcentaje de respuestas lentas")
+    parser.add_argument("--lento-ms", type=float, default=0, help="latencia extra de las respuestas lentas")
+    args = parser.parse_args()
+
+    estado = Estado(args.latencia_ms, args.error_pct, args.codigo_error, args.lento_pct, args.lento_ms)
+    servidor = ThreadingHTTPServer((args.host, args.puerto), crear_manejador(estado))
+    print(f"OpenAI falso escuchando en http://{args.host}:{args.puerto}/v1")
+    servidor.serve_forever()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,88 @@
+"""Vuelve a analizar los comentarios fallidos o analizados con un prompt anterior.
+
+Por defecto toma los comentarios sin sentimiento, con estado 'error' o con
+version_analisis menor que VERSION_PROMPT de chat/chat.py. Si se interrumpe
+(Ctrl+C o una caída), la siguiente ejecución continúa desde el checkpoint.
+
+Uso:
+    python herramientas/reanalizar.py --estado              # cuántos faltan
+    python herramientas/reanalizar.py --tasa 50 --concurrencia 4
+    python herramientas/reanalizar.py --solo-fallidos
+    python herramientas/reanalizar.py --reiniciar           # ignora el checkpoint
+"""
+import argparse
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from reanalisis import (  # noqa: E402
+    REANALISIS_CHECKPOINT, REANALISIS_CONCURRENCIA, REANALISIS_LOTE, REANALISIS_TASA, Reanalisis,
+)
+
+
+def formatear_segundos(segundos):
+    if segundos is None:
+        return "?"
+    horas, resto = divmod(int(segundos), 3600)
+    minutos, segundos = divmod(resto, 60)
+    return f"{horas}h{minutos:02d}m{segundos:02d}s" if horas else f"{minutos}m{segundos:02d}s"
+
+
+def mostrar(progreso):
+    total = progreso.get("total") or 0
+    porcentaje = progreso["procesados"] / total * 100 if total else 100.0
+    print(
+        f"  {progreso['procesados']:>8}/{total} ({porcentaje:5.1f}%)  "
+        f"actualizados {progreso['actualizados']}  fallidos {progreso['fallidos']}  "
+        f"{progreso.get('comentarios_por_segundo', 0):.1f} com/s  "
+        f"ETA {formatear_segundos(progreso.get('eta_segundos'))}  (id {progreso['ultimo_id']})",
+        flush=True,
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--solo-fallidos", action="store_true", help="ignora los comentarios con versión anterior")
+    parser.add_argument("--lote", type=int, default=REANALISIS_LOTE, help="comentarios por bloque")
+    parser.add_argument("--concurrencia", type=int, default=REANALISIS_CONCURRENCIA)
+    parser.add_argument("--tasa", type=float, default=REANALISIS_TASA, help="comentarios por segundo (0 sin límite)")
+    parser.add_argument("--hasta-id", type=int, help="último id_comentario a procesar")
+    parser.add_argument("--checkpoint", default=REANALISIS_CHECKPOINT)
+    parser.add_argument("--reiniciar", action="store_true", help="descarta el checkpoint y empieza de cero")
+    parser.add_argument("--estado", action="store_true", help="solo muestra cuántos comentarios faltan")
+    args = parser.parse_args()
+
+    opciones = {
+        "solo_fallidos": args.solo_fallidos, "lote": args.lote, "concurrencia": args.concurrencia,
+        "tasa": args.tasa, "checkpoint": args.checkpoint,
+    }
+    trabajo = Reanalisis(**opciones)
+
+    try:
+        anterior = None if args.reiniciar else trabajo.leer_checkpoint()
+    except ValueError as e:
+        sys.exit(str(e))
+
+    desde = anterior["ultimo_id"] if anterior else 0
+    if args.estado:
+        print(f"Pendientes de reanálisis: {trabajo.contar(desde)} (desde id {desde})")
+        return
+    if anterior:
+        print(f"Continuando desde el checkpoint: id {desde}, {anterior['procesados']} ya procesados")
+
+    try:
+        resultado = trabajo.ejecutar(reiniciar=args.reiniciar, hasta_id=args.hasta_id, al_avanzar=mostrar)
+    except KeyboardInterrupt:
+        # El último bloque completo ya quedó en el checkpoint
+        print("\nInterrumpido; vuelva a ejecutar el comando para continuar.")
+        sys.exit(130)
+    print(
+        f"{resultado['estado'].capitalize()}: {resultado.get('procesados', 0)} procesados, "
+        f"{resultado.get('actualizados', 0)} actualizados, {resultado.get('fallidos', 0)} fallidos "
+        f"en {formatear_segundos(resultado.get('duracion_segundos'))}"
+    )
+
+
+if __name__ == "__main__":
+    main()
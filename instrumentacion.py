@@ -0,0 +1,208 @@
+"""Métricas por ruta de la API en formato de texto de Prometheus (GET /metrics).
+
+MiddlewareMetricas es ASGI puro (sin BaseHTTPMiddleware, que agrega una
+tarea y colas por petición): mide la duración total, cuenta las peticiones
+por método, plantilla de ruta y código de estado, y abre un TiemposPeticion
+en un ContextVar. Ese contexto lo heredan los hilos del threadpool donde
+corren las rutas síncronas, así que los listeners de SQLAlchemy
+(medir_consultas) y los motores de sentimiento (medir_sentimiento) le suman
+su tiempo: al terminar la petición se sabe cuánto fue MySQL, cuánto el
+modelo y el resto (serialización, red, Python).
+
+El análisis de la cola corre fuera de las peticiones; sus consultas y sus
+lotes quedan en las series globales db_consulta_segundos{origen="segundo_plano"}
+y sentimiento_backend_segundos.
+"""
+import contextvars
+import time
+from contextlib import contextmanager
+
+from sqlalchemy import event
+
+from metricas import FamiliaContadores, FamiliaHistogramas, metrica, muestra, muestras_histograma
+
+TIPO_CONTENIDO = "text/plain; version=0.0.4; charset=utf-8"
+
+# Peticiones que no coinciden con ninguna ruta (404) comparten una serie
+SIN_RUTA = "sin_ruta"
+# Métodos con serie propia; el resto se agrupa para no crear series sin límite
+METODOS = frozenset(("GET", "POST", "PUT", "PATCH", "DELETE", "HEAD", "OPTIONS"))
+
+peticiones = FamiliaContadores(
+    "api_peticiones_total", "Peticiones HTTP atendidas", ("metodo", "ruta", "estado"),
+)
+duracion = FamiliaHistogramas(
+    "api_peticion_segundos", "Duración de la petición, incluido el envío del cuerpo", ("metodo", "ruta"),
+)
+tiempo_db = FamiliaHistogramas(
+    "api_peticion_db_segundos", "Tiempo en sentencias SQL dentro de la petición", ("metodo", "ruta"),
+)
+tiempo_sentimiento = FamiliaHistogramas(
+    "api_peticion_sentimiento_segundos",
+    "Tiempo en el motor de sentimientos dentro de la petición (solo las que lo usan)", ("metodo", "ruta"),
+)
+consultas = FamiliaHistogramas(
+    "db_consulta_segundos", "Duración de cada sentencia SQL", ("origen",),
+)
+sentimiento = FamiliaHistogramas(
+    "sentimiento_backend_segundos", "Duración de cada lote clasificado, por backend", ("backend",),
+)
+
+# Solo lo modifica el middleware, que corre en el event loop
+_en_curso = 0
+
+
+class TiemposPeticion:
+    __slots__ = ("db", "sentimiento")
+
+    def __init__(self):
+        self.db = 0.0
+        self.sentimiento = 0.0
+
+
+_peticion = contextvars.ContextVar("tiempos_peticion", default=None)
+
+
+class MiddlewareMetricas:
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+
+        global _en_curso
+        estado = 500  # si la aplicación falla antes de responder
+
+        async def enviar(mensaje):
+            nonlocal estado
+            if mensaje["type"] == "http.response.start":
+                estado = mensaje["status"]
+            await send(mensaje)
+
+        tiempos = TiemposPeticion()
+        token = _peticion.set(tiempos)
+        _en_curso += 1
+        inicio = time.perf_counter()
+        try:
+            await self.app(scope, receive, enviar)
+        finally:
+            transcurrido = time.perf_counter() - inicio
+            _en_curso -= 1
+            _peticion.reset(token)
+            _registrar(scope, estado, transcurrido, tiempos)
+
+
+def _registrar(scope, estado, transcurrido, tiempos):
+    metodo = scope["method"] if scope["method"] in METODOS else "OTRO"
+    # El router deja la ruta elegida en el scope: se usa su plantilla, no la URL
+    ruta = getattr(scope.get("route"), "path", None) or SIN_RUTA
+    peticiones.serie(metodo, ruta, str(estado)).incrementar()
+    duracion.serie(metodo, ruta).observar(transcurrido)
+    tiempo_db.serie(metodo, ruta).observar(tiempos.db)
+    if tiempos.sentimiento:
+        tiempo_sentimiento.serie(metodo, ruta).observar(tiempos.sentimiento)
+
+
+def medir_consultas(engine, perfilador=None):
+    """Registra la duración de cada sentencia del engine (síncrono o el sync_engine de uno async).
+
+    Es el único par de listeners por sentencia: si se pasa un perfilador
+    (perfilador_sql.PerfiladorSQL), la misma medición se le entrega a él.
+    """
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def _antes(conn, cursor, statement, parameters, context, executemany):
+        context._inicio_metricas = time.perf_counter()
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def _despues(conn, cursor, statement, parameters, context, executemany):
+        transcurrido = time.perf_counter() - context._inicio_metricas
+        tiempos = _peticion.get()
+        if tiempos is None:
+            consultas.serie("segundo_plano").observar(transcurrido)
+        else:
+            tiempos.db += transcurrido
+            consultas.serie("peticion").observar(transcurrido)
+        if perfilador is not None:
+            # Con cursores en streaming (SSCursor) rowcount no se conoce hasta leer todo: -1
+            perfilador.registrar(statement, transcurrido, cursor.rowcount)
+
+    if perfilador is not None:
+        @event.listens_for(engine, "handle_error")
+        def _error(contexto_error):
+            contexto = contexto_error.execution_context
+            inicio = getattr(contexto, "_inicio_metricas", None)
+            if inicio is not None and contexto_error.statement:
+                perfilador.registrar(contexto_error.statement, time.perf_counter() - inicio, -1, error=True)
+
+
+@contextmanager
+def medir_sentimiento(backend: str):
+    inicio = time.perf_counter()
+    try:
+        yield
+    finally:
+        transcurrido = time.perf_counter() - inicio
+        sentimiento.serie(backend).observar(transcurrido)
+        tiempos = _peticion.get()
+        if tiempos is not None:
+            tiempos.sentimiento += transcurrido
+
+
+# ---- Exposición ----
+
+def _metricas_pool() -> list:
+    import database
+
+    pools = [("sync", database.metricas_pool, database.engine.pool)]
+    if database.async_engine is not None:
+        pools.append(("async", database.metricas_pool_async, database.async_engine.sync_engine.pool))
+
+    conexiones, esperas, timeouts = [], [], []
+    for nombre, metricas_pool, pool in pools:
+        for estado, valor in (("en_uso", pool.checkedout()), ("disponibles", pool.checkedin()),
+                              ("overflow", max(pool.overflow(), 0))):
+            conexiones.append(muestra("db_pool_conexiones", {"pool": nombre, "estado": estado}, valor))
+        esperas.extend(muestras_histograma("db_pool_espera_segundos", {"pool": nombre}, metricas_pool.espera))
+        timeouts.append(muestra("db_pool_timeouts_total", {"pool": nombre}, metricas_pool.timeouts))
+    return [
+        metrica("db_pool_conexiones", "gauge", "Conexiones del pool por estado", conexiones),
+        metrica("db_pool_espera_segundos", "histogram", "Espera por una conexión del pool", esperas),
+        metrica("db_pool_timeouts_total", "counter", "Esperas por conexión que agotaron DB_POOL_TIMEOUT", timeouts),
+    ]
+
+
+def _metricas_llm() -> list:
+    from chat.cliente import cliente_llm
+
+    estadisticas = cliente_llm.estadisticas()
+    estado_circuito = estadisticas["circuito"]["estado"]
+    return [
+        metrica("llm_llamada_segundos", "histogram", "Duración de cada llamada al modelo, con reintentos",
+                muestras_histograma("llm_llamada_segundos", {}, cliente_llm.latencia_llamada)),
+        metrica("llm_intento_segundos", "histogram", "Duración de cada intento contra el modelo",
+                muestras_histograma("llm_intento_segundos", {}, cliente_llm.latencia_intento)),
+        metrica("llm_eventos_total", "counter", "Llamadas, reintentos y errores del cliente del modelo", [
+            muestra("llm_eventos_total", {"evento": evento}, valor)
+            for evento, valor in sorted(estadisticas["contadores"].items())
+        ]),
+        metrica("llm_en_vuelo", "gauge", "Llamadas al modelo en curso",
+                [muestra("llm_en_vuelo", {}, estadisticas["en_vuelo"])]),
+        metrica("llm_circuito_estado", "gauge", "Estado del circuit breaker (1 en el estado actual)", [
+            muestra("llm_circuito_estado", {"estado": estado}, int(estado == estado_circuito))
+            for estado in ("cerrado", "abierto", "semiabierto")
+        ]),
+    ]
+
+
+def exponer() -> str:
+    bloques = [familia.exponer() for familia in (
+        peticiones, duracion, tiempo_db, tiempo_sentimiento, consultas, sentimiento,
+    )]
+    bloques.append(metrica("api_peticiones_en_curso", "gauge", "Peticiones HTTP en curso",
+                           [muestra("api_peticiones_en_curso", {}, _en_curso)]))
+    bloques.extend(_metricas_pool())
+    bloques.extend(_metricas_llm())
+    return "\n".join(bloques) + "\n"
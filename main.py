@@ -3,36 +3,160 @@ from schemas import (
     AsignaturaCreate, AsignaturaResponse, AsignaturaUpdate,
     EvaluacionCreate, EvaluacionResponse, EvaluacionUpdate,
     ComentarioCreate, ComentarioResponse, ComentarioUpdate,
-    EstudianteDocentesResponse
+    EstadoAnalisisResponse, EstudianteDocentesResponse, ReporteCreate, ReporteResponse
 )
-from JWTKeys import SECRET_KEY, ALGORITHM, ACCESS_TOKEN_EXPIRE_MINUTES, create_access_token, pwd_context, oauth2_scheme
+from JWTKeys import SECRET_KEY, ALGORITHM, ACCESS_TOKEN_EXPIRE_MINUTES, create_access_token, oauth2_scheme
 from fastapi.security import OAuth2PasswordRequestForm, OAuth2PasswordBearer
 from sqlalchemy.exc import DBAPIError, IntegrityError
-from fastapi import FastAPI, Depends, HTTPException
+from fastapi import FastAPI, Depends, HTTPException, Request
+from fastapi.concurrency import run_in_threadpool
 from fastapi.middleware.cors import CORSMiddleware
 from database import SessionLocal, engine, Base
-from fastapi.responses import JSONResponse
+from fastapi.responses import FileResponse, Response
+from respuestas import RespuestaJSON, documentado
 from sqlalchemy import create_engine, text
 from datetime import datetime, timedelta
-from passlib.context import CryptContext
 from sqlalchemy.orm import Session
 from dotenv import load_dotenv
 from pydantic import BaseModel
 from jose import jwt, JWTError
-from typing import List, Dict
-from database import DB_URL
+from typing import List, Dict, Optional
+from chat.cache import cache_sentimientos
+from cache_entidades import cache_entidades
+from chat.motores import motor_sentimiento
+from chat.lote import micro_lote
+from chat.cliente import cliente_llm
+from analisis import cola_analisis
+from carga_masiva import detectar_formato, leer_filas
+from exportacion import EXPORTADORES, filtrar_docentes, respuesta_exportacion
+from documentos_reporte import EXTENSIONES, TIPOS_CONTENIDO as TIPOS_CONTENIDO_REPORTE
+from database import DB_URL, DB_MODO, estado_pools, POOL_CONFIG
+from paginacion import LIMITE
+from schemas import FiltroSentimiento
+from contextlib import asynccontextmanager
+import auth
+import condicional
+import contrasenas
+import database
+import instrumentacion
+import perfilador_sql
+import reanalisis
+import reportes
 import schemas
 import crud
+import importlib
+import hmac
+import asyncio
+import logging
+import time
 import re
 import os
 
  
 load_dotenv()
 
-app = FastAPI()
-print(f"Conectando a la base de datos: {DB_URL}")
+logger = logging.getLogger("uvicorn.error")
 
-Base.metadata.create_all(bind=engine)
+# En producción el esquema lo gestionan los scripts SQL; no se verifica al arrancar
+ENTORNO = os.getenv("ENTORNO", "desarrollo").lower()
+VERIFICAR_ESQUEMA = os.getenv("VERIFICAR_ESQUEMA", "false" if ENTORNO == "produccion" else "true").lower() == "true"
+# Cada cuántos minutos se reconstruye Resumen_sentimientos desde Comentarios (0 = nunca)
+RESUMEN_RECONCILIAR_MINUTOS = float(os.getenv("RESUMEN_RECONCILIAR_MINUTOS", "0"))
+# Conexiones que se abren al arrancar para que las primeras peticiones no paguen el handshake TLS
+DB_POOL_PRECALENTAR = min(int(os.getenv("DB_POOL_PRECALENTAR", "2")), POOL_CONFIG["pool_size"])
+# Si está definido, GET /metrics pide "Authorization: Bearer <METRICAS_TOKEN>"
+METRICAS_TOKEN = os.getenv("METRICAS_TOKEN")
+
+
+# ---------------------- Arranque y apagado ----------------------#
+
+# Lo consulta GET /ready; el calentamiento corre en segundo plano después de abrir el puerto
+estado_arranque = {"listo": False, "error": None, "inicio": None, "duracion_ms": None, "etapas": {}}
+
+
+def _calentar():
+    def etapa(nombre, funcion):
+        inicio = time.perf_counter()
+        funcion()
+        estado_arranque["etapas"][nombre] = round((time.perf_counter() - inicio) * 1000, 1)
+
+    def verificar_conexion():
+        with engine.connect() as conexion:
+            conexion.execute(text("SELECT 1"))
+
+    def precalentar_pool():
+        conexiones = [engine.connect() for _ in range(DB_POOL_PRECALENTAR)]
+        for conexion in conexiones:
+            conexion.close()
+
+    etapa("conexion", verificar_conexion)
+    if VERIFICAR_ESQUEMA:
+        etapa("esquema", lambda: Base.metadata.create_all(bind=engine))
+    etapa("pool", precalentar_pool)
+    # Recupera los comentarios pendientes, por eso va después de comprobar la base
+    etapa("analisis", cola_analisis.iniciar)
+    if motor_sentimiento.nombre in ("local", "hibrido"):
+        etapa("lexico", lambda: importlib.import_module("chat.lexico"))
+
+
+async def _arrancar():
+    try:
+        await run_in_threadpool(_calentar)
+        if database.async_engine is not None:
+            async with database.async_engine.connect() as conexion:
+                await conexion.execute(text("SELECT 1"))
+        estado_arranque["listo"] = True
+        estado_arranque["duracion_ms"] = round((time.perf_counter() - estado_arranque["inicio"]) * 1000, 1)
+        logger.info("Aplicación lista en %.1f ms %s", estado_arranque["duracion_ms"], estado_arranque["etapas"])
+    except Exception as e:
+        estado_arranque["error"] = str(e)
+        logger.error("Error al preparar la aplicación: %s", e)
+
+
+def _reconstruir_resumen():
+    db = SessionLocal()
+    try:
+        return crud.reconstruir_resumen_sentimientos(db)
+    finally:
+        db.close()
+
+
+async def _reconciliar_resumen_periodicamente():
+    while True:
+        await asyncio.sleep(RESUMEN_RECONCILIAR_MINUTOS * 60)
+        try:
+            resultado = await run_in_threadpool(_reconstruir_resumen)
+            if resultado["diferencias"]:
+                logger.warning("Resumen de sentimientos reconciliado: %s", resultado)
+        except Exception as e:
+            logger.error("Error al reconciliar el resumen de sentimientos: %s", e)
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    estado_arranque["inicio"] = time.perf_counter()
+    logger.info("Conectando a la base de datos: %s", engine.url.render_as_string(hide_password=True))
+    tareas = [asyncio.create_task(_arrancar())]
+    if RESUMEN_RECONCILIAR_MINUTOS > 0:
+        tareas.append(asyncio.create_task(_reconciliar_resumen_periodicamente()))
+    yield
+    for tarea in tareas:
+        tarea.cancel()
+    cola_analisis.detener()
+    contrasenas.cerrar()
+    reportes.generador.cerrar()
+    engine.dispose()
+    if database.async_engine is not None:
+        await database.async_engine.dispose()
+
+
+# orjson para todas las respuestas (ver respuestas.py)
+app = FastAPI(lifespan=lifespan, default_response_class=RespuestaJSON)
+
+# Con DB_MODO=async las rutas de rutas_async.py se registran primero y tienen prioridad
+if DB_MODO == "async":
+    import rutas_async
+    app.include_router(rutas_async.router)
 
 app.add_middleware(
     CORSMiddleware,
@@ -41,13 +165,11 @@ app.add_middleware(
     allow_methods=["*"],
     allow_headers=["*"],
 )
+# Después de CORS para quedar por fuera: mide también las respuestas de CORS
+app.add_middleware(instrumentacion.MiddlewareMetricas)
 
-#Corroboración de la conexion a la base de datos
-try:
-    engine.connect()  # Intenta conectar
-    print("Conexión exitosa a la base de datos")
-except Exception as e:
-    print(f"Error al conectar a la base de datos: {e}")
+# Filas por transacción en POST /comentarios/bulk
+CARGA_MASIVA_BLOQUE = int(os.getenv("CARGA_MASIVA_BLOQUE", "500"))
 
 
 def get_db():
@@ -62,7 +184,10 @@ def get_db():
 # ---------------------- Ruta para traer docentes por estudiante:id ----------------------#
 
 
-@app.get("/estudiantes/{id_estudiante}/docentes_asignaturas", response_model=EstudianteDocentesResponse)
+@app.get(
+    "/estudiantes/{id_estudiante}/docentes_asignaturas", dependencies=[auth.AUTENTICADO],
+    **documentado(EstudianteDocentesResponse)
+)
 def docentes_por_estudiante(id_estudiante: int, db: Session = Depends(get_db)):
     resultado = crud.obtener_docentes_por_estudiante(db, id_estudiante)
 
@@ -75,16 +200,23 @@ def docentes_por_estudiante(id_estudiante: int, db: Session = Depends(get_db)):
 # ---------------------- Ruta para login----------------------#
 
 
+# Async: bcrypt corre en el pool de contrasenas.py y mientras tanto la petición no
+# ocupa un hilo del threadpool; las consultas sí van al threadpool
 @app.post("/login")
 
 async def login(data: LoginRequest, db: Session = Depends(get_db)):
-    user = crud.get_user_by_email(db, data.email)
+    user = await run_in_threadpool(crud.get_user_by_email, db, data.email)
     if not user:
         raise HTTPException(status_code=401, detail="Usuario no encontrado")
 
-    if data.password != user.contrasena:
+    if not await contrasenas.verificar_async(data.password, user.contrasena):
         raise HTTPException(status_code=401, detail="Contraseña incorrecta")
 
+    # Filas en texto plano o con otro BCRYPT_ROUNDS: se guardan con el hash actual
+    if contrasenas.necesita_rehash(user.contrasena):
+        nuevo_hash = await contrasenas.hashear_async(data.password)
+        await run_in_threadpool(crud.actualizar_hash_contrasena, db, user.id_usuario, user.contrasena, nuevo_hash)
+
     access_token = create_access_token(
         data={"sub": user.email, "rol": user.rol}
     )
@@ -93,44 +225,163 @@ async def login(data: LoginRequest, db: Session = Depends(get_db)):
 
 # ---------------------- Ruta para sentimiento resumido en dashboard----------------------#
 
-@app.get("/resumen-sentimientos/")
-def resumen_sentimientos(db: Session = Depends(get_db)):
+@app.get("/resumen-sentimientos/", dependencies=[auth.GESTION])
+def resumen_sentimientos(request: Request, db: Session = Depends(get_db)):
     try:
+        # La versión se lee antes que los datos: si cambian entre ambas lecturas el
+        # ETag queda atrasado y el siguiente sondeo trae la respuesta nueva
+        etag = crud.etag_resumen_sentimientos(db)
+        no_modificado = condicional.no_modificado(request, etag, condicional.CACHE_RESUMEN)
+        if no_modificado is not None:
+            return no_modificado
         datos = crud.obtener_resumen_sentimientos(db)
-        return JSONResponse(content=datos, status_code=200)
+        return condicional.con_etag(datos, etag, condicional.CACHE_RESUMEN)
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 
 # ---------------------- Ruta para sentimientos por docente----------------------#
 
-@app.get("/resumen_sentimientos/nombre/{nombre_docente}", response_model=List[schemas.ResumenSentimientos])
-def obtener_resumen_por_nombre(nombre_docente: str, db: Session = Depends(get_db)):
+@app.get(
+    "/resumen_sentimientos/nombre/{nombre_docente}", dependencies=[auth.DOCENTE_O_GESTION],
+    **documentado(List[schemas.ResumenSentimientos])
+)
+def obtener_resumen_por_nombre(nombre_docente: str, request: Request, db: Session = Depends(get_db)):
     try:
+        etag = crud.etag_resumen_sentimientos_por_nombre(db, nombre_docente)
+        no_modificado = condicional.no_modificado(request, etag, condicional.CACHE_RESUMEN)
+        if no_modificado is not None:
+            return no_modificado
+
         # Llamamos a la función CRUD que interactúa con la base de datos
         resumen = crud.obtener_resumen_sentimientos_por_nombre(db, nombre_docente)
 
         if not resumen:
             raise HTTPException(status_code=404, detail="Resumen de sentimientos no encontrado para este docente")
 
-        return resumen
+        return condicional.con_etag(resumen, etag, condicional.CACHE_RESUMEN)
 
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error al obtener el resumen: {str(e)}")
         
+# ---------------------- Ruta para reconstruir el resumen de sentimientos----------------------#
+
+@app.post("/admin/resumen-sentimientos/reconstruir", dependencies=[auth.ADMINISTRADOR])
+def reconstruir_resumen_sentimientos(db: Session = Depends(get_db)):
+    try:
+        return crud.reconstruir_resumen_sentimientos(db)
+    except DBAPIError as e:
+        db.rollback()
+        raise HTTPException(status_code=500, detail=str(e.orig) if hasattr(e, 'orig') else str(e))
+
+
+# ---------------------- Ruta para métricas del cache de sentimientos----------------------#
+
+@app.get("/admin/cache-sentimientos", dependencies=[auth.ADMINISTRADOR])
+def estadisticas_cache_sentimientos():
+    return cache_sentimientos.estadisticas()
+
+
+# Aciertos por entidad de la cache de usuarios, asignaturas y evaluaciones, y de los tokens verificados
+@app.get("/admin/cache", dependencies=[auth.ADMINISTRADOR])
+def estadisticas_cache_entidades():
+    return {**cache_entidades.estadisticas(), "autenticacion": auth.estadisticas()}
+
+
+# Métricas por ruta, de la base, del modelo y del pool en formato de Prometheus (ver instrumentacion.py)
+@app.get("/metrics", include_in_schema=False)
+def metricas_prometheus(request: Request):
+    if METRICAS_TOKEN and not hmac.compare_digest(
+        request.headers.get("authorization", ""), f"Bearer {METRICAS_TOKEN}"
+    ):
+        raise HTTPException(status_code=401, detail="Token de métricas inválido")
+    return Response(instrumentacion.exponer(), media_type=instrumentacion.TIPO_CONTENIDO)
+
+
+@app.get("/ready")
+def ready():
+    if not estado_arranque["listo"]:
+        return RespuestaJSON(status_code=503, content={
+            "listo": False, "error": estado_arranque["error"], "etapas": estado_arranque["etapas"]
+        })
+    return {"listo": True, "duracion_ms": estado_arranque["duracion_ms"], "etapas": estado_arranque["etapas"]}
+
+
+@app.get("/admin/pool", dependencies=[auth.ADMINISTRADOR])
+def estado_pool_conexiones():
+    return estado_pools()
+
+
+# Sentencias SQL por procedimiento, vista o tabla y las lentas recientes (ver perfilador_sql.py)
+@app.get("/admin/sql", dependencies=[auth.ADMINISTRADOR])
+def perfil_sql(orden: str = "total", limite: int = 20):
+    if orden not in perfilador_sql.ORDENES:
+        raise HTTPException(status_code=400, detail=f"orden debe ser uno de: {', '.join(perfilador_sql.ORDENES)}")
+    if not perfilador_sql.SQL_PERFILADOR:
+        raise HTTPException(status_code=404, detail="El perfilador SQL está desactivado (SQL_PERFILADOR=false)")
+    return perfilador_sql.perfilador_sql.estadisticas(orden=orden, limite=min(max(limite, 1), 200))
+
+
+@app.post("/admin/sql/reiniciar", dependencies=[auth.ADMINISTRADOR])
+def reiniciar_perfil_sql():
+    perfilador_sql.perfilador_sql.reiniciar()
+    return {"reiniciado": True}
+
+
+# Reanálisis de comentarios fallidos o con un prompt anterior (ver reanalisis.py)
+@app.post("/admin/reanalisis", dependencies=[auth.ADMINISTRADOR])
+def iniciar_reanalisis(solo_fallidos: bool = False, tasa: float = reanalisis.REANALISIS_TASA,
+                       concurrencia: int = reanalisis.REANALISIS_CONCURRENCIA, reiniciar: bool = False):
+    try:
+        trabajo = reanalisis.iniciar_en_segundo_plano(
+            reiniciar=reiniciar, solo_fallidos=solo_fallidos, tasa=tasa, concurrencia=min(max(concurrencia, 1), 16)
+        )
+    except (RuntimeError, ValueError) as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    return RespuestaJSON(status_code=202, content=trabajo.progreso())
+
+
+@app.get("/admin/reanalisis", dependencies=[auth.ADMINISTRADOR])
+def progreso_reanalisis():
+    trabajo = reanalisis.trabajo_actual()
+    return trabajo.progreso() if trabajo else {"estado": "inactivo"}
+
+
+@app.post("/admin/reanalisis/detener", dependencies=[auth.ADMINISTRADOR])
+def detener_reanalisis():
+    trabajo = reanalisis.trabajo_actual()
+    if trabajo is None:
+        raise HTTPException(status_code=404, detail="No hay un reanálisis en curso")
+    trabajo.detener()
+    return trabajo.progreso()
+
+
+@app.get("/admin/motor-sentimientos", dependencies=[auth.ADMINISTRADOR])
+def estado_motor_sentimientos():
+    return {
+        "modo": motor_sentimiento.nombre,
+        "umbral_confianza": getattr(motor_sentimiento, "umbral", None),
+        "micro_lote": micro_lote.estadisticas(),
+        "llm": cliente_llm.estadisticas(),
+    }
+
+
 # ---------------------- Rutas para usuarios ----------------------#
 
-@app.post("/usuarios/", response_model=UserResponse) # ✅
-def crear_usuario(user: UserCreate, db: Session = Depends(get_db)):
-    resultado = crud.create_user(db, user)
+@app.post("/usuarios/", dependencies=[auth.GESTION], response_model=UserResponse) # ✅
+async def crear_usuario(user: UserCreate, db: Session = Depends(get_db)):
+    contrasena_hash = await contrasenas.hashear_async(user.contrasena)
+    resultado = await run_in_threadpool(crud.create_user, db, user, contrasena_hash)
 
     if "error" in resultado:
-        return JSONResponse(content=resultado, status_code=400)
+        return RespuestaJSON(content=resultado, status_code=400)
 
-    return JSONResponse(content=resultado, status_code=201)
+    return RespuestaJSON(content=resultado, status_code=201)
 
 
-@app.get("/usuarios/{id_usuario}", response_model=UserResponse)#✅
+@app.get("/usuarios/{id_usuario}", dependencies=[auth.AUTENTICADO], **documentado(UserResponse))#✅
 
 def obtener_usuario(id_usuario: int, db: Session = Depends(get_db)):
     user = crud.get_user(db, id_usuario)
@@ -141,10 +392,10 @@ def obtener_usuario(id_usuario: int, db: Session = Depends(get_db)):
     return user
 
 
-@app.put("/usuarios/{user_id}", response_model=UserResponse)
-
-def actualizar_usuario(user_id: int, user: UserUpdate, db: Session = Depends(get_db)):
-    actualizado = crud.update_user(db, user_id, user)
+@app.put("/usuarios/{user_id}", dependencies=[auth.GESTION], **documentado(UserResponse))
+async def actualizar_usuario(user_id: int, user: UserUpdate, db: Session = Depends(get_db)):
+    contrasena_hash = await contrasenas.hashear_async(user.contrasena) if user.contrasena else None
+    actualizado = await run_in_threadpool(crud.update_user, db, user_id, user, contrasena_hash)
 
     if actualizado is None:
         raise HTTPException(status_code=404, detail="Usuario no encontrado")
@@ -152,7 +403,7 @@ def actualizar_usuario(user_id: int, user: UserUpdate, db: Session = Depends(get
     return actualizado
 
 
-@app.delete("/usuarios/{id_usuario}", response_model=dict)
+@app.delete("/usuarios/{id_usuario}", dependencies=[auth.GESTION], response_model=dict)
 def eliminar_usuario(id_usuario: int, db: Session = Depends(get_db)):
     try:
         eliminado = crud.delete_user(db, id_usuario)
@@ -167,7 +418,7 @@ def eliminar_usuario(id_usuario: int, db: Session = Depends(get_db)):
 
 # ---------------------- Rutas para asignaturas ----------------------#
 
-@app.post("/asignaturas/", response_model=AsignaturaResponse)
+@app.post("/asignaturas/", dependencies=[auth.GESTION], response_model=AsignaturaResponse)
 
 def crear_asignatura(asignatura: AsignaturaCreate, db: Session = Depends(get_db)):
 
@@ -175,10 +426,10 @@ def crear_asignatura(asignatura: AsignaturaCreate, db: Session = Depends(get_db)
     if not nueva:
         raise HTTPException(status_code=400, detail="No se pudo crear la asignatura")
 
-    return JSONResponse(content=nueva, status_code=201)
+    return RespuestaJSON(content=nueva, status_code=201)
 
 
-@app.get("/asignaturas/{id_asignatura}", response_model=AsignaturaResponse)
+@app.get("/asignaturas/{id_asignatura}", dependencies=[auth.AUTENTICADO], **documentado(AsignaturaResponse))
 
 def obtener_asignatura(id_asignatura: int, db: Session = Depends(get_db)):
     asignatura = crud.get_asignatura(db, id_asignatura)
@@ -187,34 +438,34 @@ def obtener_asignatura(id_asignatura: int, db: Session = Depends(get_db)):
     return asignatura
 
 
-@app.put("/asignaturas/{id_asignatura}", response_model=AsignaturaResponse)
+@app.put("/asignaturas/{id_asignatura}", dependencies=[auth.GESTION], response_model=AsignaturaResponse)
 
 def actualizar_asignatura(id_asignatura: int, asignatura: AsignaturaUpdate, db: Session = Depends(get_db)):
     actualizada = crud.update_asignatura(db, id_asignatura, asignatura)
 
     if actualizada is None:
         raise HTTPException(status_code=404, detail="Asignatura no encontrada")
-    return JSONResponse(content=actualizada, status_code=201)
+    return RespuestaJSON(content=actualizada, status_code=201)
 
 
-@app.delete("/asignaturas/{id_asignatura}")
+@app.delete("/asignaturas/{id_asignatura}", dependencies=[auth.GESTION])
 
 def eliminar_asignatura(id_asignatura: int, db: Session = Depends(get_db)):
     eliminada = crud.delete_asignatura(db, id_asignatura)
 
     if eliminada is None:
         raise HTTPException(status_code=404, detail="Asignatura no encontrada")
-    return JSONResponse(content=eliminada, status_code=201)
+    return RespuestaJSON(content=eliminada, status_code=201)
 
 # ---------------------- Rutas para evaluaciones ----------------------#
 
-@app.post("/evaluaciones/", response_model=EvaluacionResponse)
+@app.post("/evaluaciones/", dependencies=[auth.GESTION], response_model=EvaluacionResponse)
 
 def crear_evaluacion(evaluacion: EvaluacionCreate, db: Session = Depends(get_db)):
     return crud.create_evaluacion(db, evaluacion)
 
 
-@app.get("/evaluaciones/{id_evaluacion}", response_model=EvaluacionResponse)
+@app.get("/evaluaciones/{id_evaluacion}", dependencies=[auth.AUTENTICADO], **documentado(EvaluacionResponse))
 
 def obtener_evaluacion(id_evaluacion: int, db: Session = Depends(get_db)):
     evaluacion = crud.get_evaluacion(db, id_evaluacion)
@@ -223,28 +474,28 @@ def obtener_evaluacion(id_evaluacion: int, db: Session = Depends(get_db)):
         raise HTTPException(status_code=404, detail="Evaluación no encontrada")
     return evaluacion
 
-@app.put("/evaluaciones/{id_evaluacion}", response_model=EvaluacionResponse)
+@app.put("/evaluaciones/{id_evaluacion}", dependencies=[auth.GESTION], response_model=EvaluacionResponse)
 
 def actualizar_evaluacion(id_evaluacion: int, evaluacion: EvaluacionUpdate, db: Session = Depends(get_db)):
     actualizada = crud.update_evaluacion(db, id_evaluacion, evaluacion)
     
     if actualizada is None:
         raise HTTPException(status_code=404, detail="Evaluación no encontrada")
-    return JSONResponse(content=actualizada, status_code=201)
+    return RespuestaJSON(content=actualizada, status_code=201)
 
-@app.delete("/evaluaciones/{id_evaluacion}", response_model=EvaluacionResponse)
+@app.delete("/evaluaciones/{id_evaluacion}", dependencies=[auth.GESTION], response_model=EvaluacionResponse)
 
 def eliminar_evaluacion(id_evaluacion: int, db: Session = Depends(get_db)):
     eliminada = crud.delete_evaluacion(db, id_evaluacion)
 
     if eliminada is None:
         raise HTTPException(status_code=404, detail="Evaluación no encontrada")
-    return JSONResponse(content=eliminada, status_code=201)
+    return RespuestaJSON(content=eliminada, status_code=201)
 
 
 # ---------------------- Rutas para comentarios ----------------------#
 
-@app.post("/comentarios/", response_model=ComentarioResponse)
+@app.post("/comentarios/", dependencies=[auth.AUTENTICADO], response_model=ComentarioResponse)
 
 def crear_comentario(comentario: ComentarioCreate, db: Session = Depends(get_db)):
     creado = crud.create_comentario(db, comentario)
@@ -252,10 +503,74 @@ def crear_comentario(comentario: ComentarioCreate, db: Session = Depends(get_db)
     if creado is None:
         raise HTTPException(status_code=404, detail="Comentario no encontrado")
 
-    return JSONResponse(content=creado, status_code=201)
+    return RespuestaJSON(content=creado, status_code=201)
+
+
+# Carga masiva: el cuerpo (NDJSON o CSV) se lee en streaming y se inserta en bloques
+# de CARGA_MASIVA_BLOQUE filas; los errores se reportan por fila sin abortar la carga.
+# El sentimiento de las filas insertadas se analiza en segundo plano.
+@app.post("/comentarios/bulk", dependencies=[auth.GESTION])
+
+async def carga_masiva_comentarios(request: Request, formato: Optional[str] = None,
+                                   solo_errores: bool = False, db: Session = Depends(get_db)):
+    formato = detectar_formato(request.headers.get("content-type"), formato)
+    resultados = []
+    contadores = {"ok": 0, "error": 0}
+    vistos = set()
+    bloque = []
+
+    async def procesar(bloque):
+        for resultado in await run_in_threadpool(crud.insertar_comentarios_masivo, db, bloque, vistos):
+            if not solo_errores or resultado["estado"] == "error":
+                resultados.append(resultado)
+            contadores[resultado["estado"]] += 1
+
+    try:
+        async for fila in leer_filas(request, formato):
+            bloque.append(fila)
+            if len(bloque) >= CARGA_MASIVA_BLOQUE:
+                await procesar(bloque)
+                bloque = []
+        if bloque:
+            await procesar(bloque)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    return {
+        "total": contadores["ok"] + contadores["error"],
+        "insertados": contadores["ok"],
+        "errores": contadores["error"],
+        "resultados": resultados,
+    }
+
+
+# Exportación para análisis: todos los comentarios que cumplan los filtros, en NDJSON o
+# CSV, escritos a medida que se leen de la base (ver exportacion.py). Se declara antes
+# de /comentarios/{id_comentario} para que "exportar" no se tome como un id; con
+# DB_MODO=async rutas_async.py tiene su propia versión, declarada con el mismo cuidado.
+@app.get("/comentarios/exportar", dependencies=[auth.GESTION])
+
+def exportar_comentarios(formato: str = "ndjson", nombre_docente: Optional[str] = None,
+                         id_docente: Optional[int] = None, id_asignatura: Optional[int] = None,
+                         sentimiento: Optional[FiltroSentimiento] = None,
+                         desde: Optional[datetime] = None, hasta: Optional[datetime] = None,
+                         db: Session = Depends(get_db)):
+    formato = formato.lower()
+    if formato not in EXPORTADORES:
+        raise HTTPException(status_code=400, detail="Formato no soportado (use 'ndjson' o 'csv')")
+
+    ids_docente = None
+    if nombre_docente:
+        ids_docente = crud.ids_docentes_por_nombre(db, nombre_docente)
+        if not ids_docente:
+            raise HTTPException(status_code=404, detail="Docente no encontrado")
+
+    return respuesta_exportacion(
+        formato, filtrar_docentes(ids_docente, id_docente), id_asignatura, sentimiento, desde, hasta
+    )
 
 
-@app.get("/comentarios/{id_comentario}", response_model=ComentarioResponse)
+@app.get("/comentarios/{id_comentario}", dependencies=[auth.AUTENTICADO], **documentado(ComentarioResponse))
 
 def obtener_comentario(id_comentario: int, db: Session = Depends(get_db)):
     comentario = crud.get_comentario(db, id_comentario)
@@ -264,24 +579,67 @@ def obtener_comentario(id_comentario: int, db: Session = Depends(get_db)):
         raise HTTPException(status_code=404, detail="Comentario no encontrado")
     return comentario
 
+
+def _leer_estado_analisis(id_comentario: int):
+    db = SessionLocal()
+    try:
+        return crud.get_estado_analisis(db, id_comentario)
+    finally:
+        db.close()
+
+
+# Estado del análisis de sentimiento. Con ?esperar=N (máx. 30 s) la petición
+# espera a que el análisis termine en vez de obligar al cliente a consultar en bucle.
+# Es async: la espera no ocupa un hilo del threadpool ni una conexión; cada lectura
+# usa una sesión corta.
+@app.get("/comentarios/{id_comentario}/estado", dependencies=[auth.AUTENTICADO], **documentado(EstadoAnalisisResponse))
+
+async def estado_analisis_comentario(id_comentario: int, esperar: float = 0):
+    limite = time.monotonic() + min(max(esperar, 0), 30)
+    estado = await run_in_threadpool(_leer_estado_analisis, id_comentario)
+
+    while (
+        estado is not None
+        and estado["estado_analisis"] in ("pendiente", "procesando")
+        and time.monotonic() < limite
+    ):
+        # Despierta al terminar un lote de este proceso; a lo sumo cada 1 s por si lo analiza otro
+        await cola_analisis.esperar(min(1.0, limite - time.monotonic()))
+        estado = await run_in_threadpool(_leer_estado_analisis, id_comentario)
+
+    if estado is None:
+        raise HTTPException(status_code=404, detail="Comentario no encontrado")
+    return estado
+
 # Listar docentes
 
 
-@app.get("/docentes")
+@app.get("/docentes", dependencies=[auth.AUTENTICADO])
+
+def listar_docentes(request: Request, limit: int = LIMITE, cursor: Optional[str] = None,
+                    id_asignatura: Optional[int] = None, db: Session = Depends(get_db)):
+    return condicional.respuesta_condicional(request, crud.get_docentes(db, limit, cursor, id_asignatura))
 
-def listar_docentes(db: Session = Depends(get_db)):
-    docentes = crud.get_docentes(db)
-    return [{"id": row.id_docente, "nombre": row.nombre} for row in docentes]
+
+# Autocompletar docentes por nombre (índice de trigramas en memoria)
+
+
+@app.get("/docentes/buscar", dependencies=[auth.AUTENTICADO])
+def buscar_docentes(q: str, limite: int = 10, db: Session = Depends(get_db)):
+    return crud.buscar_docentes(db, q, min(max(limite, 1), 50))
 
 
 # Listar usuarios
 
 
-@app.get("/usuarios", tags=["Usuarios"])
-def listar_usuarios(db: Session = Depends(get_db)):
+@app.get("/usuarios", dependencies=[auth.GESTION], tags=["Usuarios"])
+def listar_usuarios(limit: int = LIMITE, cursor: Optional[str] = None, rol: Optional[str] = None,
+                    desde: Optional[datetime] = None, hasta: Optional[datetime] = None,
+                    db: Session = Depends(get_db)):
     try:
-        usuarios = crud.get_todos_los_usuarios(db)
-        return {"usuarios": usuarios}
+        return crud.get_todos_los_usuarios(db, limit, cursor, rol, desde, hasta)
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
@@ -289,36 +647,109 @@ def listar_usuarios(db: Session = Depends(get_db)):
 # Listar asignaturas
 
 
-@app.get("/asignaturas")
-def asignaturas_con_docentes(db: Session = Depends(get_db)):
+@app.get("/asignaturas", dependencies=[auth.AUTENTICADO])
+def asignaturas_con_docentes(request: Request, limit: int = LIMITE, cursor: Optional[str] = None,
+                             id_docente: Optional[int] = None, db: Session = Depends(get_db)):
     try:
-        data = crud.get_asignaturas_con_docentes(db)
-        return {"asignaturas": data}
+        return condicional.respuesta_condicional(
+            request, crud.get_asignaturas_con_docentes(db, limit, cursor, id_docente)
+        )
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 
 #
-@app.get("/comentarios/nombre/{nombre_docente}")
-def comentarios_docente(nombre_docente: str, db: Session = Depends(get_db)):
-    return crud.get_comentarios_por_docente(db, nombre_docente)
+@app.get("/comentarios/nombre/{nombre_docente}", dependencies=[auth.DOCENTE_O_GESTION])
+def comentarios_docente(nombre_docente: str, limit: int = LIMITE, cursor: Optional[str] = None,
+                        sentimiento: Optional[FiltroSentimiento] = None, id_asignatura: Optional[int] = None,
+                        desde: Optional[datetime] = None, hasta: Optional[datetime] = None,
+                        db: Session = Depends(get_db)):
+    return crud.get_comentarios_por_docente(
+        db, nombre_docente, limit, cursor,
+        sentimiento=sentimiento, id_asignatura=id_asignatura, desde=desde, hasta=hasta
+    )
 
 
-@app.put("/comentarios/{id_comentario}", response_model=ComentarioResponse)
+@app.put("/comentarios/{id_comentario}", dependencies=[auth.GESTION], response_model=ComentarioResponse)
 
 def actualizar_comentario(id_comentario: int, comentario: ComentarioUpdate, db: Session = Depends(get_db)):
     actualizada = crud.update_comentario(db, id_comentario, comentario)
 
     if actualizada is None:
         raise HTTPException(status_code=404, detail="Comentario no encontrado")
-    return JSONResponse(content=actualizada, status_code=201)
+    return RespuestaJSON(content=actualizada, status_code=201)
 
 
-@app.delete("/comentarios/{id_comentario}", response_model=ComentarioResponse)
+@app.delete("/comentarios/{id_comentario}", dependencies=[auth.GESTION], response_model=ComentarioResponse)
 
 def eliminar_comentario(id_comentario: int, db: Session = Depends(get_db)):
     eliminada = crud.delete_comentario(db, id_comentario)
 
     if eliminada is None:
         raise HTTPException(status_code=404, detail="Comentario no encontrado")
-    return JSONResponse(content=eliminada, status_code=201)
\ No newline at end of file
+    return RespuestaJSON(content=eliminada, status_code=201)
+
+# ---------------------- Rutas para reportes ----------------------#
+
+# Un docente solo puede pedir y descargar sus propios reportes
+def _verificar_acceso_reporte(usuario, docente):
+    if usuario and usuario["rol"] == "Docente" and usuario["email"] != docente["email"]:
+        raise HTTPException(status_code=403, detail="No tiene permisos sobre los reportes de otro docente")
+
+
+# Devuelve 202 con el reporte 'pendiente' y se genera en segundo plano (ver reportes.py);
+# si ya hay uno con los mismos datos y formato, responde 200 con ese.
+@app.post("/reportes", **documentado(ReporteResponse, status_code=202))
+def solicitar_reporte(solicitud: ReporteCreate, usuario=auth.DOCENTE_O_GESTION, db: Session = Depends(get_db)):
+    docente = crud.get_user(db, solicitud.id_docente)
+    if docente is None or docente["rol"] != "Docente":
+        raise HTTPException(status_code=404, detail="Docente no encontrado")
+    _verificar_acceso_reporte(usuario, docente)
+    semestre = reportes.obtener_semestre(db, solicitud.id_semestre)
+    if semestre is None:
+        raise HTTPException(status_code=404, detail="Semestre no encontrado")
+
+    reporte, reutilizado = reportes.solicitar(db, docente, semestre, solicitud.formato)
+    return RespuestaJSON(
+        content=reportes.a_respuesta(reporte, reutilizado), status_code=200 if reutilizado else 202
+    )
+
+
+@app.get("/reportes/{id_reporte}", **documentado(ReporteResponse))
+def estado_reporte(id_reporte: int, usuario=auth.DOCENTE_O_GESTION, db: Session = Depends(get_db)):
+    reporte = reportes.obtener_reporte(db, id_reporte)
+    if reporte is None:
+        raise HTTPException(status_code=404, detail="Reporte no encontrado")
+    _verificar_acceso_reporte(usuario, crud.get_user(db, reporte["id_docente"]) or {"email": None})
+    return reportes.a_respuesta(reporte)
+
+
+# El archivo es inmutable (su nombre es el hash de los datos), así que el ETag es su hash
+@app.get("/reportes/{id_reporte}/archivo")
+def descargar_reporte(id_reporte: int, request: Request, usuario=auth.DOCENTE_O_GESTION,
+                      db: Session = Depends(get_db)):
+    reporte = reportes.obtener_reporte(db, id_reporte)
+    if reporte is None:
+        raise HTTPException(status_code=404, detail="Reporte no encontrado")
+    _verificar_acceso_reporte(usuario, crud.get_user(db, reporte["id_docente"]) or {"email": None})
+    if reporte["estado"] != "listo":
+        raise HTTPException(status_code=409, detail=f"El reporte está en estado '{reporte['estado']}'")
+    if not reportes.archivo_disponible(reporte):
+        raise HTTPException(status_code=404, detail="El reporte no tiene archivo; solicítelo de nuevo")
+
+    etag = f'"{reporte["hash_contenido"]}"'
+    no_modificado = condicional.no_modificado(request, etag, condicional.CACHE_REPORTE)
+    if no_modificado is not None:
+        return no_modificado
+    nombre = f"reporte_{reporte['id_docente']}_{reporte['id_semestre']}.{EXTENSIONES[reporte['formato']]}"
+    return FileResponse(
+        reporte["ruta"], media_type=TIPOS_CONTENIDO_REPORTE[reporte["formato"]], filename=nombre,
+        headers={"ETag": etag, "Cache-Control": condicional.CACHE_REPORTE},
+    )
+
+
+@app.get("/admin/reportes", dependencies=[auth.ADMINISTRADOR])
+def estadisticas_reportes():
+    return reportes.generador.estadisticas()
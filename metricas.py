@@ -0,0 +1,174 @@
+import bisect
+import threading
+from abc import ABC, abstractmethod
+
+# Límites superiores (en segundos) de los buckets por defecto
+BUCKETS_LATENCIA = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+class Histograma:
+    """Histograma de buckets fijos, seguro entre hilos y de costo constante por observación."""
+
+    def __init__(self, buckets=BUCKETS_LATENCIA):
+        self.buckets = tuple(buckets)
+        self._conteos = [0] * (len(self.buckets) + 1)  # el último es +Inf
+        self._lock = threading.Lock()
+        self.total = 0
+        self.suma = 0.0
+        self.maximo = 0.0
+
+    def observar(self, valor: float):
+        # Primer bucket con límite >= valor; len(buckets) es +Inf
+        indice = bisect.bisect_left(self.buckets, valor)
+        with self._lock:
+            self._conteos[indice] += 1
+            self.total += 1
+            self.suma += valor
+            if valor > self.maximo:
+                self.maximo = valor
+
+    def acumulados(self):
+        """[(límite, conteo acumulado)], con float('inf') como último límite."""
+        return self.instantanea()[0]
+
+    def instantanea(self):
+        """(acumulados, suma, total) leídos juntos, para exportar sin mezclar observaciones."""
+        with self._lock:
+            conteos, suma, total = list(self._conteos), self.suma, self.total
+        acumulados, acumulado = [], 0
+        for limite, conteo in zip(self.buckets + (float("inf"),), conteos):
+            acumulado += conteo
+            acumulados.append((limite, acumulado))
+        return acumulados, suma, total
+
+    def percentil(self, p: float):
+        """Estimación del percentil p (0-100) como el límite del bucket que lo contiene."""
+        acumulados = self.acumulados()
+        total = acumulados[-1][1]
+        if not total:
+            return None
+        objetivo = total * p / 100
+        for limite, acumulado in acumulados:
+            if acumulado >= objetivo:
+                return limite if limite != float("inf") else self.maximo
+        return self.maximo
+
+    def resumen(self) -> dict:
+        with self._lock:
+            total, suma, maximo = self.total, self.suma, self.maximo
+        return {
+            "total": total,
+            "promedio_ms": round(suma / total * 1000, 3) if total else None,
+            "max_ms": round(maximo * 1000, 3),
+            "p50_ms": _ms(self.percentil(50)),
+            "p95_ms": _ms(self.percentil(95)),
+            "p99_ms": _ms(self.percentil(99)),
+            "buckets": {
+                ("+Inf" if limite == float("inf") else f"{limite * 1000:g}ms"): acumulado
+                for limite, acumulado in self.acumulados()
+            },
+        }
+
+
+def _ms(valor):
+    return round(valor * 1000, 3) if valor is not None else None
+
+
+class Contador:
+    """Contador monotónico seguro entre hilos."""
+
+    def __init__(self):
+        self.valor = 0
+        self._lock = threading.Lock()
+
+    def incrementar(self, n: int = 1):
+        with self._lock:
+            self.valor += n
+
+
+class _Familia(ABC):
+    """Series de una métrica por combinación de etiquetas, en formato de texto de Prometheus."""
+
+    tipo = None
+
+    def __init__(self, nombre: str, ayuda: str, etiquetas=()):
+        self.nombre = nombre
+        self.ayuda = ayuda
+        self.etiquetas = tuple(etiquetas)
+        self._series = {}
+        self._lock = threading.Lock()
+
+    def serie(self, *valores):
+        # Lectura sin lock en el camino común; la serie se crea una sola vez
+        serie = self._series.get(valores)
+        if serie is None:
+            with self._lock:
+                serie = self._series.setdefault(valores, self._nueva())
+        return serie
+
+    @abstractmethod
+    def _nueva(self):
+        ...
+
+    @abstractmethod
+    def _muestras(self, valores, serie):
+        ...
+
+    def exponer(self) -> str:
+        with self._lock:
+            series = list(self._series.items())
+        lineas = [f"# HELP {self.nombre} {self.ayuda}", f"# TYPE {self.nombre} {self.tipo}"]
+        for valores, serie in sorted(series):
+            lineas.extend(self._muestras(dict(zip(self.etiquetas, valores)), serie))
+        return "\n".join(lineas)
+
+
+class FamiliaContadores(_Familia):
+    tipo = "counter"
+
+    def _nueva(self):
+        return Contador()
+
+    def _muestras(self, etiquetas, serie):
+        return [muestra(self.nombre, etiquetas, serie.valor)]
+
+
+class FamiliaHistogramas(_Familia):
+    tipo = "histogram"
+
+    def __init__(self, nombre: str, ayuda: str, etiquetas=(), buckets=BUCKETS_LATENCIA):
+        super().__init__(nombre, ayuda, etiquetas)
+        self.buckets = tuple(buckets)
+
+    def _nueva(self):
+        return Histograma(self.buckets)
+
+    def _muestras(self, etiquetas, serie):
+        return muestras_histograma(self.nombre, etiquetas, serie)
+
+
+def _escapar(valor) -> str:
+    return str(valor).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def muestra(nombre: str, etiquetas: dict, valor) -> str:
+    if etiquetas:
+        pares = ",".join(f'{clave}="{_escapar(v)}"' for clave, v in etiquetas.items())
+        return f"{nombre}{{{pares}}} {valor}"
+    return f"{nombre} {valor}"
+
+
+def muestras_histograma(nombre: str, etiquetas: dict, histograma: Histograma):
+    acumulados, suma, total = histograma.instantanea()
+    lineas = [
+        muestra(f"{nombre}_bucket", {**etiquetas, "le": "+Inf" if limite == float("inf") else f"{limite:g}"}, conteo)
+        for limite, conteo in acumulados
+    ]
+    lineas.append(muestra(f"{nombre}_sum", etiquetas, round(suma, 6)))
+    lineas.append(muestra(f"{nombre}_count", etiquetas, total))
+    return lineas
+
+
+def metrica(nombre: str, tipo: str, ayuda: str, lineas) -> str:
+    """Bloque de una métrica calculada al exponer (gauges, o histogramas y contadores ajenos)."""
+    return "\n".join([f"# HELP {nombre} {ayuda}", f"# TYPE {nombre} {tipo}", *lineas])
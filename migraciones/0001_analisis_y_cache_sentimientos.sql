@@ -0,0 +1,172 @@
+-- Análisis de sentimiento en segundo plano y cache persistente de sentimientos
+-- Estado del análisis por comentario, tabla Cache_sentimientos y procedimientos
+-- que usan analisis.py y chat/cache.py.
+
+ALTER TABLE Comentarios
+    ADD COLUMN estado_analisis ENUM('pendiente', 'procesando', 'completado', 'error')
+        NOT NULL DEFAULT 'pendiente' AFTER sentimiento,
+    ADD COLUMN origen_sentimiento ENUM('local', 'cache', 'llm') AFTER estado_analisis,
+    ADD INDEX idx_comentarios_estado_analisis (estado_analisis);
+
+-- Los comentarios existentes ya tienen su sentimiento calculado
+UPDATE Comentarios SET estado_analisis = 'completado' WHERE sentimiento IS NOT NULL;
+
+CREATE TABLE IF NOT EXISTS Cache_sentimientos (
+    clave             CHAR(64) PRIMARY KEY,
+    etiqueta_promedio ENUM('positivo', 'negativo', 'neutral') NOT NULL,
+    sentimiento       ENUM('positivo', 'negativo', 'neutral') NOT NULL,
+    fecha_creacion    TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+
+DROP PROCEDURE IF EXISTS InsertarComentario;
+DELIMITER $$
+CREATE PROCEDURE InsertarComentario(
+    IN p_id_estudiante INT,
+    IN p_id_docente    INT,
+    IN p_id_asignatura INT,
+    IN p_comentario    TEXT,
+    IN p_sentimiento   TEXT,
+    IN p_promedio      DECIMAL(3,1)
+)
+BEGIN
+    INSERT INTO Comentarios
+        (id_estudiante, id_docente, id_asignatura, comentario, sentimiento,
+         estado_analisis, promedio)
+    VALUES
+        (p_id_estudiante, p_id_docente, p_id_asignatura,
+         p_comentario, p_sentimiento,
+         IF(p_sentimiento IS NULL, 'pendiente', 'completado'), p_promedio);
+    -- Devuelve el id para encolar el análisis de sentimiento
+    SELECT LAST_INSERT_ID() AS id_comentario;
+END$$
+DELIMITER ;
+
+DROP PROCEDURE IF EXISTS LeerComentario;
+DELIMITER $$
+CREATE PROCEDURE LeerComentario(IN p_id INT)
+BEGIN
+    SELECT
+        id_comentario,
+        id_estudiante,
+        id_docente,
+        id_asignatura,
+        id_evaluacion,
+        comentario,
+        fecha_creacion,
+        sentimiento,
+        estado_analisis
+    FROM Comentarios
+    WHERE id_comentario = p_id;
+END$$
+DELIMITER ;
+
+DROP PROCEDURE IF EXISTS ActualizarComentario;
+DELIMITER $$
+CREATE PROCEDURE ActualizarComentario(
+    IN p_id          INT,
+    IN p_id_est      INT,
+    IN p_id_doc      INT,
+    IN p_id_asig     INT,
+    IN p_id_eval     INT,
+    IN p_comentario  TEXT,
+    IN p_sentimiento TEXT
+)
+BEGIN
+    UPDATE Comentarios
+    SET id_estudiante = p_id_est,
+        id_docente    = p_id_doc,
+        id_asignatura = p_id_asig,
+        id_evaluacion = p_id_eval,
+        comentario    = p_comentario,
+        sentimiento   = p_sentimiento,
+        estado_analisis = IF(p_sentimiento IS NULL, 'pendiente', 'completado'),
+        origen_sentimiento = NULL
+    WHERE id_comentario = p_id;
+END$$
+DELIMITER ;
+
+DROP PROCEDURE IF EXISTS EstadoAnalisisComentario;
+DELIMITER $$
+CREATE PROCEDURE EstadoAnalisisComentario(IN p_id INT)
+BEGIN
+    SELECT id_comentario, sentimiento, estado_analisis, origen_sentimiento
+    FROM Comentarios
+    WHERE id_comentario = p_id;
+END$$
+DELIMITER ;
+
+DROP PROCEDURE IF EXISTS ComentariosPendientesAnalisis;
+DELIMITER $$
+CREATE PROCEDURE ComentariosPendientesAnalisis(IN p_limite INT)
+BEGIN
+    SELECT id_comentario
+    FROM Comentarios
+    WHERE estado_analisis = 'pendiente'
+    ORDER BY id_comentario
+    LIMIT p_limite;
+END$$
+DELIMITER ;
+
+DROP PROCEDURE IF EXISTS ReclamarComentarioParaAnalisis;
+DELIMITER $$
+CREATE PROCEDURE ReclamarComentarioParaAnalisis(IN p_id INT)
+BEGIN
+    DECLARE v_reclamado INT DEFAULT 0;
+    UPDATE Comentarios
+    SET estado_analisis = 'procesando'
+    WHERE id_comentario = p_id
+      AND estado_analisis = 'pendiente';
+    SET v_reclamado = ROW_COUNT();
+    SELECT id_comentario, comentario, promedio
+    FROM Comentarios
+    WHERE id_comentario = p_id
+      AND v_reclamado > 0;
+END$$
+DELIMITER ;
+
+DROP PROCEDURE IF EXISTS LeerCacheSentimiento;
+DELIMITER $$
+CREATE PROCEDURE LeerCacheSentimiento(
+    IN p_clave        CHAR(64),
+    IN p_ttl_segundos INT
+)
+BEGIN
+    SELECT sentimiento
+    FROM Cache_sentimientos
+    WHERE clave = p_clave
+      AND fecha_creacion >= NOW() - INTERVAL p_ttl_segundos SECOND;
+END$$
+DELIMITER ;
+
+DROP PROCEDURE IF EXISTS GuardarCacheSentimiento;
+DELIMITER $$
+CREATE PROCEDURE GuardarCacheSentimiento(
+    IN p_clave       CHAR(64),
+    IN p_etiqueta    VARCHAR(20),
+    IN p_sentimiento VARCHAR(20)
+)
+BEGIN
+    INSERT INTO Cache_sentimientos (clave, etiqueta_promedio, sentimiento)
+    VALUES (p_clave, p_etiqueta, p_sentimiento)
+    ON DUPLICATE KEY UPDATE
+        sentimiento    = VALUES(sentimiento),
+        fecha_creacion = CURRENT_TIMESTAMP;
+END$$
+DELIMITER ;
+
+DROP PROCEDURE IF EXISTS GuardarSentimientoComentario;
+DELIMITER $$
+CREATE PROCEDURE GuardarSentimientoComentario(
+    IN p_id          INT,
+    IN p_sentimiento VARCHAR(20),
+    IN p_estado      VARCHAR(20),
+    IN p_origen      VARCHAR(10)
+)
+BEGIN
+    UPDATE Comentarios
+    SET sentimiento        = p_sentimiento,
+        estado_analisis    = p_estado,
+        origen_sentimiento = p_origen
+    WHERE id_comentario = p_id;
+END$$
+DELIMITER ;
@@ -0,0 +1,162 @@
+-- Tabla de resumen de sentimientos mantenida por triggers
+-- Los resúmenes del dashboard leen de Resumen_sentimientos en vez de agrupar Comentarios.
+
+CREATE TABLE IF NOT EXISTS Resumen_sentimientos (
+    id_docente    INT NOT NULL,
+    id_asignatura INT NOT NULL,
+    sentimiento   ENUM('positivo', 'negativo', 'neutral', 'pendiente') NOT NULL,
+    total         INT NOT NULL DEFAULT 0,
+    PRIMARY KEY (id_docente, id_asignatura, sentimiento),
+    INDEX idx_resumen_sentimiento (sentimiento)
+);
+
+DROP PROCEDURE IF EXISTS AjustarResumenSentimientos;
+DELIMITER $$
+CREATE PROCEDURE AjustarResumenSentimientos(
+    IN p_id_docente    INT,
+    IN p_id_asignatura INT,
+    IN p_sentimiento   VARCHAR(20),
+    IN p_delta         INT
+)
+BEGIN
+    INSERT INTO Resumen_sentimientos (id_docente, id_asignatura, sentimiento, total)
+    VALUES (COALESCE(p_id_docente, 0), COALESCE(p_id_asignatura, 0),
+            COALESCE(p_sentimiento, 'pendiente'), p_delta)
+    ON DUPLICATE KEY UPDATE total = total + VALUES(total);
+END$$
+DELIMITER ;
+
+DROP PROCEDURE IF EXISTS ReconstruirResumenSentimientos;
+DELIMITER $$
+CREATE PROCEDURE ReconstruirResumenSentimientos()
+BEGIN
+    DECLARE v_faltantes INT DEFAULT 0;
+    DECLARE v_sobrantes INT DEFAULT 0;
+
+    DROP TEMPORARY TABLE IF EXISTS tmp_resumen_sentimientos;
+    CREATE TEMPORARY TABLE tmp_resumen_sentimientos (
+        id_docente    INT NOT NULL,
+        id_asignatura INT NOT NULL,
+        sentimiento   VARCHAR(20) NOT NULL,
+        total         INT NOT NULL,
+        PRIMARY KEY (id_docente, id_asignatura, sentimiento)
+    );
+
+    START TRANSACTION;
+
+    INSERT INTO tmp_resumen_sentimientos
+    SELECT COALESCE(id_docente, 0), COALESCE(id_asignatura, 0),
+           COALESCE(sentimiento, 'pendiente'), COUNT(*)
+    FROM Comentarios
+    GROUP BY COALESCE(id_docente, 0), COALESCE(id_asignatura, 0), COALESCE(sentimiento, 'pendiente');
+
+    -- Grupos con conteo distinto o ausentes en el resumen
+    SELECT COUNT(*) INTO v_faltantes
+    FROM tmp_resumen_sentimientos t
+    LEFT JOIN Resumen_sentimientos r
+        ON r.id_docente = t.id_docente
+       AND r.id_asignatura = t.id_asignatura
+       AND r.sentimiento = t.sentimiento
+    WHERE r.total IS NULL OR r.total <> t.total;
+
+    -- Grupos del resumen que ya no tienen comentarios
+    SELECT COUNT(*) INTO v_sobrantes
+    FROM Resumen_sentimientos r
+    LEFT JOIN tmp_resumen_sentimientos t
+        ON t.id_docente = r.id_docente
+       AND t.id_asignatura = r.id_asignatura
+       AND t.sentimiento = r.sentimiento
+    WHERE t.total IS NULL AND r.total <> 0;
+
+    DELETE FROM Resumen_sentimientos;
+    INSERT INTO Resumen_sentimientos (id_docente, id_asignatura, sentimiento, total)
+    SELECT id_docente, id_asignatura, sentimiento, total FROM tmp_resumen_sentimientos;
+
+    COMMIT;
+
+    SELECT COUNT(*) AS grupos, v_faltantes + v_sobrantes AS diferencias
+    FROM tmp_resumen_sentimientos;
+
+    DROP TEMPORARY TABLE tmp_resumen_sentimientos;
+END$$
+DELIMITER ;
+
+DROP PROCEDURE IF EXISTS resumen_sentimientos_global;
+DELIMITER $$
+CREATE PROCEDURE resumen_sentimientos_global()
+BEGIN
+    DECLARE total_count INT;
+    SELECT SUM(total) INTO total_count FROM Resumen_sentimientos;
+    SELECT
+        NULLIF(sentimiento, 'pendiente') AS sentimiento,
+        SUM(total) AS total,
+        ROUND((SUM(total) / total_count) * 100, 2) AS porcentaje
+    FROM Resumen_sentimientos
+    GROUP BY sentimiento
+    HAVING SUM(total) > 0;
+END$$
+DELIMITER ;
+
+DROP PROCEDURE IF EXISTS resumen_sentimientos_por_nombre_docente;
+DELIMITER $$
+CREATE PROCEDURE resumen_sentimientos_por_nombre_docente(
+    IN nombre_docente_input VARCHAR(255)
+)
+BEGIN
+    SELECT
+        d.id_usuario AS id_docente,
+        d.nombre     AS nombre_docente,
+        a.id_asignatura,
+        a.nombre_asignatura,
+        SUM(r.total) AS total_comentarios,
+        SUM(CASE WHEN r.sentimiento = 'positivo' THEN r.total ELSE 0 END) AS positivos,
+        SUM(CASE WHEN r.sentimiento = 'neutral'  THEN r.total ELSE 0 END) AS neutrales,
+        SUM(CASE WHEN r.sentimiento = 'negativo' THEN r.total ELSE 0 END) AS negativos
+    FROM Resumen_sentimientos r
+    JOIN Usuarios    d ON r.id_docente    = d.id_usuario
+    JOIN Asignaturas a ON r.id_asignatura = a.id_asignatura
+    WHERE d.rol = 'Docente'
+      AND LOWER(d.nombre) LIKE CONCAT('%', LOWER(nombre_docente_input), '%')
+    GROUP BY d.id_usuario, d.nombre, a.id_asignatura, a.nombre_asignatura
+    HAVING SUM(r.total) > 0;
+END$$
+DELIMITER ;
+
+DROP TRIGGER IF EXISTS resumen_sentimientos_insert;
+DELIMITER $$
+CREATE TRIGGER resumen_sentimientos_insert
+AFTER INSERT ON Comentarios
+FOR EACH ROW
+BEGIN
+    CALL AjustarResumenSentimientos(NEW.id_docente, NEW.id_asignatura, NEW.sentimiento, 1);
+END$$
+DELIMITER ;
+
+DROP TRIGGER IF EXISTS resumen_sentimientos_update;
+DELIMITER $$
+CREATE TRIGGER resumen_sentimientos_update
+AFTER UPDATE ON Comentarios
+FOR EACH ROW
+BEGIN
+    -- El cambio de estado_analisis no mueve el conteo; solo docente, asignatura o sentimiento
+    IF NOT (OLD.id_docente    <=> NEW.id_docente
+        AND OLD.id_asignatura <=> NEW.id_asignatura
+        AND OLD.sentimiento   <=> NEW.sentimiento) THEN
+        CALL AjustarResumenSentimientos(OLD.id_docente, OLD.id_asignatura, OLD.sentimiento, -1);
+        CALL AjustarResumenSentimientos(NEW.id_docente, NEW.id_asignatura, NEW.sentimiento, 1);
+    END IF;
+END$$
+DELIMITER ;
+
+DROP TRIGGER IF EXISTS resumen_sentimientos_delete;
+DELIMITER $$
+CREATE TRIGGER resumen_sentimientos_delete
+AFTER DELETE ON Comentarios
+FOR EACH ROW
+BEGIN
+    CALL AjustarResumenSentimientos(OLD.id_docente, OLD.id_asignatura, OLD.sentimiento, -1);
+END$$
+DELIMITER ;
+
+-- Carga inicial con los comentarios existentes
+CALL ReconstruirResumenSentimientos();
@@ -0,0 +1,24 @@
+-- Índices para las búsquedas que hacen los triggers de validación y docentes_por_estudiantes
+--
+-- validar_comentario busca (id_asignatura, id_estudiante, id_docente) en cada
+-- INSERT y evitar_descripciones_duplicadas compara Evaluaciones.descripcion;
+-- sin índices ambos recorren la tabla completa y el costo de insertar crece
+-- con el tamaño de los datos.
+--
+-- El índice único falla si ya hay comentarios repetidos para el mismo
+-- estudiante, asignatura y docente (el trigger debería haberlo impedido);
+-- en ese caso hay que depurarlos antes de aplicar esta migración.
+
+ALTER TABLE Comentarios
+    ADD UNIQUE INDEX uq_comentarios_estudiante_asignatura_docente (id_estudiante, id_asignatura, id_docente);
+
+-- Índice de prefijo: la comparación sigue siendo sobre la descripción completa
+-- (con la misma collation), el índice solo acota las filas a revisar
+ALTER TABLE Evaluaciones
+    ADD INDEX idx_evaluaciones_descripcion (descripcion(255));
+
+ALTER TABLE ME
+    ADD INDEX idx_me_estudiante_asignatura (id_estudiante, id_asignatura);
+
+ALTER TABLE MDS
+    ADD INDEX idx_mds_asignatura_docente (id_asignatura, id_docente);
@@ -0,0 +1,12 @@
+-- Índices para la paginación por cursor de los listados
+--
+-- GET /comentarios/nombre/{nombre} recorre los comentarios de un docente del
+-- más reciente al más antiguo con WHERE id_docente IN (...) y la posición
+-- (fecha_creacion, id_comentario) del cursor.
+
+ALTER TABLE Comentarios
+    ADD INDEX idx_comentarios_docente_fecha (id_docente, fecha_creacion, id_comentario);
+
+-- Filtro ?rol= de GET /usuarios (InnoDB agrega id_usuario al índice, que es el orden del cursor)
+ALTER TABLE Usuarios
+    ADD INDEX idx_usuarios_rol (rol);
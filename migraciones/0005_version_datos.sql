@@ -0,0 +1,166 @@
+-- Versión de los datos para los ETag de la API
+--
+-- Version_datos lleva un contador por ámbito ('resumen', 'docente', 'catalogo')
+-- que suben los triggers; la API lo lee con una consulta por llave primaria
+-- para responder 304 Not Modified sin ejecutar los resúmenes.
+
+CREATE TABLE IF NOT EXISTS Version_datos (
+    ambito     VARCHAR(20) NOT NULL,
+    id_ambito  INT NOT NULL DEFAULT 0,
+    version    BIGINT UNSIGNED NOT NULL DEFAULT 0,
+    PRIMARY KEY (ambito, id_ambito)
+);
+
+DROP PROCEDURE IF EXISTS IncrementarVersionDatos;
+DELIMITER $$
+CREATE PROCEDURE IncrementarVersionDatos(
+    IN p_ambito VARCHAR(20),
+    IN p_id     INT
+)
+BEGIN
+    INSERT INTO Version_datos (ambito, id_ambito, version)
+    VALUES (p_ambito, COALESCE(p_id, 0), 1)
+    ON DUPLICATE KEY UPDATE version = version + 1;
+END$$
+DELIMITER ;
+
+DROP PROCEDURE IF EXISTS AjustarResumenSentimientos;
+DELIMITER $$
+CREATE PROCEDURE AjustarResumenSentimientos(
+    IN p_id_docente    INT,
+    IN p_id_asignatura INT,
+    IN p_sentimiento   VARCHAR(20),
+    IN p_delta         INT
+)
+BEGIN
+    INSERT INTO Resumen_sentimientos (id_docente, id_asignatura, sentimiento, total)
+    VALUES (COALESCE(p_id_docente, 0), COALESCE(p_id_asignatura, 0),
+            COALESCE(p_sentimiento, 'pendiente'), p_delta)
+    ON DUPLICATE KEY UPDATE total = total + VALUES(total);
+
+    CALL IncrementarVersionDatos('resumen', 0);
+    CALL IncrementarVersionDatos('docente', p_id_docente);
+END$$
+DELIMITER ;
+
+DROP PROCEDURE IF EXISTS ReconstruirResumenSentimientos;
+DELIMITER $$
+CREATE PROCEDURE ReconstruirResumenSentimientos()
+BEGIN
+    DECLARE v_faltantes INT DEFAULT 0;
+    DECLARE v_sobrantes INT DEFAULT 0;
+
+    DROP TEMPORARY TABLE IF EXISTS tmp_resumen_sentimientos;
+    CREATE TEMPORARY TABLE tmp_resumen_sentimientos (
+        id_docente    INT NOT NULL,
+        id_asignatura INT NOT NULL,
+        sentimiento   VARCHAR(20) NOT NULL,
+        total         INT NOT NULL,
+        PRIMARY KEY (id_docente, id_asignatura, sentimiento)
+    );
+
+    START TRANSACTION;
+
+    INSERT INTO tmp_resumen_sentimientos
+    SELECT COALESCE(id_docente, 0), COALESCE(id_asignatura, 0),
+           COALESCE(sentimiento, 'pendiente'), COUNT(*)
+    FROM Comentarios
+    GROUP BY COALESCE(id_docente, 0), COALESCE(id_asignatura, 0), COALESCE(sentimiento, 'pendiente');
+
+    -- Grupos con conteo distinto o ausentes en el resumen
+    SELECT COUNT(*) INTO v_faltantes
+    FROM tmp_resumen_sentimientos t
+    LEFT JOIN Resumen_sentimientos r
+        ON r.id_docente = t.id_docente
+       AND r.id_asignatura = t.id_asignatura
+       AND r.sentimiento = t.sentimiento
+    WHERE r.total IS NULL OR r.total <> t.total;
+
+    -- Grupos del resumen que ya no tienen comentarios
+    SELECT COUNT(*) INTO v_sobrantes
+    FROM Resumen_sentimientos r
+    LEFT JOIN tmp_resumen_sentimientos t
+        ON t.id_docente = r.id_docente
+       AND t.id_asignatura = r.id_asignatura
+       AND t.sentimiento = r.sentimiento
+    WHERE t.total IS NULL AND r.total <> 0;
+
+    DELETE FROM Resumen_sentimientos;
+    INSERT INTO Resumen_sentimientos (id_docente, id_asignatura, sentimiento, total)
+    SELECT id_docente, id_asignatura, sentimiento, total FROM tmp_resumen_sentimientos;
+
+    -- Solo si algo cambió, para no invalidar los ETag en cada reconciliación
+    IF v_faltantes + v_sobrantes > 0 THEN
+        UPDATE Version_datos SET version = version + 1 WHERE ambito = 'docente';
+        CALL IncrementarVersionDatos('resumen', 0);
+    END IF;
+
+    COMMIT;
+
+    SELECT COUNT(*) AS grupos, v_faltantes + v_sobrantes AS diferencias
+    FROM tmp_resumen_sentimientos;
+
+    DROP TEMPORARY TABLE tmp_resumen_sentimientos;
+END$$
+DELIMITER ;
+
+DROP TRIGGER IF EXISTS version_catalogo_usuarios_insert;
+DROP TRIGGER IF EXISTS version_catalogo_usuarios_update;
+DROP TRIGGER IF EXISTS version_catalogo_usuarios_delete;
+DROP TRIGGER IF EXISTS version_catalogo_asignaturas_insert;
+DROP TRIGGER IF EXISTS version_catalogo_asignaturas_update;
+DROP TRIGGER IF EXISTS version_catalogo_asignaturas_delete;
+
+DELIMITER $$
+CREATE TRIGGER version_catalogo_usuarios_insert
+AFTER INSERT ON Usuarios
+FOR EACH ROW
+BEGIN
+    CALL IncrementarVersionDatos('catalogo', 0);
+END$$
+DELIMITER ;
+
+DELIMITER $$
+CREATE TRIGGER version_catalogo_usuarios_update
+AFTER UPDATE ON Usuarios
+FOR EACH ROW
+BEGIN
+    CALL IncrementarVersionDatos('catalogo', 0);
+END$$
+DELIMITER ;
+
+DELIMITER $$
+CREATE TRIGGER version_catalogo_usuarios_delete
+AFTER DELETE ON Usuarios
+FOR EACH ROW
+BEGIN
+    CALL IncrementarVersionDatos('catalogo', 0);
+END$$
+DELIMITER ;
+
+DELIMITER $$
+CREATE TRIGGER version_catalogo_asignaturas_insert
+AFTER INSERT ON Asignaturas
+FOR EACH ROW
+BEGIN
+    CALL IncrementarVersionDatos('catalogo', 0);
+END$$
+DELIMITER ;
+
+DELIMITER $$
+CREATE TRIGGER version_catalogo_asignaturas_update
+AFTER UPDATE ON Asignaturas
+FOR EACH ROW
+BEGIN
+    CALL IncrementarVersionDatos('catalogo', 0);
+END$$
+DELIMITER ;
+
+DELIMITER $$
+CREATE TRIGGER version_catalogo_asignaturas_delete
+AFTER DELETE ON Asignaturas
+FOR EACH ROW
+BEGIN
+    CALL IncrementarVersionDatos('catalogo', 0);
+END$$
+DELIMITER ;
@@ -0,0 +1,22 @@
+-- Contraseñas con bcrypt
+--
+-- Las filas existentes conservan la contraseña en texto plano hasta que el
+-- usuario inicia sesión; entonces el login la reemplaza por su hash con este
+-- procedimiento (ver contrasenas.py).
+
+DROP PROCEDURE IF EXISTS ActualizarHashContrasena;
+-- Reemplaza la contraseña guardada por su hash al iniciar sesión. Solo cambia la
+-- fila si todavía tiene el valor leído, por si otra petición ya la actualizó.
+DELIMITER $$
+CREATE PROCEDURE ActualizarHashContrasena(
+    IN p_id_usuario INT,
+    IN p_anterior   VARCHAR(255),
+    IN p_hash       VARCHAR(255)
+)
+BEGIN
+    UPDATE Usuarios
+    SET contrasena = p_hash
+    WHERE id_usuario = p_id_usuario
+      AND contrasena = p_anterior;
+END$$
+DELIMITER ;
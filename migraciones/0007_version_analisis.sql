@@ -0,0 +1,30 @@
+-- Versión del análisis de cada comentario
+--
+-- version_analisis guarda el VERSION_PROMPT de chat/chat.py con que se obtuvo
+-- el sentimiento; herramientas/reanalizar.py vuelve a analizar los que
+-- tienen una versión anterior (o fallaron) después de cambiar el prompt.
+
+ALTER TABLE Comentarios
+    ADD COLUMN version_analisis SMALLINT UNSIGNED AFTER origen_sentimiento;
+
+-- Los comentarios ya analizados se hicieron con la versión 1 del prompt
+UPDATE Comentarios SET version_analisis = 1 WHERE estado_analisis = 'completado';
+
+DROP PROCEDURE IF EXISTS GuardarSentimientoComentario;
+DELIMITER $$
+CREATE PROCEDURE GuardarSentimientoComentario(
+    IN p_id          INT,
+    IN p_sentimiento VARCHAR(20),
+    IN p_estado      VARCHAR(20),
+    IN p_origen      VARCHAR(10),
+    IN p_version     SMALLINT
+)
+BEGIN
+    UPDATE Comentarios
+    SET sentimiento        = p_sentimiento,
+        estado_analisis    = p_estado,
+        origen_sentimiento = p_origen,
+        version_analisis   = p_version
+    WHERE id_comentario = p_id;
+END$$
+DELIMITER ;
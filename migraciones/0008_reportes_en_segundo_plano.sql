@@ -0,0 +1,112 @@
+-- Generación de reportes en segundo plano
+--
+-- Reportes guarda el estado de cada solicitud, la clave (hash de los datos
+-- agregados y el formato) con la que se reutilizan los reportes idénticos y
+-- el hash, la ruta y el tamaño del archivo generado (ver reportes.py).
+
+ALTER TABLE Reportes
+    ADD COLUMN id_semestre        INT NULL,
+    ADD COLUMN estado             ENUM('pendiente', 'generando', 'listo', 'error') NOT NULL DEFAULT 'listo',
+    ADD COLUMN clave              CHAR(64) NULL,
+    ADD COLUMN hash_contenido     CHAR(64) NULL,
+    ADD COLUMN ruta               VARCHAR(255) NULL,
+    ADD COLUMN tamano             INT UNSIGNED NULL,
+    ADD COLUMN error              VARCHAR(255) NULL,
+    ADD COLUMN fecha_finalizacion TIMESTAMP NULL,
+    ADD INDEX idx_reportes_clave (clave, estado);
+
+DROP PROCEDURE IF EXISTS SolicitarReporte;
+DROP PROCEDURE IF EXISTS ActualizarEstadoReporte;
+DROP PROCEDURE IF EXISTS ObtenerReporte;
+DROP PROCEDURE IF EXISTS DatosReporteDocente;
+
+-- Reportes generados en segundo plano (ver reportes.py). p_clave es el hash de
+-- los datos agregados y el formato: si ya hay un reporte listo, o uno en curso
+-- más reciente que p_vigencia segundos, con la misma clave, se devuelve ese.
+DELIMITER $$
+CREATE PROCEDURE SolicitarReporte(
+    IN p_id_docente  INT,
+    IN p_id_semestre INT,
+    IN p_formato     VARCHAR(10),
+    IN p_clave       CHAR(64),
+    IN p_contenido   TEXT,
+    IN p_vigencia    INT
+)
+BEGIN
+    DECLARE v_id INT DEFAULT NULL;
+
+    SELECT id_reporte INTO v_id
+    FROM Reportes
+    WHERE clave = p_clave
+      AND (estado = 'listo'
+           OR (estado IN ('pendiente', 'generando')
+               AND fecha_generacion >= NOW() - INTERVAL p_vigencia SECOND))
+    ORDER BY id_reporte DESC
+    LIMIT 1;
+
+    IF v_id IS NULL THEN
+        INSERT INTO Reportes (id_docente, id_semestre, contenido, formato, estado, clave)
+        VALUES (p_id_docente, p_id_semestre, p_contenido, p_formato, 'pendiente', p_clave);
+        SELECT LAST_INSERT_ID() AS id_reporte, 0 AS reutilizado;
+    ELSE
+        SELECT v_id AS id_reporte, 1 AS reutilizado;
+    END IF;
+END$$
+DELIMITER ;
+
+DELIMITER $$
+CREATE PROCEDURE ActualizarEstadoReporte(
+    IN p_id_reporte     INT,
+    IN p_estado         VARCHAR(20),
+    IN p_hash_contenido CHAR(64),
+    IN p_ruta           VARCHAR(255),
+    IN p_tamano         INT,
+    IN p_error          VARCHAR(255)
+)
+BEGIN
+    UPDATE Reportes
+    SET estado             = p_estado,
+        hash_contenido     = p_hash_contenido,
+        ruta               = p_ruta,
+        tamano             = p_tamano,
+        error              = p_error,
+        fecha_finalizacion = IF(p_estado IN ('listo', 'error'), NOW(), NULL)
+    WHERE id_reporte = p_id_reporte;
+END$$
+DELIMITER ;
+
+DELIMITER $$
+CREATE PROCEDURE ObtenerReporte(IN p_id_reporte INT)
+BEGIN
+    SELECT r.id_reporte, r.id_docente, u.nombre AS docente, r.id_semestre, s.nombre_semestre AS semestre,
+           r.formato, r.estado, r.hash_contenido, r.ruta, r.tamano, r.error,
+           r.fecha_generacion, r.fecha_finalizacion
+    FROM Reportes r
+    LEFT JOIN Usuarios u ON u.id_usuario  = r.id_docente
+    LEFT JOIN Semestre s ON s.id_semestre = r.id_semestre
+    WHERE r.id_reporte = p_id_reporte;
+END$$
+DELIMITER ;
+
+-- Sentimientos por asignatura de un docente en las fechas de un semestre
+DELIMITER $$
+CREATE PROCEDURE DatosReporteDocente(IN p_id_docente INT, IN p_id_semestre INT)
+BEGIN
+    SELECT a.id_asignatura,
+           a.nombre_asignatura              AS asignatura,
+           COUNT(*)                         AS total,
+           SUM(c.sentimiento = 'positivo')  AS positivos,
+           SUM(c.sentimiento = 'negativo')  AS negativos,
+           SUM(c.sentimiento = 'neutral')   AS neutrales,
+           SUM(c.sentimiento IS NULL)       AS pendientes,
+           ROUND(AVG(c.promedio), 2)        AS promedio
+    FROM Comentarios c
+    JOIN Semestre s     ON s.id_semestre   = p_id_semestre
+    JOIN Asignaturas a  ON a.id_asignatura = c.id_asignatura
+    WHERE c.id_docente = p_id_docente
+      AND c.fecha_creacion >= s.fecha_inicio
+      AND c.fecha_creacion <  s.fecha_final + INTERVAL 1 DAY
+    GROUP BY a.id_asignatura, a.nombre_asignatura
+    ORDER BY a.nombre_asignatura;
+END$$
+DELIMITER ;
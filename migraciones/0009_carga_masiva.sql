@@ -0,0 +1,62 @@
+-- Triggers de Comentarios, Usuarios y Asignaturas que se omiten en cargas masivas
+--
+-- herramientas/generar_datos.py define @carga_masiva en su sesión: así no se
+-- consulta Comentarios por cada fila (validar_comentario; el índice único ya
+-- rechaza duplicados) ni se actualizan Resumen_sentimientos y Version_datos
+-- fila a fila. Al terminar la carga llama a ReconstruirResumenSentimientos e
+-- incrementa la versión del catálogo una sola vez. Las demás sesiones no
+-- definen la variable y los triggers se comportan igual que antes.
+
+DROP TRIGGER IF EXISTS validar_comentario;
+DELIMITER $$
+CREATE TRIGGER validar_comentario
+BEFORE INSERT ON Comentarios
+FOR EACH ROW
+BEGIN
+    IF @carga_masiva IS NULL AND EXISTS (
+        SELECT 1 FROM Comentarios
+        WHERE id_asignatura = NEW.id_asignatura
+          AND id_estudiante = NEW.id_estudiante
+          AND id_docente    = NEW.id_docente
+    ) THEN
+        SIGNAL SQLSTATE '45000'
+        SET MESSAGE_TEXT = 'Ya existe un comentario de este estudiante para esta asignatura y docente.';
+    END IF;
+END$$
+DELIMITER ;
+
+DROP TRIGGER IF EXISTS resumen_sentimientos_insert;
+DELIMITER $$
+CREATE TRIGGER resumen_sentimientos_insert
+AFTER INSERT ON Comentarios
+FOR EACH ROW
+BEGIN
+    IF @carga_masiva IS NULL THEN
+        CALL AjustarResumenSentimientos(NEW.id_docente, NEW.id_asignatura, NEW.sentimiento, 1);
+    END IF;
+END$$
+DELIMITER ;
+
+DROP TRIGGER IF EXISTS version_catalogo_usuarios_insert;
+DELIMITER $$
+CREATE TRIGGER version_catalogo_usuarios_insert
+AFTER INSERT ON Usuarios
+FOR EACH ROW
+BEGIN
+    IF @carga_masiva IS NULL THEN
+        CALL IncrementarVersionDatos('catalogo', 0);
+    END IF;
+END$$
+DELIMITER ;
+
+DROP TRIGGER IF EXISTS version_catalogo_asignaturas_insert;
+DELIMITER $$
+CREATE TRIGGER version_catalogo_asignaturas_insert
+AFTER INSERT ON Asignaturas
+FOR EACH ROW
+BEGIN
+    IF @carga_masiva IS NULL THEN
+        CALL IncrementarVersionDatos('catalogo', 0);
+    END IF;
+END$$
+DELIMITER ;
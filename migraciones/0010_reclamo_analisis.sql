@@ -0,0 +1,58 @@
+-- Reclamo con vencimiento para el análisis en segundo plano
+--
+-- ReclamarComentarioParaAnalisis guarda en reclamado_en cuándo un worker pasó
+-- el comentario a 'procesando'. Si el proceso muere (o el lote falla sin poder
+-- devolverlo a 'pendiente') el comentario ya no queda atascado: pasados
+-- p_vencimiento segundos ComentariosPendientesAnalisis lo vuelve a listar y
+-- cualquier worker puede reclamarlo de nuevo.
+
+ALTER TABLE Comentarios
+    ADD COLUMN reclamado_en TIMESTAMP NULL AFTER version_analisis;
+
+DROP PROCEDURE IF EXISTS ComentariosPendientesAnalisis;
+DELIMITER $$
+CREATE PROCEDURE ComentariosPendientesAnalisis(IN p_limite INT, IN p_vencimiento INT)
+BEGIN
+    -- Los 'procesando' sin reclamado_en son anteriores a esta migración: se consideran vencidos
+    SELECT id_comentario
+    FROM Comentarios
+    WHERE estado_analisis = 'pendiente'
+       OR (estado_analisis = 'procesando'
+           AND (reclamado_en IS NULL OR reclamado_en < NOW() - INTERVAL p_vencimiento SECOND))
+    ORDER BY id_comentario
+    LIMIT p_limite;
+END$$
+DELIMITER ;
+
+DROP PROCEDURE IF EXISTS ReclamarComentarioParaAnalisis;
+DELIMITER $$
+CREATE PROCEDURE ReclamarComentarioParaAnalisis(IN p_id INT, IN p_vencimiento INT)
+BEGIN
+    DECLARE v_reclamado INT DEFAULT 0;
+    UPDATE Comentarios
+    SET estado_analisis = 'procesando',
+        reclamado_en    = NOW()
+    WHERE id_comentario = p_id
+      AND (estado_analisis = 'pendiente'
+           OR (estado_analisis = 'procesando'
+               AND (reclamado_en IS NULL OR reclamado_en < NOW() - INTERVAL p_vencimiento SECOND)));
+    SET v_reclamado = ROW_COUNT();
+    SELECT id_comentario, comentario, promedio
+    FROM Comentarios
+    WHERE id_comentario = p_id
+      AND v_reclamado > 0;
+END$$
+DELIMITER ;
+
+-- Devuelve a 'pendiente' un comentario reclamado cuyo lote falló
+DROP PROCEDURE IF EXISTS LiberarComentarioAnalisis;
+DELIMITER $$
+CREATE PROCEDURE LiberarComentarioAnalisis(IN p_id INT)
+BEGIN
+    UPDATE Comentarios
+    SET estado_analisis = 'pendiente',
+        reclamado_en    = NULL
+    WHERE id_comentario = p_id
+      AND estado_analisis = 'procesando';
+END$$
+DELIMITER ;
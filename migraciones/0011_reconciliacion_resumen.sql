@@ -0,0 +1,58 @@
+-- Reconciliación del resumen sin transacción propia ni reescritura completa
+--
+-- ReconstruirResumenSentimientos hacía START TRANSACTION (que confirma en
+-- silencio la transacción de quien lo llama), borraba Resumen_sentimientos y lo
+-- volvía a insertar entero en cada reconciliación. Ahora calcula en una sola
+-- lectura la diferencia de cada grupo y solo suma las que no son cero; la
+-- transacción la controla quien lo llama.
+
+DROP PROCEDURE IF EXISTS ReconstruirResumenSentimientos;
+DELIMITER $$
+CREATE PROCEDURE ReconstruirResumenSentimientos()
+BEGIN
+    DECLARE v_diferencias INT DEFAULT 0;
+
+    DROP TEMPORARY TABLE IF EXISTS tmp_resumen_diferencias;
+    CREATE TEMPORARY TABLE tmp_resumen_diferencias (
+        id_docente    INT NOT NULL,
+        id_asignatura INT NOT NULL,
+        sentimiento   VARCHAR(20) NOT NULL,
+        delta         INT NOT NULL,
+        PRIMARY KEY (id_docente, id_asignatura, sentimiento)
+    );
+
+    -- Conteo real menos el guardado, por grupo; incluye grupos ausentes y sobrantes
+    INSERT INTO tmp_resumen_diferencias (id_docente, id_asignatura, sentimiento, delta)
+    SELECT id_docente, id_asignatura, sentimiento, SUM(total)
+    FROM (
+        SELECT COALESCE(id_docente, 0) AS id_docente, COALESCE(id_asignatura, 0) AS id_asignatura,
+               COALESCE(sentimiento, 'pendiente') AS sentimiento, COUNT(*) AS total
+        FROM Comentarios
+        GROUP BY COALESCE(id_docente, 0), COALESCE(id_asignatura, 0), COALESCE(sentimiento, 'pendiente')
+        UNION ALL
+        SELECT id_docente, id_asignatura, sentimiento, -total
+        FROM Resumen_sentimientos
+    ) AS conteos
+    GROUP BY id_docente, id_asignatura, sentimiento
+    HAVING SUM(total) <> 0;
+
+    SELECT COUNT(*) INTO v_diferencias FROM tmp_resumen_diferencias;
+
+    IF v_diferencias > 0 THEN
+        INSERT INTO Resumen_sentimientos (id_docente, id_asignatura, sentimiento, total)
+        SELECT id_docente, id_asignatura, sentimiento, delta FROM tmp_resumen_diferencias
+        ON DUPLICATE KEY UPDATE total = total + VALUES(total);
+
+        -- Solo los ETag de los docentes afectados
+        INSERT INTO Version_datos (ambito, id_ambito, version)
+        SELECT DISTINCT 'docente', id_docente, 1 FROM tmp_resumen_diferencias
+        ON DUPLICATE KEY UPDATE version = version + 1;
+        CALL IncrementarVersionDatos('resumen', 0);
+    END IF;
+
+    SELECT (SELECT COUNT(*) FROM Resumen_sentimientos WHERE total <> 0) AS grupos,
+           v_diferencias AS diferencias;
+
+    DROP TEMPORARY TABLE tmp_resumen_diferencias;
+END$$
+DELIMITER ;
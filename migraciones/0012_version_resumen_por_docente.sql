@@ -0,0 +1,108 @@
+-- Versión del resumen por docente y catálogo solo con cambios de nombres
+--
+-- AjustarResumenSentimientos subía la fila ('resumen', 0) de Version_datos con
+-- cada comentario y cada sentimiento guardado: todas las transacciones que
+-- escriben comentarios esperaban por esa misma fila. Ahora solo sube la versión
+-- del docente y el ETag del resumen global se calcula con la suma de las
+-- versiones por docente. Los triggers de actualización de Usuarios y
+-- Asignaturas solo suben la versión del catálogo si cambia lo que muestran los
+-- resúmenes (no con el rehash de la contraseña en el login).
+
+DROP PROCEDURE IF EXISTS AjustarResumenSentimientos;
+DELIMITER $$
+CREATE PROCEDURE AjustarResumenSentimientos(
+    IN p_id_docente    INT,
+    IN p_id_asignatura INT,
+    IN p_sentimiento   VARCHAR(20),
+    IN p_delta         INT
+)
+BEGIN
+    INSERT INTO Resumen_sentimientos (id_docente, id_asignatura, sentimiento, total)
+    VALUES (COALESCE(p_id_docente, 0), COALESCE(p_id_asignatura, 0),
+            COALESCE(p_sentimiento, 'pendiente'), p_delta)
+    ON DUPLICATE KEY UPDATE total = total + VALUES(total);
+
+    -- Solo la versión del docente: una fila global haría esperar a todas las escrituras de comentarios
+    CALL IncrementarVersionDatos('docente', p_id_docente);
+END$$
+DELIMITER ;
+
+DROP PROCEDURE IF EXISTS ReconstruirResumenSentimientos;
+DELIMITER $$
+CREATE PROCEDURE ReconstruirResumenSentimientos()
+BEGIN
+    DECLARE v_diferencias INT DEFAULT 0;
+
+    DROP TEMPORARY TABLE IF EXISTS tmp_resumen_diferencias;
+    CREATE TEMPORARY TABLE tmp_resumen_diferencias (
+        id_docente    INT NOT NULL,
+        id_asignatura INT NOT NULL,
+        sentimiento   VARCHAR(20) NOT NULL,
+        delta         INT NOT NULL,
+        PRIMARY KEY (id_docente, id_asignatura, sentimiento)
+    );
+
+    -- Conteo real menos el guardado, por grupo; incluye grupos ausentes y sobrantes
+    INSERT INTO tmp_resumen_diferencias (id_docente, id_asignatura, sentimiento, delta)
+    SELECT id_docente, id_asignatura, sentimiento, SUM(total)
+    FROM (
+        SELECT COALESCE(id_docente, 0) AS id_docente, COALESCE(id_asignatura, 0) AS id_asignatura,
+               COALESCE(sentimiento, 'pendiente') AS sentimiento, COUNT(*) AS total
+        FROM Comentarios
+        GROUP BY COALESCE(id_docente, 0), COALESCE(id_asignatura, 0), COALESCE(sentimiento, 'pendiente')
+        UNION ALL
+        SELECT id_docente, id_asignatura, sentimiento, -total
+        FROM Resumen_sentimientos
+    ) AS conteos
+    GROUP BY id_docente, id_asignatura, sentimiento
+    HAVING SUM(total) <> 0;
+
+    SELECT COUNT(*) INTO v_diferencias FROM tmp_resumen_diferencias;
+
+    IF v_diferencias > 0 THEN
+        INSERT INTO Resumen_sentimientos (id_docente, id_asignatura, sentimiento, total)
+        SELECT id_docente, id_asignatura, sentimiento, delta FROM tmp_resumen_diferencias
+        ON DUPLICATE KEY UPDATE total = total + VALUES(total);
+
+        -- Solo los ETag de los docentes afectados (el global se deriva de ellos)
+        INSERT INTO Version_datos (ambito, id_ambito, version)
+        SELECT DISTINCT 'docente', id_docente, 1 FROM tmp_resumen_diferencias
+        ON DUPLICATE KEY UPDATE version = version + 1;
+    END IF;
+
+    SELECT (SELECT COUNT(*) FROM Resumen_sentimientos WHERE total <> 0) AS grupos,
+           v_diferencias AS diferencias;
+
+    DROP TEMPORARY TABLE tmp_resumen_diferencias;
+END$$
+DELIMITER ;
+
+DROP TRIGGER IF EXISTS version_catalogo_usuarios_update;
+DELIMITER $$
+CREATE TRIGGER version_catalogo_usuarios_update
+AFTER UPDATE ON Usuarios
+FOR EACH ROW
+BEGIN
+    -- Los resúmenes muestran el nombre y filtran por rol; cambiar la contraseña
+    -- (p. ej. el rehash del login) o el email no invalida los ETag
+    IF NOT (OLD.nombre <=> NEW.nombre AND OLD.rol <=> NEW.rol) THEN
+        CALL IncrementarVersionDatos('catalogo', 0);
+    END IF;
+END$$
+DELIMITER ;
+
+DROP TRIGGER IF EXISTS version_catalogo_asignaturas_update;
+DELIMITER $$
+CREATE TRIGGER version_catalogo_asignaturas_update
+AFTER UPDATE ON Asignaturas
+FOR EACH ROW
+BEGIN
+    -- Los resúmenes solo muestran el nombre de la asignatura
+    IF NOT (OLD.nombre_asignatura <=> NEW.nombre_asignatura) THEN
+        CALL IncrementarVersionDatos('catalogo', 0);
+    END IF;
+END$$
+DELIMITER ;
+
+-- Ya no se usa
+DELETE FROM Version_datos WHERE ambito = 'resumen';
@@ -0,0 +1,12 @@
+-- Versión del catálogo sin subir en cada alta de usuarios o asignaturas
+--
+-- Los triggers de INSERT de Usuarios y Asignaturas subían la fila
+-- ('catalogo', 0) de Version_datos con cada fila: una carga de estudiantes
+-- esperaba por esa misma fila en cada alta. Un usuario o una asignatura
+-- nuevos no aparecen en ningún resumen hasta que tienen comentarios, y esos
+-- comentarios ya suben la versión del docente; un docente nuevo que coincide
+-- con un nombre cambia los id resueltos, que también forman parte del ETag.
+-- La versión del catálogo queda para los cambios de nombre o rol y las bajas.
+
+DROP TRIGGER IF EXISTS version_catalogo_usuarios_insert;
+DROP TRIGGER IF EXISTS version_catalogo_asignaturas_insert;
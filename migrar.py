@@ -0,0 +1,139 @@
+"""Aplica las migraciones de migraciones/ a una base creada con una versión anterior de database.sql.
+
+Cada archivo NNNN_nombre.sql se ejecuta una sola vez, en orden, y queda
+registrado en la tabla Migraciones_esquema junto con su checksum. Los
+archivos pueden usar DELIMITER como en database.sql. Una base creada con el
+database.sql actual ya trae registradas todas las migraciones.
+
+Uso:
+    python migrar.py                 # aplica las pendientes
+    python migrar.py --estado        # lista aplicadas y pendientes
+    python migrar.py --hasta 0002    # aplica hasta esa versión inclusive
+    python migrar.py --simular       # muestra lo que se ejecutaría
+"""
+import argparse
+import hashlib
+import re
+import sys
+from pathlib import Path
+
+from database import engine
+
+DIRECTORIO = Path(__file__).resolve().parent / "migraciones"
+_ARCHIVO = re.compile(r"^(\d{4})_(\w+)\.sql$")
+
+SQL_TABLA_MIGRACIONES = """
+CREATE TABLE IF NOT EXISTS Migraciones_esquema (
+    version           CHAR(4) PRIMARY KEY,
+    nombre            VARCHAR(100) NOT NULL,
+    checksum          CHAR(64),
+    fecha_aplicacion  TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+)
+"""
+
+
+def listar_migraciones():
+    """[(version, nombre, ruta)] ordenadas por versión."""
+    migraciones = []
+    for ruta in sorted(DIRECTORIO.glob("*.sql")):
+        match = _ARCHIVO.match(ruta.name)
+        if match:
+            migraciones.append((match.group(1), match.group(2), ruta))
+    return migraciones
+
+
+def dividir_sentencias(sql: str):
+    """Separa un script en sentencias respetando DELIMITER, como el cliente mysql."""
+    delimitador = ";"
+    sentencias = []
+    actual = []
+    for linea in sql.splitlines():
+        limpia = linea.strip()
+        if not actual and (not limpia or limpia.startswith("--")):
+            continue
+        if limpia.upper().startswith("DELIMITER "):
+            delimitador = limpia.split()[1]
+            continue
+        if limpia.startswith("--"):
+            continue
+        actual.append(linea)
+        if limpia.endswith(delimitador):
+            sentencia = "\n".join(actual).rstrip()
+            sentencias.append(sentencia[: -len(delimitador)].rstrip())
+            actual = []
+    if actual and "\n".join(actual).strip():
+        sentencias.append("\n".join(actual).strip())
+    return sentencias
+
+
+def checksum(ruta: Path) -> str:
+    return hashlib.sha256(ruta.read_bytes()).hexdigest()
+
+
+def migraciones_aplicadas(cursor) -> dict:
+    cursor.execute(SQL_TABLA_MIGRACIONES)
+    cursor.execute("SELECT version, checksum FROM Migraciones_esquema")
+    return {version: suma for version, suma in cursor.fetchall()}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--estado", action="store_true", help="solo muestra el estado de las migraciones")
+    parser.add_argument("--hasta", help="última versión a aplicar")
+    parser.add_argument("--simular", action="store_true", help="no ejecuta nada, solo lista las sentencias")
+    args = parser.parse_args()
+
+    conexion = engine.raw_connection()
+    try:
+        cursor = conexion.cursor()
+        aplicadas = migraciones_aplicadas(cursor)
+        conexion.commit()
+
+        pendientes = []
+        for version, nombre, ruta in listar_migraciones():
+            if version in aplicadas:
+                registrada = aplicadas[version]
+                aviso = " (el archivo cambió después de aplicarse)" if registrada and registrada != checksum(ruta) else ""
+                if args.estado or aviso:
+                    print(f"  aplicada   {version} {nombre}{aviso}")
+            elif args.hasta is None or version <= args.hasta:
+                pendientes.append((version, nombre, ruta))
+                if args.estado:
+                    print(f"  pendiente  {version} {nombre}")
+
+        if args.estado:
+            return
+        if not pendientes:
+            print("No hay migraciones pendientes.")
+            return
+
+        for version, nombre, ruta in pendientes:
+            sentencias = dividir_sentencias(ruta.read_text(encoding="utf-8"))
+            print(f"Aplicando {version} {nombre} ({len(sentencias)} sentencias)")
+            if args.simular:
+                for sentencia in sentencias:
+                    print(f"    {sentencia.splitlines()[0]}")
+                continue
+            # El DDL de MySQL confirma implícitamente, así que una migración no es atómica:
+            # si falla a medias se informa la sentencia y se corrige el archivo o la base a mano
+            for numero, sentencia in enumerate(sentencias, start=1):
+                try:
+                    cursor.execute(sentencia)
+                    while cursor.nextset():
+                        pass
+                except Exception as e:
+                    conexion.rollback()
+                    print(f"Error en la sentencia {numero} de {ruta.name}: {e}", file=sys.stderr)
+                    print(sentencia, file=sys.stderr)
+                    sys.exit(1)
+            cursor.execute(
+                "INSERT INTO Migraciones_esquema (version, nombre, checksum) VALUES (%s, %s, %s)",
+                (version, nombre, checksum(ruta)),
+            )
+            conexion.commit()
+    finally:
+        conexion.close()
+
+
+if __name__ == "__main__":
+    main()
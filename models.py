@@ -1,4 +1,4 @@
-from sqlalchemy import Column, String, Integer, ForeignKey, Text, DateTime, func
+from sqlalchemy import Column, String, Integer, SmallInteger, ForeignKey, Text, DateTime, func
 from sqlalchemy.orm import relationship
 from database import Base
 
@@ -47,6 +47,9 @@ class Comentario(Base):
     
     comentario = Column(Text, nullable=False) # Text no necesita longitud
     sentimiento = Column(String(100), nullable=True)
+    estado_analisis = Column(String(20), nullable=False, server_default="pendiente")
+    origen_sentimiento = Column(String(10), nullable=True)
+    version_analisis = Column(SmallInteger, nullable=True)
     fecha_creacion = Column(DateTime, server_default=func.now())
     
     # Especificamos foreign_keys para evitar ambigüedad
@@ -62,5 +65,13 @@ class Reporte(Base):
     fecha_generacion = Column(DateTime, server_default=func.now())
     contenido = Column(Text, nullable=False)
     formato = Column(String(50), nullable=False)
+    id_semestre = Column(Integer, nullable=True)
+    estado = Column(String(20), nullable=False, server_default="listo")
+    clave = Column(String(64), nullable=True, index=True)
+    hash_contenido = Column(String(64), nullable=True)
+    ruta = Column(String(255), nullable=True)
+    tamano = Column(Integer, nullable=True)
+    error = Column(String(255), nullable=True)
+    fecha_finalizacion = Column(DateTime, nullable=True)
 
     docente = relationship("User")
\ No newline at end of file
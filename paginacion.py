@@ -0,0 +1,65 @@
+"""Paginación por cursor (keyset) para los listados.
+
+En lugar de OFFSET, cada página pide las filas posteriores a la última
+entregada (``WHERE id > :ultimo ORDER BY id LIMIT n``), así el costo no
+crece con el número de página y no se repiten ni saltan filas si se
+insertan datos entre peticiones. El cursor es opaco para el cliente: un
+JSON con la posición en base64 url-safe.
+
+Todas las respuestas usan el mismo sobre: ``{"items", "next_cursor", "limit"}``;
+``next_cursor`` es None en la última página.
+"""
+import base64
+import json
+import os
+from typing import Callable, Optional
+
+from fastapi import HTTPException, Query
+from sqlalchemy import text
+
+PAGINACION_LIMITE = int(os.getenv("PAGINACION_LIMITE", "50"))
+PAGINACION_LIMITE_MAX = int(os.getenv("PAGINACION_LIMITE_MAX", "500"))
+
+# Parámetro ``limit`` común a las rutas de listados
+LIMITE = Query(PAGINACION_LIMITE, ge=1, le=PAGINACION_LIMITE_MAX)
+
+
+def codificar_cursor(posicion: dict) -> str:
+    datos = json.dumps(posicion, separators=(",", ":"), default=str).encode("utf-8")
+    return base64.urlsafe_b64encode(datos).decode("ascii").rstrip("=")
+
+
+def decodificar_cursor(cursor: Optional[str], *campos: str) -> Optional[dict]:
+    """Posición guardada en el cursor; 400 si no es válido o le falta alguno de ``campos``."""
+    if not cursor:
+        return None
+    try:
+        datos = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        posicion = json.loads(datos)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Cursor inválido")
+    if not isinstance(posicion, dict) or not all(_escalar(posicion.get(campo)) for campo in campos):
+        raise HTTPException(status_code=400, detail="Cursor inválido")
+    return posicion
+
+
+def _escalar(valor) -> bool:
+    # Un cursor alterado con una lista u objeto llegaría a la consulta como parámetro (500)
+    return isinstance(valor, (int, str)) and not isinstance(valor, bool)
+
+
+def consulta(select_sql: str, condiciones, orden: str, params: dict, limite: int):
+    """Arma el SELECT paginado; pide una fila de más para saber si hay otra página."""
+    where = f"WHERE {' AND '.join(condiciones)}" if condiciones else ""
+    return text(f"{select_sql} {where} ORDER BY {orden} LIMIT :limite"), {**params, "limite": limite + 1}
+
+
+def pagina(filas, limite: int, posicion: Callable, formatear: Callable) -> dict:
+    """Sobre de respuesta a partir de hasta ``limite + 1`` filas."""
+    hay_mas = len(filas) > limite
+    filas = filas[:limite]
+    return {
+        "items": formatear(filas),
+        "next_cursor": codificar_cursor(posicion(filas[-1])) if hay_mas else None,
+        "limit": limite,
+    }
@@ -0,0 +1,187 @@
+"""Perfil de las sentencias SQL por procedimiento almacenado, vista o tabla.
+
+Casi todo el acceso a datos es ``CALL Procedimiento(...)``, así que las
+sentencias se agrupan por nombre: el procedimiento de un CALL, la vista si la
+consulta usa una (Vista*), o el verbo y la primera tabla para el SQL suelto
+("SELECT Comentarios", "UPDATE Comentarios"). Por cada nombre se acumulan
+llamadas, errores, tiempo total, máximo, p95 (histograma de buckets fijos) y
+filas (las devueltas por un SELECT o CALL, o las afectadas por un INSERT o
+UPDATE, según el rowcount de pymysql).
+
+Las sentencias que pasan de SQL_LENTA_MS se registran en el log (sin los
+parámetros, que pueden traer contraseñas) y en una lista con las últimas
+SQL_LENTAS_MAX. GET /admin/sql muestra las que más pesan.
+
+Los listeners los registra instrumentacion.medir_consultas, que mide cada
+sentencia una sola vez y le pasa la duración a registrar().
+"""
+import logging
+import os
+import re
+import threading
+from collections import deque
+from datetime import datetime
+from functools import lru_cache
+
+from metricas import Histograma
+
+logger = logging.getLogger(__name__)
+
+# Activa el perfilador en los engines de database.py
+SQL_PERFILADOR = os.getenv("SQL_PERFILADOR", "true").lower() == "true"
+# Milisegundos a partir de los cuales una sentencia se registra como lenta
+SQL_LENTA_MS = float(os.getenv("SQL_LENTA_MS", "200"))
+# Sentencias lentas recientes que se guardan para GET /admin/sql
+SQL_LENTAS_MAX = int(os.getenv("SQL_LENTAS_MAX", "100"))
+
+# Buckets más finos que los de la API: un CALL típico tarda de 0.1 a 50 ms
+BUCKETS_SQL = (0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+ORDENES = ("total", "p95", "max", "llamadas", "errores", "filas")
+# Caracteres del inicio de la sentencia que se usan para clasificarla: el CALL, el
+# verbo, la vista y la tabla aparecen antes de los VALUES o las listas IN largas
+LARGO_CLASIFICACION = 512
+
+_CALL = re.compile(r"^\s*CALL\s+`?(\w+)`?", re.IGNORECASE)
+_VISTA = re.compile(r"\b(Vista\w+)\b")
+_VERBO = re.compile(r"^\s*(\w+)")
+_TABLA = {
+    "SELECT": re.compile(r"\bFROM\s+`?(\w+)", re.IGNORECASE),
+    "DELETE": re.compile(r"\bFROM\s+`?(\w+)", re.IGNORECASE),
+    "INSERT": re.compile(r"\bINTO\s+`?(\w+)", re.IGNORECASE),
+    "REPLACE": re.compile(r"\bINTO\s+`?(\w+)", re.IGNORECASE),
+    "LOAD": re.compile(r"\bTABLE\s+`?(\w+)", re.IGNORECASE),
+    "UPDATE": re.compile(r"^\s*UPDATE\s+`?(\w+)", re.IGNORECASE),
+}
+
+
+def clasificar(sentencia: str):
+    """(nombre, tipo) de una sentencia; tipo es 'procedimiento', 'vista' o 'sql'."""
+    # La cache se indexa por el prefijo: un INSERT de miles de filas no queda retenido entero
+    return _clasificar(sentencia[:LARGO_CLASIFICACION])
+
+
+@lru_cache(maxsize=2048)
+def _clasificar(sentencia: str):
+    llamada = _CALL.match(sentencia)
+    if llamada:
+        return llamada.group(1), "procedimiento"
+    vista = _VISTA.search(sentencia)
+    if vista:
+        return vista.group(1), "vista"
+    verbo = _VERBO.match(sentencia)
+    if not verbo:
+        return "?", "sql"
+    verbo = verbo.group(1).upper()
+    patron = _TABLA.get(verbo)
+    tabla = patron.search(sentencia) if patron else None
+    return (f"{verbo} {tabla.group(1)}" if tabla else verbo), "sql"
+
+
+class EstadisticaSentencia:
+
+    def __init__(self, nombre: str, tipo: str, ejemplo: str):
+        self.nombre = nombre
+        self.tipo = tipo
+        self.ejemplo = ejemplo
+        self.llamadas = 0
+        self.errores = 0
+        self.lentas = 0
+        self.total = 0.0
+        self.maximo = 0.0
+        self.filas = 0
+        self.latencia = Histograma(BUCKETS_SQL)
+
+    def resumen(self) -> dict:
+        return {
+            "sentencia": self.nombre,
+            "tipo": self.tipo,
+            "llamadas": self.llamadas,
+            "errores": self.errores,
+            "lentas": self.lentas,
+            "total_ms": round(self.total * 1000, 3),
+            "promedio_ms": round(self.total / self.llamadas * 1000, 3) if self.llamadas else None,
+            "p95_ms": _ms(self.latencia.percentil(95)),
+            "max_ms": round(self.maximo * 1000, 3),
+            "filas": self.filas,
+            "filas_promedio": round(self.filas / self.llamadas, 1) if self.llamadas else None,
+            "ejemplo": self.ejemplo,
+        }
+
+
+class PerfiladorSQL:
+
+    def __init__(self, umbral_lenta_ms: float = SQL_LENTA_MS, max_lentas: int = SQL_LENTAS_MAX):
+        self.umbral = umbral_lenta_ms / 1000
+        self._lock = threading.Lock()
+        self._sentencias = {}
+        self._lentas = deque(maxlen=max_lentas)
+        self._desde = datetime.now()
+
+    def _estadistica(self, sentencia: str) -> EstadisticaSentencia:
+        # Se llama con el lock tomado
+        nombre, tipo = clasificar(sentencia)
+        estadistica = self._sentencias.get(nombre)
+        if estadistica is None:
+            estadistica = self._sentencias[nombre] = EstadisticaSentencia(nombre, tipo, _recortar(sentencia, 300))
+        return estadistica
+
+    def registrar(self, sentencia: str, segundos: float, filas: int, error: bool = False):
+        lenta = segundos >= self.umbral
+        with self._lock:
+            estadistica = self._estadistica(sentencia)
+            estadistica.llamadas += 1
+            estadistica.total += segundos
+            if segundos > estadistica.maximo:
+                estadistica.maximo = segundos
+            if filas > 0:
+                estadistica.filas += filas
+            if error:
+                estadistica.errores += 1
+            if lenta:
+                estadistica.lentas += 1
+                self._lentas.append({
+                    "fecha": datetime.now().isoformat(timespec="seconds"),
+                    "sentencia": estadistica.nombre,
+                    "duracion_ms": round(segundos * 1000, 1),
+                    "filas": filas if filas >= 0 else None,
+                    "error": error,
+                    "sql": _recortar(sentencia, 500),
+                })
+        estadistica.latencia.observar(segundos)
+        if lenta:
+            logger.warning("SQL lenta (%.1f ms, %s filas) %s: %s", segundos * 1000, filas if filas >= 0 else "?",
+                           estadistica.nombre, _recortar(sentencia, 500))
+
+    def estadisticas(self, orden: str = "total", limite: int = 20) -> dict:
+        with self._lock:
+            resumenes = [estadistica.resumen() for estadistica in self._sentencias.values()]
+            lentas = list(self._lentas)
+        clave = {"total": "total_ms", "p95": "p95_ms", "max": "max_ms"}.get(orden, orden)
+        resumenes.sort(key=lambda r: r[clave] or 0, reverse=True)
+        return {
+            "desde": self._desde.isoformat(timespec="seconds"),
+            "umbral_lenta_ms": self.umbral * 1000,
+            "orden": orden,
+            "sentencias_distintas": len(resumenes),
+            "sentencias": resumenes[:limite],
+            "lentas_recientes": lentas[::-1][:limite],
+        }
+
+    def reiniciar(self):
+        with self._lock:
+            self._sentencias = {}
+            self._lentas.clear()
+            self._desde = datetime.now()
+
+
+def _recortar(sentencia: str, largo: int) -> str:
+    # Se compacta solo el principio: basta para el recorte y no recorre sentencias enormes
+    compacta = " ".join(sentencia[:largo * 2].split())
+    return compacta if len(compacta) <= largo else compacta[:largo] + "..."
+
+
+def _ms(valor):
+    return round(valor * 1000, 3) if valor is not None else None
+
+
+perfilador_sql = PerfiladorSQL()
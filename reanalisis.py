@@ -0,0 +1,298 @@
+"""Reanálisis por lotes de comentarios fallidos o analizados con un prompt anterior.
+
+Recorre Comentarios por llave (``id_comentario > ultimo ORDER BY id LIMIT n``),
+clasifica cada bloque con el motor de chat/motores.py en ``concurrencia``
+hilos, sin pasar de ``tasa`` comentarios por segundo, y guarda el bloque con
+un solo UPDATE. Después de cada bloque escribe un checkpoint (el último id
+guardado y los contadores) para poder continuar tras una caída sin repetir
+trabajo.
+
+Solo toca comentarios que no están en manos de la cola de análisis
+(estado 'pendiente' o 'procesando'; los que quedan atascados los retoma la
+propia cola al vencer su reclamo). Si el modelo falla para un comentario que
+ya tenía sentimiento, se conserva el anterior; lo mismo con las etiquetas
+que no son definitivas para el motor (en modo híbrido, la local que quedó
+porque el modelo no respondió). A un comentario sin sentimiento sí se le
+guarda esa etiqueta, sin versión, y se vuelve a tomar en la siguiente
+ejecución.
+
+Se usa desde herramientas/reanalizar.py o desde POST /admin/reanalisis.
+"""
+import json
+import logging
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+from sqlalchemy import text
+
+from chat.chat import LOTE_MAX, VERSION_PROMPT
+from chat.cliente import CircuitoAbierto
+from database import engine
+
+logger = logging.getLogger(__name__)
+
+# Comentarios que se leen y se guardan por bloque
+REANALISIS_LOTE = int(os.getenv("REANALISIS_LOTE", "500"))
+# Lotes de hasta SENTIMIENTO_LOTE_MAX comentarios clasificándose a la vez
+REANALISIS_CONCURRENCIA = int(os.getenv("REANALISIS_CONCURRENCIA", "4"))
+# Comentarios por segundo enviados al motor; 0 sin límite
+REANALISIS_TASA = float(os.getenv("REANALISIS_TASA", "0"))
+REANALISIS_CHECKPOINT = os.getenv(
+    "REANALISIS_CHECKPOINT", str(Path(__file__).resolve().parent / "reanalisis_checkpoint.json")
+)
+
+_PENDIENTES = "c.estado_analisis NOT IN ('pendiente', 'procesando')"
+_FALLIDOS = "(c.sentimiento IS NULL OR c.estado_analisis = 'error')"
+_DESACTUALIZADOS = "(c.version_analisis IS NULL OR c.version_analisis < :version)"
+
+
+def condicion(solo_fallidos: bool) -> str:
+    criterio = _FALLIDOS if solo_fallidos else f"({_FALLIDOS} OR {_DESACTUALIZADOS})"
+    return f"{_PENDIENTES} AND {criterio}"
+
+
+class LimitadorTasa:
+    """Token bucket: ``adquirir(n)`` bloquea hasta que haya n fichas."""
+
+    def __init__(self, tasa: float, capacidad: float = None):
+        self.tasa = tasa
+        self.capacidad = capacidad or max(tasa, 1)
+        self._fichas = self.capacidad
+        self._ultimo = time.monotonic()
+        self._lock = threading.Lock()
+
+    def adquirir(self, n: int = 1):
+        if self.tasa <= 0:
+            return
+        while True:
+            with self._lock:
+                ahora = time.monotonic()
+                self._fichas = min(self.capacidad, self._fichas + (ahora - self._ultimo) * self.tasa)
+                self._ultimo = ahora
+                # Un lote mayor que la capacidad pasa cuando el balde está lleno
+                necesarias = min(n, self.capacidad)
+                if self._fichas >= necesarias:
+                    self._fichas -= necesarias
+                    return
+                espera = (necesarias - self._fichas) / self.tasa
+            time.sleep(espera)
+
+
+class Reanalisis:
+
+    def __init__(self, solo_fallidos: bool = False, lote: int = REANALISIS_LOTE,
+                 concurrencia: int = REANALISIS_CONCURRENCIA, tasa: float = REANALISIS_TASA,
+                 checkpoint: str = REANALISIS_CHECKPOINT, motor=None):
+        # Siempre la del prompt en uso: es el que clasifica y la clave de su cache
+        self.version = VERSION_PROMPT
+        self.solo_fallidos = solo_fallidos
+        self.lote = lote
+        self.concurrencia = concurrencia
+        self.limitador = LimitadorTasa(tasa)
+        self.checkpoint = Path(checkpoint)
+        self._motor = motor
+        self._detener = threading.Event()
+        self._lock = threading.Lock()
+        self._progreso = {"estado": "inactivo"}
+
+    @property
+    def motor(self):
+        if self._motor is None:
+            from chat.motores import motor_sentimiento
+            self._motor = motor_sentimiento
+        return self._motor
+
+    # ---- Checkpoint ----
+
+    def _parametros(self) -> dict:
+        return {"version": self.version, "solo_fallidos": self.solo_fallidos}
+
+    def leer_checkpoint(self):
+        if not self.checkpoint.exists():
+            return None
+        datos = json.loads(self.checkpoint.read_text(encoding="utf-8"))
+        if datos.get("parametros") != self._parametros():
+            raise ValueError(
+                f"El checkpoint {self.checkpoint} es de otra ejecución ({datos.get('parametros')}); "
+                "use reiniciar para empezar de cero"
+            )
+        return datos
+
+    def _guardar_checkpoint(self, progreso: dict):
+        temporal = self.checkpoint.with_suffix(".tmp")
+        temporal.write_text(json.dumps({"parametros": self._parametros(), **progreso}), encoding="utf-8")
+        # Reemplazo atómico: una caída a mitad de escritura deja el checkpoint anterior
+        os.replace(temporal, self.checkpoint)
+
+    # ---- Consultas ----
+
+    def contar(self, desde_id: int = 0) -> int:
+        consulta = text(
+            f"SELECT COUNT(*) FROM Comentarios c WHERE c.id_comentario > :desde AND {condicion(self.solo_fallidos)}"
+        )
+        with engine.connect() as conexion:
+            return conexion.execute(consulta, {"desde": desde_id, "version": self.version}).scalar()
+
+    def _leer_bloque(self, conexion, desde_id: int):
+        consulta = text(f"""
+            SELECT c.id_comentario, c.comentario, c.promedio, c.sentimiento
+            FROM Comentarios c
+            WHERE c.id_comentario > :desde AND {condicion(self.solo_fallidos)}
+            ORDER BY c.id_comentario
+            LIMIT :limite
+        """)
+        return conexion.execute(
+            consulta, {"desde": desde_id, "version": self.version, "limite": self.lote}
+        ).fetchall()
+
+    def _guardar_bloque(self, resultados) -> int:
+        """Un UPDATE para todo el bloque; devuelve las filas modificadas."""
+        if not resultados:
+            return 0
+        filas, params = [], {}
+        for i, (id_comentario, resultado) in enumerate(resultados):
+            filas.append(f"SELECT :id{i} AS id, :s{i} AS sentimiento, :o{i} AS origen, :v{i} AS version")
+            params.update({
+                f"id{i}": id_comentario, f"s{i}": resultado.sentimiento, f"o{i}": resultado.origen,
+                f"v{i}": self.version if self.motor.definitivo(resultado) else None,
+            })
+        consulta = text(f"""
+            UPDATE Comentarios c
+            JOIN ({' UNION ALL '.join(filas)}) r ON r.id = c.id_comentario
+            SET c.sentimiento        = r.sentimiento,
+                c.estado_analisis    = 'completado',
+                c.origen_sentimiento = r.origen,
+                c.version_analisis   = r.version
+            WHERE {_PENDIENTES}
+        """)
+        with engine.begin() as conexion:
+            return conexion.execute(consulta, params).rowcount
+
+    # ---- Clasificación ----
+
+    def _clasificar(self, pool, filas):
+        sublotes = [filas[i:i + LOTE_MAX] for i in range(0, len(filas), LOTE_MAX)]
+
+        def clasificar_sublote(sublote):
+            self.limitador.adquirir(len(sublote))
+            return self.motor.clasificar_lote([(f.comentario, float(f.promedio)) for f in sublote])
+
+        resultados = []
+        for sublote, clasificados in zip(sublotes, pool.map(clasificar_sublote, sublotes)):
+            resultados.extend(zip((f.id_comentario for f in sublote), clasificados))
+        return resultados
+
+    def _validos(self, filas, resultados):
+        """Resultados que se guardan: una etiqueta que no es definitiva no reemplaza a la anterior."""
+        anteriores = {f.id_comentario: f.sentimiento for f in filas}
+        return [
+            (id_comentario, r) for id_comentario, r in resultados
+            if r.sentimiento is not None and (anteriores[id_comentario] is None or self.motor.definitivo(r))
+        ]
+
+    # ---- Ejecución ----
+
+    def progreso(self) -> dict:
+        with self._lock:
+            return dict(self._progreso)
+
+    def detener(self):
+        """Termina después del bloque en curso; el checkpoint permite continuar luego."""
+        self._detener.set()
+
+    def ejecutar(self, reiniciar: bool = False, hasta_id: int = None, al_avanzar=None) -> dict:
+        if reiniciar and self.checkpoint.exists():
+            self.checkpoint.unlink()
+        anterior = self.leer_checkpoint() or {}
+        ultimo_id = anterior.get("ultimo_id", 0)
+        contadores = {
+            "procesados": anterior.get("procesados", 0),
+            "actualizados": anterior.get("actualizados", 0),
+            "fallidos": anterior.get("fallidos", 0),
+        }
+        total = contadores["procesados"] + self.contar(ultimo_id)
+        inicio = time.monotonic()
+        procesados_al_inicio = contadores["procesados"]
+        self._detener.clear()
+        self._actualizar(estado="ejecutando", ultimo_id=ultimo_id, total=total, **contadores)
+
+        with ThreadPoolExecutor(max_workers=self.concurrencia, thread_name_prefix="reanalisis") as pool:
+            while not self._detener.is_set():
+                with engine.connect() as conexion:
+                    filas = self._leer_bloque(conexion, ultimo_id)
+                if hasta_id is not None:
+                    filas = [f for f in filas if f.id_comentario <= hasta_id]
+                if not filas:
+                    break
+
+                try:
+                    resultados = self._clasificar(pool, filas)
+                except CircuitoAbierto as e:
+                    # Modelo caído: se espera al circuito y se repite el mismo bloque
+                    self._actualizar(estado="esperando_modelo", reintentar_en=round(e.reintentar_en, 1))
+                    self._detener.wait(max(e.reintentar_en, 1.0))
+                    self._actualizar(estado="ejecutando", reintentar_en=None)
+                    continue
+                validos = self._validos(filas, resultados)
+                contadores["actualizados"] += self._guardar_bloque(validos)
+                contadores["fallidos"] += len(resultados) - len(validos)
+                contadores["procesados"] += len(filas)
+                ultimo_id = filas[-1].id_comentario
+
+                transcurrido = time.monotonic() - inicio
+                ritmo = (contadores["procesados"] - procesados_al_inicio) / transcurrido if transcurrido else 0.0
+                restantes = max(total - contadores["procesados"], 0)
+                self._guardar_checkpoint({"ultimo_id": ultimo_id, **contadores})
+                self._actualizar(
+                    ultimo_id=ultimo_id, total=total, **contadores,
+                    comentarios_por_segundo=round(ritmo, 2),
+                    eta_segundos=round(restantes / ritmo) if ritmo else None,
+                )
+                if al_avanzar is not None:
+                    al_avanzar(self.progreso())
+
+        terminado = not self._detener.is_set()
+        if terminado and self.checkpoint.exists():
+            self.checkpoint.unlink()
+        self._actualizar(estado="terminado" if terminado else "detenido",
+                         duracion_segundos=round(time.monotonic() - inicio, 1))
+        return self.progreso()
+
+    def _actualizar(self, **cambios):
+        with self._lock:
+            self._progreso.update(cambios)
+
+
+# Trabajo lanzado desde la API; uno a la vez por proceso
+_trabajo = None
+_trabajo_lock = threading.Lock()
+
+
+def iniciar_en_segundo_plano(reiniciar: bool = False, **opciones) -> Reanalisis:
+    global _trabajo
+    with _trabajo_lock:
+        if _trabajo is not None and _trabajo.progreso().get("estado") in ("ejecutando", "esperando_modelo"):
+            raise RuntimeError("Ya hay un reanálisis en curso")
+        trabajo = Reanalisis(**opciones)
+        if reiniciar and trabajo.checkpoint.exists():
+            trabajo.checkpoint.unlink()
+        trabajo.leer_checkpoint()  # falla aquí, y no en el hilo, si el checkpoint no corresponde
+        trabajo._actualizar(estado="ejecutando")
+        _trabajo = trabajo
+
+    def correr():
+        try:
+            trabajo.ejecutar()
+        except Exception as e:
+            logger.exception("Error en el reanálisis")
+            trabajo._actualizar(estado="error", error=str(e))
+
+    threading.Thread(target=correr, name="reanalisis", daemon=True).start()
+    return trabajo
+
+
+def trabajo_actual():
+    return _trabajo
@@ -0,0 +1,237 @@
+"""Reportes de sentimientos por docente y semestre, generados en segundo plano.
+
+POST /reportes agrega los datos en la base (una consulta agrupada, barata) y
+calcula su clave: el SHA-256 de esos datos, el formato y VERSION_PLANTILLA.
+Si ya existe un reporte listo con la misma clave, o uno en curso reciente,
+se devuelve ese; si no, se registra como 'pendiente' y se encola.
+
+Cada trabajo lo coordina un hilo: pasa los datos a un pool de procesos que
+genera el PDF o el Excel (documentos_reporte.py; es CPU y no debe competir
+con el GIL de la API), escribe el archivo de forma atómica en REPORTES_DIR
+con la clave como nombre y guarda en Reportes el hash del contenido, la ruta
+y el tamaño. GET /reportes/{id}/archivo lo sirve desde el disco.
+"""
+import hashlib
+import json
+import logging
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from pathlib import Path
+
+from sqlalchemy import text
+
+import documentos_reporte
+from database import SessionLocal
+
+logger = logging.getLogger(__name__)
+
+REPORTES_DIR = Path(os.getenv("REPORTES_DIR", str(Path(__file__).resolve().parent / "reportes_generados")))
+# Procesos que generan archivos a la vez
+REPORTES_PROCESOS = int(os.getenv("REPORTES_PROCESOS", "2"))
+# Segundos máximos para generar un archivo
+REPORTES_TIMEOUT = float(os.getenv("REPORTES_TIMEOUT", "120"))
+# Un reporte 'pendiente' o 'generando' más antiguo que esto se da por perdido
+# (p. ej. el proceso se reinició) y una solicitud igual crea uno nuevo
+REPORTES_VIGENCIA_EN_CURSO = int(os.getenv("REPORTES_VIGENCIA_EN_CURSO", str(int(REPORTES_TIMEOUT * 2))))
+
+QUERY_SEMESTRE = text("""
+    SELECT id_semestre, nombre_semestre, fecha_inicio, fecha_final
+    FROM Semestre
+    WHERE id_semestre = :id
+""")
+
+
+class Generador:
+    """Pool de procesos para generar archivos y hilos que coordinan cada trabajo."""
+
+    def __init__(self, procesos: int = REPORTES_PROCESOS):
+        self.procesos = procesos
+        self._procesos = None
+        self._hilos = None
+        self._lock = threading.Lock()
+        self._contadores = {"encolados": 0, "generados": 0, "reutilizados": 0, "fallidos": 0}
+
+    def _pools(self):
+        with self._lock:
+            if self._procesos is None:
+                self._procesos = self._nuevo_pool_procesos()
+                self._hilos = ThreadPoolExecutor(max_workers=self.procesos, thread_name_prefix="reportes")
+            return self._procesos, self._hilos
+
+    def _nuevo_pool_procesos(self):
+        # spawn: hacer fork de un proceso con hilos (uvicorn, pools de conexiones) no es seguro
+        return ProcessPoolExecutor(max_workers=self.procesos, mp_context=multiprocessing.get_context("spawn"))
+
+    def contar(self, clave: str):
+        with self._lock:
+            self._contadores[clave] += 1
+
+    def encolar(self, id_reporte: int, formato: str, clave: str, datos: dict):
+        _, hilos = self._pools()
+        self.contar("encolados")
+        hilos.submit(self._generar, id_reporte, formato, clave, datos)
+
+    def _generar(self, id_reporte, formato, clave, datos):
+        procesos, _ = self._pools()
+        try:
+            _actualizar_estado(id_reporte, "generando")
+            contenido = procesos.submit(documentos_reporte.generar, formato, datos).result(timeout=REPORTES_TIMEOUT)
+            ruta = _guardar_archivo(clave, formato, contenido)
+            _actualizar_estado(
+                id_reporte, "listo", hash_contenido=hashlib.sha256(contenido).hexdigest(),
+                ruta=str(ruta), tamano=len(contenido),
+            )
+            self.contar("generados")
+        except BrokenProcessPool as e:
+            # Un proceso murió (p. ej. por memoria): el pool queda inservible y se crea otro
+            self._descartar_procesos(procesos)
+            self._fallar(id_reporte, e)
+        except Exception as e:
+            self._fallar(id_reporte, e)
+
+    def _descartar_procesos(self, procesos):
+        with self._lock:
+            if self._procesos is procesos:
+                self._procesos = self._nuevo_pool_procesos()
+        procesos.shutdown(wait=False, cancel_futures=True)
+
+    def _fallar(self, id_reporte, e):
+        logger.exception("Error al generar el reporte %s", id_reporte)
+        self.contar("fallidos")
+        try:
+            _actualizar_estado(id_reporte, "error", error=str(e)[:255] or type(e).__name__)
+        except Exception:
+            logger.exception("No se pudo marcar el reporte %s como fallido", id_reporte)
+
+    def estadisticas(self) -> dict:
+        with self._lock:
+            return {"procesos": self.procesos, **self._contadores}
+
+    def cerrar(self):
+        with self._lock:
+            if self._hilos is not None:
+                self._hilos.shutdown(wait=False, cancel_futures=True)
+                self._procesos.shutdown(wait=False, cancel_futures=True)
+            self._procesos = self._hilos = None
+
+
+generador = Generador()
+
+
+def _actualizar_estado(id_reporte, estado, hash_contenido=None, ruta=None, tamano=None, error=None):
+    db = SessionLocal()
+    try:
+        db.execute(text("CALL ActualizarEstadoReporte(:id, :estado, :hash, :ruta, :tamano, :error)"), {
+            "id": id_reporte, "estado": estado, "hash": hash_contenido,
+            "ruta": ruta, "tamano": tamano, "error": error,
+        })
+        db.commit()
+    finally:
+        db.close()
+
+
+def _guardar_archivo(clave: str, formato: str, contenido: bytes) -> Path:
+    REPORTES_DIR.mkdir(parents=True, exist_ok=True)
+    ruta = REPORTES_DIR / f"{clave}.{documentos_reporte.EXTENSIONES[formato]}"
+    temporal = ruta.with_suffix(f".{os.getpid()}.{threading.get_ident()}.tmp")
+    temporal.write_bytes(contenido)
+    # Reemplazo atómico: quien lea la ruta nunca ve un archivo a medias
+    os.replace(temporal, ruta)
+    return ruta
+
+
+# ---- Datos y solicitudes ----
+
+def datos_reporte(db, docente: dict, semestre) -> dict:
+    """Datos agregados del reporte, solo con tipos simples (se envían a otro proceso y se hashean)."""
+    filas = db.execute(
+        text("CALL DatosReporteDocente(:id_docente, :id_semestre)"),
+        {"id_docente": docente["id_usuario"], "id_semestre": semestre.id_semestre},
+    ).fetchall()
+    asignaturas = [
+        {
+            "asignatura": fila.asignatura,
+            "total": int(fila.total),
+            "positivos": int(fila.positivos or 0),
+            "negativos": int(fila.negativos or 0),
+            "neutrales": int(fila.neutrales or 0),
+            "pendientes": int(fila.pendientes or 0),
+            "promedio": float(fila.promedio) if fila.promedio is not None else None,
+        }
+        for fila in filas
+    ]
+    total = sum(a["total"] for a in asignaturas)
+    ponderado = sum(a["promedio"] * a["total"] for a in asignaturas if a["promedio"] is not None)
+    return {
+        "docente": {"id": docente["id_usuario"], "nombre": docente["nombre"]},
+        "semestre": {
+            "id": semestre.id_semestre,
+            "nombre": semestre.nombre_semestre,
+            "fecha_inicio": semestre.fecha_inicio.isoformat(),
+            "fecha_final": semestre.fecha_final.isoformat(),
+        },
+        "asignaturas": asignaturas,
+        "totales": {
+            "total": total,
+            **{c: sum(a[c] for a in asignaturas) for c in ("positivos", "negativos", "neutrales", "pendientes")},
+            "promedio": round(ponderado / total, 2) if total else None,
+        },
+    }
+
+
+def clave_reporte(formato: str, datos: dict) -> str:
+    base = json.dumps([documentos_reporte.VERSION_PLANTILLA, formato, datos], sort_keys=True, ensure_ascii=False)
+    return hashlib.sha256(base.encode("utf-8")).hexdigest()
+
+
+def obtener_semestre(db, id_semestre: int):
+    return db.execute(QUERY_SEMESTRE, {"id": id_semestre}).fetchone()
+
+
+def obtener_reporte(db, id_reporte: int):
+    fila = db.execute(text("CALL ObtenerReporte(:id)"), {"id": id_reporte}).fetchone()
+    return dict(fila._mapping) if fila is not None else None
+
+
+def a_respuesta(reporte, reutilizado: bool = None) -> dict:
+    """Lo que ve el cliente: sin la ruta en disco y con la URL de descarga cuando está listo."""
+    respuesta = {clave: valor for clave, valor in reporte.items() if clave != "ruta"}
+    respuesta["url"] = f"/reportes/{reporte['id_reporte']}/archivo" if reporte["estado"] == "listo" else None
+    if reutilizado is not None:
+        respuesta["reutilizado"] = reutilizado
+    return respuesta
+
+
+def archivo_disponible(reporte) -> bool:
+    return reporte["estado"] == "listo" and bool(reporte["ruta"]) and os.path.exists(reporte["ruta"])
+
+
+def solicitar(db, docente: dict, semestre, formato: str):
+    """(reporte, reutilizado): el reporte existente con los mismos datos o uno nuevo encolado."""
+    datos = datos_reporte(db, docente, semestre)
+    clave = clave_reporte(formato, datos)
+    parametros = {
+        "id_docente": docente["id_usuario"], "id_semestre": semestre.id_semestre, "formato": formato,
+        "clave": clave, "contenido": f"Reporte de sentimientos {semestre.nombre_semestre}",
+        "vigencia": REPORTES_VIGENCIA_EN_CURSO,
+    }
+    consulta = text("CALL SolicitarReporte(:id_docente, :id_semestre, :formato, :clave, :contenido, :vigencia)")
+
+    fila = db.execute(consulta, parametros).fetchone()
+    db.commit()
+    reporte = obtener_reporte(db, fila.id_reporte)
+    if fila.reutilizado and reporte["estado"] == "listo" and not archivo_disponible(reporte):
+        # El archivo se borró del disco: se descarta esa fila y se genera de nuevo
+        _actualizar_estado(fila.id_reporte, "error", error="Archivo no encontrado")
+        fila = db.execute(consulta, parametros).fetchone()
+        db.commit()
+        reporte = obtener_reporte(db, fila.id_reporte)
+
+    if fila.reutilizado:
+        generador.contar("reutilizados")
+    else:
+        generador.encolar(fila.id_reporte, formato, clave, datos)
+    return reporte, bool(fila.reutilizado)
@@ -0,0 +1,31 @@
+"""Respuesta JSON serializada con orjson, usada como clase por defecto de la app.
+
+Las funciones de crud.py devuelven dicts ya listos para la respuesta, así que
+las rutas de lectura no declaran ``response_model`` (que validaría cada
+objeto otra vez con Pydantic y pasaría por jsonable_encoder): lo documentan
+con ``documentado(Modelo)``, que solo lo agrega a OpenAPI.
+"""
+from decimal import Decimal
+
+import orjson
+from fastapi.responses import JSONResponse
+
+
+def _por_defecto(valor):
+    # Tipos que orjson no serializa por sí mismo; fechas y datetimes sí los soporta
+    if isinstance(valor, Decimal):
+        return float(valor)
+    if hasattr(valor, "_mapping"):  # Row de SQLAlchemy
+        return dict(valor._mapping)
+    raise TypeError(f"Tipo no serializable: {type(valor).__name__}")
+
+
+class RespuestaJSON(JSONResponse):
+
+    def render(self, content) -> bytes:
+        return orjson.dumps(content, default=_por_defecto, option=orjson.OPT_NON_STR_KEYS)
+
+
+def documentado(modelo, status_code: int = 200) -> dict:
+    """Argumentos de ruta que documentan ``modelo`` sin validar la respuesta con él."""
+    return {"response_model": None, "responses": {status_code: {"model": modelo}}}
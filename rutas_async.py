@@ -0,0 +1,240 @@
+"""Rutas asíncronas, activas con DB_MODO=async.
+
+Tienen las mismas rutas y respuestas que sus equivalentes en main.py, pero
+usan AsyncSession sobre aiomysql, así que la concurrencia ya no depende del
+tamaño del threadpool de Starlette. main.py registra este router antes que
+sus propias rutas, por lo que estas tienen prioridad.
+"""
+from schemas import (
+    LoginRequest, UserResponse, AsignaturaResponse, EvaluacionResponse,
+    ComentarioCreate, ComentarioResponse, EstadoAnalisisResponse, EstudianteDocentesResponse,
+    FiltroSentimiento
+)
+from sqlalchemy.ext.asyncio import AsyncSession
+from fastapi import APIRouter, Depends, HTTPException, Request
+from respuestas import RespuestaJSON, documentado
+from JWTKeys import create_access_token
+from database import get_async_db
+from analisis import cola_analisis
+from exportacion import EXPORTADORES, filtrar_docentes, respuesta_exportacion
+from paginacion import LIMITE
+from datetime import datetime
+from typing import List, Optional
+import auth
+import condicional
+import contrasenas
+import crud_async
+import schemas
+import time
+
+router = APIRouter(include_in_schema=False, default_response_class=RespuestaJSON)
+
+
+@router.get(
+    "/estudiantes/{id_estudiante}/docentes_asignaturas", dependencies=[auth.AUTENTICADO],
+    **documentado(EstudianteDocentesResponse)
+)
+async def docentes_por_estudiante_async(id_estudiante: int, db: AsyncSession = Depends(get_async_db)):
+    resultado = await crud_async.obtener_docentes_por_estudiante(db, id_estudiante)
+
+    if not resultado:
+        raise HTTPException(status_code=404, detail="No se encontraron docentes ni asignaturas para este estudiante.")
+
+    return resultado
+
+
+@router.post("/login")
+async def login_async(data: LoginRequest, db: AsyncSession = Depends(get_async_db)):
+    user = await crud_async.get_user_by_email(db, data.email)
+    if not user:
+        raise HTTPException(status_code=401, detail="Usuario no encontrado")
+
+    if not await contrasenas.verificar_async(data.password, user.contrasena):
+        raise HTTPException(status_code=401, detail="Contraseña incorrecta")
+
+    if contrasenas.necesita_rehash(user.contrasena):
+        nuevo_hash = await contrasenas.hashear_async(data.password)
+        await crud_async.actualizar_hash_contrasena(db, user.id_usuario, user.contrasena, nuevo_hash)
+
+    access_token = create_access_token(
+        data={"sub": user.email, "rol": user.rol}
+    )
+    return {"access_token": access_token, "token_type": "bearer"}
+
+
+@router.get("/resumen-sentimientos/", dependencies=[auth.GESTION])
+async def resumen_sentimientos_async(request: Request, db: AsyncSession = Depends(get_async_db)):
+    try:
+        etag = await crud_async.etag_resumen_sentimientos(db)
+        no_modificado = condicional.no_modificado(request, etag, condicional.CACHE_RESUMEN)
+        if no_modificado is not None:
+            return no_modificado
+        datos = await crud_async.obtener_resumen_sentimientos(db)
+        return condicional.con_etag(datos, etag, condicional.CACHE_RESUMEN)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@router.get(
+    "/resumen_sentimientos/nombre/{nombre_docente}", dependencies=[auth.DOCENTE_O_GESTION],
+    **documentado(List[schemas.ResumenSentimientos])
+)
+async def obtener_resumen_por_nombre_async(nombre_docente: str, request: Request,
+                                           db: AsyncSession = Depends(get_async_db)):
+    try:
+        etag = await crud_async.etag_resumen_sentimientos_por_nombre(db, nombre_docente)
+        no_modificado = condicional.no_modificado(request, etag, condicional.CACHE_RESUMEN)
+        if no_modificado is not None:
+            return no_modificado
+
+        resumen = await crud_async.obtener_resumen_sentimientos_por_nombre(db, nombre_docente)
+
+        if not resumen:
+            raise HTTPException(status_code=404, detail="Resumen de sentimientos no encontrado para este docente")
+
+        return condicional.con_etag(resumen, etag, condicional.CACHE_RESUMEN)
+
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error al obtener el resumen: {str(e)}")
+
+
+@router.get("/usuarios/{id_usuario}", dependencies=[auth.AUTENTICADO], **documentado(UserResponse))
+async def obtener_usuario_async(id_usuario: int, db: AsyncSession = Depends(get_async_db)):
+    user = await crud_async.get_user(db, id_usuario)
+
+    if user is None:
+        raise HTTPException(status_code=404, detail="Usuario no encontrado")
+
+    return user
+
+
+@router.get("/asignaturas/{id_asignatura}", dependencies=[auth.AUTENTICADO], **documentado(AsignaturaResponse))
+async def obtener_asignatura_async(id_asignatura: int, db: AsyncSession = Depends(get_async_db)):
+    asignatura = await crud_async.get_asignatura(db, id_asignatura)
+    if asignatura is None:
+        raise HTTPException(status_code=404, detail="Asignatura no encontrada")
+    return asignatura
+
+
+@router.get("/evaluaciones/{id_evaluacion}", dependencies=[auth.AUTENTICADO], **documentado(EvaluacionResponse))
+async def obtener_evaluacion_async(id_evaluacion: int, db: AsyncSession = Depends(get_async_db)):
+    evaluacion = await crud_async.get_evaluacion(db, id_evaluacion)
+    if evaluacion is None:
+        raise HTTPException(status_code=404, detail="Evaluación no encontrada")
+    return evaluacion
+
+
+@router.post("/comentarios/", dependencies=[auth.AUTENTICADO], response_model=ComentarioResponse)
+async def crear_comentario_async(comentario: ComentarioCreate, db: AsyncSession = Depends(get_async_db)):
+    creado = await crud_async.create_comentario(db, comentario)
+
+    if creado is None:
+        raise HTTPException(status_code=404, detail="Comentario no encontrado")
+
+    return RespuestaJSON(content=creado, status_code=201)
+
+
+# Antes de /comentarios/{id_comentario}: este router se registra antes que las rutas de
+# main.py, así que sin esta versión "exportar" se tomaría como un id (422)
+@router.get("/comentarios/exportar", dependencies=[auth.GESTION])
+async def exportar_comentarios_async(formato: str = "ndjson", nombre_docente: Optional[str] = None,
+                                     id_docente: Optional[int] = None, id_asignatura: Optional[int] = None,
+                                     sentimiento: Optional[FiltroSentimiento] = None,
+                                     desde: Optional[datetime] = None, hasta: Optional[datetime] = None,
+                                     db: AsyncSession = Depends(get_async_db)):
+    formato = formato.lower()
+    if formato not in EXPORTADORES:
+        raise HTTPException(status_code=400, detail="Formato no soportado (use 'ndjson' o 'csv')")
+
+    ids_docente = None
+    if nombre_docente:
+        ids_docente = await crud_async.ids_docentes_por_nombre(db, nombre_docente)
+        if not ids_docente:
+            raise HTTPException(status_code=404, detail="Docente no encontrado")
+
+    return respuesta_exportacion(
+        formato, filtrar_docentes(ids_docente, id_docente), id_asignatura, sentimiento, desde, hasta
+    )
+
+
+@router.get("/comentarios/{id_comentario}", dependencies=[auth.AUTENTICADO], **documentado(ComentarioResponse))
+async def obtener_comentario_async(id_comentario: int, db: AsyncSession = Depends(get_async_db)):
+    comentario = await crud_async.get_comentario(db, id_comentario)
+    if comentario is None:
+        raise HTTPException(status_code=404, detail="Comentario no encontrado")
+    return comentario
+
+
+@router.get(
+    "/comentarios/{id_comentario}/estado", dependencies=[auth.AUTENTICADO],
+    **documentado(EstadoAnalisisResponse)
+)
+async def estado_analisis_comentario_async(id_comentario: int, esperar: float = 0,
+                                           db: AsyncSession = Depends(get_async_db)):
+    limite = time.monotonic() + min(max(esperar, 0), 30)
+    estado = await crud_async.get_estado_analisis(db, id_comentario)
+
+    while (
+        estado is not None
+        and estado["estado_analisis"] in ("pendiente", "procesando")
+        and time.monotonic() < limite
+    ):
+        # Termina la transacción antes de esperar: la conexión vuelve al pool mientras tanto
+        await db.rollback()
+        await cola_analisis.esperar(min(1.0, limite - time.monotonic()))
+        estado = await crud_async.get_estado_analisis(db, id_comentario)
+
+    if estado is None:
+        raise HTTPException(status_code=404, detail="Comentario no encontrado")
+    return estado
+
+
+@router.get("/docentes", dependencies=[auth.AUTENTICADO])
+async def listar_docentes_async(request: Request, limit: int = LIMITE, cursor: Optional[str] = None,
+                                id_asignatura: Optional[int] = None, db: AsyncSession = Depends(get_async_db)):
+    return condicional.respuesta_condicional(request, await crud_async.get_docentes(db, limit, cursor, id_asignatura))
+
+
+@router.get("/docentes/buscar", dependencies=[auth.AUTENTICADO])
+async def buscar_docentes_async(q: str, limite: int = 10, db: AsyncSession = Depends(get_async_db)):
+    return await crud_async.buscar_docentes(db, q, min(max(limite, 1), 50))
+
+
+@router.get("/usuarios", dependencies=[auth.GESTION])
+async def listar_usuarios_async(limit: int = LIMITE, cursor: Optional[str] = None, rol: Optional[str] = None,
+                                desde: Optional[datetime] = None, hasta: Optional[datetime] = None,
+                                db: AsyncSession = Depends(get_async_db)):
+    try:
+        return await crud_async.get_todos_los_usuarios(db, limit, cursor, rol, desde, hasta)
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@router.get("/asignaturas", dependencies=[auth.AUTENTICADO])
+async def asignaturas_con_docentes_async(request: Request, limit: int = LIMITE, cursor: Optional[str] = None,
+                                         id_docente: Optional[int] = None,
+                                         db: AsyncSession = Depends(get_async_db)):
+    try:
+        return condicional.respuesta_condicional(
+            request, await crud_async.get_asignaturas_con_docentes(db, limit, cursor, id_docente)
+        )
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@router.get("/comentarios/nombre/{nombre_docente}", dependencies=[auth.DOCENTE_O_GESTION])
+async def comentarios_docente_async(nombre_docente: str, limit: int = LIMITE, cursor: Optional[str] = None,
+                                    sentimiento: Optional[FiltroSentimiento] = None,
+                                    id_asignatura: Optional[int] = None,
+                                    desde: Optional[datetime] = None, hasta: Optional[datetime] = None,
+                                    db: AsyncSession = Depends(get_async_db)):
+    return await crud_async.get_comentarios_por_docente(
+        db, nombre_docente, limit, cursor,
+        sentimiento=sentimiento, id_asignatura=id_asignatura, desde=desde, hasta=hasta
+    )
@@ -1,6 +1,6 @@
 from pydantic import BaseModel
-from typing import Optional
-from datetime import date
+from typing import Optional, Literal
+from datetime import date, datetime
 from typing import List
 
 
@@ -123,12 +123,46 @@ class ComentarioUpdate(BaseModel):
     id_estudiante: Optional[int] = None
     id_docente: Optional[int] = None
     id_asignatura: Optional[int] = None
+    id_evaluacion: Optional[int] = None
     comentario: Optional[str] = None
     promedio: Optional[float] = None
 
 class ComentarioResponse(ComentarioBase):
     id_comentario: int
-    sentimiento: str
+    sentimiento: Optional[str] = None  # None mientras el análisis está pendiente
+    estado_analisis: Optional[str] = None
 
     class Config:
-        from_attributes = True
\ No newline at end of file
+        from_attributes = True
+
+class EstadoAnalisisResponse(BaseModel):
+    id_comentario: int
+    sentimiento: Optional[str] = None
+    estado_analisis: str
+    origen_sentimiento: Optional[str] = None  # 'local', 'cache' o 'llm'
+
+# Filtro ?sentimiento= de los listados; 'pendiente' son los comentarios sin analizar
+FiltroSentimiento = Literal["positivo", "negativo", "neutral", "pendiente"]
+
+# --- Reportes ---
+
+class ReporteCreate(BaseModel):
+    id_docente: int
+    id_semestre: int
+    formato: Literal["PDF", "Excel"] = "PDF"
+
+class ReporteResponse(BaseModel):
+    id_reporte: int
+    id_docente: Optional[int] = None
+    docente: Optional[str] = None
+    id_semestre: Optional[int] = None
+    semestre: Optional[str] = None
+    formato: str
+    estado: str  # 'pendiente', 'generando', 'listo' o 'error'
+    hash_contenido: Optional[str] = None  # SHA-256 del archivo
+    tamano: Optional[int] = None
+    error: Optional[str] = None
+    fecha_generacion: Optional[datetime] = None
+    fecha_finalizacion: Optional[datetime] = None
+    url: Optional[str] = None  # descarga, cuando estado es 'listo'
+    reutilizado: Optional[bool] = None  # en POST: ya existía un reporte con los mismos datos
@@ -0,0 +1,4 @@
+import os
+
+# database.py exige DATABASE_URL al importarse; las pruebas no abren conexiones
+os.environ.setdefault("DATABASE_URL", "mysql://u:p@127.0.0.1:9/x")
@@ -0,0 +1,111 @@
+import pytest
+
+from buscador_docentes import IndiceDocentes, trigramas
+
+DOCENTES = [
+    (1, "María José Pérez"),
+    (2, "Mario Peralta"),
+    (3, "MARIA"),
+    (4, "José María Núñez"),
+    (5, "Ana Martínez"),
+    (6, "Mariana López"),
+]
+
+
+class BaseFalsa:
+    """Sesión mínima para asegurar(): cuenta las lecturas de Usuarios."""
+
+    def __init__(self, filas):
+        self.filas = filas
+        self.lecturas = 0
+
+    def execute(self, consulta):
+        self.lecturas += 1
+        filas = list(self.filas)
+        return type("Resultado", (), {"fetchall": lambda _: filas})()
+
+
+@pytest.fixture
+def indice():
+    indice = IndiceDocentes(ttl=3600)
+    indice.cargar(DOCENTES)
+    return indice
+
+
+def test_trigramas_con_y_sin_relleno_final():
+    assert trigramas("ana") == {"  a", " an", "ana", "na "}
+    assert trigramas("ana", completo=False) == {"  a", " an", "ana"}
+
+
+@pytest.mark.parametrize("consulta", ["maria", "MARÍA", "María", "  maría  ", "maría!"])
+def test_resolver_sin_distinguir_tildes_ni_mayusculas(indice, consulta):
+    assert indice.resolver(consulta) == [1, 3, 4, 6]
+
+
+def test_resolver_exacto_solo_el_nombre_completo(indice):
+    assert indice.resolver("maria", exacto=True) == [3]
+    assert indice.resolver("jose maria nunez", exacto=True) == [4]
+    assert indice.resolver("jose maria", exacto=True) == []
+    assert indice.resolver("jose maria") == [4]
+    assert indice.resolver("mariana", exacto=True) == []
+
+
+def test_resolver_consultas_cortas_o_vacias(indice):
+    # Menos de 3 letras no da trigramas: se revisan todos los nombres
+    assert indice.resolver("na") == [5, 6]
+    assert indice.resolver("") == []
+    assert indice.resolver(None) == []
+    assert indice.resolver("zzz") == []
+
+
+def test_buscar_pone_primero_las_coincidencias_y_las_mas_parecidas(indice):
+    resultados = indice.buscar("maria")
+    # Los que contienen "maria" van primero; a igual puntaje, el nombre más corto y luego el alfabético
+    assert [r["id"] for r in resultados[:4]] == [3, 6, 4, 1]
+    assert [r["puntaje"] for r in resultados[:4]] == [1.0] * 4
+    # "Mario" y "Martínez" solo comparten trigramas: entran por el umbral, detrás y por parecido
+    assert [r["id"] for r in resultados[4:]] == [2, 5]
+    assert 1.0 > resultados[4]["puntaje"] > resultados[5]["puntaje"]
+
+
+def test_buscar_autocompleta_la_ultima_palabra(indice):
+    assert indice.buscar("ana mar")[0] == {"id": 5, "nombre": "Ana Martínez", "puntaje": 1.0}
+    assert indice.buscar("Nuñ", limite=1) == [{"id": 4, "nombre": "José María Núñez", "puntaje": 1.0}]
+
+
+def test_buscar_respeta_el_limite_y_el_umbral(indice):
+    assert len(indice.buscar("mar", limite=2)) == 2
+    assert indice.buscar("xyz") == []
+
+
+def test_invalidar_recarga_una_vez_en_la_siguiente_busqueda():
+    indice = IndiceDocentes(ttl=3600)
+    base = BaseFalsa(DOCENTES)
+    indice.asegurar(base)
+    indice.asegurar(base)
+    assert base.lecturas == 1
+
+    base.filas = DOCENTES + [(7, "Mariela Díaz")]
+    for _ in range(3):
+        indice.invalidar()
+    assert indice.resolver("mariela") == []
+    indice.asegurar(base)
+    indice.asegurar(base)
+    assert base.lecturas == 2
+    assert indice.resolver("mariela") == [7]
+
+
+def test_invalidar_durante_una_recarga_deja_el_indice_marcado():
+    indice = IndiceDocentes(ttl=3600)
+
+    class BaseQueCambia(BaseFalsa):
+        def execute(self, consulta):
+            resultado = super().execute(consulta)
+            # Un alta llega después de leer la tabla y antes de instalar el índice
+            indice.invalidar()
+            return resultado
+
+    base = BaseQueCambia(DOCENTES)
+    indice.asegurar(base)
+    assert indice.necesita_recarga()
+    assert indice.resolver("maria") == [1, 3, 4, 6]
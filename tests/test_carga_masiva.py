@@ -0,0 +1,106 @@
+import asyncio
+
+import pytest
+
+from carga_masiva import detectar_formato, leer_filas
+
+ENCABEZADO = "id_estudiante,id_docente,id_asignatura,comentario,promedio\n"
+
+
+class PeticionFalsa:
+    """Imita Request.stream() entregando el cuerpo en los bloques dados."""
+
+    def __init__(self, *bloques):
+        self.bloques = [b.encode("utf-8") if isinstance(b, str) else b for b in bloques]
+
+    async def stream(self):
+        for bloque in self.bloques:
+            yield bloque
+
+
+def filas(formato, *bloques):
+    async def leer():
+        return [fila async for fila in leer_filas(PeticionFalsa(*bloques), formato)]
+    return asyncio.run(leer())
+
+
+def en_bloques(cuerpo: bytes, largo: int):
+    return [cuerpo[i:i + largo] for i in range(0, len(cuerpo), largo)]
+
+
+def test_detectar_formato():
+    assert detectar_formato("text/csv; charset=utf-8") == "csv"
+    assert detectar_formato("application/x-ndjson") == "ndjson"
+    assert detectar_formato(None) == "ndjson"
+    assert detectar_formato("text/csv", "NDJSON") == "ndjson"
+
+
+# ---- NDJSON ----
+
+def test_ndjson_linea_partida_entre_bloques():
+    resultado = filas("ndjson", '{"comentario": "muy bu', 'eno", "promedio": 5}\n{"comentario": "x"}')
+    assert resultado == [
+        (1, {"comentario": "muy bueno", "promedio": 5}, None),
+        (2, {"comentario": "x"}, None),
+    ]
+
+
+def test_ndjson_caracter_multibyte_partido_y_bom():
+    cuerpo = '﻿{"comentario": "explicó bien"}\r\n'.encode("utf-8")
+    # Bloques de un byte: parten el BOM y la "ó"
+    assert filas("ndjson", *en_bloques(cuerpo, 1)) == [(1, {"comentario": "explicó bien"}, None)]
+
+
+def test_ndjson_fila_mala_en_medio_no_corta_la_carga():
+    resultado = filas("ndjson", '{"id": 1}\n', "\n", "{roto\n", "[1, 2]\n", '{"id": 4}\n')
+    assert [(numero, datos) for numero, datos, _ in resultado] == [(1, {"id": 1}), (2, None), (3, None), (4, {"id": 4})]
+    assert resultado[1][2].startswith("JSON inválido")
+    assert resultado[2][2] == "Cada línea debe ser un objeto JSON"
+
+
+# ---- CSV ----
+
+def test_csv_campo_con_salto_de_linea_partido_entre_bloques():
+    resultado = filas(
+        "csv",
+        ENCABEZADO + '1,2,3,"primera línea',
+        '\nsegunda ""línea"""',
+        ",4\n5,6,7,otro,3\n",
+    )
+    assert resultado == [
+        (1, {"id_estudiante": "1", "id_docente": "2", "id_asignatura": "3",
+             "comentario": 'primera línea\nsegunda "línea"', "promedio": "4"}, None),
+        (2, {"id_estudiante": "5", "id_docente": "6", "id_asignatura": "7", "comentario": "otro", "promedio": "3"},
+         None),
+    ]
+
+
+@pytest.mark.parametrize("largo", [1, 3, 7, 64])
+def test_csv_con_bom_y_crlf_en_cualquier_particion(largo):
+    cuerpo = ("﻿" + ENCABEZADO.replace("\n", "\r\n") + '1,2,3,"a,\r\nb",5\r\n9,8,7,,4').encode("utf-8")
+    resultado = filas("csv", *en_bloques(cuerpo, largo))
+    assert [datos["comentario"] for _, datos, _ in resultado] == ["a,\nb", None]
+    assert resultado[1][1]["id_estudiante"] == "9"
+
+
+def test_csv_fila_mala_en_medio_no_corta_la_carga():
+    resultado = filas("csv", ENCABEZADO, "1,2,3,bien,5\n", "1,2,faltan\n", "\n", "4,5,6,también,4\n")
+    assert [(numero, error) for numero, _, error in resultado] == [
+        (1, None), (2, "Se esperaban 5 columnas y llegaron 3"), (3, None),
+    ]
+    assert resultado[2][1]["comentario"] == "también"
+
+
+def test_csv_sin_columnas_obligatorias():
+    with pytest.raises(ValueError, match="comentario, promedio"):
+        filas("csv", "id_estudiante,id_docente,id_asignatura\n1,2,3\n")
+
+
+def test_csv_comillas_sin_cerrar_al_final():
+    resultado = filas("csv", ENCABEZADO, '1,2,3,"nunca se cierra\n', "4,5,6,x,3\n")
+    assert resultado == [(1, None, "Campo entre comillas sin cerrar al final del archivo")]
+
+
+def test_formato_desconocido():
+    with pytest.raises(ValueError, match="Formato no soportado"):
+        filas("xml", "<a/>")
@@ -0,0 +1,177 @@
+from types import SimpleNamespace
+
+import pytest
+
+from chat import cliente
+from chat.cliente import CircuitBreaker, CircuitoAbierto, ClienteLLM, ErrorLLM
+
+
+class Reloj:
+    """Reemplaza time en chat.cliente: sleep avanza el reloj sin esperar."""
+
+    def __init__(self):
+        self.ahora = 1000.0
+
+    def monotonic(self):
+        return self.ahora
+
+    def sleep(self, segundos):
+        self.ahora += segundos
+
+
+class ErrorHTTP(Exception):
+
+    def __init__(self, status_code):
+        super().__init__(f"HTTP {status_code}")
+        self.status_code = status_code
+
+
+class ModeloFalso:
+    """Imita client.chat.completions.create con una lista de respuestas (texto o excepción)."""
+
+    def __init__(self, *respuestas):
+        self.respuestas = list(respuestas)
+        self.llamadas = 0
+        self.chat = SimpleNamespace(completions=SimpleNamespace(create=self.create))
+
+    def create(self, **parametros):
+        self.llamadas += 1
+        respuesta = self.respuestas.pop(0)
+        if isinstance(respuesta, Exception):
+            raise respuesta
+        return SimpleNamespace(choices=[SimpleNamespace(message=SimpleNamespace(content=respuesta))])
+
+
+@pytest.fixture
+def reloj(monkeypatch):
+    reloj = Reloj()
+    monkeypatch.setattr(cliente, "time", reloj)
+    # Jitter en el techo: la espera de cada reintento es determinista
+    monkeypatch.setattr(cliente.random, "uniform", lambda minimo, maximo: maximo)
+    return reloj
+
+
+def nuevo_circuito():
+    return CircuitBreaker(umbral=0.5, min_intentos=4, ventana=30, enfriamiento=10)
+
+
+def test_circuito_se_abre_al_llegar_al_umbral(reloj):
+    circuito = nuevo_circuito()
+    for ok in (True, False, False):
+        circuito.registrar(ok)
+    assert circuito.estado == "cerrado"
+
+    circuito.registrar(False)  # 3 errores de 4 intentos
+    assert circuito.estado == "abierto"
+    with pytest.raises(CircuitoAbierto) as error:
+        circuito.permitir()
+    assert error.value.reintentar_en == 10
+
+
+def test_circuito_no_se_abre_sin_el_minimo_de_intentos(reloj):
+    circuito = nuevo_circuito()
+    for _ in range(3):
+        circuito.registrar(False)
+    assert circuito.estado == "cerrado"
+    circuito.permitir()
+
+
+def test_errores_fuera_de_la_ventana_no_cuentan(reloj):
+    circuito = nuevo_circuito()
+    for _ in range(3):
+        circuito.registrar(False)
+    reloj.ahora += 31
+    circuito.registrar(False)
+    assert circuito.estado == "cerrado"
+    assert circuito.estadisticas()["intentos_en_ventana"] == 1
+
+
+def test_semiabierto_deja_pasar_un_solo_intento_y_se_cierra_si_sale_bien(reloj):
+    circuito = nuevo_circuito()
+    for _ in range(4):
+        circuito.registrar(False)
+    reloj.ahora += 4
+    assert circuito.segundos_para_reintento() == 6
+
+    reloj.ahora += 6
+    assert circuito.estado == "semiabierto"
+    circuito.permitir()
+    with pytest.raises(CircuitoAbierto) as error:
+        circuito.permitir()
+    assert error.value.reintentar_en == 0
+
+    circuito.registrar(True)
+    assert circuito.estado == "cerrado"
+    circuito.permitir()
+
+
+def test_semiabierto_vuelve_a_abrirse_si_la_prueba_falla(reloj):
+    circuito = nuevo_circuito()
+    for _ in range(4):
+        circuito.registrar(False)
+    reloj.ahora += 10
+    circuito.permitir()
+    circuito.registrar(False)
+    assert circuito.estado == "abierto"
+    assert circuito.aperturas == 2
+    assert circuito.segundos_para_reintento() == 10
+
+
+def test_reintenta_errores_transitorios_con_backoff(reloj):
+    modelo = ModeloFalso(ErrorHTTP(503), ErrorHTTP(429), "positivo")
+    llm = ClienteLLM(reintentos=2, plazo=25, circuito=nuevo_circuito(), cliente=modelo)
+
+    assert llm.completar([], max_tokens=5) == "positivo"
+    assert modelo.llamadas == 3
+    # Backoff exponencial desde LLM_BACKOFF_BASE_MS: 250 ms y 500 ms
+    assert reloj.ahora - 1000.0 == pytest.approx(0.75)
+    contadores = llm.estadisticas()["contadores"]
+    assert contadores["reintentos"] == 2
+    assert contadores["exitosas"] == 1
+
+
+def test_error_no_recuperable_no_se_reintenta_ni_abre_el_circuito(reloj):
+    circuito = nuevo_circuito()
+    modelo = ModeloFalso(*[ErrorHTTP(400)] * 5)
+    llm = ClienteLLM(reintentos=2, circuito=circuito, cliente=modelo)
+
+    for _ in range(5):
+        with pytest.raises(ErrorLLM):
+            llm.completar([], max_tokens=5)
+    assert modelo.llamadas == 5
+    assert circuito.estado == "cerrado"
+
+
+def test_los_reintentos_se_cortan_cuando_el_circuito_se_abre(reloj):
+    circuito = nuevo_circuito()
+    modelo = ModeloFalso(*[ErrorHTTP(503)] * 6)
+    llm = ClienteLLM(reintentos=5, plazo=25, circuito=circuito, cliente=modelo)
+
+    with pytest.raises(CircuitoAbierto):
+        llm.completar([], max_tokens=5)
+    # El cuarto error abre el circuito: el quinto intento ya no se envía
+    assert modelo.llamadas == 4
+    assert circuito.estado == "abierto"
+
+
+def test_circuito_abierto_falla_sin_llamar_al_modelo(reloj):
+    circuito = nuevo_circuito()
+    for _ in range(4):
+        circuito.registrar(False)
+    modelo = ModeloFalso("positivo")
+    llm = ClienteLLM(circuito=circuito, cliente=modelo)
+
+    with pytest.raises(CircuitoAbierto) as error:
+        llm.completar([], max_tokens=5)
+    assert error.value.reintentar_en == 10
+    assert modelo.llamadas == 0
+    assert llm.estadisticas()["contadores"]["rechazadas_circuito"] == 1
+
+
+def test_no_reintenta_si_la_espera_pasa_del_plazo(reloj):
+    modelo = ModeloFalso(ErrorHTTP(503), "positivo")
+    llm = ClienteLLM(reintentos=2, plazo=0.1, circuito=nuevo_circuito(), cliente=modelo)
+
+    with pytest.raises(ErrorLLM):
+        llm.completar([], max_tokens=5)
+    assert modelo.llamadas == 1
@@ -0,0 +1,76 @@
+import asyncio
+
+import pytest
+
+import contrasenas
+
+# Costo mínimo de bcrypt: las pruebas no necesitan un hash lento
+ROUNDS = 4
+
+
+@pytest.fixture(autouse=True)
+def costo_bajo(monkeypatch):
+    monkeypatch.setattr(contrasenas, "BCRYPT_ROUNDS", ROUNDS)
+
+
+def test_hash_y_verificacion():
+    guardada = contrasenas.hashear("secreta")
+    assert contrasenas.es_hash(guardada)
+    assert guardada != "secreta"
+    assert contrasenas.verificar("secreta", guardada)
+    assert not contrasenas.verificar("Secreta", guardada)
+    assert not contrasenas.necesita_rehash(guardada)
+
+
+def test_texto_plano_antiguo_se_acepta_y_pide_rehash():
+    assert contrasenas.verificar("secreta", "secreta")
+    assert contrasenas.verificar("contraseña", "contraseña")
+    assert not contrasenas.verificar("secreta", "otra")
+    assert not contrasenas.verificar("secret", "secreta")
+    assert contrasenas.necesita_rehash("secreta")
+
+
+def test_sin_contrasena_guardada_no_verifica():
+    assert not contrasenas.verificar("", "")
+    assert not contrasenas.verificar("secreta", None)
+
+
+@pytest.mark.parametrize("prefijo", ["$2a$", "$2y$"])
+def test_acepta_otras_variantes_de_bcrypt(prefijo):
+    guardada = prefijo + contrasenas.hashear("secreta")[4:]
+    assert contrasenas.verificar("secreta", guardada)
+
+
+def test_cambio_de_costo_pide_rehash(monkeypatch):
+    guardada = contrasenas.hashear("secreta")
+    monkeypatch.setattr(contrasenas, "BCRYPT_ROUNDS", ROUNDS + 1)
+    assert contrasenas.necesita_rehash(guardada)
+    # El hash anterior sigue siendo válido hasta que el login lo reemplaza
+    assert contrasenas.verificar("secreta", guardada)
+    nuevo = contrasenas.hashear("secreta")
+    assert nuevo.startswith(f"$2b${ROUNDS + 1:02d}$")
+    assert not contrasenas.necesita_rehash(nuevo)
+
+
+def test_limite_de_72_bytes():
+    base = "x" * 72
+    guardada = contrasenas.hashear(base + "sobra")
+    # bcrypt solo usa los primeros 72 bytes: se trunca en vez de fallar
+    assert contrasenas.verificar(base, guardada)
+    assert contrasenas.verificar(base + "otra cosa", guardada)
+    assert not contrasenas.verificar("x" * 71, guardada)
+
+
+def test_limite_de_72_bytes_con_caracteres_multibyte():
+    # 36 "ñ" son 72 bytes en UTF-8: la 37 queda fuera
+    guardada = contrasenas.hashear("ñ" * 40)
+    assert contrasenas.verificar("ñ" * 36, guardada)
+    assert not contrasenas.verificar("ñ" * 35, guardada)
+
+
+def test_versiones_async():
+    async def probar():
+        guardada = await contrasenas.hashear_async("secreta")
+        return await contrasenas.verificar_async("secreta", guardada), await contrasenas.verificar_async("x", guardada)
+
+    assert asyncio.run(probar()) == (True, False)
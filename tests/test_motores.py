@@ -0,0 +1,121 @@
+import pytest
+
+from chat.cliente import CircuitoAbierto
+from chat.motores import MotorHibrido, MotorLocal, MotorSentimiento, ResultadoSentimiento, crear_motor
+
+
+class MotorFijo(MotorSentimiento):
+    """Devuelve resultados preparados por texto y guarda lo que se le pidió."""
+
+    nombre = "fijo"
+
+    def __init__(self, resultados=None, error=None):
+        self.resultados = resultados or {}
+        self.error = error
+        self.pedidos = []
+
+    def clasificar_lote(self, comentarios):
+        self.pedidos.append([texto for texto, _ in comentarios])
+        if self.error is not None:
+            raise self.error
+        return [self.resultados.get(texto, ResultadoSentimiento(None, None, "llm")) for texto, _ in comentarios]
+
+
+def local(sentimiento, confianza):
+    return ResultadoSentimiento(sentimiento, confianza, "local")
+
+
+def llm(sentimiento):
+    return ResultadoSentimiento(sentimiento, None, "llm")
+
+
+# ---- MotorLocal ----
+
+@pytest.mark.parametrize("texto, promedio, esperado", [
+    ("Excelente profesor, muy claro y paciente", 5, "positivo"),
+    ("Pésimo, aburrido y confuso", 1, "negativo"),
+    ("PÉSIMO, ABURRIDO Y CONFUSO", 4, "negativo"),
+    ("Es bueno pero podría mejorar", 3, "neutral"),
+])
+def test_local_comentarios_claros_con_confianza_alta(texto, promedio, esperado):
+    resultado = MotorLocal().clasificar(texto, promedio)
+    assert resultado.sentimiento == esperado
+    assert resultado.confianza > 0.9
+    assert resultado.origen == "local"
+
+
+def test_local_la_negacion_invierte_el_sentido():
+    afirmado = MotorLocal().clasificar("es bueno", 3)
+    negado = MotorLocal().clasificar("no es bueno", 3)
+    assert afirmado.sentimiento == "positivo"
+    assert negado.sentimiento == "negativo"
+
+
+def test_local_sin_evidencia_sigue_al_promedio_con_poca_confianza():
+    motor = MotorLocal()
+    assert motor.clasificar("La clase", 3).sentimiento == "neutral"
+    positivo = motor.clasificar("La clase", 5)
+    assert positivo.sentimiento == "positivo"
+    assert 1 / 3 < positivo.confianza < 0.75
+
+
+def test_local_comentario_vacio_sin_etiqueta():
+    resultados = MotorLocal().clasificar_lote([("", 5), ("   ", 1), ("Excelente", 5)])
+    assert [r.sentimiento for r in resultados] == [None, None, "positivo"]
+
+
+def test_local_confianza_es_una_probabilidad():
+    resultados = MotorLocal().clasificar_lote([(f"comentario {i} bueno malo", i % 5 + 1) for i in range(20)])
+    assert all(1 / 3 <= r.confianza <= 1 for r in resultados)
+
+
+# ---- MotorHibrido ----
+
+def test_hibrido_solo_escala_los_dudosos():
+    locales = MotorFijo({"claro": local("positivo", 0.95), "dudoso": local("neutral", 0.5),
+                         "vacio": local(None, 0.4), "limite": local("negativo", 0.75)})
+    remoto = MotorFijo({"dudoso": llm("negativo")})
+    motor = MotorHibrido(umbral=0.75, local=locales, remoto=remoto)
+
+    resultados = motor.clasificar_lote([("claro", 5), ("dudoso", 3), ("vacio", 1), ("limite", 2)])
+    # Ni los vacíos ni los que llegan justo al umbral pasan por el modelo
+    assert remoto.pedidos == [["dudoso"]]
+    assert resultados == [local("positivo", 0.95), llm("negativo"), local(None, 0.4), local("negativo", 0.75)]
+
+
+def test_hibrido_sin_dudosos_no_llama_al_modelo():
+    remoto = MotorFijo()
+    motor = MotorHibrido(umbral=0.75, local=MotorFijo({"a": local("positivo", 0.9)}), remoto=remoto)
+    assert motor.clasificar_lote([("a", 5)]) == [local("positivo", 0.9)]
+    assert remoto.pedidos == []
+
+
+def test_hibrido_conserva_la_local_si_el_modelo_no_decide():
+    locales = MotorFijo({"a": local("neutral", 0.4), "b": local("positivo", 0.6)})
+    motor = MotorHibrido(umbral=0.75, local=locales, remoto=MotorFijo({"b": llm("negativo")}))
+
+    resultados = motor.clasificar_lote([("a", 3), ("b", 4)])
+    assert resultados == [local("neutral", 0.4), llm("negativo")]
+    assert not motor.definitivo(resultados[0])
+    assert motor.definitivo(resultados[1])
+
+
+def test_hibrido_con_el_circuito_abierto_devuelve_las_locales():
+    locales = MotorFijo({"a": local("neutral", 0.4), "b": local("positivo", 0.9)})
+    motor = MotorHibrido(umbral=0.75, local=locales, remoto=MotorFijo(error=CircuitoAbierto(5)))
+
+    resultados = motor.clasificar_lote([("a", 3), ("b", 5)])
+    assert resultados == [local("neutral", 0.4), local("positivo", 0.9)]
+    assert [motor.definitivo(r) for r in resultados] == [False, True]
+
+
+def test_definitivo_en_los_demas_motores():
+    motor = MotorLocal()
+    assert motor.definitivo(local("neutral", 0.4))
+    assert not motor.definitivo(local(None, 0.4))
+
+
+def test_crear_motor():
+    assert isinstance(crear_motor("hibrido"), MotorHibrido)
+    with pytest.raises(ValueError):
+        crear_motor("otro")
@@ -0,0 +1,130 @@
+import base64
+from datetime import datetime
+
+import pytest
+from fastapi import HTTPException
+from sqlalchemy import Column, DateTime, Integer, MetaData, String, Table, bindparam, create_engine
+
+import crud
+import paginacion
+
+
+def cursor_crudo(texto: str) -> str:
+    return base64.urlsafe_b64encode(texto.encode("utf-8")).decode("ascii").rstrip("=")
+
+
+@pytest.mark.parametrize("posicion", [
+    {"id": 1},
+    {"id": 2 ** 40},
+    {"fecha": "2024-03-01T10:00:00", "id": 17},
+    {"id": 5, "nombre": "María Ñúñez"},
+])
+def test_cursor_ida_y_vuelta(posicion):
+    cursor = paginacion.codificar_cursor(posicion)
+    assert "=" not in cursor
+    assert paginacion.decodificar_cursor(cursor, *posicion) == posicion
+
+
+def test_sin_cursor_es_la_primera_pagina():
+    assert paginacion.decodificar_cursor(None, "id") is None
+    assert paginacion.decodificar_cursor("", "id") is None
+
+
+@pytest.mark.parametrize("cursor", [
+    "!!!",
+    "ñandú",
+    "a",
+    cursor_crudo("no es json"),
+    cursor_crudo("[1, 2]"),
+    cursor_crudo('"id"'),
+    cursor_crudo('{"otro": 1}'),
+    cursor_crudo('{"id": [1, 2]}'),
+    cursor_crudo('{"id": {"$gt": 0}}'),
+    cursor_crudo('{"id": null}'),
+    cursor_crudo('{"id": true}'),
+    base64.urlsafe_b64encode(b"\xff\xfe{").decode("ascii"),
+])
+def test_cursor_invalido_es_400(cursor):
+    with pytest.raises(HTTPException) as error:
+        paginacion.decodificar_cursor(cursor, "id")
+    assert error.value.status_code == 400
+
+
+def test_cursor_de_comentarios_con_fecha_alterada_es_400():
+    cursor = paginacion.codificar_cursor({"fecha": "ayer", "id": 3})
+    with pytest.raises(HTTPException) as error:
+        crud._consulta_comentarios_docente([1], 10, cursor)
+    assert error.value.status_code == 400
+
+
+def test_pagina_pide_una_fila_de_mas():
+    consulta, params = paginacion.consulta("SELECT id FROM t", ["id > :despues"], "id", {"despues": 4}, 10)
+    assert str(consulta) == "SELECT id FROM t WHERE id > :despues ORDER BY id LIMIT :limite"
+    assert params == {"despues": 4, "limite": 11}
+
+
+def test_pagina_solo_da_cursor_si_hay_mas_filas():
+    formatear = lambda filas: list(filas)  # noqa: E731
+    posicion = lambda fila: {"id": fila}  # noqa: E731
+
+    ultima = paginacion.pagina([1, 2, 3], 3, posicion, formatear)
+    assert ultima == {"items": [1, 2, 3], "next_cursor": None, "limit": 3}
+
+    intermedia = paginacion.pagina([1, 2, 3, 4], 3, posicion, formatear)
+    assert intermedia["items"] == [1, 2, 3]
+    assert paginacion.decodificar_cursor(intermedia["next_cursor"], "id") == {"id": 3}
+
+
+@pytest.fixture
+def comentarios():
+    """SQLite con las columnas que usa SELECT_COMENTARIOS_POR_DOCENTE; varias filas comparten fecha."""
+    engine = create_engine("sqlite://")
+    metadata = MetaData()
+    asignaturas = Table(
+        "Asignaturas", metadata,
+        Column("id_asignatura", Integer, primary_key=True), Column("nombre_asignatura", String),
+    )
+    tabla = Table(
+        "Comentarios", metadata,
+        Column("id_comentario", Integer, primary_key=True), Column("id_docente", Integer),
+        Column("id_asignatura", Integer), Column("comentario", String),
+        Column("fecha_creacion", DateTime), Column("sentimiento", String),
+    )
+    metadata.create_all(engine)
+    fechas = [datetime(2024, 3, 1, 10), datetime(2024, 3, 1, 10), datetime(2024, 3, 2, 9)]
+    with engine.begin() as conexion:
+        conexion.execute(asignaturas.insert(), [{"id_asignatura": 1, "nombre_asignatura": "Cálculo"}])
+        conexion.execute(tabla.insert(), [
+            {"id_comentario": i, "id_docente": 7 if i % 4 else 8, "id_asignatura": 1,
+             "comentario": f"c{i}", "fecha_creacion": fechas[i % 3], "sentimiento": "neutral"}
+            for i in range(1, 21)
+        ])
+    return engine
+
+
+def recorrer(engine, limite):
+    ids, cursor, paginas = [], None, 0
+    with engine.connect() as conexion:
+        while True:
+            consulta, params = crud._consulta_comentarios_docente([7], limite, cursor)
+            # SQLite guarda las fechas como texto: se declaran los tipos para comparar y leer datetime
+            consulta = consulta.bindparams(bindparam("fecha", type_=DateTime)) if "fecha" in params else consulta
+            consulta = consulta.columns(fecha_creacion=DateTime)
+            pagina = crud._pagina_comentarios_docente(conexion.execute(consulta, params).fetchall(), limite)
+            ids.extend(item["id_comentario"] for item in pagina["items"])
+            paginas += 1
+            cursor = pagina["next_cursor"]
+            if cursor is None:
+                return ids, paginas
+
+
+@pytest.mark.parametrize("limite", [1, 2, 3, 7, 50])
+def test_recorrido_con_fechas_repetidas_no_repite_ni_salta(comentarios, limite):
+    ids, paginas = recorrer(comentarios, limite)
+
+    # Más reciente primero; a igual fecha decide id_comentario, también descendente
+    del_docente = [i for i in range(20, 0, -1) if i % 4]
+    esperados = [i for i in del_docente if i % 3 == 2] + [i for i in del_docente if i % 3 != 2]
+    assert ids == esperados
+    # La fila de más evita una última página vacía
+    assert paginas == -(-len(esperados) // limite)
@@ -0,0 +1,28 @@
+import os
+
+# main.py lee DB_MODO al importarse: sin esto las rutas de rutas_async.py no se registran
+os.environ["DB_MODO"] = "async"
+os.environ.setdefault("DATABASE_URL", "mysql://u:p@127.0.0.1:9/x")
+
+import pytest
+from fastapi.testclient import TestClient
+
+import auth
+import main
+
+
+@pytest.fixture
+def cliente():
+    main.app.dependency_overrides[auth.GESTION.dependency] = lambda: {"rol": "Administrador"}
+    try:
+        yield TestClient(main.app)
+    finally:
+        main.app.dependency_overrides.clear()
+
+
+def test_exportar_no_se_toma_como_id_de_comentario(cliente):
+    # Un formato inválido se rechaza antes de tocar la base: 400 de la exportación, no 422 de {id_comentario}
+    respuesta = cliente.get("/comentarios/exportar", params={"formato": "xml"})
+    assert respuesta.status_code == 400
+    assert "Formato no soportado" in respuesta.json()["detail"]
+
@@ -1,9 +1,75 @@
-from passlib.context import CryptContext
+from collections import OrderedDict
+import threading
+import time
 
-# pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+# El hash de contraseñas está en contrasenas.py
 
-# def verify_password(plain_password, hashed_password):
-#     return pwd_context.verify(plain_password, hashed_password)
 
-# def hash_password(password):
-#     return pwd_context.hash(password)
+class CacheLRU:
+    """Cache en memoria acotada: descarta la entrada menos usada y expira por TTL.
+
+    Es segura entre hilos y lleva contadores de aciertos, fallos, desalojos
+    y expiraciones para poder medir cuánto trabajo ahorra.
+    """
+
+    def __init__(self, max_entradas: int = 1024, ttl: float = 300):
+        self.max_entradas = max_entradas
+        self.ttl = ttl
+        self._datos = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expiraciones = 0
+
+    def get(self, clave, default=None):
+        ahora = time.monotonic()
+        with self._lock:
+            entrada = self._datos.get(clave)
+            if entrada is None:
+                self.misses += 1
+                return default
+
+            valor, expira = entrada
+            if expira <= ahora:
+                del self._datos[clave]
+                self.expiraciones += 1
+                self.misses += 1
+                return default
+
+            self._datos.move_to_end(clave)
+            self.hits += 1
+            return valor
+
+    def set(self, clave, valor, ttl: float = None):
+        expira = time.monotonic() + (self.ttl if ttl is None else ttl)
+        with self._lock:
+            self._datos[clave] = (valor, expira)
+            self._datos.move_to_end(clave)
+            while len(self._datos) > self.max_entradas:
+                self._datos.popitem(last=False)
+                self.evictions += 1
+
+    def invalidar(self, clave):
+        with self._lock:
+            self._datos.pop(clave, None)
+
+    def limpiar(self):
+        with self._lock:
+            self._datos.clear()
+
+    def __len__(self):
+        return len(self._datos)
+
+    def estadisticas(self) -> dict:
+        with self._lock:
+            consultas = self.hits + self.misses
+            return {
+                "entradas": len(self._datos),
+                "max_entradas": self.max_entradas,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "expiraciones": self.expiraciones,
+                "hit_ratio": round(self.hits / consultas, 4) if consultas else 0.0,
+            }